@@ -0,0 +1,37 @@
+"""
+Routine load per step: every routine on every step, aligned cadences, and staggered cadences.
+Run from the repository root with: python -m benchmarks.cadence_benchmark
+"""
+from typing import List
+
+from helpers.cadence import CadenceScheduler, Routine
+
+GAME_STEP: int = 8
+STEPS: int = 400
+# Cadences of the TerranBot routines, in game loops.
+CADENCES: List[int] = [11, 1, 11, 22, 22, 1, 44, 44, 44, 22, 44, 11, 1, 1, 22, 1, 22, 22, 1, 1, 1, 22]
+
+
+def noop():
+    pass
+
+
+def calls_per_step(scheduler: CadenceScheduler) -> List[int]:
+    return [len(scheduler.due(step * GAME_STEP)) for step in range(STEPS)]
+
+
+def main():
+    every_step = CadenceScheduler([Routine(noop) for _ in CADENCES])
+    aligned = CadenceScheduler([Routine(noop, cadence, offset=0) for cadence in CADENCES])
+    staggered = CadenceScheduler([Routine(noop, cadence) for cadence in CADENCES])
+
+    print("{:<12} {:>10} {:>10} {:>10}".format("schedule", "mean", "max", "skipped"))
+    for name, scheduler in (("every step", every_step), ("aligned", aligned), ("staggered", staggered)):
+        # The first step runs everything, leave it out.
+        counts = calls_per_step(scheduler)[1:]
+        print("{:<12} {:>10.2f} {:>10} {:>10}".format(
+            name, sum(counts) / len(counts), max(counts), scheduler.report()["skipped"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Commands sent by TerranBot on the synthetic game with different deduplication windows.
+Run from the repository root with: python -m benchmarks.command_benchmark
+"""
+from sc2.data import Race
+from typing import List
+
+import asyncio
+import random
+
+from bots.terran_bot import TerranBot
+from tests.fakes import SyntheticGame, synthetic_bot
+
+STEPS: int = 200
+# 0 turns the deduplication off.
+WINDOWS: List[int] = [0, 1, 11, 22, 44]
+
+
+async def run(window: int):
+    random.seed(0)
+    bot = synthetic_bot(TerranBot, command_window=window)
+    game = SyntheticGame(bot, Race.Terran, own_units=200, enemies=100, seed=0)
+    await game.start()
+    actions = 0
+    for _ in range(STEPS):
+        actions += len(await game.step())
+    return actions, bot
+
+
+def main():
+    print("{:>8} {:>14} {:>12} {:>12}".format("window", "actions/step", "sent", "suppressed"))
+    for window in WINDOWS:
+        actions, bot = asyncio.run(run(window))
+        commands = bot.command_filter
+        print("{:>8} {:>14.1f} {:>12} {:>12}".format(window, actions / STEPS, commands.sent, commands.suppressed))
+
+
+if __name__ == "__main__":
+    main()
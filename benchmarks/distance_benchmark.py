@@ -0,0 +1,63 @@
+"""
+Bulk unit-to-unit distance queries: one scalar distance per pair, versus the vectorized distance engine.
+Run from the repository root with: python -m benchmarks.distance_benchmark
+"""
+from collections import namedtuple
+from timeit import default_timer
+from typing import List
+
+import math
+import random
+
+from helpers.distance_engine import DistanceEngine
+
+Positioned = namedtuple("Positioned", ["tag", "position"])
+
+UNIT_COUNTS: List[int] = [10, 50, 100, 200, 500]
+REPEATS: int = 50
+
+
+def distance(a, b) -> float:
+    return math.hypot(a.position[0] - b.position[0], a.position[1] - b.position[1])
+
+
+def scalar_closest(units, enemies) -> List[int]:
+    return [min(range(len(enemies)), key=lambda index: distance(unit, enemies[index])) for unit in units]
+
+
+def scalar_any_within(units, enemies, radius: float) -> List[bool]:
+    return [any(distance(unit, enemy) < radius for enemy in enemies) for unit in units]
+
+
+def random_units(count: int, center, spread: float, rng: random.Random) -> List[Positioned]:
+    return [
+        Positioned(index, (center[0] + rng.uniform(-spread, spread), center[1] + rng.uniform(-spread, spread)))
+        for index in range(count)
+    ]
+
+
+def main():
+    rng = random.Random(0)
+    engine = DistanceEngine()
+
+    print("{:>8} {:>16} {:>16} {:>16} {:>16}".format(
+        "units", "closest py us", "closest np us", "within py us", "within np us"))
+    for count in UNIT_COUNTS:
+        units = random_units(count, (60, 60), 40, rng)
+        enemies = random_units(count, (90, 90), 40, rng)
+        timings = []
+        for function in (
+            lambda: scalar_closest(units, enemies),
+            lambda: engine.closest_indexes(units, enemies),
+            lambda: scalar_any_within(units, enemies, 15),
+            lambda: engine.any_within(units, enemies, 15),
+        ):
+            start = default_timer()
+            for _ in range(REPEATS):
+                function()
+            timings.append((default_timer() - start) / REPEATS * 1e6)
+        print("{:>8} {:>16.1f} {:>16.1f} {:>16.1f} {:>16.1f}".format(count, *timings))
+
+
+if __name__ == "__main__":
+    main()
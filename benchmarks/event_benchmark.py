@@ -0,0 +1,60 @@
+"""
+Global event dispatch: every handler checking the unit type itself, versus the type-indexed event bus.
+Run from the repository root with: python -m benchmarks.event_benchmark
+"""
+from collections import namedtuple
+from timeit import default_timer
+from typing import List
+
+import random
+
+from sc2.data import Alliance
+from sc2.ids.unit_typeid import UnitTypeId
+
+from events.event_bus import EventBus
+from events.passive_event import PassiveEvent
+from helpers.enum import EventTypes
+
+FakeUnit = namedtuple("FakeUnit", ["tag", "type_id", "alliance"])
+
+HANDLER_COUNTS: List[int] = [1, 10, 50]
+UNITS: int = 2000
+TYPES = [UnitTypeId.SCV, UnitTypeId.MARINE, UnitTypeId.SUPPLYDEPOT, UnitTypeId.BARRACKS, UnitTypeId.ENGINEERINGBAY,
+         UnitTypeId.FACTORY, UnitTypeId.STARPORT, UnitTypeId.MARAUDER, UnitTypeId.HELLION, UnitTypeId.SIEGETANK]
+
+
+def main():
+    rng = random.Random(0)
+    units = [FakeUnit(tag, rng.choice(TYPES), Alliance.Self) for tag in range(UNITS)]
+
+    print("{:>9} {:>14} {:>14}".format("handlers", "list us", "indexed us"))
+    for count in HANDLER_COUNTS:
+        handled = [0]
+        handler_types = [TYPES[index % len(TYPES)] for index in range(count)]
+
+        def checking_handler(type_id):
+            def handler(bot, unit):
+                if unit.type_id == type_id:
+                    handled[0] += 1
+            return handler
+
+        handlers = [PassiveEvent(checking_handler(type_id), EventTypes.NEW_UNIT) for type_id in handler_types]
+        start = default_timer()
+        for unit in units:
+            for event in handlers:
+                event.trigger_event(None, unit)
+        listed = (default_timer() - start) / UNITS * 1e6
+
+        bus = EventBus()
+        for type_id in handler_types:
+            bus.subscribe(PassiveEvent(lambda bot, unit: handled.__setitem__(0, handled[0] + 1), EventTypes.NEW_UNIT,
+                                       unit_types={type_id}))
+        start = default_timer()
+        for unit in units:
+            bus.dispatch(None, EventTypes.NEW_UNIT, unit, unit_type=unit.type_id, alliance=unit.alliance)
+        indexed = (default_timer() - start) / UNITS * 1e6
+        print("{:>9} {:>14.2f} {:>14.2f}".format(count, listed, indexed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Speed of the local stand-in game (see helpers.local_server): game loops per second of its world alone, and of whole
+run_game loops with our bots against it, and the replay of a game recorded against it.
+Run from the repository root with: python -m benchmarks.local_server_benchmark --seconds 300
+"""
+from timeit import default_timer
+
+import argparse
+import importlib
+import os
+import tempfile
+
+from sc2.data import Difficulty, Race
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.player import Bot, Computer
+
+from helpers.local_data import GAME_LOOPS_PER_SECOND
+from helpers.local_server import run_local_game
+from helpers.local_world import LocalWorld
+from helpers.match_runner import BOTS
+from helpers.observation_replay import replay
+
+
+def world_speed(seconds: int, game_step: int = 8) -> None:
+    """
+    The world on its own, with the workers of the bot mining and an observation built every step.
+    """
+    world = LocalWorld(Race.Terran, Race.Zerg, Difficulty.Medium, seed=0)
+    workers = [unit for unit in world.units.values() if unit.owner == 1 and unit.unit_type == UnitTypeId.SCV]
+    minerals = [unit for unit in world.units.values() if unit.unit_type == UnitTypeId.MINERALFIELD]
+    for worker in workers:
+        field = min(minerals, key=lambda mineral: mineral.distance_to(worker.x, worker.y))
+        world.command(1, AbilityId.HARVEST_GATHER.value, [worker.tag], field.tag)
+
+    start = default_timer()
+    loops = int(seconds * GAME_LOOPS_PER_SECOND)
+    while world.game_loop < loops and world.result is None:
+        world.step(game_step)
+        world.observation(1)
+    elapsed = default_timer() - start
+    print("world: {} loops in {:.2f} s, {:.0f} loops/s, {} units, {:.0f} minerals mined".format(
+        world.game_loop, elapsed, world.game_loop / elapsed, len(world.units), world.players[1].minerals))
+
+
+def make_bot(name: str, **kwargs):
+    module_name, class_name = BOTS[name][0].split(":")
+    return getattr(importlib.import_module(module_name), class_name)(**kwargs)
+
+
+def game_speed(name: str, seconds: int, capture_path: str = None) -> None:
+    bot = make_bot(name, capture_path=capture_path)
+    start = default_timer()
+    result = run_local_game([Bot(Race[BOTS[name][1]], bot), Computer(Race.Random, Difficulty.Easy)],
+                            game_time_limit=seconds, random_seed=0)
+    elapsed = default_timer() - start
+    game_loop = bot.state.game_loop
+    steps = game_loop // bot.client.game_step
+    print("{}: {} in {:.2f} s, {:.0f} loops/s, {:.0f} steps/s, supply {}/{}, {} units".format(
+        name, result.name, elapsed, game_loop / elapsed, steps / elapsed, bot.supply_used, bot.supply_cap,
+        len(bot.all_own_units)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=int, default=180, help="Game seconds of every game.")
+    parser.add_argument("--bots", nargs="+", default=["terran", "zerg"], choices=sorted(BOTS))
+    arguments = parser.parse_args()
+
+    world_speed(arguments.seconds)
+    for name in arguments.bots:
+        game_speed(name, arguments.seconds)
+
+    # A game against the local server replayed offline.
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "terran.sc2obs")
+        game_speed("terran", min(arguments.seconds, 60), capture_path=path)
+        report = replay(path, make_bot("terran"))
+        print("replay: " + report.format_report().splitlines()[1])
+
+
+if __name__ == "__main__":
+    main()
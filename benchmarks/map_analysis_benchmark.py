@@ -0,0 +1,37 @@
+"""
+Map analysis: analysing a map from its grids, versus loading the analysis from the on-disk cache.
+Run from the repository root with: python -m benchmarks.map_analysis_benchmark
+"""
+from timeit import default_timer
+
+import os
+import random
+import tempfile
+
+from helpers.map_analysis import MAP_ANALYSIS_VERSION, MapAnalysis, analyze_map, map_hash
+from tests.fakes import synthetic_map
+
+
+def main():
+    pathable, expansions, geysers, ramps, main_ramps = synthetic_map(random.Random(0))
+    key = map_hash("Synthetic", pathable)
+
+    start = default_timer()
+    analysis = analyze_map("Synthetic", key, pathable, expansions, geysers, ramps, main_ramps)
+    analyse_ms = (default_timer() - start) * 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = MapAnalysis.cache_path(directory, "Synthetic", key)
+        analysis.save(path)
+        start = default_timer()
+        MapAnalysis.load(path, key)
+        load_ms = (default_timer() - start) * 1000
+        size = os.path.getsize(path)
+
+    print("analysis version {}: {} bases, {:.1f} KB on disk".format(MAP_ANALYSIS_VERSION, len(expansions), size / 1024))
+    print("{:<10} {:>10.2f} ms".format("analyse", analyse_ms))
+    print("{:<10} {:>10.2f} ms".format("load", load_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Wall time of a batch of games played one after the other and by the match runner's worker pool, with a stand-in
+game that keeps a core busy instead of the StarCraft II client.
+Run from the repository root with: python -m benchmarks.match_runner_benchmark
+"""
+from timeit import default_timer
+
+import os
+
+from helpers.match_runner import MatchSpec, format_summary, match_matrix, run_matches, summarize
+
+GAMES: int = 2
+# CPU seconds of a stand-in game.
+GAME_SECONDS: float = 0.5
+
+
+def stand_in_game(spec: MatchSpec) -> str:
+    """ Burns GAME_SECONDS of CPU like a bot step loop, wins against Easy and loses against Hard. """
+    end = default_timer() + GAME_SECONDS
+    while default_timer() < end:
+        sum(range(1000))
+    return "Victory" if spec.difficulty == "Easy" else "Defeat"
+
+
+def main():
+    workers = os.cpu_count() or 1
+    specs = match_matrix(["terran", "zerg"], ["Terran", "Zerg"], ["Easy", "Hard"], games=GAMES)
+
+    start = default_timer()
+    serial = run_matches(specs, stand_in_game, workers=0)
+    serial_seconds = default_timer() - start
+
+    start = default_timer()
+    parallel = run_matches(specs, stand_in_game, workers=workers)
+    parallel_seconds = default_timer() - start
+    print(format_summary(summarize(parallel), parallel_seconds))
+
+    print("{} games: {:.1f} s one after the other, {:.1f} s on {} workers".format(
+        len(specs), serial_seconds, parallel_seconds, workers))
+
+if __name__ == "__main__":
+    main()
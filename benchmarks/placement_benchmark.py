@@ -0,0 +1,51 @@
+"""
+Placement requests sent to the game: BotAI.find_placement asking one ring at a time against the placement
+batcher, and the requests of a TerranBot step on the synthetic game.
+Run from the repository root with: python -m benchmarks.placement_benchmark
+"""
+from sc2.data import Race
+from sc2.ids.ability_id import AbilityId
+from sc2.position import Point2
+
+import asyncio
+import random
+
+from bots.terran_bot import TerranBot
+from tests.fakes import BatchedBot, Grid, LegacyBot, SyntheticGame, synthetic_bot
+
+SEARCHES: int = 200
+STEPS: int = 100
+
+
+async def compare_searches() -> None:
+    generator = random.Random(1)
+    legacy, batched = LegacyBot(Grid()), BatchedBot(Grid())
+    for search in range(SEARCHES):
+        near = Point2((generator.randint(30, 170) + 0.5, generator.randint(30, 170) + 0.5))
+        await legacy.find_placement(AbilityId.TERRANBUILD_BARRACKS, near, random_alternative=False)
+        await batched.find_placement(AbilityId.TERRANBUILD_BARRACKS, near, random_alternative=False)
+    print("find_placement requests per search: one ring at a time {:.2f}, batched {:.2f}".format(
+        legacy.client.grid.requests / SEARCHES, batched.grid.requests / SEARCHES))
+
+
+async def terran_steps() -> None:
+    random.seed(0)
+    bot = synthetic_bot(TerranBot)
+    game = SyntheticGame(bot, Race.Terran, own_units=200, enemies=100, seed=0)
+    await game.start()
+    most = 0
+    for _ in range(STEPS):
+        before = game.placement_requests
+        await game.step()
+        most = max(most, game.placement_requests - before)
+    print("terran steps: {} placement requests over {} steps, {} at most in a step, {} positions asked".format(
+        game.placement_requests, STEPS, most, bot.placements.questions))
+
+
+def main():
+    asyncio.run(compare_searches())
+    asyncio.run(terran_steps())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Memory and throughput of the queued task records: slotted Task, TriggerEvent, QueueEntry and UnitRecord
+against the former per-entry dicts and classes with an instance dict.
+Run from the repository root with: python -m benchmarks.records_benchmark
+"""
+from timeit import default_timer
+from typing import Callable, List
+
+import tracemalloc
+
+from events.trigger_event import TriggerEvent
+from helpers.enum import EventTypes, States
+from helpers.scheduler import QueueEntry
+from helpers.task import Task
+from helpers.unit_registry import UnitRecord
+
+RECORDS: int = 20000
+
+
+class DictTask(object):
+    """ Task before __slots__. """
+
+    def __init__(self, start=None, step=None, end=None, get_status=None):
+        self.__start_func = start
+        self.__step_func = step
+        self.__end_func = end
+        self.__get_status_func = get_status
+        self.__start_called = False
+
+
+class DictEvent(object):
+    """ TriggerEvent before __slots__. """
+
+    def __init__(self, get_status=None, constant: bool = False):
+        self.__on_event = None
+        self.__get_status = get_status
+        self.event_type = EventTypes.TRIGGER
+        self.constant = constant
+        self.toggle = False
+        self.depends_on = None
+        self.tags = ()
+        self.__dependency_mask = None
+        self.__has_toggled = False
+        self.__evaluated_version = None
+        self.__last_status = False
+
+
+def dict_records(tag: int):
+    """ A queued unit task and the registry entry of its unit, as they were stored. """
+    entry = {
+        "priority": 0,
+        "task": DictTask(step=noop),
+        "trigger_event": DictEvent(noop, constant=True),
+        "tag": "",
+        "time": 0.0,
+    }
+    unit = {"type_id": 48, "state": States.IDLE, "display_state": "", "target_location": None, "target_type": None}
+    return entry, unit
+
+
+def slotted_records(tag: int):
+    entry = QueueEntry(0, Task(step=noop), TriggerEvent(noop, constant=True), "", 0.0)
+    return entry, UnitRecord(48)
+
+
+def noop(*args):
+    return False
+
+
+def memory(factory: Callable) -> float:
+    """ :return: Bytes per queued task and unit entry. """
+    tracemalloc.start()
+    records: List = [factory(tag) for tag in range(RECORDS)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return size / RECORDS
+
+
+def create(factory: Callable) -> float:
+    start = default_timer()
+    for tag in range(RECORDS):
+        factory(tag)
+    return (default_timer() - start) / RECORDS * 1e9
+
+
+def read_dicts(records) -> None:
+    for entry, unit in records:
+        if entry["priority"] > 0 and entry["trigger_event"].constant and unit["state"] == States.IDLE:
+            pass
+
+
+def read_slotted(records) -> None:
+    for entry, unit in records:
+        if entry.priority > 0 and entry.trigger_event.constant and unit.state == States.IDLE:
+            pass
+
+
+def read(factory: Callable, reader: Callable) -> float:
+    records = [factory(tag) for tag in range(RECORDS)]
+    start = default_timer()
+    for _ in range(10):
+        reader(records)
+    return (default_timer() - start) / (10 * RECORDS) * 1e9
+
+
+def main():
+    print("{:<8} {:>14} {:>14} {:>14}".format("records", "bytes/entry", "create ns", "read ns"))
+    for name, factory, reader in (("dicts", dict_records, read_dicts), ("slots", slotted_records, read_slotted)):
+        print("{:<8} {:>14.0f} {:>14.0f} {:>14.1f}".format(
+            name, memory(factory), create(factory), read(factory, reader)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Per-step cost of keeping the unit registry up to date, for growing army sizes.
+Run from the repository root with: python -m benchmarks.registry_benchmark
+"""
+from timeit import default_timer
+from typing import Dict, List
+
+from helpers.unit_registry import UnitRegistry
+from tests.fakes import RegistryUnit, rebuild_step
+
+ARMY_SIZES: List[int] = [50, 100, 200, 400, 800]
+STEPS: int = 500
+# Units created and destroyed on every step.
+CHURN: int = 2
+
+
+def run(army_size: int) -> Dict[str, float]:
+    live = {tag: RegistryUnit(tag, 0) for tag in range(army_size)}
+    next_tag = army_size
+
+    registry = UnitRegistry()
+    for unit in live.values():
+        registry.mark_new(unit)
+    registry.apply_changes()
+    world = {}
+    rebuild_step(world, list(live.values()))
+
+    rebuild_time = 0.0
+    delta_time = 0.0
+    for _ in range(STEPS):
+        created = [RegistryUnit(tag, 0) for tag in range(next_tag, next_tag + CHURN)]
+        next_tag += CHURN
+        destroyed = list(live.keys())[:CHURN]
+        for tag in destroyed:
+            live.pop(tag)
+        for unit in created:
+            live[unit.tag] = unit
+
+        start = default_timer()
+        rebuild_step(world, list(live.values()))
+        rebuild_time += default_timer() - start
+
+        start = default_timer()
+        for unit in created:
+            registry.mark_new(unit)
+        for tag in destroyed:
+            registry.mark_removed(tag)
+        registry.apply_changes()
+        delta_time += default_timer() - start
+
+    return {
+        "rebuild_us": rebuild_time / STEPS * 1e6,
+        "delta_us": delta_time / STEPS * 1e6,
+    }
+
+
+def main():
+    print("{:>6} {:>14} {:>14}".format("units", "rebuild us/step", "delta us/step"))
+    for army_size in ARMY_SIZES:
+        result = run(army_size)
+        print("{:>6} {:>14.2f} {:>14.2f}".format(army_size, result["rebuild_us"], result["delta_us"]))
+
+
+if __name__ == "__main__":
+    main()
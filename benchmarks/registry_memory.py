@@ -0,0 +1,25 @@
+"""
+Registry memory over a synthetic 30 minute game with constant unit production and losses.
+Every unit gets a queued task, and every destroyed unit must be evicted together with its queue.
+Run from the repository root with: python -m benchmarks.registry_memory
+"""
+from tests.fakes import registry_game
+
+GAME_LOOPS_PER_SECOND: float = 22.4
+GAME_STEP: int = 8
+GAME_MINUTES: int = 30
+MAX_LIVE_UNITS: int = 200
+
+
+def main():
+    steps = int(GAME_MINUTES * 60 * GAME_LOOPS_PER_SECOND / GAME_STEP)
+    created, evicted, ended, live, samples = registry_game(steps, MAX_LIVE_UNITS, steps // GAME_MINUTES)
+
+    print("units created: {}, evicted: {}, live: {}".format(created, evicted, live))
+    print("{:>6} {:>6} {:>10}".format("minute", "live", "traced KiB"))
+    for minute, (live_units, memory) in sorted(samples.items()):
+        print("{:>6} {:>6} {:>10.1f}".format(minute, live_units, memory / 1024))
+
+
+if __name__ == "__main__":
+    main()
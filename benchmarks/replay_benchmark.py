@@ -0,0 +1,70 @@
+"""
+Replays a capture recorded with BaseBot(capture_path=...) and reports the on_step time of every step and the
+commands that differ from the recorded game.
+Run from the repository root with: python -m benchmarks.replay_benchmark CAPTURE --bot terran
+Without a capture, measures the cost of recording late-game sized observations and of loading them back.
+"""
+from s2clientprotocol import sc2api_pb2 as sc_pb
+from timeit import default_timer
+
+import argparse
+import importlib
+import os
+import tempfile
+
+from helpers.match_runner import BOTS
+from helpers.observation_capture import Capture, ObservationRecorder
+from helpers.observation_replay import replay
+from tests.fakes import late_game_observation
+
+# Steps of a 30 minute game with a game step of 8.
+GAME_STEPS: int = int(30 * 60 * 22.4 / 8)
+UNITS: int = 400
+
+
+def time_capture(path: str) -> None:
+    game_info = sc_pb.ResponseGameInfo(map_name="Synthetic")
+    game_info.start_raw.pathing_grid.data = bytes(176 * 172 // 8)
+    observations = [late_game_observation(game_loop, UNITS) for game_loop in range(0, 80, 8)]
+    recorder = ObservationRecorder(path)
+    recorder.start({"player_id": 1, "seed": 0}, game_info, sc_pb.ResponseData(), observations[0],
+                   bytes(176 * 172 // 8))
+    elapsed = 0.0
+    for step in range(GAME_STEPS):
+        observation = observations[step % len(observations)]
+        pathing = bytes([step // 500]) * (176 * 172 // 8)
+        start = default_timer()
+        recorder.placements([[319, 40.5, 60.5, True]])
+        recorder.step(observation, pathing, [[23, 0x100001, [100.0, 100.0], False]])
+        elapsed += default_timer() - start
+    recorder.close()
+    size = os.path.getsize(path)
+
+    start = default_timer()
+    Capture(path)
+    load_s = default_timer() - start
+
+    print("record: {:.0f} us per step of {} units".format(elapsed / GAME_STEPS * 1e6, UNITS))
+    print("file: {} steps, {:.1f} MiB, {:.1f} KiB per step".format(GAME_STEPS, size / 2 ** 20,
+                                                                     size / GAME_STEPS / 1024))
+    print("load: {:.2f} s".format(load_s))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", nargs="?", help="Capture file to replay.")
+    parser.add_argument("--bot", default="terran", choices=sorted(BOTS), help="Bot replaying the capture.")
+    parser.add_argument("--steps", type=int, default=None, help="Steps replayed, all of them by default.")
+    arguments = parser.parse_args()
+
+    if arguments.capture is None:
+        with tempfile.TemporaryDirectory() as directory:
+            time_capture(os.path.join(directory, "game.sc2obs"))
+        return
+    module_name, class_name = BOTS[arguments.bot][0].split(":")
+    bot = getattr(importlib.import_module(module_name), class_name)()
+    print(replay(arguments.capture, bot, arguments.steps).format_report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Benchmark suite for the bots on synthetic game states, checked against stored baselines.
+Needs the python-sc2 package but no StarCraft II client.
+
+Run from the repository root:
+    python -m benchmarks.run_benchmarks                     # compare against benchmarks/baselines.json
+    python -m benchmarks.run_benchmarks --update-baselines  # record the current timings as the baselines
+
+The baselines are machine specific, so record them on the machine that runs the comparison (e.g. CI).
+The exit code is 1 when a scenario fails, has no baseline, or a timing is slower than its baseline times the
+tolerance, and 2 when there is no baselines file.
+"""
+from sc2.data import Race
+from timeit import default_timer
+from typing import Dict, List, Tuple
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import random
+import sys
+import traceback
+
+from bots.terran_bot import TerranBot
+from bots.zerg_bot import BaseZergBot, BroodlordZergBot
+from tests.fakes import SyntheticGame, synthetic_bot
+
+BASELINES_PATH: str = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+# (own units, enemy units) of each scenario.
+SCALES: List[Tuple[int, int]] = [(50, 0), (200, 100), (500, 300)]
+
+BOTS = {
+    "terran": (TerranBot, Race.Terran),
+    "zerg": (BaseZergBot, Race.Zerg),
+    "broodlord": (BroodlordZergBot, Race.Zerg),
+}
+
+# Methods timed on their own, on top of the whole on_step. Missing methods are skipped.
+HOT_METHODS: List[str] = [
+    "detect_changes",
+    "exec_global_tasks",
+    "exec_all_units_tasks",
+    "army_attack",
+    "expand",
+    "assign_workers",
+    "reactive_depot",
+    "run_build_order",
+    "build_gas_havester",
+    "build_depots",
+    "BC_attack",
+    "train_drone",
+]
+
+WARMUP_STEPS: int = 5
+
+
+async def time_call(method) -> float:
+    start = default_timer()
+    result = method()
+    if inspect.isawaitable(result):
+        await result
+    return default_timer() - start
+
+
+async def run_scenario(bot_name: str, own_units: int, enemies: int, steps: int) -> Dict[str, float]:
+    """
+    :return: Mean microseconds per call of on_step and of every hot method.
+    """
+    bot_class, race = BOTS[bot_name]
+    random.seed(0)
+    bot = synthetic_bot(bot_class)
+    game = SyntheticGame(bot, race, own_units=own_units, enemies=enemies, seed=0)
+    await game.start()
+    for _ in range(WARMUP_STEPS):
+        await game.step()
+
+    timings: Dict[str, float] = {}
+    start = default_timer()
+    for _ in range(steps):
+        await game.step()
+    timings["on_step"] = (default_timer() - start) / steps * 1e6
+
+    for name in HOT_METHODS:
+        method = getattr(bot, name, None)
+        if method is None:
+            continue
+        elapsed = 0.0
+        for _ in range(steps):
+            elapsed += await time_call(method)
+        timings[name] = elapsed / steps * 1e6
+    return timings
+
+
+def scenario_name(bot_name: str, own_units: int, enemies: int) -> str:
+    return "{}/{}u/{}e".format(bot_name, own_units, enemies)
+
+
+def run_all(bot_names: List[str], steps: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for bot_name in bot_names:
+        for own_units, enemies in SCALES:
+            name = scenario_name(bot_name, own_units, enemies)
+            try:
+                results[name] = asyncio.run(run_scenario(bot_name, own_units, enemies, steps))
+            except Exception:
+                print("{}: failed".format(name))
+                traceback.print_exc()
+                results[name] = {"error": 1.0}
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baselines: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[str]:
+    """
+    Print the timings next to their baselines.
+    :return: Descriptions of the failed scenarios, the scenarios without baseline and the timings that regressed.
+    """
+    failures = []
+    for scenario, timings in results.items():
+        print(scenario)
+        if "error" in timings:
+            print("    error")
+            failures.append("{}: failed".format(scenario))
+            continue
+        scenario_baselines = baselines.get(scenario)
+        if scenario_baselines is None:
+            failures.append("{}: no baseline".format(scenario))
+            scenario_baselines = {}
+        for metric, value in timings.items():
+            baseline = scenario_baselines.get(metric)
+            if baseline is None:
+                print("    {:<26} {:>12.1f} us   (no baseline)".format(metric, value))
+                continue
+            ratio = value / baseline if baseline else float("inf")
+            flag = ""
+            if ratio > tolerance:
+                flag = "  REGRESSION"
+                failures.append("{} {}: {:.1f} us vs {:.1f} us".format(scenario, metric, value, baseline))
+            print("    {:<26} {:>12.1f} us   x{:.2f}{}".format(metric, value, ratio, flag))
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bots", nargs="+", default=list(BOTS), choices=list(BOTS))
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="Slowdown factor over the baseline that counts as a regression.")
+    parser.add_argument("--baselines", default=BASELINES_PATH)
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+
+    if not args.update_baselines and not os.path.exists(args.baselines):
+        print("no baselines at {}, record them on this machine with --update-baselines".format(args.baselines))
+        return 2
+
+    results = run_all(args.bots, args.steps)
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines) as baselines_file:
+            baselines = json.load(baselines_file)
+
+    failures = compare(results, baselines, args.tolerance)
+
+    if args.update_baselines:
+        # A failed scenario keeps its former baseline.
+        baselines.update((scenario, timings) for scenario, timings in results.items() if "error" not in timings)
+        with open(args.baselines, "w") as baselines_file:
+            json.dump(baselines, baselines_file, indent=2, sort_keys=True)
+        print("baselines written to {}".format(args.baselines))
+        failures = [failure for failure in failures if failure.endswith(": failed")]
+
+    if failures:
+        print("\n{} failure(s):".format(len(failures)))
+        for failure in failures:
+            print("    " + failure)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
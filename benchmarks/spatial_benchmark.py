@@ -0,0 +1,71 @@
+"""
+Scaling of enemy proximity checks: every depot against every enemy with distance_to, versus the grid index.
+Run from the repository root with: python -m benchmarks.spatial_benchmark
+"""
+from collections import namedtuple
+from timeit import default_timer
+from typing import List
+
+import math
+import random
+
+from helpers.spatial_index import GridIndex
+
+Positioned = namedtuple("Positioned", ["tag", "position"])
+
+ENEMY_COUNTS: List[int] = [0, 50, 100, 200, 300, 600]
+DEPOTS: int = 20
+REPEATS: int = 200
+
+
+def distance(a, b) -> float:
+    return math.hypot(a.position[0] - b.position[0], a.position[1] - b.position[1])
+
+
+def naive_any_within(depots, enemies, radius: float) -> List[bool]:
+    result = []
+    for depot in depots:
+        for enemy in enemies:
+            if distance(enemy, depot) < radius:
+                result.append(True)
+                break
+        else:
+            result.append(False)
+    return result
+
+
+def grid_any_within(depots, enemies, radius: float) -> List[bool]:
+    grid = GridIndex(enemies)
+    return [grid.any_within(depot.position, radius) for depot in depots]
+
+
+def random_units(count: int, center, spread: float, rng: random.Random) -> List[Positioned]:
+    return [
+        Positioned(index, (center[0] + rng.uniform(-spread, spread), center[1] + rng.uniform(-spread, spread)))
+        for index in range(count)
+    ]
+
+
+def main():
+    rng = random.Random(0)
+
+    depots = random_units(DEPOTS, (30, 30), 10, rng)
+    print("{:>8} {:>14} {:>14}".format("enemies", "naive us", "grid us"))
+    for count in ENEMY_COUNTS:
+        # The enemies sit at the front, so most depots have no enemy in range and scan the whole list.
+        enemies = random_units(count, (100, 100), 40, rng)
+
+        start = default_timer()
+        for _ in range(REPEATS):
+            naive_any_within(depots, enemies, 15)
+        naive = (default_timer() - start) / REPEATS * 1e6
+
+        start = default_timer()
+        for _ in range(REPEATS):
+            grid_any_within(depots, enemies, 15)
+        grid = (default_timer() - start) / REPEATS * 1e6
+        print("{:>8} {:>14.1f} {:>14.1f}".format(count, naive, grid))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Cost of recording the telemetry of a step and of loading a whole game back.
+Run from the repository root with: python -m benchmarks.telemetry_benchmark
+"""
+from sc2.data import Race
+from timeit import default_timer
+
+import asyncio
+import os
+import random
+import tempfile
+
+from bots.terran_bot import TerranBot
+from helpers.telemetry import TelemetryRecorder, load_games, load_telemetry
+from tests.fakes import SyntheticGame, synthetic_bot
+
+# Steps of a 30 minute game with a game step of 8.
+GAME_STEPS: int = int(30 * 60 * 22.4 / 8)
+GAMES: int = 100
+
+
+async def record_game(path: str) -> float:
+    """ :return: Mean microseconds per recorded step. """
+    random.seed(0)
+    bot = synthetic_bot(TerranBot)
+    game = SyntheticGame(bot, Race.Terran, own_units=200, enemies=100, seed=0)
+    await game.start()
+    for _ in range(5):
+        actions = await game.step()
+    # Only the timed steps are recorded.
+    bot.telemetry = TelemetryRecorder(path)
+    elapsed = 0.0
+    for step in range(GAME_STEPS):
+        bot.state.game_loop += 8
+        start = default_timer()
+        bot.record_telemetry(0.002, len(actions))
+        elapsed += default_timer() - start
+    await bot.on_end(None)
+    return elapsed / GAME_STEPS * 1e6
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "game.tlm")
+        record_us = asyncio.run(record_game(path))
+        size = os.path.getsize(path)
+
+        start = default_timer()
+        game = load_telemetry(path)
+        load_ms = (default_timer() - start) * 1000
+
+        paths = [path] * GAMES
+        start = default_timer()
+        load_games(paths)
+        games_ms = (default_timer() - start) * 1000
+
+    print("record: {:.1f} us per step".format(record_us))
+    print("file: {} steps, {} unit types, {:.0f} KiB".format(GAME_STEPS, len(game["unit_types"]), size / 1024))
+    print("load: {:.2f} ms per game, {} games in {:.0f} ms".format(load_ms, GAMES, games_ms))
+
+
+if __name__ == "__main__":
+    main()
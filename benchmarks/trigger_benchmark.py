@@ -0,0 +1,40 @@
+"""
+Queued task triggers: polled every step, versus evaluated again only when their declared inputs changed.
+Run from the repository root with: python -m benchmarks.trigger_benchmark
+"""
+from timeit import default_timer
+from typing import List
+
+import random
+
+from tests.fakes import TriggerBot, trigger_step, trigger_tasks
+
+TASK_COUNTS: List[int] = [10, 100, 1000]
+STEPS: int = 500
+STRUCTURES: int = 60
+
+
+def run(task_count: int, track: bool, seed: int = 0):
+    generator = random.Random(seed)
+    bot = TriggerBot(track, STRUCTURES)
+    scheduler, runs = trigger_tasks(bot, task_count)
+
+    start = default_timer()
+    for step in range(STEPS):
+        trigger_step(bot, step, generator)
+        scheduler.exec_unit_tasks(bot)
+    elapsed = (default_timer() - start) / STEPS * 1e6
+    return elapsed, bot.checks, runs[0]
+
+
+def main():
+    print("{:>7} {:>12} {:>12} {:>14} {:>14}".format("tasks", "polled us", "tracked us", "polled evals",
+                                                     "tracked evals"))
+    for count in TASK_COUNTS:
+        polled, polled_checks, _ = run(count, track=False)
+        tracked, tracked_checks, _ = run(count, track=True)
+        print("{:>7} {:>12.1f} {:>12.1f} {:>14} {:>14}".format(count, polled, tracked, polled_checks, tracked_checks))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,44 @@
 from sc2.bot_ai import BotAI
+from sc2.ids.ability_id import AbilityId
 from sc2.ids.unit_typeid import UnitTypeId
+from sc2.ids.upgrade_id import UpgradeId
 from sc2.units import Units
 from sc2.unit import Unit
-from sc2.data import Race
+from sc2.data import Alliance, Race
 from sc2.position import Point2
+from sc2.unit_command import UnitCommand
 from helpers.task import Task
 from helpers.enum import States, EventTypes, TaskStatus
+from helpers.unit_registry import UnitRegistry
+from helpers.scheduler import TaskScheduler, QueueEntry
+from helpers.profiler import StepProfiler
+from helpers.query_cache import UnitQueryCache
+from helpers.spatial_index import SpatialIndexes
+from helpers.distance_engine import DistanceEngine
+from helpers.change_tracker import ChangeTracker
+from helpers.cadence import CadenceScheduler, Routine
+from helpers.reservations import StepReservations
+from helpers.command_filter import DEFAULT_COMMAND_WINDOW, CommandFilter
+from helpers.telemetry import TelemetryRecorder
+from helpers.observation_capture import ObservationRecorder, command_record
+from helpers.placement_batcher import PlacementBatcher, PlacementKey, ring_positions
+from helpers.expansion_planner import ExpansionPlanner
+from helpers.worker_assignment import WorkerAssignment
+from helpers.target_index import TargetIndex
+from helpers.build_order import BuildOrder
+from helpers.map_analysis import DEFAULT_CACHE_DIR, MapAnalysis, analyze_map, map_hash
 from events.trigger_event import TriggerEvent
 from events.passive_event import PassiveEvent
-from typing import Set, Tuple
+from events.event_bus import EventBus
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from time import perf_counter
+from timeit import default_timer
+from s2clientprotocol import query_pb2 as query_pb
+from loguru import logger
+from s2clientprotocol import sc2api_pb2 as sc_pb
 
+import asyncio
+import inspect
 import random
 
 
@@ -26,6 +55,8 @@ WORKER_TYPE: Set[UnitTypeId] = {
     Race.Zerg: UnitTypeId.DRONE,
 }
 
+GAS_BUILDING_TYPES: Set[UnitTypeId] = {UnitTypeId.ASSIMILATOR, UnitTypeId.REFINERY, UnitTypeId.EXTRACTOR}
+
 VESPENE_GAS_HARVESTER_TYPE: Set[UnitTypeId] = {
     Race.Protoss: UnitTypeId.ASSIMILATOR,
     Race.Terran: UnitTypeId.REFINERY,
@@ -34,162 +65,714 @@ VESPENE_GAS_HARVESTER_TYPE: Set[UnitTypeId] = {
 
 MAX_WORKERS: int = 65
 HAVESTER_PER_TOWNHALL: int = 2
+# Resources closer than this to a finished townhall are harvested from it.
+BASE_RESOURCE_RADIUS: float = 10
+HARVEST_ABILITIES: Set[AbilityId] = {AbilityId.HARVEST_GATHER, AbilityId.HARVEST_RETURN}
 # ITERATIONS_PER_MINUTE: int = 165
 
 
 class BaseBot(BotAI):
-    def __init__(self):
+    def __init__(self, profile: bool = False, profile_report_path: Optional[str] = None,
+                 map_cache_dir: Optional[str] = None, command_window: int = DEFAULT_COMMAND_WINDOW,
+                 telemetry_path: Optional[str] = None, capture_path: Optional[str] = None):
+        """
+        :param profile: Record the time spent in each phase of the step. Off by default.
+        :param profile_report_path: Where to write the JSON profiling report at the end of the game.
+                                    The report is logged when no path is given.
+        :param map_cache_dir: Where the map analyses are stored, "map_cache" at the root of the project by default.
+        :param command_window: Game loops during which sending a unit the same free command again is dropped.
+                               0 sends every command.
+        :param telemetry_path: File to record the numbers of every step to, see helpers.telemetry. Off by default.
+        :param capture_path: File to record the observations and commands of every step to, to replay the game
+                             offline, see helpers.observation_capture. Off by default.
+        """
         # Contains all the information available about the game world.
         self.world = { 
             "locations": {},
-            "units": {},
+            "units": UnitRegistry(),
         }
-        self.global_queue = [] 
-        self.global_events = {}
+        self.__registry_seeded = False
+        self.scheduler = TaskScheduler()
+        self.global_events = EventBus()
         self.army_units = {}
         self.WORKERS_PER_TOWNHALL: int = 16
         self.MIN_SUPPLY_AMOUNT: int = 2
+        self.profiler: Optional[StepProfiler] = StepProfiler() if profile else None
+        self.profile_report_path = profile_report_path
+        self.__query_cache = UnitQueryCache()
+        self.__spatial_indexes = SpatialIndexes()
+        self.__distance_engine = DistanceEngine()
+        self.__target_index = TargetIndex()
+        self.__change_tracker = ChangeTracker()
+        self.__reservations = StepReservations()
+        self.__placements = PlacementBatcher(self.send_placement_queries)
+        self.__commands = CommandFilter(command_window)
+        self.map_cache_dir = map_cache_dir or DEFAULT_CACHE_DIR
+        self.map_analysis: Optional[MapAnalysis] = None
+        # Wall positions of the main ramp: "barracks", "depot_in_middle" and "corner_depots".
+        self.main_ramp: Dict = {}
+        self.expansion_planner: Optional[ExpansionPlanner] = None
+        # Tag of the worker sent to build the next townhall, and its site.
+        self.__expansion_builder: Optional[Tuple[int, Point2]] = None
+        self.worker_assignment = WorkerAssignment()
+        # Structures, add-ons, units and upgrades the bot makes to a fixed count, see run_build_order.
+        self.build_order: Optional[BuildOrder] = None
+        self.routines: Optional[CadenceScheduler] = None
+        self.telemetry: Optional[TelemetryRecorder] = TelemetryRecorder(telemetry_path) if telemetry_path else None
+        self.capture: Optional[ObservationRecorder] = ObservationRecorder(capture_path) if capture_path else None
+
+    @property
+    def query(self) -> UnitQueryCache:
+        """
+        Unit queries shared by all the routines of a step. The cache is rebuilt on the next observation.
+        """
+        self.__query_cache.refresh(self, self.state.game_loop)
+        return self.__query_cache
+
+    @property
+    def spatial(self) -> SpatialIndexes:
+        """
+        Grid indexes over the unit groups of the bot (own units, enemies, resources), rebuilt every step.
+        """
+        self.__spatial_indexes.refresh(self, self.state.game_loop)
+        return self.__spatial_indexes
+
+    @property
+    def distances(self) -> DistanceEngine:
+        """
+        Bulk distance queries over the positions of the current observation.
+        """
+        self.__distance_engine.refresh(self, self.state.game_loop)
+        return self.__distance_engine
+
+    @property
+    def targets(self) -> TargetIndex:
+        """
+        Enemy units and structures scored by threat, value and distance to the army, built once per step.
+        """
+        self.__target_index.refresh(self, self.state.game_loop)
+        return self.__target_index
+
+    @property
+    def changes(self) -> ChangeTracker:
+        """
+        Versions of the game inputs the triggers depend on, used to skip triggers whose inputs didn't change.
+        """
+        self.__change_tracker.refresh(self, self.state.game_loop)
+        return self.__change_tracker
+
+    @property
+    def reservations(self) -> StepReservations:
+        """
+        Resources held by the routines of the step that wait on the game before sending their command.
+        """
+        return self.__reservations
+
+    def hold(self, item):
+        """
+        Hold the cost of an item while the routine making it waits on the game, so the routines running at the
+        same time can't spend it too. To use as `with self.hold(item):` around the awaits, see StepReservations.
+        """
+        cost = self.calculate_cost(item)
+        supply = self.calculate_supply_cost(item) if isinstance(item, UnitTypeId) else 0
+        return self.__reservations.hold(cost.minerals, cost.vespene, supply)
+
+    def can_afford(self, item_id, check_supply_cost: bool = True) -> bool:
+        """
+        BotAI.can_afford, leaving out the resources held by the other routines of the step.
+        """
+        reservations = self.__reservations
+        if not reservations.held:
+            return super().can_afford(item_id, check_supply_cost)
+        cost = self.calculate_cost(item_id)
+        supply = self.calculate_supply_cost(item_id) if check_supply_cost and isinstance(item_id, UnitTypeId) else 0
+        return reservations.fits(cost.minerals, cost.vespene, supply, self.minerals, self.vespene, self.supply_left)
+
+    def command_cost(self, action: UnitCommand) -> Tuple[int, int]:
+        """
+        :return: Minerals and vespene the command spends.
+        """
+        cost = self.game_data.calculate_ability_cost(action.ability)
+        return cost.minerals, cost.vespene
+
+    def filter_commands(self) -> None:
+        """
+        Drop the commands of the step that change nothing, before they are sent to the game.
+        A free command is dropped when the unit is already carrying it out or got it less than `command_window`
+        game loops ago (see CommandFilter). Paid commands are never dropped as duplicates, training the same unit
+        twice queues it twice.
+        """
+        commands = self.__commands
+        game_loop = self.state.game_loop
+        kept = []
+        for action in self.actions:
+            unit = action.unit
+            minerals, vespene = self.command_cost(action)
+            if not minerals and not vespene and commands.window and \
+                    commands.is_redundant(unit.tag, action.ability, action.target, action.queue, game_loop,
+                                          unit.orders):
+                continue
+            commands.record(unit.tag, action.ability, action.target, action.queue, game_loop)
+            kept.append(action)
+        if len(kept) < len(self.actions):
+            self.actions[:] = kept
+
+    @property
+    def command_filter(self) -> CommandFilter:
+        return self.__commands
+
+    @property
+    def placements(self) -> PlacementBatcher:
+        """
+        Placement questions of the step, sent to the game together. The answers are kept until the next observation.
+        """
+        self.__placements.refresh(self.state.game_loop)
+        return self.__placements
+
+    def creation_ability(self, building) -> Optional[AbilityId]:
+        """
+        :return: The ability placing a structure, or None when the structure can't be placed.
+        """
+        if isinstance(building, UnitTypeId):
+            ability = self.game_data.units[building.value].creation_ability
+            return ability.id if ability is not None else None
+        return building
+
+    async def send_placement_queries(self, queries: List[PlacementKey]) -> List[bool]:
+        """
+        Ask the game about several placements, for any structures, in one request.
+        """
+        result = await self.client._execute(query=query_pb.RequestQuery(
+            placements=(
+                query_pb.RequestQueryBuildingPlacement(ability_id=ability_id, target_pos=Point2(position).as_Point2D)
+                for ability_id, position in queries
+            ),
+            ignore_resource_requirements=True,
+        ))
+        # 1 is ActionResult.Success.
+        answers = [placement.result == 1 for placement in result.query.placements]
+        if self.capture is not None:
+            self.capture.placements([
+                [ability_id, round(float(position[0]), 2), round(float(position[1]), 2), answer]
+                for (ability_id, position), answer in zip(queries, answers)
+            ])
+        return answers
+
+    async def can_place(self, building, positions) -> List[bool]:
+        """
+        BotAI.can_place, answered by the placement batcher.
+        """
+        if not isinstance(positions, list):
+            return await self.can_place_single(building, positions)
+        ability = self.creation_ability(building)
+        if ability is None:
+            return [False for _ in positions]
+        return await self.placements.query(ability.value, positions)
+
+    async def can_place_single(self, building, position) -> bool:
+        ability = self.creation_ability(building)
+        if ability is None:
+            return False
+        return (await self.placements.query(ability.value, [position]))[0]
+
+    async def find_placement(self, building, near: Point2, max_distance: int = 20, random_alternative: bool = True,
+                             placement_step: int = 2, addon_place: bool = False) -> Optional[Point2]:
+        """
+        BotAI.find_placement asking about `near` and every ring in one request instead of one ring at a time.
+        The answer is the same: `near` when it is free, else a free position of the closest ring.
+        """
+        ability = self.creation_ability(building)
+        if ability is None:
+            return None
+        rings = [ring_positions(near, distance, placement_step)
+                 for distance in range(placement_step, max_distance, placement_step)] if max_distance else []
+        free = await self.free_placements(
+            ability, [(near.x, near.y)] + [position for ring in rings for position in ring], addon_place)
+        if free[0]:
+            return near
+        index = 1
+        for ring in rings:
+            possible = [Point2(position) for position, is_free in zip(ring, free[index:index + len(ring)]) if is_free]
+            index += len(ring)
+            if not possible:
+                continue
+            if random_alternative:
+                return random.choice(possible)
+            return min(possible, key=lambda position: position.distance_to_point2(near))
+        return None
+
+    async def build(self, building: UnitTypeId, near, max_distance: int = 20, build_worker: Optional[Unit] = None,
+                    random_alternative: bool = True, placement_step: int = 2) -> bool:
+        """
+        BotAI.build, holding the cost of the structure while its placement is looked for. The worker is picked
+        once the placement is known, when no other routine can run before the command is sent.
+        """
+        if not self.can_afford(building):
+            return False
+        if isinstance(near, Unit) and building not in GAS_BUILDING_TYPES:
+            near = near.position
+        position = near
+        if isinstance(near, Point2):
+            with self.hold(building):
+                position = await self.find_placement(building, near.to2, max_distance, random_alternative,
+                                                     placement_step)
+            if position is None:
+                return False
+        builder = build_worker or self.select_build_worker(position)
+        if builder is None:
+            return False
+        builder.build(building, position)
+        return True
+
+    def select_build_worker(self, pos, force: bool = False) -> Optional[Unit]:
+        """
+        The closest worker gathering or idle, leaving out the workers that already got a command on this step:
+        two routines must not send the same worker to two structures.
+        """
+        taken = self.unit_tags_received_action
+        workers = self.workers.filter(
+            lambda worker: worker.tag not in taken and (worker.is_gathering or worker.is_idle))
+        if workers:
+            return workers.closest_to(pos)
+        return self.workers.random if force and self.workers else None
+
+    async def free_placements(self, ability: AbilityId, positions: List[Tuple[float, float]],
+                                addon_place: bool) -> List[bool]:
+        """
+        :return: For every position, whether the structure (and its add-on when addon_place) can be placed there.
+        """
+        queries = [(ability.value, position) for position in positions]
+        if addon_place:
+            queries += [(AbilityId.TERRANBUILD_SUPPLYDEPOT.value, (x + 2.5, y - 0.5)) for x, y in positions]
+        free = await self.placements.answer(queries)
+        if addon_place:
+            free = [structure and addon for structure, addon in zip(free, free[len(positions):])]
+        return free
+
+    def assign_workers(self) -> None:
+        """
+        Keep the workers harvesting the mineral fields and gas buildings of the bases, see WorkerAssignment.
+        Replaces BotAI.distribute_workers: only the workers whose resource changed get an order, and the assigned
+        workers that went idle are sent back to their resource.
+        Workers busy with anything else than harvesting (building, repairing, fighting) are left alone and lose
+        their resource. Workers inside a gas building are not observed and keep theirs.
+        """
+        workers, positions, idle, busy = {}, {}, [], []
+        for worker in self.workers:
+            orders = worker.orders
+            if not orders:
+                idle.append(worker.tag)
+            elif orders[0].ability.id not in HARVEST_ABILITIES:
+                busy.append(worker.tag)
+                continue
+            workers[worker.tag] = worker
+            positions[worker.tag] = worker.position_tuple
+        resources, minerals, gas = {}, {}, {}
+        for townhall in self.query.townhalls(ready=True):
+            for field in self.spatial.query_radius("mineral_field", townhall.position, BASE_RESOURCE_RADIUS):
+                resources[field.tag] = field
+                minerals[field.tag] = field.position_tuple
+            for gas_building in self.spatial.query_radius("gas_buildings", townhall.position, BASE_RESOURCE_RADIUS):
+                if gas_building.is_ready and gas_building.vespene_contents:
+                    resources[gas_building.tag] = gas_building
+                    gas[gas_building.tag] = gas_building.position_tuple
+
+        moved = self.worker_assignment.update(positions, minerals, gas, self.state.game_loop, busy)
+        for tag in idle:
+            resource = self.worker_assignment.resource_of(tag)
+            if resource is not None:
+                moved.setdefault(tag, resource)
+        for tag, resource in moved.items():
+            workers[tag].gather(resources[resource])
+
+    async def on_start(self) -> None:
+        if self.capture is not None:
+            self.start_capture()
+        start = default_timer()
+        self.map_analysis, cached = self.load_map_analysis()
+        if self.profiler is not None:
+            self.profiler.count("map analysis cached", cached)
+            self.profiler.count("map analysis ms", round((default_timer() - start) * 1000, 3))
+
+        positions = self.map_analysis.main_ramp(self.start_location)
+        if positions is None:
+            ramp = self.main_base_ramp
+            positions = {
+                "barracks": ramp.barracks_correct_placement,
+                "depot_in_middle": ramp.depot_in_middle,
+                "corner_depots": ramp.corner_depots,
+            }
+        self.main_ramp = {
+            "barracks": Point2(positions["barracks"]),
+            "depot_in_middle": Point2(positions["depot_in_middle"]),
+            "corner_depots": {Point2(position) for position in positions["corner_depots"]},
+        }
+
+        # Expansion sites ranked by walking distance from the main base.
+        start_base = self.map_analysis.closest_base(self.start_location)
+        self.expansion_planner = ExpansionPlanner(
+            [Point2(site) for site in self.map_analysis.expansions.tolist()],
+            self.map_analysis.base_distances[start_base].tolist(),
+        )
+        for structure in self.structures:
+            self.expansion_planner.occupy(structure.tag, structure.position)
+        for structure in self.enemy_structures:
+            self.expansion_planner.occupy(structure.tag, structure.position, enemy=True)
+
+    def load_map_analysis(self) -> Tuple[MapAnalysis, bool]:
+        """
+        Load the analysis of the current map from the cache, analysing the map when it isn't there yet.
+        :return: The analysis and whether it came from the cache.
+        """
+        game_info = self.game_info
+        key = map_hash(game_info.map_name, game_info.placement_grid.data_numpy, game_info.terrain_height.data_numpy)
+        path = MapAnalysis.cache_path(self.map_cache_dir, game_info.map_name, key)
+        analysis = MapAnalysis.load(path, key)
+        if analysis is not None:
+            return analysis, True
+
+        ramps = [
+            (ramp.top_center.x, ramp.top_center.y, ramp.bottom_center.x, ramp.bottom_center.y, len(ramp.upper))
+            for ramp in game_info.map_ramps
+        ]
+        main_ramps = []
+        for start_location in set(game_info.start_locations) | {self.start_location}:
+            row = self.__main_ramp_row(start_location)
+            if row is not None:
+                main_ramps.append(row)
+        analysis = analyze_map(
+            game_info.map_name,
+            key,
+            game_info.pathing_grid.data_numpy,
+            self.expansion_locations_list,
+            [geyser.position for geyser in self.vespene_geyser],
+            ramps,
+            main_ramps,
+        )
+        analysis.save(path)
+        return analysis, False
+
+    def __main_ramp_row(self, start_location: Point2) -> Optional[Tuple[float, ...]]:
+        """
+        Wall positions of the main ramp of a start location, picked like BotAI.main_base_ramp.
+        """
+        candidates = [ramp for ramp in self.game_info.map_ramps if len(ramp.upper) in {2, 5}] or \
+            [ramp for ramp in self.game_info.map_ramps if len(ramp.upper) in {4, 9}]
+        if not candidates:
+            return None
+        ramp = min(candidates, key=lambda candidate: start_location.distance_to(candidate.top_center))
+        try:
+            barracks = ramp.barracks_correct_placement
+            middle = ramp.depot_in_middle
+            corners = sorted(ramp.corner_depots)
+        except Exception:
+            # The wall positions are only known for ramps with two upper points.
+            return None
+        if barracks is None or len(corners) != 2:
+            return None
+        return (start_location.x, start_location.y, barracks.x, barracks.y, middle.x, middle.y,
+                corners[0].x, corners[0].y, corners[1].x, corners[1].y)
+
+    async def on_step(self, iteration: int) -> None:
+        """
+        Play the step of the bot (see play_step), then drop the commands that change nothing.
+        The step is recorded when telemetry or capture is enabled.
+        """
+        start = perf_counter()
+        await self.play_step(iteration)
+        self.filter_commands()
+        if self.telemetry is not None:
+            self.record_telemetry(perf_counter() - start, len(self.actions))
+        if self.capture is not None:
+            self.capture.step(self.state.response_observation, bytes(self.game_info.pathing_grid._proto.data),
+                              [command_record(action) for action in self.actions])
+
+    async def play_step(self, iteration: int) -> None:
+        """
+        Decisions of the bot on a step, overridden by every bot. The base bot makes none.
+        """
+
+    async def __run_phase(self, phase: Callable) -> None:
+        if self.profiler is None:
+            result = phase()
+            if inspect.isawaitable(result):
+                await result
+        else:
+            await self.profiler.measure(phase.__name__, phase)
+
+    async def run_phases(self, phases: List) -> None:
+        """
+        Run the phases of a step in order. Phases can be plain or coroutine functions.
+        A list of phases runs concurrently with asyncio.gather: while one waits on the game, the others go on.
+        Their requests to the game still leave one at a time (see PlacementBatcher) and the resources they
+        are about to spend are held (see StepReservations).
+        Each phase is timed when profiling is enabled.
+        """
+        if self.profiler is not None:
+            self.profiler.begin_step()
+        for phase in phases:
+            if isinstance(phase, list):
+                await asyncio.gather(*(self.__run_phase(concurrent_phase) for concurrent_phase in phase))
+            else:
+                await self.__run_phase(phase)
+        if self.profiler is not None:
+            self.profiler.end_step()
+
+    def schedule_routines(self, routines: List[Routine]) -> CadenceScheduler:
+        """
+        Run the step as routines with a cadence, see run_routines. The events the routines wake on are
+        subscribed to the global events.
+        """
+        self.routines = CadenceScheduler(routines)
+        for event_type in self.routines.wake_events():
+            self.register_global_event(PassiveEvent(
+                lambda bot, *args, event_type=event_type: bot.routines.wake(event_type), event_type,
+            ))
+        return self.routines
+
+    async def run_routines(self) -> None:
+        """
+        Run the routines that are due on this step, in their registration order.
+        """
+        start = default_timer()
+        await self.run_phases(self.routines.due(self.state.game_loop))
+        self.routines.record_step(default_timer() - start)
+
+    def record_telemetry(self, step_seconds: float, actions: int) -> None:
+        """
+        Record the numbers of the step that just ran.
+        :param step_seconds: Time spent in on_step.
+        :param actions: Commands issued during the step.
+        """
+        self.telemetry.record(
+            self.state.game_loop, self.minerals, self.vespene, self.supply_used, self.supply_cap, len(self.workers),
+            len(self.units), len(self.structures), self.scheduler.queued_unit_count(),
+            len(self.scheduler.global_tasks()), actions, step_seconds,
+            {**self.query.type_counts("units"), **self.query.type_counts("structures")},
+        )
+
+    def start_capture(self) -> None:
+        """
+        Record the start of the game. The random generator is seeded with a seed written in the capture, so the
+        replay makes the same random choices.
+        """
+        seed = random.randrange(2 ** 32)
+        random.seed(seed)
+        game_data = sc_pb.ResponseData(
+            abilities=[ability._proto for ability in self.game_data.abilities.values()],
+            units=[unit._proto for unit in self.game_data.units.values()],
+            upgrades=[upgrade._proto for upgrade in self.game_data.upgrades.values()],
+        )
+        header = {
+            "bot": type(self).__name__,
+            "player_id": self.player_id,
+            "base_build": self.base_build,
+            "game_step": getattr(self.client, "game_step", 1),
+            "seed": seed,
+        }
+        self.capture.start(header, self.game_info._proto, game_data, self.state.response_observation,
+                           bytes(self.game_info.pathing_grid._proto.data))
+
+    async def on_end(self, game_result) -> None:
+        if self.telemetry is not None:
+            self.telemetry.close()
+        if self.capture is not None:
+            self.capture.close()
+        if self.routines is not None:
+            self.routines.reset()
+        if self.profiler is None:
+            return
+        if self.routines is not None:
+            report = self.routines.report()
+            self.profiler.count("routine calls", report["calls"])
+            self.profiler.count("routine calls skipped", report["skipped"])
+            self.profiler.count("routine wake ups", report["wake_ups"])
+            self.profiler.count("routine step mean ms", round(report["mean_step_ms"], 3))
+            self.profiler.count("routine step max ms", round(report["max_step_ms"], 3))
+        self.profiler.count("query filter passes saved", self.__query_cache.filter_passes_saved)
+        self.profiler.count("commands sent", self.__commands.sent)
+        self.profiler.count("commands suppressed", self.__commands.suppressed)
+        self.profiler.count("cost holds", self.__reservations.holds)
+        self.profiler.count("costs refused by holds", self.__reservations.refused)
+        self.profiler.count("placement positions asked", self.__placements.questions)
+        self.profiler.count("placement answers reused", self.__placements.reused)
+        self.profiler.count("placement requests", self.__placements.requests)
+        self.profiler.count("worker assignment rebalances", self.worker_assignment.rebalances)
+        self.profiler.count("workers moved", self.worker_assignment.moves)
+        self.profiler.count("target index builds", self.__target_index.builds)
+        self.profiler.count("target index queries", self.__target_index.queries)
+        if self.build_order is not None:
+            self.profiler.count("build order evaluations", self.build_order.evaluations)
+            self.profiler.count("build order wake ups", self.build_order.wake_ups)
+        self.profiler.count("trigger evaluations", self.__change_tracker.evaluations)
+        self.profiler.count("trigger evaluations skipped", self.__change_tracker.skipped_evaluations)
+        for name, stats in self.global_events.stats().items():
+            self.profiler.count("event {} dispatches".format(name), stats["dispatches"])
+            self.profiler.count("event {} handler calls".format(name), stats["handler_calls"])
+            self.profiler.count("event {} handler ms".format(name), round(stats["handler_ms"], 3))
+        if self.profile_report_path:
+            self.profiler.dump(self.profile_report_path)
+        else:
+            logger.info("step profile:\n" + self.profiler.format_report())
 
     async def expand(self) -> None:
         """
         Check if can build another base
         """
         townhall_id = TOWNHALL_TYPE[self.race]
+        if self.__expansion_builder is not None:
+            tag, site = self.__expansion_builder
+            worker = self.workers.find_by_tag(tag)
+            ability = self.creation_ability(townhall_id)
+            if worker is None or all(order.ability.id != ability for order in worker.orders):
+                # The worker dropped the build order (or died) before the townhall was placed: the site is free
+                # again. A placed townhall has taken the site already (see ExpansionPlanner.occupy).
+                self.expansion_planner.unreserve(site)
+                self.__expansion_builder = None
         if self.can_afford(townhall_id):
-            planned_hatch_locations: Set[Point2] = {
-                placeholder.position for placeholder in self.placeholders}
-            my_structure_locations: Set[Point2] = {
-                structure.position for structure in self.structures}
-            enemy_structure_locations: Set[Point2] = {
-                structure.position for structure in self.enemy_structures}
-            blocked_locations: Set[Point2] = (
-                my_structure_locations | planned_hatch_locations | enemy_structure_locations
-            )
-
-        
-            location = await self.get_next_expansion()
-            if location and location not in blocked_locations:
+            if self.expansion_planner.enemy_claims:
+                # Enemy bases destroyed out of vision are only noticed when their site is seen empty.
+                self.expansion_planner.expire_enemy_claims(
+                    self.is_visible, {structure.tag for structure in self.enemy_structures})
+            location = self.expansion_planner.next_site(self.state.game_loop)
+            if location:
                 workers: Units = self.workers.gathering
                 
                 # if workers were found
                 if workers:  
                     worker: Unit = workers.random
-                    self.do(worker.build(townhall_id, location))
+                    # The site is only held when the command was sent. The worker may still drop the order in the
+                    # game, the site is then handed out again (see above).
+                    if worker.build(townhall_id, location, can_afford_check=True):
+                        self.expansion_planner.reserve(location, self.state.game_loop)
+                        self.__expansion_builder = (worker.tag, location)
     
     async def select_target(self) -> Tuple[Point2, bool]:
-        targets: Units = {self.enemy_units, self.enemy_structures}
-        if targets:
-            return targets.random.position, True
+        target = self.targets.best()
+        if target is not None:
+            return target.position, True
+        return self.enemy_start_locations[0], False
 
     async def army_attack(self):
         for unit in self.army_units:
-            if self.units(unit).amount > self.army_units[unit][0] and self.units(unit).amount > self.army_units[unit][1] and self.units(unit).amount > self.army_units[unit][2] and self.units(unit).amount > self.army_units[unit][3]:
-                for s in self.units(unit).idle:
-                    self.do(s.attack(self.select_army_target(self.state)))
+            amount = self.query.units(unit).amount
+            if amount > max(self.army_units[unit]):
+                target = self.select_army_target(self.state)
+                for s in self.query.units(unit, idle=True):
+                    self.do(s.attack(target))
 
-            elif self.units(unit).amount > self.army_units[unit][1]:
-                if len(self.enemy_units) > 0:
-                    for s in self.units(unit).idle:
-                        self.do(s.attack(random.choice(self.enemy_units)))
+            elif amount > self.army_units[unit][1]:
+                idle_units = self.query.units(unit, idle=True)
+                if idle_units:
+                    # Every idle unit attacks the best enemy unit in reach, else the best one overall.
+                    targets = self.targets.best_for(self.distances.positions(idle_units), units_only=True)
+                    for s, target in zip(idle_units, targets):
+                        self.do(s.attack(target))
 
     def build_gas_havester(self) -> None:
-        townhall_id = TOWNHALL_TYPE[self.race]
+        """
+        Send a worker to build a gas building on a free geyser of a base. Used as the action of the gas building
+        nodes of the build orders, which keep the count.
+        """
         vespene_gas_havester_id = VESPENE_GAS_HARVESTER_TYPE[self.race]
+        # Geysers a worker is already on the way to.
+        targeted = {order.target for worker in self.workers for order in worker.orders}
+        for hq in self.query.townhalls():
+            for vespene_geyser in self.spatial.query_radius("vespene_geyser", hq.position, 20):
+                if vespene_geyser.tag in targeted or self.spatial.any_within("gas_buildings", vespene_geyser.position, 1):
+                    continue
+                worker: Unit = self.select_build_worker(vespene_geyser.position)
+                if worker is None:
+                    return
+                worker.build(vespene_gas_havester_id, vespene_geyser)
+                return
+
+    async def run_build_order(self) -> None:
+        """
+        Evaluate the nodes of the build order that may need something, see BuildOrder.
+        """
+        if self.build_order is not None:
+            await self.build_order.run(self)
+
+    async def on_unit_created(self, unit: Unit) -> None:
+        self.world["units"].mark_new(unit)
+        if self.build_order is not None:
+            self.build_order.unit_ready(unit.type_id)
+
+    async def on_building_construction_started(self, unit: Unit) -> None:
+        self.world["units"].mark_new(unit)
+        self.expansion_planner.occupy(unit.tag, unit.position)
+
+    async def on_building_construction_complete(self, unit: Unit) -> None:
+        if self.build_order is not None:
+            self.build_order.unit_ready(unit.type_id)
+        self.__trigger_global_event(EventTypes.STRUCTURE_COMPLETE, unit, unit_type=unit.type_id,
+                                    alliance=unit.alliance)
+
+    async def on_enemy_unit_entered_vision(self, unit: Unit) -> None:
+        if unit.is_structure:
+            self.expansion_planner.occupy(unit.tag, unit.position, enemy=True)
+
+    async def on_unit_type_changed(self, unit: Unit, previous_type: UnitTypeId) -> None:
+        self.world["units"].mark_changed(unit)
+        if self.build_order is not None:
+            self.build_order.unit_lost(previous_type)
+            if unit.is_ready:
+                self.build_order.unit_ready(unit.type_id)
+
+    async def on_upgrade_complete(self, upgrade: UpgradeId) -> None:
+        if self.build_order is not None:
+            self.build_order.unit_ready(upgrade)
+
+    async def on_unit_destroyed(self, unit_tag: int) -> None:
+        # Units consumed by a morph (e.g. a drone turned into a building) are reported as dead as well.
+        self.world["units"].mark_removed(unit_tag)
+        self.expansion_planner.release(unit_tag)
+        self.worker_assignment.forget(unit_tag)
+        self.__commands.forget(unit_tag)
+        if self.build_order is not None:
+            unit = self._all_units_previous_map.get(unit_tag)
+            if unit is not None:
+                self.build_order.unit_lost(unit.type_id)
 
-        for hq in self.townhalls(townhall_id):
-            if self.gas_buildings.amount < HAVESTER_PER_TOWNHALL*len(self.townhalls(townhall_id)) and self.can_afford(vespene_gas_havester_id):
-                vespene_geyser_list: Units = self.vespene_geyser.closer_than(20, hq)
-                for vespene_geyser in vespene_geyser_list:
-                    if self.gas_buildings.filter(lambda unit: unit.distance_to(vespene_geyser) < 1):
-                        break
-                    worker: Unit = self.select_build_worker(vespene_geyser.position)
-                    if worker is None: 
-                        break
-
-                    worker.build(vespene_gas_havester_id, vespene_geyser)
-                    break
-
-        for havester in self.gas_buildings:
-            if havester.assigned_harvesters < havester.ideal_harvesters:
-                worker: Units = self.workers.closer_than(10, havester)
-                if worker:
-                    worker.random.gather(havester)
-                    
     def detect_changes(self) -> None:
-        # --- Check all units ---
-        # Extract the ids from the list of units and make them sets.
-        units_by_id = {unit.tag: unit for unit in self.units + self.structures}
-        units_ids = set(units_by_id.keys())
-        world_units_ids = set([unit.tag for unit in self.world["units"].keys()])  # TODO: Add caching to reduce workload.
-
-        # Calculate the difference and the intersection between the sets.
-        new_ids = units_ids.difference(world_units_ids)
-        removed_ids = world_units_ids.difference(units_ids)
-        comm_ids = units_ids.intersection(world_units_ids)
-
-        # Add the new unit.
-        for unit_id in new_ids:
-            self.world["units"][units_by_id[unit_id]] = {
-                "state": States.IDLE,
-                "task_queue": [],
-                "display_state": "",
-                "target_location": None,
-                "target_type": None
-            }
-            self.__trigger_global_event(EventTypes.NEW_UNIT, units_by_id[unit_id])
-            
-            # Remove the missing unit.
-            for unit_id in removed_ids:
-                # Trigger global event for removed unit and pop the unit from the registry.
-                # self.trigger_global_event(EventTypes.REMOVED_UNIT, self.world["units"].pop(units_by_id[unit_id]))  # TODO: Why does this crash?
-                pass
-
-            # Check if states are correct.
-            for unit_id in comm_ids:
-                # TODO: Add check for if the state is correct.
-                unit = units_by_id[unit_id]
-
-                # Check if workers are done building. # TODO: Think this is the root of a problem
-                """  
-                if self.get_unit_state(unit) == States.WORKER_BUILDING and unit.is_idle:
-                    self.set_unit_state(unit, States.IDLE)
-                """
-    
+        """
+        Apply the unit changes reported by the game events since the last step to the registry.
+        Only the new, removed and changed units are visited, so the cost does not grow with army size.
+        Removed units are evicted: their queued tasks end as failed and a REMOVED_UNIT event is
+        triggered with the unit tag and its last registry entry.
+        """
+        if not self.__registry_seeded:
+            # Units that exist before the first step may not be reported as created.
+            for unit in self.units + self.structures:
+                self.world["units"].mark_new(unit)
+            self.__registry_seeded = True
+
+        new_units, removed, changed_units = self.world["units"].apply_changes()
+        self.changes.mark_units([unit.tag for unit in new_units], [tag for tag, _ in removed])
+
+        for unit in new_units:
+            self.__trigger_global_event(EventTypes.NEW_UNIT, unit, unit_type=unit.type_id, alliance=unit.alliance)
+
+        for tag, entry in removed:
+            self.scheduler.fail_unit_tasks(self, tag)
+            self.__trigger_global_event(EventTypes.REMOVED_UNIT, tag, entry, unit_type=entry.type_id,
+                                        alliance=Alliance.Self)
+
     def exec_all_units_tasks(self) -> None:
-        for unit in self.units + self.structures:
-            if self.world["units"][unit]["task_queue"]:
-                item = self.world["units"][unit]["task_queue"][0]
-                self.world["units"][unit]["task_queue"].sort(
-                    key=lambda i: i["priority"], reverse=True
-                )
-
-                if item["trigger_event"].should_trigger(self):
-                    item["task"].on_step(self)
-                    status = item["task"].get_status(self)
-                    if (not item["trigger_event"].constant) or (
-                        status != TaskStatus.RUNNING
-                    ):
-                        self.world["units"][unit]["task_queue"].pop(0)["task"].on_end(
-                            self, status
-                        )
+        self.scheduler.exec_unit_tasks(self)
     
     def exec_global_tasks(self) -> None:
-        self.global_queue.sort(key=lambda i: i["priority"], reverse=True)
-
-        for i, item in enumerate(self.global_queue[:]):
-            if item["trigger_event"].should_trigger(self):
-                item["task"].on_step(self)
-                status = item["task"].get_status(self)
-                if (not item["trigger_event"].constant) or (status != Task.STATUS.RUNNING):
-                    self.global_queue.pop(self.global_queue.index(item))["task"].on_end(self, status)
+        self.scheduler.exec_global_tasks(self)
     
-    def select_army_target(self,state) -> None:
-        if len(self.enemy_units) > 0:
-            return random.choice(self.enemy_units)
-        elif len(self.enemy_structures) > 0:
-            return random.choice(self.enemy_structures)
-        else: 
-            self.enemy_start_locations[0]
+    def select_army_target(self,state):
+        """
+        The best target of the step, units before structures, else the enemy start location.
+        """
+        target = self.targets.best(units_only=True)
+        if target is None:
+            target = self.targets.best()
+        return target if target is not None else self.enemy_start_locations[0]
     
     def add_unit_task(
         self,
@@ -198,30 +781,35 @@ class BaseBot(BotAI):
         trigger_event: TriggerEvent,
         priority: int = 0,
         tag: str = "",
-    ) -> None:
-        self.world["units"][unit]["task_queue"].append(
-            {
-                "priority": priority,
-                "task": task,
-                "trigger_event": trigger_event,
-                "tag": tag,
-                "time": self.time,
-            }
+    ) -> QueueEntry:
+        return self.scheduler.add_unit_task(
+            unit.tag, QueueEntry(priority, task, trigger_event, tag, self.time)
         )
 
+    def add_global_task(
+        self,
+        task: Task,
+        trigger_event: TriggerEvent,
+        priority: int = 0,
+        tag: str = "",
+    ) -> QueueEntry:
+        return self.scheduler.add_global_task(
+            QueueEntry(priority, task, trigger_event, tag, self.time)
+        )
+
+    def cancel_task(self, entry: QueueEntry) -> None:
+        self.scheduler.cancel(entry)
+
     def register_global_event(self, event: PassiveEvent) -> None:
-        if event.event_type in self.global_events.keys():
-            self.global_events[event.event_type].append(event)
-        else:
-            self.global_events[event.event_type] = [event]
+        self.global_events.subscribe(event)
 
-    def __trigger_global_event(self, event_type, *args) -> None:
+    def __trigger_global_event(self, event_type, *args, unit_type=None, alliance=None) -> None:
         """
-        Used to trigger all events in the global event dictionary of a specified type.
+        Used to trigger the events in the global event bus of a specified type that match the unit.
         :param event_type:
         :param args:
+        :param unit_type: UnitTypeId of the unit the event is about.
+        :param alliance: Alliance of the unit the event is about.
         :return:
         """
-        if event_type in self.global_events.keys():
-            for event in self.global_events[event_type]:
-                event.trigger_event(self, *args)
+        self.global_events.dispatch(self, event_type, *args, unit_type=unit_type, alliance=alliance)
@@ -12,12 +12,19 @@ from typing import List, Tuple
 from helpers.task import Task
 from events.trigger_event import TriggerEvent
 from events.passive_event import PassiveEvent
-from helpers.enum import EventTypes
-from .base_bot import BaseBot
+from helpers.enum import Dependency, EventTypes
+from helpers.addon_placement import AddonPlacementCache
+from helpers.build_order import BuildNode, BuildOrder
+from helpers.cadence import LOOPS_PER_SECOND, Routine
+from .base_bot import HAVESTER_PER_TOWNHALL, BaseBot
 
 MAX_SCV_REPAIRING_PERCENTAGE = 0.2
 MAX_WORKERS: int = 65
+# Cadences of the routines, in game loops.
+SECOND: int = int(LOOPS_PER_SECOND)
+HALF_SECOND: int = SECOND // 2
 
+# Upgrades researched by the engineering bay, in order.
 upgrade_ids = [
     UpgradeId.TERRANBUILDINGARMOR,
     UpgradeId.TERRANINFANTRYWEAPONSLEVEL1,
@@ -30,7 +37,53 @@ upgrade_ids = [
 
 class TerranBot(BaseBot):
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__addon_placement = AddonPlacementCache()
+        # Upgrades left to research, taken in order by the engineering bay task.
+        self.upgrade_ids = list(upgrade_ids)
+        # Structures, add-ons and battlecruisers made to a fixed count. Only the nodes whose prerequisites are
+        # ready and whose count isn't reached are evaluated, see BuildOrder.
+        self.build_order = BuildOrder([
+            BuildNode(UnitTypeId.REFINERY, HAVESTER_PER_TOWNHALL, per=UnitTypeId.COMMANDCENTER,
+                      action=self.build_gas_havester),
+            # A barracks walling the ramp, else anywhere when the ramp can't take it.
+            BuildNode(UnitTypeId.BARRACKS, action=self.build_ramp_barracks),
+            BuildNode(UnitTypeId.BARRACKS, placement_step=6),
+            BuildNode(UnitTypeId.ENGINEERINGBAY),
+            BuildNode(UnitTypeId.FACTORY, requires=[UnitTypeId.BARRACKS], placement_step=5),
+            BuildNode(UnitTypeId.STARPORT, 2, requires=[UnitTypeId.FACTORY], placement_step=5),
+            BuildNode(UnitTypeId.FUSIONCORE, requires=[UnitTypeId.STARPORT], placement_step=5),
+            BuildNode(UnitTypeId.BARRACKSTECHLAB, per=UnitTypeId.BARRACKS,
+                      action=lambda: self.build_addon(UnitTypeId.BARRACKS, UnitTypeId.BARRACKSTECHLAB)),
+            BuildNode(UnitTypeId.FACTORYTECHLAB, per=UnitTypeId.FACTORY,
+                      action=lambda: self.build_addon(UnitTypeId.FACTORY, UnitTypeId.FACTORYTECHLAB)),
+            BuildNode(UnitTypeId.STARPORTTECHLAB, per=UnitTypeId.STARPORT,
+                      action=lambda: self.build_addon(UnitTypeId.STARPORT, UnitTypeId.STARPORTTECHLAB)),
+            BuildNode(UnitTypeId.BATTLECRUISER, 8, requires=[UnitTypeId.FUSIONCORE, UnitTypeId.STARPORTTECHLAB]),
+        ])
+        # Routines of the step. Production and combat run on every step, the build order a few times per second.
+        # A structure finishing can unlock the next nodes, so the build order runs right away then.
+        # The depots and the build order wait on the game for placements and run concurrently, the cost of what
+        # they are placing is held meanwhile (see BaseBot.hold).
+        built = [EventTypes.STRUCTURE_COMPLETE]
+        self.schedule_routines([
+            Routine(self.assign_workers, HALF_SECOND),
+            Routine(self.build_workers),
+            Routine(self.build_base_army),
+            Routine(self.build_depots, HALF_SECOND, concurrent=True),
+            Routine(self.run_build_order, HALF_SECOND, wake_on=built, concurrent=True),
+            Routine(self.BC_attack),
+            Routine(self.army_attack),
+            Routine(self.expand, SECOND),
+            Routine(self.reactive_depot),
+            Routine(self.detect_changes),
+            Routine(self.exec_global_tasks),
+            Routine(self.exec_all_units_tasks),
+        ])
+
     async def on_start(self):
+        await super().on_start()
         self.army_units =  {
             UnitTypeId.MARINE: [8, 3],
             UnitTypeId.HELLION: [8, 3],
@@ -40,23 +93,28 @@ class TerranBot(BaseBot):
          # Add global event to add engineeringbay logic to new engineeringbay.
         def engineeringbay_task_adder_logic(bot: TerranBot, unit: Unit):
             def engineeringbay_core_logic():
-                if (len(upgrade_ids) == 0):
+                if len(self.upgrade_ids) == 0 or self.minerals <= 100 or self.vespene <= 100:
                     return
 
-                upgrade_id = upgrade_ids[0]
+                upgrade_id = self.upgrade_ids[0]
                 if self.research(upgrade_id):
-                    upgrade_ids.pop(0)
-
-            if unit.type_id == UnitTypeId.ENGINEERINGBAY:
-                self.add_unit_task(
-                    unit,
-                    Task(step=bot.factory(engineeringbay_core_logic)),
-                    TriggerEvent(lambda bot: self.structures.by_tag(unit.tag) and self.minerals > 100 and self.vespene > 100,
-                        constant=True,
-                    ),
-                )
+                    self.upgrade_ids.pop(0)
+
+            # The trigger only checks that the engineering bay is there, so it is evaluated again only when it is
+            # removed. The resources, which change on almost every step, are checked by the task.
+            self.add_unit_task(
+                unit,
+                Task(step=bot.factory(engineeringbay_core_logic)),
+                TriggerEvent(lambda bot: self.structures.find_by_tag(unit.tag) is not None,
+                    constant=True,
+                    depends_on=Dependency.NONE,
+                    tags=[unit.tag],
+                ),
+            )
         
-        self.register_global_event(PassiveEvent(engineeringbay_task_adder_logic, EventTypes.NEW_UNIT, True))
+        self.register_global_event(PassiveEvent(
+            engineeringbay_task_adder_logic, EventTypes.NEW_UNIT, True, unit_types={UnitTypeId.ENGINEERINGBAY},
+        ))
 
         if len(self.enemy_units) > 0:
             return random.choice(self.enemy_units)
@@ -67,59 +125,37 @@ class TerranBot(BaseBot):
         else: 
             self.enemy_start_locations[0]
 
-    async def on_step(self, iteration):
+    async def play_step(self, iteration):
         self.iteration = iteration
-        await self.distribute_workers()
-        await self.build_workers()
-        await self.build_depots()
-        await self.build_refinary()
-        await self.build_barrack()
-        await self.build_base_army()
-        await self.build_engineering_bay()
-        await self.build_factory()
-        await self.build_starport()
-        await self.build_starport_techlab()
-        await self.build_fusion_core()
-        await self.train_BC()
-        await self.BC_attack()
-        await self.army_attack()
-        await self.expand()
-        await self.reactive_depot()
-        await self.build_tech_lab_barrack()
-        await self.build_tech_lab_factory()
-
-        self.detect_changes()
-        self.exec_global_tasks()
-        self.exec_all_units_tasks()
-        
-        barracks_placement_position = self.main_base_ramp.barracks_correct_placement
+        await self.run_routines()
+
+    async def build_ramp_barracks(self):
+        """ Wall the main ramp with a barracks. """
+        barracks_placement_position = self.main_ramp["barracks"]
+        with self.hold(UnitTypeId.BARRACKS):
+            free = (await self.can_place(UnitTypeId.BARRACKS, [barracks_placement_position]))[0]
         worker = self.select_build_worker(barracks_placement_position)
 
-        if (
-            worker
-            and (
-                await self.can_place(UnitTypeId.BARRACKS, [barracks_placement_position])
-            )[0]
-        ):
+        if worker and free:
             worker.build(UnitTypeId.BARRACKS, barracks_placement_position)
 
     async def build_workers(self):
-        if len(self.townhalls(UnitTypeId.COMMANDCENTER))*16 > len(self.units(UnitTypeId.SCV)):
-            if len(self.units(UnitTypeId.SCV)) < MAX_WORKERS:
-                for cc in self.townhalls(UnitTypeId.COMMANDCENTER):
+        if len(self.query.townhalls(UnitTypeId.COMMANDCENTER))*16 > len(self.query.units(UnitTypeId.SCV)):
+            if len(self.query.units(UnitTypeId.SCV)) < MAX_WORKERS:
+                for cc in self.query.townhalls(UnitTypeId.COMMANDCENTER):
                     if self.can_afford(UnitTypeId.SCV) and cc.is_idle:
                         self.do(cc.train(UnitTypeId.SCV))
 
     async def build_depots(self):
-        ccs: Units = self.townhalls(UnitTypeId.COMMANDCENTER)
+        ccs: Units = self.query.townhalls(UnitTypeId.COMMANDCENTER)
         if not ccs:
             return
         else:
             cc: Unit = ccs.first
 
-        if self.can_afford(UnitTypeId.SUPPLYDEPOT) and len(self.structures.of_type({UnitTypeId.SUPPLYDEPOT, UnitTypeId.SUPPLYDEPOTLOWERED})) < 3 and not self.already_pending(UnitTypeId.SUPPLYDEPOT):
-            depot_placement_positions = self.main_base_ramp.corner_depots | {self.main_base_ramp.depot_in_middle}
-            depots: Units = self.structures.of_type({UnitTypeId.SUPPLYDEPOT, UnitTypeId.SUPPLYDEPOTLOWERED})
+        if self.can_afford(UnitTypeId.SUPPLYDEPOT) and len(self.query.structures({UnitTypeId.SUPPLYDEPOT, UnitTypeId.SUPPLYDEPOTLOWERED})) < 3 and not self.already_pending(UnitTypeId.SUPPLYDEPOT):
+            depot_placement_positions = self.main_ramp["corner_depots"] | {self.main_ramp["depot_in_middle"]}
+            depots: Units = self.query.structures({UnitTypeId.SUPPLYDEPOT, UnitTypeId.SUPPLYDEPOTLOWERED})
             if depots:
                 depot_placement_positions: Set[Point2] = {
                     d
@@ -140,109 +176,27 @@ class TerranBot(BaseBot):
             and self.supply_used >= 14
             and not self.already_pending(UnitTypeId.SUPPLYDEPOT)
         ):
-            if self.can_afford(UnitTypeId.SUPPLYDEPOT):
-                workers: Units = self.workers.gathering
-                if workers:  # if workers were found
-                    worker: Unit = workers.random
-                    depot_placement_positions = self.main_base_ramp.depot_in_middle
-                    depot_position = await self.find_placement(UnitTypeId.SUPPLYDEPOT, near=depot_placement_positions)
-                    self.do(worker.build(UnitTypeId.SUPPLYDEPOT, depot_position))
+            await self.build(UnitTypeId.SUPPLYDEPOT, near=self.main_ramp["depot_in_middle"])
     
-    async def build_refinary(self):
-        for cc in self.townhalls(UnitTypeId.COMMANDCENTER):
-            if self.gas_buildings.amount < 2*len(self.townhalls(UnitTypeId.COMMANDCENTER)) and self.can_afford(UnitTypeId.REFINERY):
-                vgs: Units = self.vespene_geyser.closer_than(20, cc)
-                for vg in vgs:
-                    if self.gas_buildings.filter(lambda unit: unit.distance_to(vg) < 1):
-                        break
-                    worker: Unit = self.select_build_worker(vg.position)
-                    if worker is None: 
-                        break
-
-                    worker.build(UnitTypeId.REFINERY, vg)
-                    break
-        for refinery in self.gas_buildings:
-            if refinery.assigned_harvesters < refinery.ideal_harvesters:
-                worker: Units = self.workers.closer_than(10, refinery)
-                if worker:
-                    worker.random.gather(refinery)
-
-    async def build_barrack(self):
-        ccs: Units = self.townhalls(UnitTypeId.COMMANDCENTER)
-        if not ccs:
-            return
-        else:
-            cc: Unit = ccs.first
-        if not self.structures(UnitTypeId.BARRACKS) and self.can_afford(UnitTypeId.BARRACKS) and not self.already_pending(UnitTypeId.BARRACKS):
-            await self.build(UnitTypeId.BARRACKS, near=cc.position.towards(self.game_info.map_center, 8), placement_step=6)
-
     async def build_base_army(self):
-        for barrack in self.structures(UnitTypeId.BARRACKS):
+        for barrack in self.query.structures(UnitTypeId.BARRACKS):
             if  self.can_afford(UnitTypeId.MARINE) and self.supply_army < 8 and not self.already_pending(UnitTypeId.MARINE) and barrack.is_idle:
                 self.train(UnitTypeId.MARINE, 1)
 
             elif self.can_afford(UnitTypeId.MARAUDER) and self.supply_army < 15 and not self.already_pending(UnitTypeId.MARAUDER) and barrack.is_idle and barrack.has_add_on:
                 self.train(UnitTypeId.MARAUDER, 1)
 
-        for factory in self.structures(UnitTypeId.FACTORY):
+        for factory in self.query.structures(UnitTypeId.FACTORY):
             if  self.can_afford(UnitTypeId.HELLION) and self.supply_army < 12 and not self.already_pending(UnitTypeId.HELLION):
                 self.train(UnitTypeId.HELLION, 1)
 
             elif self.can_afford(UnitTypeId.SIEGETANK) and self.supply_army < 15 and not self.already_pending(UnitTypeId.SIEGETANK) and factory.has_add_on:
                 self.train(UnitTypeId.SIEGETANK, 1)
 
-    async def build_engineering_bay(self):
-        ccs: Units = self.townhalls(UnitTypeId.COMMANDCENTER)
-        if not ccs:
-            return
-        else:
-            cc: Unit = ccs.first
-        if self.can_afford(UnitTypeId.ENGINEERINGBAY) and not self.structures(UnitTypeId.ENGINEERINGBAY) and not self.already_pending(UnitTypeId.ENGINEERINGBAY):
-            await self.build(UnitTypeId.ENGINEERINGBAY, near=cc.position.towards(self.game_info.map_center, 8))
-
-    async def build_factory(self):
-        ccs: Units = self.townhalls(UnitTypeId.COMMANDCENTER)
-        if not ccs:
-            return
-        else:
-            cc: Unit = ccs.first
-        if self.structures(UnitTypeId.BARRACKS) and not self.structures(UnitTypeId.FACTORY) and self.can_afford(UnitTypeId.FACTORY) and not self.already_pending(UnitTypeId.FACTORY):
-            await self.build(
-                UnitTypeId.FACTORY,
-                near=cc.position.towards(self.game_info.map_center, 8),
-                placement_step=5
-            )
-
-    async def build_starport(self):
-        ccs: Units = self.townhalls(UnitTypeId.COMMANDCENTER)
-        if not ccs:
-            return
-        else:
-            cc: Unit = ccs.first
-        if self.structures(UnitTypeId.FACTORY) and len(self.structures(UnitTypeId.STARPORT)) < 2 and self.can_afford(UnitTypeId.STARPORT) and not self.already_pending(UnitTypeId.STARPORT):
-            await self.build(UnitTypeId.STARPORT, near=cc.position.towards(self.game_info.map_center, 8), placement_step=5)
-
-    async def build_fusion_core(self):
-        ccs: Units = self.townhalls(UnitTypeId.COMMANDCENTER)
-        if not ccs:
-            return
-        else:
-            cc: Unit = ccs.first
-        
-        if self.structures(UnitTypeId.STARPORT) and not self.structures(UnitTypeId.FUSIONCORE) and self.can_afford(UnitTypeId.FUSIONCORE) and not self.already_pending(UnitTypeId.FUSIONCORE):
-            await self.build(UnitTypeId.FUSIONCORE, near=cc.position.towards(self.game_info.map_center, 8), placement_step=5)
-
-    async def train_BC(self):
-        for sp in self.structures(UnitTypeId.STARPORT).idle:
-            if sp.has_add_on and len(self.units(UnitTypeId.BATTLECRUISER)) < 8:
-                if not self.can_afford(UnitTypeId.BATTLECRUISER):
-                    break
-                sp.train(UnitTypeId.BATTLECRUISER)
-
-    async def starport_points_to_build_addon(self, sp_position: Point2) -> List[Point2]:
+    def starport_points_to_build_addon(self, sp_position: Point2) -> List[Point2]:
         """ Return all points that need to be checked when trying to build an addon. Returns 4 points. """
         addon_offset: Point2 = Point2((2.5, -0.5))
-        addon_position: Point2 = sp_position + addon_offset
+        addon_position: Point2 = Point2(sp_position) + addon_offset
         addon_points = [
             (addon_position + Point2((x - 0.5, y - 0.5))).rounded
             for x in range(0, 2)
@@ -250,21 +204,25 @@ class TerranBot(BaseBot):
         ]
         return addon_points
 
-    async def build_starport_techlab(self):
-        sp: Unit
-        for sp in self.structures(UnitTypeId.STARPORT).ready.idle:
-            if not sp.has_add_on and self.can_afford(UnitTypeId.STARPORTTECHLAB):
-                addon_points = await self.starport_points_to_build_addon(sp.position)
-                if all(
-                    self.in_map_bounds(addon_point)
-                    and self.in_placement_grid(addon_point)
-                    and self.in_pathing_grid(addon_point)
-                    for addon_point in addon_points
-                ):
-                    sp.build(UnitTypeId.STARPORTTECHLAB)
+    def can_build_addon(self, building: Unit) -> bool:
+        """ Check the addon space of a building, reusing the last result while nothing was built or destroyed near it. """
+        return self.__addon_placement.check(
+            building.tag,
+            building.position,
+            self.starport_points_to_build_addon,
+            lambda point: self.in_map_bounds(point) and self.in_placement_grid(point),
+            self.in_pathing_grid,
+        )
+
+    def build_addon(self, producer_id: UnitTypeId, addon_id: UnitTypeId) -> None:
+        """ Build the add-on on the first idle structure without one that has room for it. """
+        for producer in self.query.structures(producer_id, ready=True, idle=True):
+            if not producer.has_add_on and self.can_build_addon(producer):
+                producer.build(addon_id)
+                return
 
     async def BC_attack(self):
-        bcs: Units = self.units(UnitTypeId.BATTLECRUISER)
+        bcs: Units = self.query.units(UnitTypeId.BATTLECRUISER)
         if bcs:
             target, target_is_enemy_unit = await self.select_target()
             bc: Unit
@@ -277,25 +235,47 @@ class TerranBot(BaseBot):
                     bc.move(target)
 
     async def reactive_depot(self):
-        for depo in self.structures(UnitTypeId.SUPPLYDEPOT).ready:
-            for unit in self.enemy_units:
-                if unit.distance_to(depo) < 15:
-                    break
-            else:
+        for depo in self.query.structures(UnitTypeId.SUPPLYDEPOT, ready=True):
+            if not self.spatial.any_within("enemy_units", depo.position, 15):
                 depo(AbilityId.MORPH_SUPPLYDEPOT_LOWER)
 
         # Lower depos when no enemies are nearby
-        for depo in self.structures(UnitTypeId.SUPPLYDEPOTLOWERED).ready:
-            for unit in self.enemy_units:
-                if unit.distance_to(depo) < 10:
-                    depo(AbilityId.MORPH_SUPPLYDEPOT_RAISE)
-                    break
+        for depo in self.query.structures(UnitTypeId.SUPPLYDEPOTLOWERED, ready=True):
+            if self.spatial.any_within("enemy_units", depo.position, 10):
+                depo(AbilityId.MORPH_SUPPLYDEPOT_RAISE)
+
+    async def on_building_construction_started(self, unit: Unit) -> None:
+        await super().on_building_construction_started(unit)
+        self.__addon_placement.invalidate_near(unit.position)
+
+    async def on_unit_destroyed(self, unit_tag: int) -> None:
+        unit = self._all_units_previous_map.get(unit_tag)
+        if unit is not None and unit.is_structure:
+            self.__addon_placement.invalidate_near(unit.position)
+        self.__addon_placement.forget(unit_tag)
+        await super().on_unit_destroyed(unit_tag)
+
+    async def on_enemy_unit_entered_vision(self, unit: Unit) -> None:
+        await super().on_enemy_unit_entered_vision(unit)
+        if unit.is_structure:
+            self.__addon_placement.invalidate_near(unit.position)
+
+    async def on_unit_type_changed(self, unit: Unit, previous_type: UnitTypeId) -> None:
+        await super().on_unit_type_changed(unit, previous_type)
+        # A supply depot raised or lowered (or a structure lifting off) frees or covers the cells around it.
+        if unit.is_structure:
+            self.__addon_placement.invalidate_near(unit.position)
+
+    async def on_end(self, game_result) -> None:
+        if self.profiler is not None:
+            self.profiler.count("addon placement checks saved", self.__addon_placement.checks_saved)
+        await super().on_end(game_result)
 
     def factory(self, func, *args):
         return lambda bot: func(*args)
 
     async def on_unit_took_damage(self, unit: Unit, amount_damage_taken):
-        scvs = self.units(UnitTypeId.SCV)
+        scvs = self.query.units(UnitTypeId.SCV)
         if len(scvs) == 0 or not unit.is_structure:
             return 
 
@@ -309,53 +289,27 @@ class TerranBot(BaseBot):
         if len(scvs_not_repairing) == 0:
             return
 
-        scvs_not_repairing[0].repair(unit, queue=True)
-
-    async def build_tech_lab_barrack(self):
-        for barrack in self.structures(UnitTypeId.BARRACKS).ready.idle:
-            if not barrack.has_add_on and self.can_afford(UnitTypeId.BARRACKSTECHLAB):
-                addon_points = await self.starport_points_to_build_addon(barrack.position)
-                if all(
-                    self.in_map_bounds(addon_point)
-                    and self.in_placement_grid(addon_point)
-                    and self.in_pathing_grid(addon_point)
-                    for addon_point in addon_points
-                ):
-                    barrack.build(UnitTypeId.BARRACKSTECHLAB)
+        # Send the closest available SCV.
+        closest = self.distances.closest_indexes(unit, scvs_not_repairing)[0]
+        scvs_not_repairing[int(closest)].repair(unit, queue=True)
 
     async def select_target(self) -> Tuple[Point2, bool]:
-        targets: Units = self.enemy_units
-        if targets:
-            return targets.random.position, True
-
-        """ Select an enemy target the units should attack. """
-        targets: Units = self.enemy_structures
-        if targets and len(self.units(UnitTypeId.BATTLECRUISER)) > 5 :
-            return targets.random.position, True
-
-        # if ( self.units and min([u.position.distance_to(self.enemy_start_locations[0])for u in self.units]) < 5) :
-            # return self.enemy_start_locations[0].position, False
-        if len(self.units(UnitTypeId.BATTLECRUISER)) > 5:
+        """ Select an enemy target the units should attack, the best enemy unit of the target index first. """
+        target = self.targets.best(units_only=True)
+        if target is not None:
+            return target.position, True
+
+        if len(self.query.units(UnitTypeId.BATTLECRUISER)) > 5:
+            target = self.targets.best()
+            if target is not None:
+                return target.position, True
             return self.enemy_start_locations[0].position, False
 
         #retornar a posição de um cc randomico 
-        ccs: Units = self.townhalls(UnitTypeId.COMMANDCENTER)
+        ccs: Units = self.query.townhalls(UnitTypeId.COMMANDCENTER)
         if not ccs:
             return
         else:
             cc: Unit = ccs.random
 
         return cc.position, False
-
-    async def build_tech_lab_factory(self):
-        for factory in self.structures(UnitTypeId.FACTORY).ready.idle:
-            if not factory.has_add_on and self.can_afford(UnitTypeId.FACTORYTECHLAB):
-                addon_points = await self.starport_points_to_build_addon(factory.position)
-                if all(
-                    self.in_map_bounds(addon_point)
-                    and self.in_placement_grid(addon_point)
-                    and self.in_pathing_grid(addon_point)
-                    for addon_point in addon_points
-                ):
-                    factory.build(UnitTypeId.FACTORYTECHLAB)
-            
\ No newline at end of file
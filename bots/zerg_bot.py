@@ -6,12 +6,14 @@ from sc2.units import Units
 from sc2.data import Race
 from sc2.ids.ability_id import AbilityId
 from contextlib import suppress
-from typing import Set
-from .base_bot import BaseBot
+from typing import List, Set
+from helpers.build_order import BuildNode, BuildOrder
+from .base_bot import HAVESTER_PER_TOWNHALL, BaseBot
 
 import random
 
 _MAX_BROODLORDS_AMOUNT: int = 2
+_MAX_DRONES: int = 22
 _MAX_ZERGLINGS_AMOUNT: int = 100
 _QUEEN_ENERGY_AMOUNT: int = 25
 
@@ -33,14 +35,26 @@ class BaseZergBot(BaseBot):
     Base class for a zerg bot
     """
 
-    async def on_step(self, iteration):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.build_order = BuildOrder(self.build_order_nodes())
+
+    def build_order_nodes(self) -> List[BuildNode]:
+        """
+        Nodes of the build order of the bot, see BuildOrder.
+        """
+        return [
+            BuildNode(UnitTypeId.EXTRACTOR, HAVESTER_PER_TOWNHALL, per=TOWNHALLS_ID, action=self.build_gas_havester),
+            BuildNode(UnitTypeId.SPAWNINGPOOL, placement_step=6),
+        ]
+
+    async def play_step(self, iteration):
         self.iteration = iteration
 
-        await self.distribute_workers()
+        self.assign_workers()
         self.train_overlord()
-        self.build_gas_havester()
         self.train_drone()
-        await self.build_spawning_pool()
+        await self.run_build_order()
 
         await self.expand()
 
@@ -50,8 +64,8 @@ class BaseZergBot(BaseBot):
 
     # Units
     def train_queen(self) -> None:
-        if self.structures(UnitTypeId.SPAWNINGPOOL).ready:
-            if not self.units(UnitTypeId.QUEEN) and self.headquarter.is_idle:
+        if self.query.structures(UnitTypeId.SPAWNINGPOOL, ready=True):
+            if not self.query.units(UnitTypeId.QUEEN) and self.headquarter.is_idle:
                 if self.can_afford(UnitTypeId.QUEEN):
                     self.headquarter.train(UnitTypeId.QUEEN)
     
@@ -59,11 +73,11 @@ class BaseZergBot(BaseBot):
         """
         Train drones
         """
-        max_drones_amount = len(self.townhalls(TOWNHALLS_ID)) * self.WORKERS_PER_TOWNHALL
+        max_drones_amount = len(self.query.townhalls(TOWNHALLS_ID)) * self.WORKERS_PER_TOWNHALL
         drones_amount = self.supply_workers + self.already_pending(UnitTypeId.DRONE)
 
         if drones_amount < max_drones_amount:
-            for hq in self.townhalls(TOWNHALLS_ID):
+            for hq in self.query.townhalls(TOWNHALLS_ID):
                 if self.larva and self.can_afford(UnitTypeId.DRONE) and hq.is_idle:
                     larva: Unit = self.larva.random
                     larva.train(UnitTypeId.DRONE)
@@ -74,21 +88,26 @@ class BaseZergBot(BaseBot):
             if self.larva and self.can_afford(UnitTypeId.OVERLORD):
                 self.larva.random.train(UnitTypeId.OVERLORD)
     
-    # Builds
-    async def build_spawning_pool(self) -> None:
-        """
-        Build spawning pool
-        """
-        townhall_builds: Units = self.townhalls(TOWNHALLS_ID)
-        if townhall_builds:
-            headquarter: Unit = townhall_builds.first
-            if not self.structures(UnitTypeId.SPAWNINGPOOL) and self.can_afford(UnitTypeId.SPAWNINGPOOL) and not self.already_pending(UnitTypeId.SPAWNINGPOOL):
-                await self.build(UnitTypeId.SPAWNINGPOOL, near=headquarter.position.towards(self.game_info.map_center, 8), placement_step=6)
 
 
 class BroodlordZergBot(BaseZergBot):
 
-    async def on_step(self, iteration):
+    def build_order_nodes(self) -> List[BuildNode]:
+        """
+        Pool and tech up to the greater spire, then extractors and a queen.
+        """
+        return [
+            BuildNode(UnitTypeId.SPAWNINGPOOL, placement_step=6),
+            BuildNode(UnitTypeId.LAIR, counts=[UnitTypeId.HIVE], requires=[UnitTypeId.SPAWNINGPOOL]),
+            BuildNode(UnitTypeId.INFESTATIONPIT, requires=[{UnitTypeId.LAIR, UnitTypeId.HIVE}]),
+            BuildNode(UnitTypeId.SPIRE, counts=[UnitTypeId.GREATERSPIRE], requires=[{UnitTypeId.LAIR, UnitTypeId.HIVE}]),
+            BuildNode(UnitTypeId.HIVE, requires=[UnitTypeId.INFESTATIONPIT]),
+            BuildNode(UnitTypeId.GREATERSPIRE, requires=[UnitTypeId.HIVE]),
+            BuildNode(UnitTypeId.EXTRACTOR, HAVESTER_PER_TOWNHALL, per=TOWNHALLS_ID, action=self.build_gas_havester),
+            BuildNode(UnitTypeId.QUEEN, requires=[UnitTypeId.SPAWNINGPOOL]),
+        ]
+
+    async def play_step(self, iteration):
         self.headquarter: Unit = self.townhalls.first
         self.army: Units = self.units.of_type(_ARMY_UNITS)
 
@@ -96,10 +115,11 @@ class BroodlordZergBot(BaseZergBot):
                 UnitTypeId.HATCHERY):
             await self.can_expand()
 
-        if self.units(
+        if self.query.units(
                 UnitTypeId.BROODLORD).amount > _MAX_BROODLORDS_AMOUNT and iteration % 50 == 0:
+            target = self.select_army_target(self.state)
             for unit in self.army:
-                unit.attack(self.select_target())
+                unit.attack(target)
 
         # Train Overlord
         if self.supply_left < self.MIN_SUPPLY_AMOUNT and not self.already_pending(
@@ -108,10 +128,10 @@ class BroodlordZergBot(BaseZergBot):
                 self.larva.random.train(UnitTypeId.OVERLORD)
                 return
 
-        if self.structures(UnitTypeId.GREATERSPIRE).ready:
-            corruptors: Units = self.units(UnitTypeId.CORRUPTOR)
+        if self.query.structures(UnitTypeId.GREATERSPIRE, ready=True):
+            corruptors: Units = self.query.units(UnitTypeId.CORRUPTOR)
             # build half-and-half corruptors and broodlords
-            if corruptors and corruptors.amount > self.units(
+            if corruptors and corruptors.amount > self.query.units(
                     UnitTypeId.BROODLORD).amount:
                 if self.can_afford(UnitTypeId.BROODLORD):
                     corruptors.random.train(UnitTypeId.BROODLORD)
@@ -120,61 +140,15 @@ class BroodlordZergBot(BaseZergBot):
                 return
 
         # Make idle queens inject
-        for queen in self.units(UnitTypeId.QUEEN).idle:
+        for queen in self.query.units(UnitTypeId.QUEEN, idle=True):
             if queen.energy >= _QUEEN_ENERGY_AMOUNT:
                 queen(AbilityId.EFFECT_INJECTLARVA, self.headquarter)
 
-        # Build pool
-        await self.build_spawning_pool()
-
-        # Upgrade to lair
-        if self.structures(UnitTypeId.SPAWNINGPOOL).ready:
-            if not self.townhalls(UnitTypeId.LAIR) and not self.townhalls(
-                    UnitTypeId.HIVE) and self.headquarter.is_idle:
-                if self.can_afford(UnitTypeId.LAIR):
-                    self.headquarter.build(UnitTypeId.LAIR)
-
-        # Build infestation pit
-        if self.townhalls(UnitTypeId.LAIR).ready:
-            if self.structures(UnitTypeId.INFESTATIONPIT).amount + \
-                    self.already_pending(UnitTypeId.INFESTATIONPIT) == 0:
-                if self.can_afford(UnitTypeId.INFESTATIONPIT):
-                    await self.build(UnitTypeId.INFESTATIONPIT, near=self.headquarter)
-
-            # Build spire
-            if self.structures(UnitTypeId.SPIRE).amount + \
-                    self.already_pending(UnitTypeId.SPIRE) == 0:
-                if self.can_afford(UnitTypeId.SPIRE):
-                    await self.build(UnitTypeId.SPIRE, near=self.headquarter)
-
-        # Upgrade to hive
-        if self.structures(UnitTypeId.INFESTATIONPIT).ready and not self.townhalls(
-                UnitTypeId.HIVE) and self.headquarter.is_idle:
-            if self.can_afford(UnitTypeId.HIVE):
-                self.headquarter.build(UnitTypeId.HIVE)
-
-        # Upgrade to greater spire
-        if self.townhalls(UnitTypeId.HIVE).ready:
-            spires: Units = self.structures(UnitTypeId.SPIRE).ready
-            if spires:
-                spire: Unit = spires.random
-                if self.can_afford(UnitTypeId.GREATERSPIRE) and spire.is_idle:
-                    spire.build(UnitTypeId.GREATERSPIRE)
-
-        # Build extractor
-        self.build_extractor()
-
-        # Assign drones to extractors
-        for extractor in self.gas_buildings:
-            if extractor.surplus_harvesters < 0:
-                drones: Units = self.get_drones().filter(
-                    lambda d: d.distance_to(extractor) < 8
-                )
-                if drones:
-                    drones.random.gather(extractor)
-
-        # TODO: distribute drones better
-        await self.distribute_workers()
+        # Build order: pool, tech up to the greater spire, extractors and queen
+        await self.run_build_order()
+
+        # Assign drones to minerals and extractors
+        self.assign_workers()
 
         # Build up to 22 drones
         if self.supply_workers + \
@@ -184,15 +158,9 @@ class BroodlordZergBot(BaseZergBot):
                 larva.train(UnitTypeId.DRONE)
                 return
 
-        # Build queen
-        if self.structures(UnitTypeId.SPAWNINGPOOL).ready:
-            if not self.units(UnitTypeId.QUEEN) and self.headquarter.is_idle:
-                if self.can_afford(UnitTypeId.QUEEN):
-                    self.headquarter.train(UnitTypeId.QUEEN)
-
         # Build zerglings if we have not enough gas to build corruptors and
         # broodlords
-        if self.units(
+        if self.query.units(
                 UnitTypeId.ZERGLING).amount < _MAX_ZERGLINGS_AMOUNT and self.minerals > 1000:
             if self.larva and self.can_afford(UnitTypeId.ZERGLING):
                 self.larva.random.train(UnitTypeId.ZERGLING)
\ No newline at end of file
@@ -1,19 +1,30 @@
-from helpers.enum import EventTypes
+from helpers.enum import Dependency, EventTypes
 
 class Event(object):
     """
     Not meant to be used by itself.
     Trigger event or Passive event should be used instead.
+    @param depends_on game inputs read by get_status. When given, get_status is only called again after one of
+    them changed, otherwise its last result is reused. get_status is called every time when None.
+    @param tags units whose existence get_status checks.
     """
+    __slots__ = ("__on_event", "__get_status", "event_type", "constant", "toggle", "depends_on", "tags",
+                 "__dependency_mask", "__has_toggled", "__evaluated_version", "__last_status")
 
     def __init__(self, on_event = None, get_status = None,
-                event_type: EventTypes = EventTypes.EMPTY, constant: bool = False, toggle: bool = False):
+                event_type: EventTypes = EventTypes.EMPTY, constant: bool = False, toggle: bool = False,
+                depends_on: Dependency = None, tags = ()):
         self.__on_event = on_event
         self.__get_status = get_status
         self.event_type = event_type
         self.constant = constant
         self.toggle = toggle
+        self.depends_on = depends_on
+        self.tags = tuple(tags)
+        self.__dependency_mask = None
         self.__has_toggled = False
+        self.__evaluated_version = None
+        self.__last_status = False
         
 
     def trigger_event(self, bot, *args):
@@ -30,10 +41,26 @@ class Event(object):
         :return:
         """
         if self.__get_status:
-            status = self.__get_status(bot)
+            status = self.__status(bot)
             if status or (self.toggle and self.__has_toggled):
                 self.__has_toggled = True
                 return True
             return False
         return True
 
+    def __status(self, bot):
+        changes = getattr(bot, "changes", None) if self.depends_on is not None else None
+        if changes is None:
+            return self.__get_status(bot)
+        if self.__evaluated_version is not None and \
+                not changes.changed_since(self.__evaluated_version, self.__dependency_mask, self.tags):
+            changes.skipped_evaluations += 1
+            return self.__last_status
+        if self.__evaluated_version is None:
+            self.__dependency_mask = changes.mask(self.depends_on, self.tags)
+            changes.watch(self.tags)
+        changes.evaluations += 1
+        self.__evaluated_version = changes.version
+        self.__last_status = bool(self.__get_status(bot))
+        return self.__last_status
+
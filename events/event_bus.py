@@ -0,0 +1,113 @@
+from timeit import default_timer
+from typing import Dict, List, Optional, Tuple
+
+from helpers.enum import EventTypes
+from .passive_event import PassiveEvent
+
+
+class EventStats(object):
+    """
+    Dispatch counters of one event type.
+    """
+
+    def __init__(self):
+        self.dispatches = 0
+        self.handler_calls = 0
+        self.handler_time = 0.0
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "dispatches": self.dispatches,
+            "handler_calls": self.handler_calls,
+            "handler_ms": self.handler_time * 1000,
+        }
+
+
+class EventBus(object):
+    """
+    Global events indexed by event type, unit type and alliance, so a dispatch only looks at the events
+    whose filters can match. The predicates are checked on the remaining events.
+    Events with the same filters run in the order they were subscribed.
+    """
+
+    def __init__(self):
+        # {event_type: {(unit_type or None, alliance or None): [(order, event)]}}
+        self.__index: Dict[EventTypes, Dict[Tuple, List[Tuple[int, PassiveEvent]]]] = {}
+        self.__stats: Dict[EventTypes, EventStats] = {}
+        self.__subscribed = 0
+
+    def __len__(self) -> int:
+        return self.__subscribed
+
+    def subscribe(self, event: PassiveEvent) -> None:
+        buckets = self.__index.setdefault(event.event_type, {})
+        unit_types = getattr(event, "unit_types", None)
+        alliance = getattr(event, "alliance", None)
+        for unit_type in (unit_types if unit_types is not None else (None,)):
+            buckets.setdefault((unit_type, alliance), []).append((self.__subscribed, event))
+        self.__subscribed += 1
+
+    def unsubscribe(self, event: PassiveEvent) -> None:
+        buckets = self.__index.get(event.event_type, {})
+        for key in list(buckets.keys()):
+            buckets[key] = [entry for entry in buckets[key] if entry[1] is not event]
+            if not buckets[key]:
+                del buckets[key]
+
+    def handlers(self, event_type: EventTypes, unit_type=None, alliance=None) -> List[PassiveEvent]:
+        """
+        :return: The events whose unit type and alliance filters match, in subscription order.
+        """
+        buckets = self.__index.get(event_type)
+        if not buckets:
+            return []
+        keys = [(None, None)]
+        if unit_type is not None:
+            keys.append((unit_type, None))
+        if alliance is not None:
+            keys.append((None, alliance))
+            if unit_type is not None:
+                keys.append((unit_type, alliance))
+        matches = None
+        for key in keys:
+            bucket = buckets.get(key)
+            if not bucket:
+                continue
+            if matches is None:
+                matches = bucket
+            else:
+                matches = sorted(matches + bucket, key=lambda entry: entry[0])
+        return [event for _, event in matches] if matches else []
+
+    def dispatch(self, bot, event_type: EventTypes, *args, unit_type=None, alliance=None) -> int:
+        """
+        Trigger the events of a type that match the unit type, the alliance and their predicate.
+        :return: Number of events triggered.
+        """
+        stats = self.__stats.get(event_type)
+        if stats is None:
+            stats = self.__stats[event_type] = EventStats()
+        stats.dispatches += 1
+
+        handlers = self.handlers(event_type, unit_type, alliance)
+        if not handlers:
+            return 0
+        start = default_timer()
+        called = 0
+        for event in handlers:
+            predicate = getattr(event, "predicate", None)
+            if predicate is not None and not predicate(bot, *args):
+                continue
+            event.trigger_event(bot, *args)
+            called += 1
+        stats.handler_calls += called
+        stats.handler_time += default_timer() - start
+        return called
+
+    def stats(self, event_type: Optional[EventTypes] = None) -> Dict:
+        """
+        :return: The counters of an event type, or of every event type by name.
+        """
+        if event_type is not None:
+            return self.__stats.get(event_type, EventStats()).summary()
+        return {event_type.name: stats.summary() for event_type, stats in self.__stats.items()}
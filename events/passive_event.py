@@ -5,7 +5,15 @@ class PassiveEvent(Event):
     """
     Most commonly used on the global event dictionary.
     @param event_type should be any Event.TYPES except TRIGGER.
+    @param unit_types only trigger for units of these UnitTypeId. Any type when None.
+    @param alliance only trigger for units of this Alliance. Any alliance when None.
+    @param predicate only trigger when predicate(bot, *args) is true.
     """
-    def __init__(self, on_event, event_type: EventTypes, constant: bool = False, toggle: bool = False):
-        Event.__init__(self, on_event=on_event, event_type=event_type, constant=constant, toggle=toggle)
+    __slots__ = ("unit_types", "alliance", "predicate")
 
+    def __init__(self, on_event, event_type: EventTypes, constant: bool = False, toggle: bool = False,
+                 unit_types=None, alliance=None, predicate=None):
+        Event.__init__(self, on_event=on_event, event_type=event_type, constant=constant, toggle=toggle)
+        self.unit_types = frozenset(unit_types) if unit_types is not None else None
+        self.alliance = alliance
+        self.predicate = predicate
@@ -1,9 +1,14 @@
-from helpers.enum import EventTypes
+from helpers.enum import Dependency, EventTypes
 from .event import Event
 class TriggerEvent(Event):
     """
     Most commonly used when registering a Task.
+    @param depends_on game inputs read by the trigger, see Event.
+    @param tags units whose existence the trigger checks.
     """
-    def __init__(self, trigger, constant: bool = False, toggle: bool = False):
-        Event.__init__(self, get_status=trigger, event_type=EventTypes.TRIGGER, constant=constant, toggle=toggle)
+    __slots__ = ()
 
+    def __init__(self, trigger, constant: bool = False, toggle: bool = False,
+                 depends_on: Dependency = None, tags = ()):
+        Event.__init__(self, get_status=trigger, event_type=EventTypes.TRIGGER, constant=constant, toggle=toggle,
+                       depends_on=depends_on, tags=tags)
@@ -0,0 +1,72 @@
+from typing import Callable, Dict, List, Set, Tuple
+
+
+class AddonPlacementCache(object):
+    """
+    Whether the addon space next to a production building is free, keyed by building tag and position.
+    A result is kept until a structure appears or disappears close to the addon footprint. Footprints blocked by
+    the terrain (outside the map or not placeable) never become valid and are not checked again.
+    """
+
+    # Structures whose center is closer than this (on both axes) to a footprint point can cover it.
+    INVALIDATION_DISTANCE: float = 4.0
+
+    def __init__(self):
+        self.__entries: Dict[int, Tuple[Tuple[float, float], List, bool]] = {}
+        self.__blocked: Dict[int, Set[Tuple[float, float]]] = {}
+        # Number of checks answered and number of them that needed the grids.
+        self.checks = 0
+        self.grid_checks = 0
+
+    @property
+    def checks_saved(self) -> int:
+        return self.checks - self.grid_checks
+
+    def is_blocked(self, tag: int, position) -> bool:
+        """
+        :return: True when the terrain blocks the addon of the building at this position.
+        """
+        return (position[0], position[1]) in self.__blocked.get(tag, ())
+
+    def check(self, tag: int, position, footprint: Callable, terrain_allows: Callable, is_free: Callable) -> bool:
+        """
+        :param tag: Tag of the building.
+        :param position: Position of the building.
+        :param footprint: Returns the points covered by the addon of a building at a position.
+        :param terrain_allows: Whether the terrain allows building on a point. Must not change during the game.
+        :param is_free: Whether nothing stands on a point.
+        :return: True when the addon can be placed.
+        """
+        position = (position[0], position[1])
+        self.checks += 1
+        if self.is_blocked(tag, position):
+            return False
+        entry = self.__entries.get(tag)
+        if entry is not None and entry[0] == position:
+            return entry[2]
+
+        self.grid_checks += 1
+        points = footprint(position)
+        if not all(terrain_allows(point) for point in points):
+            self.__blocked.setdefault(tag, set()).add(position)
+            self.__entries.pop(tag, None)
+            return False
+        valid = all(is_free(point) for point in points)
+        self.__entries[tag] = (position, points, valid)
+        return valid
+
+    def invalidate_near(self, position, distance: float = INVALIDATION_DISTANCE) -> None:
+        """
+        Forget the results of the footprints around a structure that was placed or removed.
+        """
+        x, y = position[0], position[1]
+        stale = [
+            tag for tag, (_, points, _) in self.__entries.items()
+            if any(abs(point[0] - x) < distance and abs(point[1] - y) < distance for point in points)
+        ]
+        for tag in stale:
+            del self.__entries[tag]
+
+    def forget(self, tag: int) -> None:
+        self.__entries.pop(tag, None)
+        self.__blocked.pop(tag, None)
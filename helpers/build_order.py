@@ -0,0 +1,180 @@
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import inspect
+
+from sc2.dicts.unit_trained_from import UNIT_TRAINED_FROM
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.ids.upgrade_id import UpgradeId
+
+WORKER_TYPES: Set[UnitTypeId] = {UnitTypeId.SCV, UnitTypeId.DRONE, UnitTypeId.PROBE}
+
+# States of the nodes: evaluated on every run, waiting for a prerequisite, or done until a unit is lost.
+OPEN, BLOCKED, DONE = range(3)
+
+
+class BuildNode(object):
+    """
+    An item of the build order and how many of it are wanted.
+    :param item: UnitTypeId of a structure, add-on or unit, or UpgradeId.
+    :param count: Number wanted, or number wanted per ready structure of `per`.
+    :param requires: Items that must be ready before making the item. A set in it stands for any one of its items,
+                     e.g. {LAIR, HIVE}.
+    :param per: Type or set of types the count is multiplied by, e.g. 2 refineries per command center.
+    :param counts: Other types counted as the item, e.g. SUPPLYDEPOTLOWERED for SUPPLYDEPOT or HIVE for LAIR.
+    :param action: Plain or coroutine function without arguments making one more of the item, instead of the
+                   default: research for an upgrade, BotAI.build for a structure built by a worker and BotAI.train
+                   for anything else, on every idle producer up to the count.
+    :param near: Function (bot) -> Point2 a structure is placed near, by default 8 from the first townhall towards
+                 the map center.
+    :param placement_step: Placement step of BotAI.build.
+    """
+
+    __slots__ = ("item", "count", "requires", "per", "types", "action", "near", "placement_step", "index", "state")
+
+    def __init__(self, item, count: int = 1, requires: Iterable = (), per=None, counts: Iterable = (),
+                 action: Optional[Callable] = None, near: Optional[Callable] = None, placement_step: int = 2):
+        self.item = item
+        self.count = count
+        self.requires = [frozenset(required) if isinstance(required, (set, frozenset, list, tuple))
+                         else frozenset([required]) for required in requires]
+        self.per = frozenset(per) if isinstance(per, (set, frozenset, list, tuple)) else per
+        self.types = frozenset([item, *counts])
+        self.action = action
+        self.near = near
+        self.placement_step = placement_step
+        self.index = 0
+        self.state = OPEN
+
+    def __repr__(self) -> str:
+        return "BuildNode({}, {})".format(self.item.name, self.count)
+
+
+class BuildOrder(object):
+    """
+    A build order as a graph of nodes with prerequisites and target counts, for any race.
+    Only the open nodes are evaluated when the build order runs. A node waiting for a prerequisite is put aside
+    until an item it waits for is ready, and a node that reached its count until a unit it counts is lost (or a
+    structure its count is multiplied by is ready), so the finished part of the build order costs nothing.
+    The bot reports the units through unit_ready and unit_lost, see BaseBot.
+    :param nodes: The nodes by priority, the first nodes spend the resources first.
+    """
+
+    def __init__(self, nodes: Iterable[BuildNode]):
+        self.nodes: List[BuildNode] = list(nodes)
+        for index, node in enumerate(self.nodes):
+            node.index = index
+            node.state = OPEN
+        self.__open: List[BuildNode] = list(self.nodes)
+        # Nodes put aside, by the item whose readiness or loss wakes them.
+        self.__on_ready: Dict[object, List[BuildNode]] = {}
+        self.__on_lost: Dict[object, List[BuildNode]] = {}
+        # Number of node evaluations and of nodes woken up, over the whole game.
+        self.evaluations = 0
+        self.wake_ups = 0
+
+    @property
+    def open_nodes(self) -> List[BuildNode]:
+        return list(self.__open)
+
+    def __put_aside(self, node: BuildNode, state: int, on_ready: Iterable, on_lost: Iterable = ()) -> None:
+        node.state = state
+        self.__open.remove(node)
+        for waiting, items in ((self.__on_ready, on_ready), (self.__on_lost, on_lost)):
+            for item in items:
+                waiting.setdefault(item, []).append(node)
+
+    def __wake(self, waiting: Dict[object, List[BuildNode]], item) -> None:
+        nodes = waiting.pop(item, None)
+        if not nodes:
+            return
+        for node in nodes:
+            # A node waits on several items, it may have been woken already.
+            if node.state != OPEN:
+                node.state = OPEN
+                self.__open.append(node)
+                self.wake_ups += 1
+        self.__open.sort(key=lambda node: node.index)
+
+    def unit_ready(self, item) -> None:
+        """
+        A unit or structure of this type was finished, or an upgrade was researched.
+        """
+        self.__wake(self.__on_ready, item)
+
+    def unit_lost(self, type_id: UnitTypeId) -> None:
+        """
+        A unit or structure of this type was destroyed or changed to another type.
+        """
+        self.__wake(self.__on_lost, type_id)
+
+    @staticmethod
+    def ready_amount(bot, types) -> int:
+        """
+        :return: Number of ready units and structures of the types, or 1 when an upgrade is researched.
+        """
+        if isinstance(types, UpgradeId):
+            return int(types in bot.state.upgrades)
+        if isinstance(types, UnitTypeId):
+            types = (types,)
+        upgrades = [item for item in types if isinstance(item, UpgradeId)]
+        if upgrades:
+            return sum(int(upgrade in bot.state.upgrades) for upgrade in upgrades)
+        return len(bot.query.structures(types, ready=True)) + len(bot.query.units(types, ready=True))
+
+    def __missing(self, bot, node: BuildNode) -> Optional[frozenset]:
+        """
+        :return: The first prerequisite of the node that isn't ready, None when they all are.
+        """
+        for required in node.requires:
+            if not self.ready_amount(bot, required):
+                return required
+        return None
+
+    async def run(self, bot) -> None:
+        """
+        Evaluate the open nodes: put aside the nodes that wait on a prerequisite or are done, and make one more of
+        the items that are missing and affordable.
+        """
+        for node in list(self.__open):
+            self.evaluations += 1
+            missing = self.__missing(bot, node)
+            if missing is not None:
+                self.__put_aside(node, BLOCKED, missing)
+                continue
+
+            target = node.count
+            if node.per is not None:
+                target *= self.ready_amount(bot, node.per)
+            ready = self.ready_amount(bot, node.types)
+            if ready >= target:
+                # Upgrades are never lost. More structures of `per` raise the target.
+                lost = () if isinstance(node.item, UpgradeId) else node.types
+                per = () if node.per is None else node.per if isinstance(node.per, frozenset) else (node.per,)
+                self.__put_aside(node, DONE, per, lost)
+                continue
+            pending = bot.already_pending(node.item)
+            if isinstance(node.item, UpgradeId):
+                # The progress of the research.
+                pending = int(pending > 0)
+            if ready + pending >= target or not bot.can_afford(node.item):
+                continue
+
+            result = self.__make(bot, node, target - ready - pending)
+            if inspect.isawaitable(result):
+                await result
+
+    @staticmethod
+    def __make(bot, node: BuildNode, missing: int):
+        if node.action is not None:
+            return node.action()
+        if isinstance(node.item, UpgradeId):
+            return bot.research(node.item)
+        if UNIT_TRAINED_FROM.get(node.item, set()) & WORKER_TYPES:
+            if node.near is not None:
+                near = node.near(bot)
+            elif bot.townhalls:
+                near = bot.townhalls.first.position.towards(bot.game_info.map_center, 8)
+            else:
+                return None
+            return bot.build(node.item, near=near, placement_step=node.placement_step)
+        return bot.train(node.item, missing)
@@ -0,0 +1,140 @@
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from helpers.enum import EventTypes
+
+# Game loops in one second of game time on the faster speed.
+LOOPS_PER_SECOND: float = 22.4
+
+
+class Routine(object):
+    """
+    A routine of the bot step and how often it runs.
+    :param function: Plain or coroutine function without arguments, usually a bound method of the bot.
+    :param cadence: Game loops between two runs. 1 runs it on every step.
+    :param offset: Game loops the schedule is shifted by. Routines with the same cadence are spread evenly
+    over the cadence when None.
+    :param wake_on: Events that make the routine run on the next step, whatever its cadence.
+    :param concurrent: The routine doesn't depend on the routines around it. Consecutive concurrent routines
+    that are due run together, see CadenceScheduler.due.
+    """
+
+    def __init__(self, function: Callable, cadence: int = 1, offset: Optional[int] = None,
+                 wake_on: Iterable[EventTypes] = (), concurrent: bool = False):
+        self.function = function
+        self.concurrent = concurrent
+        self.cadence = max(1, int(cadence))
+        self.offset = offset
+        self.wake_on = frozenset(wake_on)
+        self.woken = False
+        self.last_slot: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        return getattr(self.function, "__name__", repr(self.function))
+
+    def is_due(self, game_loop: int) -> bool:
+        return self.woken or (game_loop + self.offset) // self.cadence != self.last_slot
+
+    def mark_run(self, game_loop: int) -> None:
+        self.woken = False
+        self.last_slot = (game_loop + self.offset) // self.cadence
+
+
+class CadenceScheduler(object):
+    """
+    Picks the routines that are due on a step. A routine runs once per window of `cadence` game loops, so the
+    schedule holds whatever the number of game loops between two steps. Routines keep their registration order.
+    """
+
+    def __init__(self, routines: List[Routine]):
+        self.__routines = list(routines)
+        self.__woken_by: Dict[EventTypes, List[Routine]] = {}
+        for routine in self.__routines:
+            for event_type in routine.wake_on:
+                self.__woken_by.setdefault(event_type, []).append(routine)
+        self.__stagger()
+        self.steps = 0
+        self.calls = 0
+        self.skipped = 0
+        self.wake_ups = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def __stagger(self) -> None:
+        by_cadence: Dict[int, List[Routine]] = {}
+        for routine in self.__routines:
+            if routine.offset is None:
+                by_cadence.setdefault(routine.cadence, []).append(routine)
+        for cadence, routines in by_cadence.items():
+            for index, routine in enumerate(routines):
+                routine.offset = index * cadence // len(routines)
+
+    def __len__(self) -> int:
+        return len(self.__routines)
+
+    @property
+    def routines(self) -> List[Routine]:
+        return list(self.__routines)
+
+    def wake_events(self) -> Set[EventTypes]:
+        return set(self.__woken_by.keys())
+
+    def wake(self, event_type: EventTypes) -> None:
+        for routine in self.__woken_by.get(event_type, ()):
+            if not routine.woken:
+                routine.woken = True
+                self.wake_ups += 1
+
+    def reset(self) -> None:
+        """
+        Forget the last runs, for a new game.
+        """
+        for routine in self.__routines:
+            routine.woken = False
+            routine.last_slot = None
+
+    def due(self, game_loop: int) -> List:
+        """
+        :return: The functions to run on this step, in order. Consecutive concurrent routines that are due are
+        grouped in a list. They are considered run.
+        """
+        functions = []
+        group: List[Callable] = []
+        calls = 0
+        for routine in self.__routines:
+            if not routine.is_due(game_loop):
+                continue
+            routine.mark_run(game_loop)
+            calls += 1
+            if routine.concurrent:
+                group.append(routine.function)
+                continue
+            if group:
+                functions.append(group if len(group) > 1 else group[0])
+                group = []
+            functions.append(routine.function)
+        if group:
+            functions.append(group if len(group) > 1 else group[0])
+        self.steps += 1
+        self.calls += calls
+        self.skipped += len(self.__routines) - calls
+        return functions
+
+    def record_step(self, elapsed: float) -> None:
+        """
+        Record the time spent running the routines of a step.
+        """
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+
+    def report(self) -> Dict[str, float]:
+        return {
+            "steps": self.steps,
+            "calls": self.calls,
+            "skipped": self.skipped,
+            "wake_ups": self.wake_ups,
+            "calls_per_step": self.calls / self.steps if self.steps else 0.0,
+            "mean_step_ms": self.total_time / self.steps * 1000 if self.steps else 0.0,
+            "max_step_ms": self.max_time * 1000,
+        }
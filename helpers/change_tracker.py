@@ -0,0 +1,96 @@
+from typing import Dict, Iterable, Optional, Set
+
+from helpers.enum import Dependency
+
+_INPUTS = tuple(int(flag) for flag in
+                (Dependency.RESOURCES, Dependency.UNITS, Dependency.SUPPLY, Dependency.TIME, Dependency.UPGRADES))
+_UNITS = int(Dependency.UNITS)
+
+
+class ChangeTracker(object):
+    """
+    Keeps a version number of every game input a trigger can depend on (see Dependency).
+    The version grows every time an input changes, so a trigger only has to remember the version it was
+    evaluated at to know whether its inputs changed since.
+    Unit tags are only followed once a trigger asked about them, and until the unit is removed.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.__game_loop: Optional[int] = None
+        self.__values: Dict[int, object] = {}
+        self.__changed_at: Dict[int, int] = {flag: 0 for flag in _INPUTS}
+        # Last change of the inputs of a dependency mask, cleared when the version grows.
+        self.__latest: Dict[int, int] = {}
+        self.__watched: Set[int] = set()
+        self.__tag_changed_at: Dict[int, int] = {}
+        # Number of trigger evaluations run and avoided.
+        self.evaluations = 0
+        self.skipped_evaluations = 0
+
+    def refresh(self, bot, game_loop: int) -> None:
+        """
+        Compare the inputs of the current observation with the previous one.
+        """
+        if game_loop == self.__game_loop:
+            return
+        self.__game_loop = game_loop
+        values = {
+            int(Dependency.RESOURCES): (bot.minerals, bot.vespene),
+            int(Dependency.SUPPLY): (bot.supply_used, bot.supply_cap),
+            int(Dependency.TIME): game_loop,
+            int(Dependency.UPGRADES): len(bot.state.upgrades),
+        }
+        changed = [flag for flag, value in values.items() if self.__values.get(flag) != value]
+        if changed:
+            self.version += 1
+            self.__latest.clear()
+            for flag in changed:
+                self.__values[flag] = values[flag]
+                self.__changed_at[flag] = self.version
+
+    def mark_units(self, tags: Iterable[int], removed: Iterable[int] = ()) -> None:
+        """
+        Record units that appeared or disappeared.
+        :param tags: Units that appeared.
+        :param removed: Units that disappeared, they are no longer followed.
+        """
+        tags, removed = list(tags), list(removed)
+        if not tags and not removed:
+            return
+        self.version += 1
+        self.__latest.clear()
+        self.__changed_at[_UNITS] = self.version
+        for tag in tags:
+            if tag in self.__watched:
+                self.__tag_changed_at[tag] = self.version
+        for tag in removed:
+            self.__watched.discard(tag)
+            self.__tag_changed_at.pop(tag, None)
+
+    def watch(self, tags: Iterable[int]) -> None:
+        self.__watched.update(tags)
+
+    @staticmethod
+    def mask(depends_on: Dependency, tags: Iterable[int] = ()) -> int:
+        """
+        :return: The inputs to compare for a trigger. With tags, the existence of the other units doesn't matter.
+        """
+        return int(depends_on) & ~_UNITS if tags else int(depends_on)
+
+    def changed_since(self, version: int, mask: int, tags: Iterable[int] = ()) -> bool:
+        """
+        :param version: Version the trigger was evaluated at.
+        :param mask: Inputs of the trigger, see ChangeTracker.mask.
+        :param tags: Units whose existence the trigger checks, a unit no longer followed was removed.
+        :return: True when one of the inputs changed after `version`.
+        """
+        latest = self.__latest.get(mask)
+        if latest is None:
+            latest = self.__latest[mask] = max([self.__changed_at[flag] for flag in _INPUTS if mask & flag] or [0])
+        if latest > version:
+            return True
+        for tag in tags:
+            if tag not in self.__watched or self.__tag_changed_at.get(tag, 0) > version:
+                return True
+        return False
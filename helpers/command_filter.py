@@ -0,0 +1,58 @@
+from typing import Dict, Optional, Tuple
+
+# Game loops an identical command is considered redundant for (half a second).
+DEFAULT_COMMAND_WINDOW: int = 11
+
+
+def target_key(target) -> Optional[object]:
+    """
+    :return: Comparable form of a command or order target: the tag of a unit, rounded (x, y) of a position.
+    """
+    if target is None:
+        return None
+    if isinstance(target, int):
+        return target
+    tag = getattr(target, "tag", None)
+    if tag is not None:
+        return tag
+    return round(float(target[0]), 1), round(float(target[1]), 1)
+
+
+class CommandFilter(object):
+    """
+    Remembers the last command sent to every unit and tells the commands that would change nothing:
+    the same ability on the same target as the order the unit is carrying out, or as a command sent to it less
+    than `window` game loops ago.
+    :param window: Game loops a command sent to a unit stays in memory.
+    """
+
+    def __init__(self, window: int = DEFAULT_COMMAND_WINDOW):
+        self.window = window
+        # Unit tag -> (ability, target key, queued, game loop sent).
+        self.__last: Dict[int, Tuple[object, object, bool, int]] = {}
+        # Over the whole game.
+        self.sent = 0
+        self.suppressed = 0
+
+    def is_redundant(self, tag: int, ability, target, queue: bool, game_loop: int, orders=()) -> bool:
+        """
+        Counts the command as suppressed when it is redundant.
+        :param orders: Current orders of the unit, the first one is compared when the command isn't queued.
+        """
+        key = target_key(target)
+        last = self.__last.get(tag)
+        redundant = last is not None and last[0] == ability and last[1] == key and last[2] == queue and \
+            game_loop - last[3] < self.window
+        if not redundant and not queue and orders:
+            order = orders[0]
+            redundant = order.ability.id == ability and target_key(order.target) == key
+        if redundant:
+            self.suppressed += 1
+        return redundant
+
+    def record(self, tag: int, ability, target, queue: bool, game_loop: int) -> None:
+        self.__last[tag] = (ability, target_key(target), queue, game_loop)
+        self.sent += 1
+
+    def forget(self, tag: int) -> None:
+        self.__last.pop(tag, None)
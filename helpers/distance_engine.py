@@ -0,0 +1,94 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class DistanceEngine(object):
+    """
+    Batched distance queries between groups of units.
+    The positions of a unit group of the bot (e.g. "enemy_units", "workers") are packed into a contiguous
+    (n, 2) array the first time the group is used in a step. Queries also accept a Units/list of units,
+    a single unit or point, or an array of positions.
+    """
+
+    def __init__(self):
+        self.__bot = None
+        self.__game_loop: Optional[int] = None
+        self.__positions: Dict[str, np.ndarray] = {}
+
+    def refresh(self, bot, game_loop: int) -> None:
+        if game_loop != self.__game_loop or bot is not self.__bot:
+            self.__bot = bot
+            self.__game_loop = game_loop
+            self.__positions.clear()
+
+    @staticmethod
+    def pack(units) -> np.ndarray:
+        """
+        :return: The positions of the units (or points) as a float (n, 2) array.
+        """
+        positions = [unit.position if hasattr(unit, "position") else unit for unit in units]
+        if not positions:
+            return np.empty((0, 2))
+        return np.array([(position[0], position[1]) for position in positions], dtype=float)
+
+    def positions(self, source) -> np.ndarray:
+        """
+        :param source: Group name, units, a single unit or point, or an array of positions.
+        """
+        if isinstance(source, str):
+            packed = self.__positions.get(source)
+            if packed is None:
+                packed = self.__positions[source] = self.pack(getattr(self.__bot, source))
+            return packed
+        if isinstance(source, np.ndarray):
+            return source.reshape(-1, 2)
+        if hasattr(source, "position") or (
+            isinstance(source, tuple) and len(source) == 2 and all(isinstance(value, (int, float)) for value in source)
+        ):
+            return self.pack([source])
+        return self.pack(source)
+
+    def squared_distance_matrix(self, a, b) -> np.ndarray:
+        a, b = self.positions(a), self.positions(b)
+        difference = a[:, np.newaxis, :] - b[np.newaxis, :, :]
+        return np.einsum("ijk,ijk->ij", difference, difference)
+
+    def distance_matrix(self, a, b) -> np.ndarray:
+        """
+        :return: (len(a), len(b)) array with the distance between every pair.
+        """
+        return np.sqrt(self.squared_distance_matrix(a, b))
+
+    def min_distances(self, a, b) -> np.ndarray:
+        """
+        :return: For every element of `a`, the distance to the closest element of `b` (inf when b is empty).
+        """
+        squared = self.squared_distance_matrix(a, b)
+        if squared.shape[1] == 0:
+            return np.full(squared.shape[0], np.inf)
+        return np.sqrt(squared.min(axis=1))
+
+    def closest_indexes(self, a, b) -> np.ndarray:
+        """
+        :return: For every element of `a`, the index in `b` of the closest element. `b` must not be empty.
+        """
+        return self.squared_distance_matrix(a, b).argmin(axis=1)
+
+    def within(self, a, b, threshold: float) -> np.ndarray:
+        """
+        :return: (len(a), len(b)) boolean mask of the pairs strictly closer than `threshold`.
+        """
+        return self.squared_distance_matrix(a, b) < threshold * threshold
+
+    def any_within(self, a, b, threshold: float) -> np.ndarray:
+        """
+        :return: For every element of `a`, whether any element of `b` is strictly closer than `threshold`.
+        """
+        return self.within(a, b, threshold).any(axis=1)
+
+    def within_indexes(self, a, b, threshold: float) -> List[np.ndarray]:
+        """
+        :return: For every element of `a`, the indexes in `b` of the elements strictly closer than `threshold`.
+        """
+        return [np.flatnonzero(row) for row in self.within(a, b, threshold)]
@@ -1,4 +1,4 @@
-from enum import IntEnum
+from enum import IntEnum, IntFlag
 
 class EventTypes(IntEnum):
     EMPTY = 0,
@@ -6,7 +6,8 @@ class EventTypes(IntEnum):
     CONSTANT = 2,
     NEW_UNIT = 3,
     REMOVED_UNIT = 4,
-    UPGRADE = 5
+    UPGRADE = 5,
+    STRUCTURE_COMPLETE = 6
 
 class TaskStatus(IntEnum):
     DONE = 1,
@@ -19,3 +20,14 @@ class States(IntEnum):
     WORKER_MINERALS = 3,
     WORKER_GAS = 4,
     ARMY_DEFENDING = 5
+
+class Dependency(IntFlag):
+    """
+    Game inputs a trigger reads. A trigger is only evaluated again after one of them changed.
+    """
+    NONE = 0,
+    RESOURCES = 1,
+    UNITS = 2,
+    SUPPLY = 4,
+    TIME = 8,
+    UPGRADES = 16
@@ -0,0 +1,125 @@
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+import math
+
+
+class ExpansionPlanner(object):
+    """
+    Expansion sites ranked once by walking distance, with the sites taken by structures kept up to date from the
+    structure events. The closest free site is found in constant time: a pointer stays on the first free site of
+    the ranking, it moves forward when that site gets taken and back when a closer site is freed.
+    An enemy structure destroyed out of vision is never reported, so the enemy claims are also dropped when their
+    site is seen without them (see expire_enemy_claims).
+    :param sites: Townhall positions of the bases.
+    :param distances: Walking distance to every site, unreachable sites (inf) are left out.
+    """
+
+    # A structure closer than this to a site prevents building a townhall on it.
+    OCCUPIED_DISTANCE: float = 4.0
+    # Game loops a site stays reserved after a worker was sent to build on it (30 seconds).
+    RESERVATION_LOOPS: int = 672
+
+    def __init__(self, sites: Sequence, distances: Sequence[float]):
+        order = sorted((index for index in range(len(sites)) if math.isfinite(distances[index])),
+                       key=lambda index: distances[index])
+        self.__ranking: List = [sites[index] for index in order]
+        self.__rank: Dict = {site: rank for rank, site in enumerate(self.__ranking)}
+        # Tags of the structures on every site, and the site of every structure tag.
+        self.__occupants: Dict = {site: set() for site in self.__ranking}
+        self.__site_of: Dict[int, object] = {}
+        # Tags of the enemy structures among the occupants.
+        self.__enemy: Set[int] = set()
+        self.__reserved: Dict = {}
+        self.__next = 0
+
+    def __len__(self) -> int:
+        return len(self.__ranking)
+
+    @property
+    def ranking(self) -> List:
+        return list(self.__ranking)
+
+    def site_near(self, position) -> Optional[object]:
+        """
+        :return: The site a structure at this position would take, or None.
+        """
+        limit = ExpansionPlanner.OCCUPIED_DISTANCE ** 2
+        for site in self.__ranking:
+            if (site[0] - position[0]) ** 2 + (site[1] - position[1]) ** 2 < limit:
+                return site
+        return None
+
+    def is_free(self, site) -> bool:
+        return not self.__occupants.get(site)
+
+    def occupy(self, tag: int, position, enemy: bool = False) -> None:
+        """
+        Record a structure, own or enemy. Structures away from every site are ignored.
+        """
+        if tag in self.__site_of:
+            return
+        site = self.site_near(position)
+        if site is None:
+            return
+        self.__occupants[site].add(tag)
+        self.__site_of[tag] = site
+        if enemy:
+            self.__enemy.add(tag)
+        self.__reserved.pop(site, None)
+        while self.__next < len(self.__ranking) and self.__occupants[self.__ranking[self.__next]]:
+            self.__next += 1
+
+    def release(self, tag: int) -> None:
+        """
+        Forget a structure that was destroyed.
+        """
+        site = self.__site_of.pop(tag, None)
+        if site is None:
+            return
+        self.__enemy.discard(tag)
+        occupants: Set[int] = self.__occupants[site]
+        occupants.discard(tag)
+        if not occupants:
+            self.__next = min(self.__next, self.__rank[site])
+
+    @property
+    def enemy_claims(self) -> int:
+        """
+        :return: Number of enemy structures taking a site.
+        """
+        return len(self.__enemy)
+
+    def expire_enemy_claims(self, is_visible: Callable, present_tags: Set[int]) -> int:
+        """
+        Forget the enemy structures of the sites in vision that are no longer there.
+        :param is_visible: Whether a site is in vision.
+        :param present_tags: Tags of the enemy structures of the observation.
+        :return: Number of structures forgotten.
+        """
+        stale = [tag for tag in self.__enemy if tag not in present_tags and is_visible(self.__site_of[tag])]
+        for tag in stale:
+            self.release(tag)
+        return len(stale)
+
+    def reserve(self, site, game_loop: int) -> None:
+        """
+        Keep a site from being handed out again while a worker is on the way.
+        """
+        self.__reserved[site] = game_loop + ExpansionPlanner.RESERVATION_LOOPS
+
+    def unreserve(self, site) -> None:
+        """
+        Hand a reserved site out again, the worker sent to build on it gave up.
+        """
+        self.__reserved.pop(site, None)
+
+    def next_site(self, game_loop: int = 0) -> Optional[object]:
+        """
+        :return: The closest free site, or None when every site is taken or the closest one is reserved.
+        """
+        if self.__next >= len(self.__ranking):
+            return None
+        site = self.__ranking[self.__next]
+        if self.__reserved.get(site, -1) > game_loop:
+            return None
+        return site
@@ -0,0 +1,339 @@
+"""
+Game data of the local game (see helpers.local_server): the units, abilities and upgrades it knows about.
+Costs follow the conventions of the real game data, so sc2.game_data derives the same costs from them: morphs
+cost the total of their chain (Orbital Command 550) and Zerg structures include the Drone (Spawning Pool 250).
+"""
+from typing import Dict, Optional, Set, Tuple
+
+from s2clientprotocol import data_pb2 as data_pb
+from s2clientprotocol import sc2api_pb2 as sc_pb
+from sc2.data import Attribute, Race
+from sc2.dicts.generic_redirect_abilities import GENERIC_REDIRECT_ABILITIES
+from sc2.dicts.unit_research_abilities import RESEARCH_INFO
+from sc2.dicts.unit_tech_alias import UNIT_TECH_ALIAS
+from sc2.dicts.unit_train_build_abilities import TRAIN_INFO
+from sc2.dicts.unit_unit_alias import UNIT_UNIT_ALIAS
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.ids.upgrade_id import UpgradeId
+
+GAME_LOOPS_PER_SECOND: float = 22.4
+
+GROUND, AIR, ANY = data_pb.Weapon.Ground, data_pb.Weapon.Air, data_pb.Weapon.Any
+LIGHT, ARMORED, BIOLOGICAL, MECHANICAL, MASSIVE, STRUCTURE = (
+    Attribute.Light.value, Attribute.Armored.value, Attribute.Biological.value, Attribute.Mechanical.value,
+    Attribute.Massive.value, Attribute.Structure.value,
+)
+
+
+class UnitStats(object):
+    """
+    :param build_time: Seconds.
+    :param speed: Distance per second.
+    :param footprint: Side of the square a structure covers, in cells.
+    :param weapon: (damage, attacks, cooldown in seconds, range, target type).
+    """
+
+    __slots__ = ("race", "minerals", "vespene", "food", "food_provided", "build_time", "health", "speed", "radius",
+                 "footprint", "weapon", "attributes", "flying")
+
+    def __init__(self, race: Race, minerals: int, vespene: int = 0, food: float = 0, build_time: float = 20,
+                 health: float = 100, speed: float = 0, radius: float = 0.5, footprint: int = 0,
+                 food_provided: float = 0, weapon: Optional[Tuple] = None, attributes: Tuple = (),
+                 flying: bool = False):
+        self.race = race
+        self.minerals = minerals
+        self.vespene = vespene
+        self.food = food
+        self.food_provided = food_provided
+        self.build_time = build_time
+        self.health = health
+        self.speed = speed
+        self.radius = radius if not footprint else footprint * 0.55
+        self.footprint = footprint
+        self.weapon = weapon
+        self.attributes = attributes + ((STRUCTURE,) if footprint else ())
+        self.flying = flying
+
+    @property
+    def is_structure(self) -> bool:
+        return bool(self.footprint)
+
+    @property
+    def dps(self) -> float:
+        if self.weapon is None:
+            return 0.0
+        damage, attacks, cooldown, weapon_range, target = self.weapon
+        return damage * attacks / cooldown
+
+
+T, Z, P, N = Race.Terran, Race.Zerg, Race.Protoss, Race.NoRace
+U = UnitTypeId
+
+UNIT_STATS: Dict[UnitTypeId, UnitStats] = {
+    # Terran
+    U.SCV: UnitStats(T, 50, 0, 1, 12, 45, 3.94, 0.375, weapon=(5, 1, 1.07, 0.1, GROUND),
+                     attributes=(LIGHT, BIOLOGICAL, MECHANICAL)),
+    U.MULE: UnitStats(T, 0, 0, 0, 0, 60, 3.94, 0.375, attributes=(LIGHT, MECHANICAL)),
+    U.MARINE: UnitStats(T, 50, 0, 1, 18, 45, 3.15, 0.375, weapon=(6, 1, 0.61, 5, ANY),
+                        attributes=(LIGHT, BIOLOGICAL)),
+    U.MARAUDER: UnitStats(T, 100, 25, 2, 21, 125, 3.15, 0.5625, weapon=(10, 1, 1.07, 6, GROUND),
+                          attributes=(ARMORED, BIOLOGICAL)),
+    U.REAPER: UnitStats(T, 50, 50, 1, 32, 60, 5.25, 0.375, weapon=(4, 2, 0.79, 5, GROUND),
+                        attributes=(LIGHT, BIOLOGICAL)),
+    U.HELLION: UnitStats(T, 100, 0, 2, 21, 90, 5.95, 0.625, weapon=(8, 1, 1.79, 5, GROUND),
+                         attributes=(LIGHT, MECHANICAL)),
+    U.SIEGETANK: UnitStats(T, 150, 125, 3, 32, 175, 3.15, 0.875, weapon=(15, 1, 1.04, 7, GROUND),
+                           attributes=(ARMORED, MECHANICAL)),
+    U.VIKINGFIGHTER: UnitStats(T, 150, 75, 2, 30, 135, 3.85, 0.75, weapon=(10, 2, 1.43, 9, AIR),
+                               attributes=(ARMORED, MECHANICAL), flying=True),
+    U.MEDIVAC: UnitStats(T, 100, 100, 2, 30, 150, 3.5, 0.75, attributes=(ARMORED, MECHANICAL), flying=True),
+    U.BATTLECRUISER: UnitStats(T, 400, 300, 6, 64, 550, 2.62, 1.25, weapon=(8, 1, 0.16, 6, ANY),
+                               attributes=(ARMORED, MECHANICAL, MASSIVE), flying=True),
+    U.COMMANDCENTER: UnitStats(T, 400, 0, 0, 71, 1500, footprint=5, food_provided=15, attributes=(ARMORED,)),
+    U.ORBITALCOMMAND: UnitStats(T, 550, 0, 0, 25, 1500, footprint=5, food_provided=15, attributes=(ARMORED,)),
+    U.PLANETARYFORTRESS: UnitStats(T, 550, 150, 0, 36, 1500, footprint=5, food_provided=15,
+                                   weapon=(40, 1, 1.43, 6, GROUND), attributes=(ARMORED,)),
+    U.SUPPLYDEPOT: UnitStats(T, 100, 0, 0, 21, 400, footprint=2, food_provided=8, attributes=(ARMORED,)),
+    U.SUPPLYDEPOTLOWERED: UnitStats(T, 100, 0, 0, 21, 400, footprint=2, food_provided=8, attributes=(ARMORED,)),
+    U.REFINERY: UnitStats(T, 75, 0, 0, 21, 500, footprint=3, attributes=(ARMORED,)),
+    U.BARRACKS: UnitStats(T, 150, 0, 0, 46, 1000, footprint=3, attributes=(ARMORED,)),
+    U.ENGINEERINGBAY: UnitStats(T, 125, 0, 0, 25, 850, footprint=3, attributes=(ARMORED,)),
+    U.BUNKER: UnitStats(T, 100, 0, 0, 29, 400, footprint=3, attributes=(ARMORED,)),
+    U.MISSILETURRET: UnitStats(T, 100, 0, 0, 18, 250, footprint=2, weapon=(12, 2, 0.61, 7, AIR),
+                               attributes=(ARMORED,)),
+    U.FACTORY: UnitStats(T, 150, 100, 0, 43, 1250, footprint=3, attributes=(ARMORED,)),
+    U.STARPORT: UnitStats(T, 150, 100, 0, 36, 1300, footprint=3, attributes=(ARMORED,)),
+    U.ARMORY: UnitStats(T, 150, 100, 0, 46, 750, footprint=3, attributes=(ARMORED,)),
+    U.FUSIONCORE: UnitStats(T, 150, 150, 0, 46, 750, footprint=3, attributes=(ARMORED,)),
+    U.TECHLAB: UnitStats(T, 50, 25, 0, 18, 400, footprint=2, attributes=(ARMORED,)),
+    U.REACTOR: UnitStats(T, 50, 50, 0, 36, 400, footprint=2, attributes=(ARMORED,)),
+    U.BARRACKSTECHLAB: UnitStats(T, 50, 25, 0, 18, 400, footprint=2, attributes=(ARMORED,)),
+    U.FACTORYTECHLAB: UnitStats(T, 50, 25, 0, 18, 400, footprint=2, attributes=(ARMORED,)),
+    U.STARPORTTECHLAB: UnitStats(T, 50, 25, 0, 18, 400, footprint=2, attributes=(ARMORED,)),
+    U.BARRACKSREACTOR: UnitStats(T, 50, 50, 0, 36, 400, footprint=2, attributes=(ARMORED,)),
+    U.FACTORYREACTOR: UnitStats(T, 50, 50, 0, 36, 400, footprint=2, attributes=(ARMORED,)),
+    U.STARPORTREACTOR: UnitStats(T, 50, 50, 0, 36, 400, footprint=2, attributes=(ARMORED,)),
+    # Zerg
+    U.LARVA: UnitStats(Z, 0, 0, 0, 0, 10, 0.79, 0.25, attributes=(LIGHT, BIOLOGICAL)),
+    U.EGG: UnitStats(Z, 0, 0, 0, 0, 200, 0, 0.4, attributes=(BIOLOGICAL,)),
+    U.DRONE: UnitStats(Z, 50, 0, 1, 12, 40, 3.94, 0.375, weapon=(5, 1, 1.07, 0.1, GROUND),
+                       attributes=(LIGHT, BIOLOGICAL)),
+    U.OVERLORD: UnitStats(Z, 100, 0, 0, 18, 200, 0.902, 1.0, food_provided=8, attributes=(ARMORED, BIOLOGICAL),
+                          flying=True),
+    U.ZERGLING: UnitStats(Z, 25, 0, 0.5, 17, 35, 4.13, 0.375, weapon=(5, 1, 0.497, 0.1, GROUND),
+                          attributes=(LIGHT, BIOLOGICAL)),
+    U.QUEEN: UnitStats(Z, 150, 0, 2, 36, 175, 1.31, 0.875, weapon=(8, 1, 0.71, 6, ANY), attributes=(BIOLOGICAL,)),
+    U.ROACH: UnitStats(Z, 75, 25, 2, 19, 145, 3.15, 0.625, weapon=(16, 1, 1.43, 4, GROUND),
+                       attributes=(ARMORED, BIOLOGICAL)),
+    U.HYDRALISK: UnitStats(Z, 100, 50, 2, 24, 90, 3.15, 0.625, weapon=(12, 1, 0.59, 5, ANY),
+                           attributes=(LIGHT, BIOLOGICAL)),
+    U.MUTALISK: UnitStats(Z, 100, 100, 2, 24, 120, 5.6, 0.5, weapon=(9, 1, 1.09, 3, ANY),
+                          attributes=(LIGHT, BIOLOGICAL), flying=True),
+    U.CORRUPTOR: UnitStats(Z, 150, 100, 2, 29, 200, 4.725, 0.625, weapon=(14, 1, 1.36, 6, AIR),
+                           attributes=(ARMORED, BIOLOGICAL), flying=True),
+    U.BROODLORD: UnitStats(Z, 300, 250, 4, 24, 225, 1.97, 1.0, weapon=(20, 1, 1.79, 10, GROUND),
+                           attributes=(ARMORED, BIOLOGICAL, MASSIVE), flying=True),
+    U.HATCHERY: UnitStats(Z, 350, 0, 0, 71, 1500, footprint=5, food_provided=6, attributes=(ARMORED, BIOLOGICAL)),
+    U.LAIR: UnitStats(Z, 500, 100, 0, 57, 2000, footprint=5, food_provided=6, attributes=(ARMORED, BIOLOGICAL)),
+    U.HIVE: UnitStats(Z, 700, 250, 0, 71, 2500, footprint=5, food_provided=6, attributes=(ARMORED, BIOLOGICAL)),
+    U.EXTRACTOR: UnitStats(Z, 75, 0, 0, 21, 500, footprint=3, attributes=(ARMORED, BIOLOGICAL)),
+    U.SPAWNINGPOOL: UnitStats(Z, 250, 0, 0, 46, 1000, footprint=3, attributes=(ARMORED, BIOLOGICAL)),
+    U.EVOLUTIONCHAMBER: UnitStats(Z, 125, 0, 0, 25, 750, footprint=3, attributes=(ARMORED, BIOLOGICAL)),
+    U.ROACHWARREN: UnitStats(Z, 200, 0, 0, 39, 850, footprint=3, attributes=(ARMORED, BIOLOGICAL)),
+    U.HYDRALISKDEN: UnitStats(Z, 150, 100, 0, 29, 850, footprint=3, attributes=(ARMORED, BIOLOGICAL)),
+    U.INFESTATIONPIT: UnitStats(Z, 150, 100, 0, 36, 850, footprint=3, attributes=(ARMORED, BIOLOGICAL)),
+    U.SPIRE: UnitStats(Z, 250, 200, 0, 71, 850, footprint=2, attributes=(ARMORED, BIOLOGICAL)),
+    U.GREATERSPIRE: UnitStats(Z, 350, 350, 0, 71, 1000, footprint=2, attributes=(ARMORED, BIOLOGICAL)),
+    U.SPINECRAWLER: UnitStats(Z, 150, 0, 0, 36, 300, footprint=2, weapon=(25, 1, 1.32, 7, GROUND),
+                              attributes=(ARMORED, BIOLOGICAL)),
+    U.SPORECRAWLER: UnitStats(Z, 125, 0, 0, 21, 400, footprint=2, weapon=(15, 1, 0.61, 7, AIR),
+                              attributes=(ARMORED, BIOLOGICAL)),
+    # Protoss
+    U.PROBE: UnitStats(P, 50, 0, 1, 12, 40, 3.94, 0.375, weapon=(5, 1, 1.07, 0.1, GROUND),
+                       attributes=(LIGHT, MECHANICAL)),
+    U.ZEALOT: UnitStats(P, 100, 0, 2, 27, 150, 3.15, 0.5, weapon=(8, 2, 0.86, 0.1, GROUND),
+                        attributes=(LIGHT, BIOLOGICAL)),
+    U.STALKER: UnitStats(P, 125, 50, 2, 30, 160, 4.13, 0.625, weapon=(13, 1, 1.34, 6, ANY),
+                         attributes=(ARMORED, MECHANICAL)),
+    U.NEXUS: UnitStats(P, 400, 0, 0, 71, 2000, footprint=5, food_provided=15, attributes=(ARMORED,)),
+    U.PYLON: UnitStats(P, 100, 0, 0, 18, 400, footprint=2, food_provided=8, attributes=(ARMORED,)),
+    U.ASSIMILATOR: UnitStats(P, 75, 0, 0, 21, 600, footprint=3, attributes=(ARMORED,)),
+    U.GATEWAY: UnitStats(P, 150, 0, 0, 46, 1000, footprint=3, attributes=(ARMORED,)),
+    U.FORGE: UnitStats(P, 150, 0, 0, 32, 800, footprint=3, attributes=(ARMORED,)),
+    U.CYBERNETICSCORE: UnitStats(P, 150, 0, 0, 36, 1100, footprint=3, attributes=(ARMORED,)),
+    U.PHOTONCANNON: UnitStats(P, 150, 0, 0, 29, 300, footprint=2, weapon=(20, 1, 0.89, 7, ANY),
+                              attributes=(ARMORED,)),
+    # Resources
+    U.MINERALFIELD: UnitStats(N, 0, 0, 0, 0, 0, radius=1.125),
+    U.VESPENEGEYSER: UnitStats(N, 0, 0, 0, 0, 0, radius=1.8125),
+}
+
+WORKERS: Dict[Race, UnitTypeId] = {T: U.SCV, Z: U.DRONE, P: U.PROBE}
+TOWNHALLS: Dict[Race, UnitTypeId] = {T: U.COMMANDCENTER, Z: U.HATCHERY, P: U.NEXUS}
+GAS_BUILDINGS: Set[UnitTypeId] = {U.REFINERY, U.EXTRACTOR, U.ASSIMILATOR}
+TOWNHALL_TYPES: Set[UnitTypeId] = {U.COMMANDCENTER, U.ORBITALCOMMAND, U.PLANETARYFORTRESS, U.HATCHERY, U.LAIR,
+                                   U.HIVE, U.NEXUS}
+# Structures of the built-in player at its start location, offset from its townhall, and the army it trains.
+OPPONENT_BASES: Dict[Race, Tuple] = {
+    T: (((-7.0, 2.0), U.SUPPLYDEPOT), ((-6.5, 6.5), U.BARRACKS), ((2.0, 7.0), U.SUPPLYDEPOT)),
+    Z: (((-6.5, 6.5), U.SPAWNINGPOOL), ((4.0, 7.0), U.SPINECRAWLER)),
+    P: (((-7.0, 2.0), U.PYLON), ((-6.5, 6.5), U.GATEWAY), ((4.0, 7.0), U.PHOTONCANNON)),
+}
+OPPONENT_ARMY: Dict[Race, UnitTypeId] = {T: U.MARINE, Z: U.ZERGLING, P: U.ZEALOT}
+
+# Addon abilities, which TRAIN_INFO doesn't list: ability -> (structure, addon).
+ADDON_ABILITIES: Dict[AbilityId, Tuple[UnitTypeId, UnitTypeId]] = {
+    AbilityId.BUILD_TECHLAB_BARRACKS: (U.BARRACKS, U.BARRACKSTECHLAB),
+    AbilityId.BUILD_TECHLAB_FACTORY: (U.FACTORY, U.FACTORYTECHLAB),
+    AbilityId.BUILD_TECHLAB_STARPORT: (U.STARPORT, U.STARPORTTECHLAB),
+    AbilityId.BUILD_REACTOR_BARRACKS: (U.BARRACKS, U.BARRACKSREACTOR),
+    AbilityId.BUILD_REACTOR_FACTORY: (U.FACTORY, U.FACTORYREACTOR),
+    AbilityId.BUILD_REACTOR_STARPORT: (U.STARPORT, U.STARPORTREACTOR),
+}
+# Free morphs switching between two types: ability -> (from, to).
+TOGGLE_ABILITIES: Dict[AbilityId, Tuple[UnitTypeId, UnitTypeId]] = {
+    AbilityId.MORPH_SUPPLYDEPOT_LOWER: (U.SUPPLYDEPOT, U.SUPPLYDEPOTLOWERED),
+    AbilityId.MORPH_SUPPLYDEPOT_RAISE: (U.SUPPLYDEPOTLOWERED, U.SUPPLYDEPOT),
+}
+# Research costs and times in seconds, the others cost DEFAULT_RESEARCH.
+RESEARCH_COSTS: Dict[UpgradeId, Tuple[int, int, float]] = {
+    UpgradeId.TERRANINFANTRYWEAPONSLEVEL1: (100, 100, 114),
+    UpgradeId.TERRANINFANTRYWEAPONSLEVEL2: (175, 175, 136),
+    UpgradeId.TERRANINFANTRYWEAPONSLEVEL3: (250, 250, 157),
+    UpgradeId.TERRANINFANTRYARMORSLEVEL1: (100, 100, 114),
+    UpgradeId.TERRANINFANTRYARMORSLEVEL2: (175, 175, 136),
+    UpgradeId.TERRANINFANTRYARMORSLEVEL3: (250, 250, 157),
+    UpgradeId.TERRANBUILDINGARMOR: (150, 150, 100),
+}
+DEFAULT_RESEARCH: Tuple[int, int, float] = (100, 100, 100)
+
+# AbilityData targets, sc2.unit.Unit warns about commands given another kind of target.
+NO_TARGET, POINT_TARGET, UNIT_TARGET, POINT_OR_UNIT_TARGET, POINT_OR_NO_TARGET = range(1, 6)
+# Targets of the abilities which are not productions, by the start of their name. The others take a point or a unit.
+ABILITY_TARGETS: Tuple[Tuple[Tuple[str, ...], int], ...] = (
+    (("HARVEST_GATHER", "EFFECT_REPAIR", "EFFECT_INJECTLARVA"), UNIT_TARGET),
+    (("STOP", "HOLDPOSITION", "CANCEL", "HARVEST_RETURN", "MORPH", "LIFT", "BURROW", "UPGRADETO", "HALT",
+      "RESEARCH"), NO_TARGET),
+    (("BUILD_TECHLAB", "BUILD_REACTOR"), POINT_OR_NO_TARGET),
+)
+
+
+class Production(object):
+    """
+    What an ability makes.
+    :param kind: "build" (a worker places a structure), "train" (a structure or a larva makes a unit),
+    "morph" (the unit becomes another type), "addon" or "research".
+    :param product: UnitTypeId made, or UpgradeId researched.
+    :param makers: Types able to use the ability.
+    """
+
+    __slots__ = ("kind", "product", "makers", "required")
+
+    def __init__(self, kind: str, product, makers: Set[UnitTypeId], required: Optional[UnitTypeId] = None):
+        self.kind = kind
+        self.product = product
+        self.makers = makers
+        self.required = required
+
+
+def _productions() -> Dict[int, Production]:
+    productions: Dict[int, Production] = {}
+    for maker, products in TRAIN_INFO.items():
+        for product, info in products.items():
+            if product not in UNIT_STATS or maker not in UNIT_STATS:
+                continue
+            ability = info["ability"].value
+            if maker in WORKERS.values() and UNIT_STATS[product].is_structure:
+                kind = "build"
+            elif product in UNIT_TECH_ALIAS and maker in UNIT_TECH_ALIAS[product] or \
+                    info["ability"].name.startswith(("MORPH", "UPGRADETO")):
+                kind = "morph"
+            else:
+                kind = "train"
+            if ability in productions:
+                productions[ability].makers.add(maker)
+            else:
+                productions[ability] = Production(kind, product, {maker}, info.get("required_building"))
+    for ability, (maker, addon) in ADDON_ABILITIES.items():
+        productions[ability.value] = Production("addon", addon, {maker})
+    for maker, upgrades in RESEARCH_INFO.items():
+        for upgrade, info in upgrades.items():
+            productions[info["ability"].value] = Production("research", upgrade, {maker},
+                                                            info.get("required_building"))
+    return productions
+
+
+# Ability id -> what it makes.
+PRODUCTIONS: Dict[int, Production] = _productions()
+# Unit type -> ability creating it.
+CREATION_ABILITIES: Dict[UnitTypeId, int] = {
+    production.product: ability for ability, production in sorted(PRODUCTIONS.items())
+    if production.kind != "research" and isinstance(production.product, UnitTypeId)
+}
+
+
+def research_cost(upgrade: UpgradeId) -> Tuple[int, int, float]:
+    return RESEARCH_COSTS.get(upgrade, DEFAULT_RESEARCH)
+
+
+def game_data() -> sc_pb.ResponseData:
+    """
+    :return: The ResponseData the local game sends to the bots: every ability, the units of UNIT_STATS and the
+    upgrades of RESEARCH_INFO.
+    """
+    data = sc_pb.ResponseData()
+    for ability in AbilityId:
+        if ability.value == 0:
+            continue
+        entry = data.abilities.add(
+            ability_id=ability.value,
+            link_name=ability.name.title().replace("_", ""),
+            button_name=ability.name.split("_", 1)[-1].title(),
+            friendly_name=ability.name.replace("_", " ").title(),
+            available=True,
+        )
+        generic = GENERIC_REDIRECT_ABILITIES.get(ability)
+        if generic is not None and generic != ability:
+            entry.remaps_to_ability_id = generic.value
+        production = PRODUCTIONS.get(ability.value)
+        if production is None:
+            entry.target = next((target for prefixes, target in ABILITY_TARGETS if ability.name.startswith(prefixes)),
+                                POINT_OR_UNIT_TARGET)
+        elif production.kind == "build":
+            stats = UNIT_STATS[production.product]
+            entry.is_building = True
+            entry.footprint_radius = stats.footprint / 2
+            entry.target = UNIT_TARGET if production.product in GAS_BUILDINGS else POINT_TARGET
+        else:
+            entry.target = POINT_OR_NO_TARGET if production.kind == "addon" else NO_TARGET
+    for unit_type, stats in UNIT_STATS.items():
+        entry = data.units.add(
+            unit_id=unit_type.value,
+            name=unit_type.name.title(),
+            available=True,
+            mineral_cost=stats.minerals,
+            vespene_cost=stats.vespene,
+            food_required=stats.food,
+            food_provided=stats.food_provided,
+            ability_id=CREATION_ABILITIES.get(unit_type, 0),
+            race=stats.race.value,
+            build_time=stats.build_time * GAME_LOOPS_PER_SECOND,
+            has_minerals=unit_type == U.MINERALFIELD,
+            has_vespene=unit_type == U.VESPENEGEYSER,
+            movement_speed=stats.speed / 1.4,
+            attributes=stats.attributes,
+        )
+        entry.tech_alias.extend(alias.value for alias in UNIT_TECH_ALIAS.get(unit_type, ()) if alias in UNIT_STATS)
+        if UNIT_UNIT_ALIAS.get(unit_type) in UNIT_STATS:
+            entry.unit_alias = UNIT_UNIT_ALIAS[unit_type].value
+        if stats.weapon is not None:
+            damage, attacks, cooldown, weapon_range, target = stats.weapon
+            entry.weapons.add(type=target, damage=damage, attacks=attacks, range=weapon_range, speed=cooldown)
+    for upgrade, production in sorted(
+            ((production.product, ability) for ability, production in PRODUCTIONS.items()
+             if production.kind == "research"), key=lambda item: item[0].value):
+        minerals, vespene, seconds = research_cost(upgrade)
+        data.upgrades.add(upgrade_id=upgrade.value, name=upgrade.name.title(), mineral_cost=minerals,
+                          vespene_cost=vespene, research_time=seconds * GAME_LOOPS_PER_SECOND, ability_id=production)
+    return data
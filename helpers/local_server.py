@@ -0,0 +1,247 @@
+"""
+A stand-in for the StarCraft II client: a websocket server answering the requests sc2.main and sc2.BotAI send
+(create and join a game, game info, data, observations, actions, steps and queries) from the world of
+helpers.local_world. The bots run the same run_game loop as against the real game, so the whole loop can be timed
+and stress tested on machines without the game.
+    result = run_local_game([Bot(Race.Terran, TerranBot()), Computer(Race.Zerg, Difficulty.Easy)],
+                            game_time_limit=600)
+"""
+from pathlib import Path
+from typing import List, Optional
+
+import asyncio
+
+import aiohttp
+from aiohttp import web
+from s2clientprotocol import query_pb2 as query_pb
+from s2clientprotocol import sc2api_pb2 as sc_pb
+from sc2.controller import Controller
+from sc2.data import Difficulty, Race, Status
+from sc2.main import _play_game, _setup_host_game
+from sc2.maps import Map
+from sc2.player import Bot, Computer
+
+from helpers.local_data import game_data
+from helpers.local_world import LOCAL_MAP_NAME, LocalWorld
+
+LOCAL_BASE_BUILD: int = 0
+_PARTICIPANT, _COMPUTER = 1, 2
+
+
+class LocalGame(object):
+    """
+    Answers the requests of the client of player 1, one Request at a time, the way the game would.
+    """
+
+    def __init__(self):
+        self.status = Status.launched
+        self.world: Optional[LocalWorld] = None
+        self.map_name = LOCAL_MAP_NAME
+        self.__setup: List = []
+        self.__seed = 0
+        self.__game_data: Optional[sc_pb.ResponseData] = None
+        # Game info of the last pathing grid sent.
+        self.__info: Optional[sc_pb.ResponseGameInfo] = None
+        self.__info_pathing: Optional[bytes] = None
+
+    def handle(self, request: sc_pb.Request) -> sc_pb.Response:
+        response = sc_pb.Response()
+        if request.HasField("id"):
+            response.id = request.id
+        kind = request.WhichOneof("request")
+        handler = getattr(self, "_LocalGame__{}".format(kind), None)
+        if handler is None:
+            response.error.append("{} is not supported by the local game".format(kind))
+        else:
+            handler(getattr(request, kind), response)
+        response.status = self.status.value
+        return response
+
+    def __ping(self, request: sc_pb.RequestPing, response: sc_pb.Response) -> None:
+        response.ping.game_version = "local"
+        response.ping.base_build = LOCAL_BASE_BUILD
+
+    def __create_game(self, request: sc_pb.RequestCreateGame, response: sc_pb.Response) -> None:
+        if request.HasField("local_map"):
+            self.map_name = Path(request.local_map.map_path).stem or LOCAL_MAP_NAME
+        self.__setup = list(request.player_setup)
+        self.__seed = request.random_seed if request.HasField("random_seed") else 0
+        computers = [setup for setup in self.__setup if setup.type == _COMPUTER]
+        if len(self.__setup) != 2 or len(computers) != 1:
+            response.create_game.error = sc_pb.ResponseCreateGame.InvalidPlayerSetup
+            response.create_game.error_details = "The local game is a bot against the built-in AI"
+            return
+        self.status = Status.init_game
+
+    def __join_game(self, request: sc_pb.RequestJoinGame, response: sc_pb.Response) -> None:
+        computer = next(setup for setup in self.__setup if setup.type == _COMPUTER)
+        self.world = LocalWorld(Race(request.race), Race(computer.race), Difficulty(computer.difficulty),
+                                self.__seed)
+        response.join_game.player_id = 1
+        self.status = Status.in_game
+
+    def __game_info(self, request: sc_pb.RequestGameInfo, response: sc_pb.Response) -> None:
+        pathing = self.world.pathing_grid()
+        if self.__info is None:
+            game_info = self.__info = sc_pb.ResponseGameInfo(map_name=self.map_name,
+                                                             local_map_path=self.map_name + ".SC2Map")
+            for player in self.world.players.values():
+                info = game_info.player_info.add(player_id=player.player_id, race_requested=player.race.value,
+                                                 race_actual=player.race.value)
+                if player.difficulty is None:
+                    info.type = _PARTICIPANT
+                else:
+                    info.type, info.difficulty = _COMPUTER, player.difficulty.value
+            game_info.options.raw = True
+        if pathing is not self.__info_pathing:
+            self.__info_pathing = pathing
+            self.__info.start_raw.CopyFrom(self.world.map.start_raw(pathing))
+            start = self.world.players[2].start
+            self.__info.start_raw.start_locations.add(x=start[0], y=start[1])
+        response.game_info.CopyFrom(self.__info)
+
+    def __data(self, request: sc_pb.RequestData, response: sc_pb.Response) -> None:
+        if self.__game_data is None:
+            self.__game_data = game_data()
+        response.data.CopyFrom(self.__game_data)
+
+    def __observation(self, request: sc_pb.RequestObservation, response: sc_pb.Response) -> None:
+        if request.game_loop > self.world.game_loop:
+            self.__advance(request.game_loop - self.world.game_loop)
+        response.observation.CopyFrom(self.world.observation(1))
+
+    def __action(self, request: sc_pb.RequestAction, response: sc_pb.Response) -> None:
+        for action in request.actions:
+            if not action.HasField("action_raw") or not action.action_raw.HasField("unit_command"):
+                # Camera moves, chat and the other actions don't change the game.
+                response.action.result.append(1)
+                continue
+            command = action.action_raw.unit_command
+            if command.HasField("target_unit_tag"):
+                target = command.target_unit_tag
+            elif command.HasField("target_world_space_pos"):
+                target = (command.target_world_space_pos.x, command.target_world_space_pos.y)
+            else:
+                target = None
+            result = self.world.command(1, command.ability_id, command.unit_tags, target, command.queue_command)
+            response.action.result.append(result.value)
+
+    def __step(self, request: sc_pb.RequestStep, response: sc_pb.Response) -> None:
+        self.__advance(request.count or 1)
+        response.step.simulation_loop = self.world.game_loop
+
+    def __advance(self, loops: int) -> None:
+        self.world.step(loops)
+        if self.world.result is not None:
+            self.status = Status.ended
+
+    def __query(self, request: query_pb.RequestQuery, response: sc_pb.Response) -> None:
+        world = self.world
+        for pathing in request.pathing:
+            if pathing.HasField("unit_tag"):
+                unit = world.units.get(pathing.unit_tag)
+                start = (unit.x, unit.y) if unit is not None else None
+            else:
+                start = (pathing.start_pos.x, pathing.start_pos.y)
+            distance = world.pathing_distance(start, (pathing.end_pos.x, pathing.end_pos.y)) if start else 0.0
+            response.query.pathing.add(distance=distance)
+        for abilities in request.abilities:
+            answer = response.query.abilities.add(unit_tag=abilities.unit_tag)
+            unit = world.units.get(abilities.unit_tag)
+            if unit is not None:
+                answer.unit_type_id = unit.unit_type.value
+            for ability in world.available_abilities(abilities.unit_tag):
+                answer.abilities.add(ability_id=ability)
+        for placement in request.placements:
+            result = world.placement(placement.ability_id, placement.target_pos.x, placement.target_pos.y)
+            response.query.placements.add(result=result.value)
+
+    def __debug(self, request: sc_pb.RequestDebug, response: sc_pb.Response) -> None:
+        # Debug drawings are not shown anywhere.
+        response.debug.SetInParent()
+
+    def __leave_game(self, request: sc_pb.RequestLeaveGame, response: sc_pb.Response) -> None:
+        response.leave_game.SetInParent()
+        self.status = Status.launched
+
+    def __quit(self, request: sc_pb.RequestQuit, response: sc_pb.Response) -> None:
+        response.quit.SetInParent()
+        self.status = Status.quit
+
+
+class LocalProcess(object):
+    """
+    Stands in for sc2.sc2process.SC2Process: serves a LocalGame on a local port for the length of the `async with`
+    and gives the Controller connected to it.
+    """
+
+    def __init__(self, host: str = "127.0.0.1"):
+        self.host = host
+        self.game = LocalGame()
+        # Controller.running checks it.
+        self._process = self
+        self.__runner: Optional[web.AppRunner] = None
+        self.__session: Optional[aiohttp.ClientSession] = None
+        self.__ws = None
+
+    async def __serve(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        async for message in ws:
+            if message.type != aiohttp.WSMsgType.BINARY:
+                break
+            response = self.game.handle(sc_pb.Request.FromString(message.data))
+            await ws.send_bytes(response.SerializeToString())
+            if self.game.status == Status.quit:
+                break
+        await ws.close()
+        return ws
+
+    async def __aenter__(self) -> Controller:
+        app = web.Application()
+        app.router.add_get("/sc2api", self.__serve)
+        self.__runner = web.AppRunner(app, access_log=None)
+        await self.__runner.setup()
+        site = web.TCPSite(self.__runner, self.host, 0)
+        await site.start()
+        port = self.__runner.addresses[0][1]
+        self.__session = aiohttp.ClientSession()
+        self.__ws = await self.__session.ws_connect("ws://{}:{}/sc2api".format(self.host, port), timeout=120,
+                                                    max_msg_size=0)
+        return Controller(self.__ws, self)
+
+    async def __aexit__(self, *args) -> None:
+        if self.__ws is not None:
+            await self.__ws.close()
+        if self.__session is not None:
+            await self.__session.close()
+        if self.__runner is not None:
+            await self.__runner.cleanup()
+        self._process = None
+
+
+async def host_local_game(players: List, realtime: bool = False, game_time_limit: Optional[int] = None,
+                          random_seed: Optional[int] = None, map_name: str = LOCAL_MAP_NAME):
+    """
+    sc2.main._host_game against the local game instead of a StarCraft II process.
+    :param players: A Bot and a Computer, like for run_game.
+    :return: The result of the bot.
+    """
+    assert len(players) == 2 and isinstance(players[0], Bot) and isinstance(players[1], Computer), \
+        "The local game is a bot against the built-in AI"
+    async with LocalProcess() as server:
+        await server.ping()
+        client = await _setup_host_game(server, Map(Path(map_name + ".SC2Map")), players, realtime, random_seed)
+        if getattr(players[0].ai, "raw_affects_selection", None) is not None:
+            client.raw_affects_selection = players[0].ai.raw_affects_selection
+        result = await _play_game(players[0], client, realtime, None, game_time_limit)
+        await client.leave()
+        await client.quit()
+        return result
+
+
+def run_local_game(players: List, **kwargs):
+    """
+    run_game against the local game, see host_local_game.
+    """
+    return asyncio.run(host_local_game(players, **kwargs))
@@ -0,0 +1,1138 @@
+"""
+The simplified world of the local game (see helpers.local_server): a fixed two player map, an economy, production,
+straight line movement and combat against a scripted opponent. It answers the questions a bot asks the real game
+(placement, pathing, available abilities) and builds the observations the bots read, without any StarCraft II client.
+
+The world is deterministic: the same seed and the same commands give the same game.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import math
+import random
+
+import numpy as np
+from s2clientprotocol import raw_pb2 as raw_pb
+from s2clientprotocol import sc2api_pb2 as sc_pb
+from sc2.data import ActionResult, Difficulty, Race, Result
+from sc2.dicts.generic_redirect_abilities import GENERIC_REDIRECT_ABILITIES
+from sc2.dicts.unit_tech_alias import UNIT_TECH_ALIAS
+from sc2.dicts.unit_train_build_abilities import TRAIN_INFO
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId
+
+from helpers.local_data import (
+    AIR, GAME_LOOPS_PER_SECOND, GAS_BUILDINGS, GROUND, OPPONENT_ARMY, OPPONENT_BASES, PRODUCTIONS, TOGGLE_ABILITIES,
+    TOWNHALL_TYPES, TOWNHALLS, UNIT_STATS, WORKERS, Production, research_cost,
+)
+
+LOCAL_MAP_NAME: str = "LocalStandIn"
+MAP_SIZE: int = 144
+MAP_MARGIN: int = 8
+# The main base of player 1 is the corner x + y < MAIN_EDGE, a cliff band of CLIFF_ROWS diagonals separates it from
+# the low ground. Player 2 gets the same terrain turned by half a turn.
+MAIN_EDGE: int = 83
+CLIFF_ROWS: int = 6
+HIGH_GROUND: int = 200
+LOW_GROUND: int = 120
+# Townhall position near which the resources of a base are laid out, and the direction of the mineral line in
+# degrees. The bases of player 2 are their mirror images.
+BASE_LAYOUTS: Tuple = (
+    ((26.5, 26.5), 225),
+    ((66.5, 36.5), 315),
+    ((36.5, 66.5), 135),
+    ((112.5, 24.5), 315),
+)
+MINERAL_CONTENTS: int = 1800
+VESPENE_CONTENTS: int = 2250
+
+# Longest stretch of game loops simulated at once.
+TICK_LOOPS: int = 8
+# Income of a worker, per second.
+MINERALS_PER_SECOND: float = 0.93
+THIRD_WORKER_MINERALS_PER_SECOND: float = 0.4
+VESPENE_PER_SECOND: float = 0.94
+# Distance from a townhall at which resources count as part of its base.
+BASE_RADIUS: float = 10.0
+SIGHT_RANGE: float = 9.0
+LARVA_SECONDS: float = 11.0
+INJECT_SECONDS: float = 29.0
+ENERGY_PER_SECOND: float = 0.7875
+MAX_ENERGY: float = 200.0
+FIRST_TAG: int = 0x100000000
+
+NEUTRAL_PLAYER: int = 16
+_SELF, _ENEMY, _NEUTRAL = raw_pb.Self, raw_pb.Enemy, raw_pb.Neutral
+U = UnitTypeId
+
+
+def _generic(ability: int) -> int:
+    try:
+        generic = GENERIC_REDIRECT_ABILITIES.get(AbilityId(ability))
+    except ValueError:
+        return ability
+    return generic.value if generic is not None else ability
+
+
+# Specific ability -> ability the bots send for it, and (generic ability, maker) -> the productions it can mean.
+_GENERIC_PRODUCTIONS: Dict[Tuple[int, UnitTypeId], List[int]] = {}
+for _ability, _production in sorted(PRODUCTIONS.items()):
+    _remap = _generic(_ability)
+    if _remap != _ability:
+        for _maker in _production.makers:
+            _GENERIC_PRODUCTIONS.setdefault((_remap, _maker), []).append(_ability)
+
+_MOVE, _ATTACK, _SMART, _STOP, _HOLD, _PATROL = (
+    AbilityId.MOVE.value, AbilityId.ATTACK.value, AbilityId.SMART.value, AbilityId.STOP.value,
+    AbilityId.HOLDPOSITION.value, AbilityId.PATROL.value,
+)
+_GATHER, _RETURN, _REPAIR, _INJECT = (
+    AbilityId.HARVEST_GATHER.value, AbilityId.HARVEST_RETURN.value, AbilityId.EFFECT_REPAIR.value,
+    AbilityId.EFFECT_INJECTLARVA.value,
+)
+_CANCELS = {AbilityId.CANCEL.value, AbilityId.CANCEL_LAST.value}
+_RALLIES = {AbilityId.RALLY_UNITS.value, AbilityId.RALLY_WORKERS.value, AbilityId.RALLY_BUILDING.value}
+_RESOURCES = {U.MINERALFIELD, U.VESPENEGEYSER}
+_HATCHERIES = {U.HATCHERY, U.LAIR, U.HIVE}
+
+
+class LocalMap(object):
+    """
+    Terrain of the local game, grids indexed [y, x] like sc2.pixel_map.PixelMap.
+    Every base has 8 mineral fields and 2 geysers, its townhall position is the one sc2.BotAI finds for it.
+    """
+
+    def __init__(self, size: int = MAP_SIZE, margin: int = MAP_MARGIN):
+        self.width = self.height = size
+        self.playable = (margin, margin, size - margin, size - margin)
+        ys, xs = np.mgrid[0:size, 0:size]
+        inside = (xs >= margin) & (xs < size - margin) & (ys >= margin) & (ys < size - margin)
+        self.terrain_height = np.full((size, size), LOW_GROUND, dtype=np.uint8)
+        self.placeable = inside.copy()
+        self.pathable = inside.copy()
+        step = (HIGH_GROUND - LOW_GROUND) / (CLIFF_ROWS + 1)
+        # Diagonal index from the corner of each main base, and distance to the middle of its ramp.
+        for diagonal, across in ((xs + ys, np.abs(xs - ys)), ((size - 1 - xs) + (size - 1 - ys), np.abs(xs - ys))):
+            self.terrain_height[diagonal <= MAIN_EDGE] = HIGH_GROUND
+            for row in range(CLIFF_ROWS):
+                band = diagonal == MAIN_EDGE + row
+                # The ramp is 2 cells wide at the top, like the main ramps the bots wall off, the cells beside its
+                # top row still belong to the main base.
+                ramp = band & (across <= min(row + 1, 3))
+                sloped = band if row else ramp
+                self.terrain_height[sloped] = int(HIGH_GROUND - (row + 1) * step)
+                self.placeable[sloped] = False
+                self.pathable[sloped & ~ramp] = False
+
+        # (townhall, minerals, geysers) of every base.
+        self.bases: List[Tuple[Tuple[float, float], List[Tuple[float, float]], List[Tuple[float, float]]]] = []
+        layouts = [self.__resources(center, angle) for center, angle in BASE_LAYOUTS]
+        layouts += [([(size - x, size - y) for x, y in minerals], [(size - x, size - y) for x, y in geysers])
+                    for minerals, geysers in layouts]
+        for minerals, geysers in layouts:
+            self.bases.append((self.__townhall_position(minerals, geysers), minerals, geysers))
+        self.start_locations = [self.bases[0][0], self.bases[len(BASE_LAYOUTS)][0]]
+
+    @staticmethod
+    def __resources(center: Tuple[float, float], angle: float) -> Tuple[List, List]:
+        direction = math.radians(angle)
+        minerals = []
+        for index in range(8):
+            mineral_angle = direction + (index - 3.5) * 0.3
+            distance = 7.0 + (0.6 if index % 2 else 0.0)
+            x = center[0] + distance * math.cos(mineral_angle)
+            y = center[1] + distance * math.sin(mineral_angle)
+            # Mineral fields are 2x1, centered on (x, y.5).
+            minerals.append((float(round(x)), math.floor(y) + 0.5))
+        geysers = []
+        for side in (-1, 1):
+            geyser_angle = direction + side * math.radians(80)
+            x = center[0] + 7.0 * math.cos(geyser_angle)
+            y = center[1] + 7.0 * math.sin(geyser_angle)
+            geysers.append((math.floor(x) + 0.5, math.floor(y) + 0.5))
+        return minerals, geysers
+
+    def __townhall_position(self, minerals: List, geysers: List) -> Tuple[float, float]:
+        """
+        The position BotAI._find_expansion_location picks for the resources.
+        """
+        resources = [(x, y, 6) for x, y in minerals] + [(x, y, 7) for x, y in geysers]
+        center_x = int(sum(x for x, y, gap in resources) / len(resources)) + 0.5
+        center_y = int(sum(y for x, y, gap in resources) / len(resources)) + 0.5
+        best, best_total = None, math.inf
+        for dx in range(-7, 8):
+            for dy in range(-7, 8):
+                if not 4 < math.hypot(dx, dy) <= 8:
+                    continue
+                x, y = center_x + dx, center_y + dy
+                if not self.placeable[int(round(y)), int(round(x))]:
+                    continue
+                distances = [math.hypot(x - rx, y - ry) for rx, ry, gap in resources]
+                if any(distance < gap for distance, (rx, ry, gap) in zip(distances, resources)):
+                    continue
+                if sum(distances) < best_total:
+                    best, best_total = (x, y), sum(distances)
+        return best
+
+    def height_at(self, x: float, y: float) -> float:
+        """
+        :return: The z coordinate of a position, like the game gives.
+        """
+        height = self.terrain_height[min(max(int(y), 0), self.height - 1), min(max(int(x), 0), self.width - 1)]
+        return -16 + 32 * float(height) / 255
+
+    def start_raw(self, pathing: bytes) -> raw_pb.StartRaw:
+        start_raw = raw_pb.StartRaw()
+        start_raw.map_size.x, start_raw.map_size.y = self.width, self.height
+        for grid, data, bits in ((start_raw.pathing_grid, pathing, 1),
+                                 (start_raw.placement_grid, np.packbits(self.placeable).tobytes(), 1),
+                                 (start_raw.terrain_height, self.terrain_height.tobytes(), 8)):
+            grid.bits_per_pixel = bits
+            grid.size.x, grid.size.y = self.width, self.height
+            grid.data = data
+        start_raw.playable_area.p0.x, start_raw.playable_area.p0.y = self.playable[:2]
+        start_raw.playable_area.p1.x, start_raw.playable_area.p1.y = self.playable[2:]
+        return start_raw
+
+
+class LocalOrder(object):
+    """
+    :param kind: What the unit does: "move", "attack", "gather", "repair", "inject", "build", "construct",
+    "train", "morph", "addon" or "research".
+    :param ability: Ability id reported in the observations.
+    :param target: Unit tag, (x, y) or None.
+    :param production: What the order makes, for the production kinds.
+    :param progress: From 0 to 1, for the production kinds. For "gather", 1 once the worker reached its resource.
+    """
+
+    __slots__ = ("kind", "ability", "target", "production", "progress")
+
+    def __init__(self, kind: str, ability: int, target: Union[int, Tuple[float, float], None] = None,
+                 production: Optional[Production] = None):
+        self.kind = kind
+        self.ability = ability
+        self.target = target
+        self.production = production
+        self.progress = 0.0
+
+
+class LocalUnit(object):
+    """
+    :param timer: Seconds left before something happens to the unit: next larva of a hatchery, injected larvae.
+    :param cells: (x0, y0, x1, y1) cells the unit stops other structures from using, None for the others.
+    """
+
+    __slots__ = ("tag", "unit_type", "stats", "owner", "x", "y", "health", "build_progress", "orders", "energy",
+                 "contents", "add_on_tag", "timer", "inject_timer", "cells")
+
+    def __init__(self, tag: int, unit_type: UnitTypeId, owner: int, x: float, y: float, build_progress: float = 1.0):
+        self.tag = tag
+        self.unit_type = unit_type
+        self.stats = UNIT_STATS[unit_type]
+        self.owner = owner
+        self.x = x
+        self.y = y
+        self.health = self.stats.health * (1.0 if build_progress >= 1 else 0.1)
+        self.build_progress = build_progress
+        self.orders: List[LocalOrder] = []
+        self.energy = 50.0 if unit_type == U.QUEEN else 0.0
+        self.contents = MINERAL_CONTENTS if unit_type == U.MINERALFIELD else \
+            VESPENE_CONTENTS if unit_type == U.VESPENEGEYSER or unit_type in GAS_BUILDINGS else 0
+        self.add_on_tag = 0
+        self.timer = 0.0
+        self.inject_timer = 0.0
+        self.cells: Optional[Tuple[int, int, int, int]] = None
+
+    def set_type(self, unit_type: UnitTypeId) -> None:
+        health = self.health / self.stats.health
+        self.unit_type = unit_type
+        self.stats = UNIT_STATS[unit_type]
+        self.health = self.stats.health * health
+
+    def distance_to(self, x: float, y: float) -> float:
+        return math.hypot(self.x - x, self.y - y)
+
+
+class LocalPlayer(object):
+    __slots__ = ("player_id", "race", "minerals", "vespene", "upgrades", "start", "difficulty")
+
+    def __init__(self, player_id: int, race: Race, start: Tuple[float, float], difficulty: Optional[Difficulty] = None):
+        self.player_id = player_id
+        self.race = race
+        self.minerals = 50.0
+        self.vespene = 0.0
+        self.upgrades = set()
+        self.start = start
+        # Set for the built-in player.
+        self.difficulty = difficulty
+
+
+def footprint_cells(x: float, y: float, width: int, height: Optional[int] = None) -> Tuple[int, int, int, int]:
+    """
+    :return: (x0, y0, x1, y1) cells covered by a footprint centered on (x, y), the ends excluded.
+    """
+    height = width if height is None else height
+    x0, y0 = int(math.floor(x - width / 2 + 0.5)), int(math.floor(y - height / 2 + 0.5))
+    return x0, y0, x0 + width, y0 + height
+
+
+class LocalWorld(object):
+    """
+    The game between a bot (player 1) and a scripted built-in player (player 2).
+    The simplifications: no fog of war, creep or power fields, straight line movement that ignores cliffs,
+    one production at a time per structure (reactors included), income instead of worker trips and damage spread
+    evenly over time. The built-in player doesn't build, it trains its army at a pace set by the difficulty and
+    sends it at the bot in waves.
+    :param opponent_race: Race of the built-in player, Race.Random picks one with the seed.
+    """
+
+    def __init__(self, race: Race, opponent_race: Race, difficulty: Difficulty = Difficulty.Easy, seed: int = 0,
+                 terrain: Optional[LocalMap] = None):
+        self.random = random.Random(seed)
+        if race == Race.Random:
+            race = self.random.choice([Race.Terran, Race.Zerg, Race.Protoss])
+        if opponent_race == Race.Random:
+            opponent_race = self.random.choice([Race.Terran, Race.Zerg, Race.Protoss])
+        self.map = terrain or LocalMap()
+        self.players: Dict[int, LocalPlayer] = {
+            1: LocalPlayer(1, race, self.map.start_locations[0]),
+            2: LocalPlayer(2, opponent_race, self.map.start_locations[1], difficulty),
+        }
+        self.units: Dict[int, LocalUnit] = {}
+        self.game_loop = 0
+        self.result: Optional[Dict[int, Result]] = None
+        self.__next_tag = FIRST_TAG
+        # Cells taken by structures and resources, and the pathing grid bytes while they stay the same.
+        self.occupied = np.zeros_like(self.map.placeable)
+        self.__pathing: Optional[bytes] = None
+        # Tags that died since the last observation of each player.
+        self.__dead: Dict[int, List[int]] = {1: [], 2: []}
+        seconds = 60.0 / difficulty.value
+        # Seconds between two army units of the built-in player, and between two of its attacks.
+        self.spawn_seconds = max(4.0, seconds)
+        self.wave_seconds = max(60.0, 300.0 - 20.0 * difficulty.value)
+        self.__spawn_timer = self.spawn_seconds
+        self.__wave_timer = self.wave_seconds
+        # Fixed grids sent with every observation.
+        cells = self.map.width * self.map.height
+        self.visibility = bytes([2]) * cells
+        self.creep = bytes(cells // 8)
+
+        for townhall, minerals, geysers in self.map.bases:
+            for x, y in minerals:
+                self.add_unit(U.MINERALFIELD, NEUTRAL_PLAYER, x, y)
+            for x, y in geysers:
+                self.add_unit(U.VESPENEGEYSER, NEUTRAL_PLAYER, x, y)
+        for player in self.players.values():
+            self.__start_base(player)
+
+    # Units
+
+    def add_unit(self, unit_type: UnitTypeId, owner: int, x: float, y: float,
+                 build_progress: float = 1.0) -> LocalUnit:
+        unit = LocalUnit(self.__next_tag, unit_type, owner, x, y, build_progress)
+        self.__next_tag += 1
+        self.units[unit.tag] = unit
+        if unit_type == U.MINERALFIELD:
+            unit.cells = footprint_cells(x, y, 2, 1)
+        elif unit.stats.is_structure or unit_type == U.VESPENEGEYSER:
+            unit.cells = footprint_cells(x, y, unit.stats.footprint or 3)
+        if unit.cells is not None:
+            self.__occupy(unit.cells, unit_type not in (U.SUPPLYDEPOTLOWERED,))
+        if unit_type in _HATCHERIES:
+            unit.timer = LARVA_SECONDS
+        return unit
+
+    def remove_unit(self, unit: LocalUnit, died: bool = True) -> None:
+        del self.units[unit.tag]
+        if unit.cells is not None:
+            self.__occupy(unit.cells, False)
+        if died:
+            for dead in self.__dead.values():
+                dead.append(unit.tag)
+
+    def __occupy(self, cells: Tuple[int, int, int, int], occupied: bool) -> None:
+        x0, y0, x1, y1 = cells
+        self.occupied[y0:y1, x0:x1] = occupied
+        self.__pathing = None
+
+    def pathing_grid(self) -> bytes:
+        """
+        :return: The pathing grid data of the game info: the terrain without the cells of structures and resources.
+        """
+        if self.__pathing is None:
+            self.__pathing = np.packbits(self.map.pathable & ~self.occupied).tobytes()
+        return self.__pathing
+
+    def __start_base(self, player: LocalPlayer) -> None:
+        x, y = player.start
+        townhall = self.add_unit(TOWNHALLS[player.race], player.player_id, x, y)
+        minerals = [unit for unit in self.units.values()
+                    if unit.unit_type == U.MINERALFIELD and unit.distance_to(x, y) < BASE_RADIUS]
+        for index in range(12):
+            mineral = minerals[index % len(minerals)]
+            worker = self.add_unit(WORKERS[player.race], player.player_id, (x + mineral.x) / 2 + index % 3 * 0.4,
+                                   (y + mineral.y) / 2 + index // 3 * 0.3)
+            if player.difficulty is not None:
+                worker.orders.append(LocalOrder("gather", _GATHER, mineral.tag))
+        if player.race == Race.Zerg:
+            for index in range(3):
+                self.__spawn_larva(townhall)
+            self.add_unit(U.OVERLORD, player.player_id, x + (3 if x < self.map.width / 2 else -3), y)
+        if player.difficulty is not None:
+            # The built-in player faces the middle of the map.
+            sign = 1 if x < self.map.width / 2 else -1
+            for (dx, dy), structure in OPPONENT_BASES[player.race]:
+                position = self.snap(x + sign * dx, y + sign * dy, UNIT_STATS[structure].footprint)
+                self.add_unit(structure, player.player_id, *position)
+
+    def __spawn_larva(self, hatchery: LocalUnit) -> None:
+        count = sum(1 for unit in self.units.values() if unit.unit_type == U.LARVA and unit.owner == hatchery.owner
+                    and unit.distance_to(hatchery.x, hatchery.y) < 4)
+        self.add_unit(U.LARVA, hatchery.owner, hatchery.x - 1.5 + count % 4, hatchery.y - 3.0 - count // 4 * 0.5)
+
+    def __spawn_near(self, unit_type: UnitTypeId, maker: LocalUnit) -> LocalUnit:
+        angle = self.random.uniform(0, 2 * math.pi)
+        distance = maker.stats.radius + UNIT_STATS[unit_type].radius + 0.5
+        return self.add_unit(unit_type, maker.owner, maker.x + distance * math.cos(angle),
+                             maker.y + distance * math.sin(angle))
+
+    @staticmethod
+    def snap(x: float, y: float, footprint: int) -> Tuple[float, float]:
+        """
+        :return: The center of the cells a footprint covers around (x, y): x.5 for odd sizes, whole for even ones.
+        """
+        if footprint % 2:
+            return math.floor(x) + 0.5, math.floor(y) + 0.5
+        return float(round(x)), float(round(y))
+
+    # Questions
+
+    def can_place(self, unit_type: UnitTypeId, x: float, y: float) -> bool:
+        stats = UNIT_STATS[unit_type]
+        if unit_type in GAS_BUILDINGS:
+            return self.__free_geyser(x, y) is not None
+        x0, y0, x1, y1 = footprint_cells(x, y, stats.footprint)
+        if x0 < 0 or y0 < 0 or x1 > self.map.width or y1 > self.map.height:
+            return False
+        if not self.map.placeable[y0:y1, x0:x1].all() or self.occupied[y0:y1, x0:x1].any():
+            return False
+        if unit_type in TOWNHALL_TYPES:
+            # Townhalls keep their distance from the resources, like in the game.
+            return not any(unit.unit_type in _RESOURCES and unit.distance_to(x, y) < (
+                6 if unit.unit_type == U.MINERALFIELD else 7) for unit in self.units.values())
+        return True
+
+    def __free_geyser(self, x: float, y: float) -> Optional[LocalUnit]:
+        for unit in self.units.values():
+            if unit.unit_type == U.VESPENEGEYSER and abs(unit.x - x) < 0.6 and abs(unit.y - y) < 0.6:
+                taken = any(other.unit_type in GAS_BUILDINGS and abs(other.x - unit.x) < 0.6
+                            and abs(other.y - unit.y) < 0.6 for other in self.units.values())
+                return None if taken else unit
+        return None
+
+    def placement(self, ability: int, x: float, y: float) -> ActionResult:
+        """
+        Answer to a building placement query.
+        """
+        resolved = self.__production(ability, None, 0)
+        if resolved is None or resolved[1].kind != "build":
+            return ActionResult.Error
+        if self.can_place(resolved[1].product, x, y):
+            return ActionResult.Success
+        return ActionResult.CantBuildLocationInvalid
+
+    def pathing_distance(self, start: Tuple[float, float], end: Tuple[float, float]) -> float:
+        """
+        :return: Straight line distance between the points, 0 when the end can't be walked on.
+        """
+        x, y = int(end[0]), int(end[1])
+        if not (0 <= x < self.map.width and 0 <= y < self.map.height) or not self.map.pathable[y, x]:
+            return 0.0
+        return math.hypot(end[0] - start[0], end[1] - start[1])
+
+    def available_abilities(self, tag: int) -> List[int]:
+        unit = self.units.get(tag)
+        if unit is None:
+            return []
+        abilities = [ability for ability, production in PRODUCTIONS.items() if unit.unit_type in production.makers]
+        abilities += [ability for ability, (source, target) in TOGGLE_ABILITIES.items() if unit.unit_type == source]
+        if unit.stats.speed:
+            abilities += [AbilityId.MOVE_MOVE.value, AbilityId.STOP_STOP.value, AbilityId.HOLDPOSITION_HOLD.value]
+        if unit.stats.weapon is not None:
+            abilities.append(AbilityId.ATTACK_ATTACK.value)
+        return sorted(set(abilities))
+
+    # Commands
+
+    def __production(self, ability: int, unit: Optional[LocalUnit],
+                     player_id: int) -> Optional[Tuple[int, Production]]:
+        """
+        :return: The specific ability and what it makes. Generic abilities (BUILD_TECHLAB, a research without its
+        level...) are resolved with the type of the unit using them, a generic research means its next level.
+        """
+        if ability in PRODUCTIONS:
+            return ability, PRODUCTIONS[ability]
+        if unit is not None:
+            candidates = _GENERIC_PRODUCTIONS.get((ability, unit.unit_type), [])
+        else:
+            candidates = [specific for (generic, maker), abilities in _GENERIC_PRODUCTIONS.items()
+                          if generic == ability for specific in abilities]
+        if not candidates:
+            return None
+        player = self.players.get(player_id)
+        for specific in candidates:
+            candidate = PRODUCTIONS[specific]
+            if candidate.kind != "research" or player is None or (
+                    candidate.product not in player.upgrades and not self.__researching(player_id, candidate.product)):
+                return specific, candidate
+        return candidates[-1], PRODUCTIONS[candidates[-1]]
+
+    def __researching(self, player_id: int, upgrade) -> bool:
+        return any(order.production is not None and order.production.product == upgrade
+                   for unit in self.units.values() if unit.owner == player_id for order in unit.orders)
+
+    def food(self, player_id: int) -> Tuple[float, float]:
+        """
+        :return: Supply used, units in production included, and supply cap of a player.
+        """
+        used = cap = 0.0
+        for unit in self.units.values():
+            if unit.owner != player_id:
+                continue
+            if unit.build_progress >= 1:
+                cap += unit.stats.food_provided
+            used += unit.stats.food
+            for order in unit.orders:
+                if order.kind == "train":
+                    used += UNIT_STATS[order.production.product].food * (2 if order.production.product == U.ZERGLING
+                                                                         else 1)
+                elif order.kind == "morph" and isinstance(order.production.product, UnitTypeId):
+                    used += max(0.0, UNIT_STATS[order.production.product].food - unit.stats.food)
+        return used, min(200.0, cap)
+
+    def __owned_types(self, player_id: int) -> set:
+        types = set()
+        for unit in self.units.values():
+            if unit.owner == player_id and unit.build_progress >= 1:
+                types.add(unit.unit_type)
+                types.update(UNIT_TECH_ALIAS.get(unit.unit_type, ()))
+        return types
+
+    def __cost(self, production: Production, maker: LocalUnit) -> Tuple[float, float]:
+        if production.kind == "research":
+            minerals, vespene, seconds = research_cost(production.product)
+            return minerals, vespene
+        stats = UNIT_STATS[production.product]
+        minerals, vespene = stats.minerals, stats.vespene
+        if production.kind == "morph":
+            minerals, vespene = minerals - maker.stats.minerals, vespene - maker.stats.vespene
+        elif stats.race == Race.Zerg and stats.is_structure:
+            # The Drone is part of the cost of Zerg structures.
+            minerals -= 50
+        if production.product == U.ZERGLING:
+            minerals *= 2
+        return minerals, vespene
+
+    def __check(self, player: LocalPlayer, production: Production, maker: LocalUnit) -> ActionResult:
+        minerals, vespene = self.__cost(production, maker)
+        if player.minerals < minerals:
+            return ActionResult.NotEnoughMinerals
+        if player.vespene < vespene:
+            return ActionResult.NotEnoughVespene
+        if production.kind in ("train", "morph") and isinstance(production.product, UnitTypeId):
+            food = UNIT_STATS[production.product].food * (2 if production.product == U.ZERGLING else 1)
+            if production.kind == "morph":
+                food -= maker.stats.food
+            used, cap = self.food(player.player_id)
+            if food > 0 and used + food > cap:
+                return ActionResult.NotEnoughFood
+        if production.required is not None and production.required not in self.__owned_types(player.player_id):
+            return ActionResult.TechRequirementsNotMet
+        if production.kind == "train" and TRAIN_INFO.get(maker.unit_type, {}).get(
+                production.product, {}).get("requires_techlab"):
+            add_on = self.units.get(maker.add_on_tag)
+            if add_on is None or "TECHLAB" not in add_on.unit_type.name or add_on.build_progress < 1:
+                return ActionResult.TechRequirementsNotMet
+        return ActionResult.Success
+
+    def __pay(self, player: LocalPlayer, production: Production, maker: LocalUnit, sign: float = 1.0) -> None:
+        minerals, vespene = self.__cost(production, maker)
+        player.minerals -= sign * minerals
+        player.vespene -= sign * vespene
+
+    def command(self, player_id: int, ability: int, tags: Iterable[int],
+                target: Union[int, Tuple[float, float], None] = None, queue: bool = False) -> ActionResult:
+        """
+        Give an order to units of a player, like an ActionRawUnitCommand.
+        :return: The result of the last unit that failed, Success when none did.
+        """
+        result = ActionResult.Success
+        for tag in tags:
+            unit = self.units.get(tag)
+            if unit is None or unit.owner != player_id:
+                result = ActionResult.Error
+                continue
+            unit_result = self.__command(self.players[player_id], unit, ability, target, queue)
+            if unit_result != ActionResult.Success:
+                result = unit_result
+        return result
+
+    def __command(self, player: LocalPlayer, unit: LocalUnit, ability: int,
+                  target: Union[int, Tuple[float, float], None], queue: bool) -> ActionResult:
+        generic = _generic(ability)
+        if generic in (_STOP, _HOLD):
+            unit.orders.clear()
+            return ActionResult.Success
+        if generic in _CANCELS:
+            return self.__cancel(player, unit)
+        if generic in _RALLIES:
+            return ActionResult.Success
+        if ability in TOGGLE_ABILITIES:
+            source, result = TOGGLE_ABILITIES[ability]
+            if unit.unit_type != source:
+                return ActionResult.Error
+            unit.set_type(result)
+            self.__occupy(unit.cells, result != U.SUPPLYDEPOTLOWERED)
+            return ActionResult.Success
+
+        order = self.__simple_order(player, unit, generic, target)
+        if order is None:
+            resolved = self.__production(ability, unit, player.player_id)
+            if resolved is None:
+                return ActionResult.NotSupported
+            ability, production = resolved
+            if unit.unit_type not in production.makers or unit.build_progress < 1:
+                return ActionResult.Error
+            result = self.__check(player, production, unit)
+            if result != ActionResult.Success:
+                return result
+            order = LocalOrder(production.kind, ability, target, production)
+            if production.kind == "build":
+                if target is None:
+                    return ActionResult.Error
+                if isinstance(target, int):
+                    geyser = self.units.get(target)
+                    if geyser is None or self.__free_geyser(geyser.x, geyser.y) is None:
+                        return ActionResult.CantBuildLocationInvalid
+                    order.target = (geyser.x, geyser.y)
+                else:
+                    order.target = self.snap(target[0], target[1], UNIT_STATS[production.product].footprint)
+                    if not self.can_place(production.product, *order.target):
+                        return ActionResult.CantBuildLocationInvalid
+            elif production.kind == "addon":
+                if unit.add_on_tag or unit.orders:
+                    return ActionResult.Error
+                position = (unit.x + 2.5, unit.y - 0.5)
+                if not self.can_place(production.product, *position):
+                    return ActionResult.CantBuildLocationInvalid
+                add_on = self.add_unit(production.product, unit.owner, position[0], position[1], 0.0)
+                unit.add_on_tag = add_on.tag
+                order.target = add_on.tag
+            elif production.kind in ("train", "research", "morph"):
+                if len(unit.orders) >= 5 or production.kind == "morph" and unit.orders:
+                    return ActionResult.QueueIsFull
+            if production.kind != "build":
+                # Like in the game, structures are paid for when the worker places them.
+                self.__pay(player, production, unit)
+            if unit.unit_type == U.LARVA:
+                unit.set_type(U.EGG)
+            if production.kind != "build":
+                # Productions of a unit queue behind each other.
+                queue = True
+        if not queue:
+            unit.orders.clear()
+        unit.orders.append(order)
+        return ActionResult.Success
+
+    def __simple_order(self, player: LocalPlayer, unit: LocalUnit, generic: int,
+                       target: Union[int, Tuple[float, float], None]) -> Optional[LocalOrder]:
+        target_unit = self.units.get(target) if isinstance(target, int) else None
+        if generic == _SMART:
+            if target_unit is not None and unit.unit_type in WORKERS.values() and (
+                    target_unit.unit_type == U.MINERALFIELD or target_unit.unit_type in GAS_BUILDINGS):
+                generic = _GATHER
+            elif target_unit is not None and target_unit.owner not in (unit.owner, NEUTRAL_PLAYER):
+                generic = _ATTACK
+            else:
+                generic = _MOVE
+        if generic in (_MOVE, _PATROL):
+            return LocalOrder("move", AbilityId.MOVE_MOVE.value, target)
+        if generic == _ATTACK:
+            return LocalOrder("attack", AbilityId.ATTACK_ATTACK.value, target)
+        if generic == _GATHER:
+            return LocalOrder("gather", _GATHER, target)
+        if generic == _RETURN:
+            return LocalOrder("move", _RETURN, (unit.x, unit.y))
+        if generic == _REPAIR:
+            return LocalOrder("repair", _REPAIR, target)
+        if generic == _INJECT:
+            return LocalOrder("inject", _INJECT, target)
+        return None
+
+    def __cancel(self, player: LocalPlayer, unit: LocalUnit) -> ActionResult:
+        if unit.build_progress < 1:
+            # A structure canceled while it is built gives back 75% of its cost.
+            stats = unit.stats
+            player.minerals += stats.minerals * 0.75
+            player.vespene += stats.vespene * 0.75
+            self.remove_unit(unit)
+            return ActionResult.Success
+        for order in reversed(unit.orders):
+            if order.production is not None:
+                unit.orders.remove(order)
+                if order.kind not in ("build", "construct"):
+                    self.__pay(player, order.production, unit, -1.0)
+                if unit.unit_type == U.EGG:
+                    unit.set_type(U.LARVA)
+                return ActionResult.Success
+        return ActionResult.Error
+
+    # Simulation
+
+    def step(self, loops: int) -> None:
+        """
+        Advance the game by `loops` game loops, TICK_LOOPS at most at a time.
+        """
+        while loops > 0 and self.result is None:
+            tick = min(loops, TICK_LOOPS)
+            self.__tick(tick / GAME_LOOPS_PER_SECOND)
+            self.game_loop += tick
+            loops -= tick
+
+    def __tick(self, seconds: float) -> None:
+        engaged = self.__combat(seconds)
+        for unit in list(self.units.values()):
+            if unit.tag not in self.units:
+                continue
+            if unit.build_progress < 1:
+                self.__construct(unit, seconds)
+                continue
+            if unit.unit_type == U.QUEEN:
+                unit.energy = min(MAX_ENERGY, unit.energy + ENERGY_PER_SECOND * seconds)
+            if unit.unit_type in _HATCHERIES:
+                self.__hatchery(unit, seconds)
+            if unit.orders:
+                self.__advance(unit, unit.orders[0], seconds, engaged.get(unit.tag))
+        self.__economy(seconds)
+        self.__opponent(seconds)
+        self.__check_result()
+
+    def __construct(self, unit: LocalUnit, seconds: float) -> None:
+        progress = seconds / unit.stats.build_time
+        unit.build_progress = min(1.0, unit.build_progress + progress)
+        unit.health = min(unit.stats.health, unit.health + unit.stats.health * 0.9 * progress)
+
+    def __hatchery(self, hatchery: LocalUnit, seconds: float) -> None:
+        hatchery.timer -= seconds
+        if hatchery.timer <= 0:
+            hatchery.timer = LARVA_SECONDS
+            larvae = sum(1 for unit in self.units.values() if unit.unit_type == U.LARVA
+                         and unit.owner == hatchery.owner and unit.distance_to(hatchery.x, hatchery.y) < 4)
+            if larvae < 3:
+                self.__spawn_larva(hatchery)
+        if hatchery.inject_timer > 0:
+            hatchery.inject_timer -= seconds
+            if hatchery.inject_timer <= 0:
+                for index in range(3):
+                    self.__spawn_larva(hatchery)
+
+    def __move(self, unit: LocalUnit, x: float, y: float, seconds: float, reach: float = 0.1) -> bool:
+        """
+        Move a unit straight at a point.
+        :return: Whether it is within `reach` of the point.
+        """
+        distance = unit.distance_to(x, y)
+        if distance <= reach:
+            return True
+        travel = unit.stats.speed * seconds
+        if not travel:
+            return False
+        if travel >= distance - reach:
+            ratio = (distance - reach) / distance
+            unit.x += (x - unit.x) * ratio
+            unit.y += (y - unit.y) * ratio
+            return True
+        unit.x += (x - unit.x) * travel / distance
+        unit.y += (y - unit.y) * travel / distance
+        return False
+
+    def __target_position(self, target) -> Optional[Tuple[float, float]]:
+        if isinstance(target, int):
+            unit = self.units.get(target)
+            return None if unit is None else (unit.x, unit.y)
+        return target
+
+    def __advance(self, unit: LocalUnit, order: LocalOrder, seconds: float,
+                  enemy: Optional[Tuple[float, float]]) -> None:
+        kind = order.kind
+        if kind in ("move", "attack"):
+            if kind == "attack" and enemy is not None:
+                # Attacks chase the closest enemy in sight, and stop to shoot the ones in range.
+                if enemy != (unit.x, unit.y):
+                    self.__move(unit, enemy[0], enemy[1], seconds)
+                return
+            position = self.__target_position(order.target)
+            if position is None or self.__move(unit, position[0], position[1], seconds,
+                                               1.0 if isinstance(order.target, int) else 0.1):
+                unit.orders.pop(0)
+        elif kind == "gather":
+            resource = self.units.get(order.target)
+            if resource is None or resource.owner not in (unit.owner, NEUTRAL_PLAYER):
+                unit.orders.pop(0)
+            elif order.progress < 1 and self.__move(unit, resource.x, resource.y, seconds,
+                                                    resource.stats.radius + unit.stats.radius + 0.2):
+                order.progress = 1.0
+                if resource.unit_type == U.MINERALFIELD:
+                    self.__spread(unit, order, resource)
+        elif kind == "repair":
+            structure = self.units.get(order.target)
+            if structure is None or structure.health >= structure.stats.health:
+                unit.orders.pop(0)
+            elif self.__move(unit, structure.x, structure.y, seconds, structure.stats.radius + 1.0):
+                structure.health = min(structure.stats.health, structure.health
+                                       + structure.stats.health / structure.stats.build_time * seconds)
+        elif kind == "inject":
+            hatchery = self.units.get(order.target)
+            if hatchery is None or hatchery.unit_type not in _HATCHERIES or unit.energy < 25:
+                unit.orders.pop(0)
+            elif self.__move(unit, hatchery.x, hatchery.y, seconds, hatchery.stats.radius + 1.0):
+                unit.energy -= 25
+                hatchery.inject_timer = INJECT_SECONDS
+                unit.orders.pop(0)
+        elif kind == "build":
+            self.__build(unit, order, seconds)
+        elif kind == "construct":
+            structure = self.units.get(order.target)
+            if structure is None or structure.build_progress >= 1:
+                unit.orders.pop(0)
+                if structure is not None and structure.unit_type in GAS_BUILDINGS:
+                    unit.orders.append(LocalOrder("gather", _GATHER, structure.tag))
+        elif kind == "addon":
+            add_on = self.units.get(order.target)
+            if add_on is None or add_on.build_progress >= 1:
+                unit.orders.pop(0)
+            else:
+                order.progress = add_on.build_progress
+        else:
+            production = order.production
+            build_time = research_cost(production.product)[2] if kind == "research" else \
+                UNIT_STATS[production.product].build_time
+            order.progress = min(1.0, order.progress + seconds / build_time)
+            if order.progress >= 1:
+                unit.orders.pop(0)
+                self.__produced(unit, production)
+
+    def __spread(self, worker: LocalUnit, order: LocalOrder, mineral: LocalUnit) -> None:
+        """
+        Send a worker reaching a busy mineral field to a free field nearby, like the game does.
+        """
+        miners: Dict[int, int] = {}
+        for unit in self.units.values():
+            if unit is not worker and unit.orders and unit.orders[0].kind == "gather" and unit.orders[0].progress >= 1:
+                miners[unit.orders[0].target] = miners.get(unit.orders[0].target, 0) + 1
+        if miners.get(mineral.tag, 0) < 2:
+            return
+        fields = [unit for unit in self.units.values() if unit.unit_type == U.MINERALFIELD
+                  and miners.get(unit.tag, 0) < 2 and unit.distance_to(mineral.x, mineral.y) < 8]
+        if fields:
+            free = min(fields, key=lambda field: (miners.get(field.tag, 0), field.distance_to(worker.x, worker.y)))
+            order.target, order.progress = free.tag, 0.0
+
+    def __build(self, worker: LocalUnit, order: LocalOrder, seconds: float) -> None:
+        product = order.production.product
+        stats = UNIT_STATS[product]
+        x, y = order.target
+        if not self.__move(worker, x, y, seconds, stats.footprint / 2 + 1.0):
+            return
+        player = self.players[worker.owner]
+        if not self.can_place(product, x, y) or self.__check(player, order.production, worker) != ActionResult.Success:
+            worker.orders.pop(0)
+            return
+        self.__pay(player, order.production, worker)
+        structure = self.add_unit(product, worker.owner, x, y, 0.0)
+        if product in GAS_BUILDINGS:
+            geyser = self.__geyser_under(structure)
+            structure.contents = geyser.contents if geyser is not None else VESPENE_CONTENTS
+        if player.race == Race.Zerg:
+            # The Drone becomes the structure.
+            self.remove_unit(worker, died=False)
+        elif player.race == Race.Terran:
+            order.kind, order.target = "construct", structure.tag
+        else:
+            worker.orders.pop(0)
+
+    def __geyser_under(self, structure: LocalUnit) -> Optional[LocalUnit]:
+        for unit in self.units.values():
+            if unit.unit_type == U.VESPENEGEYSER and abs(unit.x - structure.x) < 0.6 and abs(unit.y - structure.y) < 0.6:
+                return unit
+        return None
+
+    def __produced(self, maker: LocalUnit, production: Production) -> None:
+        product = production.product
+        if production.kind == "research":
+            self.players[maker.owner].upgrades.add(product)
+        elif production.kind == "morph":
+            maker.set_type(product)
+        elif maker.unit_type == U.EGG:
+            maker.set_type(product)
+            maker.health = maker.stats.health
+            if product == U.ZERGLING:
+                self.__spawn_near(U.ZERGLING, maker)
+        else:
+            self.__spawn_near(product, maker)
+
+    def __economy(self, seconds: float) -> None:
+        # Workers on every resource, only the ones close to a finished townhall of their owner bring income.
+        miners: Dict[int, int] = {}
+        for unit in self.units.values():
+            if unit.orders and unit.orders[0].kind == "gather" and unit.orders[0].progress >= 1:
+                miners[unit.orders[0].target] = miners.get(unit.orders[0].target, 0) + 1
+        if not miners:
+            return
+        townhalls = [unit for unit in self.units.values()
+                     if unit.unit_type in TOWNHALL_TYPES and unit.build_progress >= 1]
+        for tag, count in miners.items():
+            resource = self.units.get(tag)
+            if resource is None:
+                continue
+            if resource.unit_type in GAS_BUILDINGS:
+                owner = resource.owner
+                if resource.build_progress < 1:
+                    continue
+                income = min(count, 3) * VESPENE_PER_SECOND * seconds
+            else:
+                owner = next((townhall.owner for townhall in townhalls
+                              if townhall.distance_to(resource.x, resource.y) < BASE_RADIUS), None)
+                income = (min(count, 2) * MINERALS_PER_SECOND
+                          + (THIRD_WORKER_MINERALS_PER_SECOND if count > 2 else 0)) * seconds
+            if owner is None or not any(townhall.owner == owner and townhall.distance_to(resource.x, resource.y)
+                                        < BASE_RADIUS for townhall in townhalls):
+                continue
+            income = min(income, resource.contents)
+            resource.contents -= income
+            player = self.players[owner]
+            if resource.unit_type == U.MINERALFIELD:
+                player.minerals += income
+                if resource.contents <= 0:
+                    self.remove_unit(resource)
+            else:
+                player.vespene += income
+
+    def __combat(self, seconds: float) -> Dict[int, Tuple[float, float]]:
+        """
+        Every armed unit shoots the closest enemy in range, its attack target first.
+        :return: For the units chasing or shooting an enemy, the position to go to: the enemy in sight, or their own
+        position when it is in range.
+        """
+        fighters = [unit for unit in self.units.values()
+                    if unit.owner != NEUTRAL_PLAYER and unit.health > 0]
+        attackers = [unit for unit in fighters if unit.stats.weapon is not None and unit.build_progress >= 1
+                     and (not unit.orders or unit.orders[0].kind == "attack")
+                     and (unit.unit_type not in WORKERS.values() or unit.orders)]
+        if not attackers:
+            return {}
+        positions = np.array([(unit.x, unit.y) for unit in fighters])
+        owners = np.array([unit.owner for unit in fighters])
+        flying = np.array([unit.stats.flying for unit in fighters])
+        structures = np.array([unit.stats.is_structure for unit in fighters])
+        radii = np.array([unit.stats.radius for unit in fighters])
+        index = {unit.tag: row for row, unit in enumerate(fighters)}
+
+        attacker_rows = np.array([index[unit.tag] for unit in attackers])
+        weapons = [unit.stats.weapon for unit in attackers]
+        ranges = np.array([weapon[3] for weapon in weapons])
+        targets = np.array([weapon[4] for weapon in weapons])
+        gaps = np.hypot(positions[attacker_rows, None, 0] - positions[None, :, 0],
+                        positions[attacker_rows, None, 1] - positions[None, :, 1])
+        gaps -= radii[attacker_rows, None] + radii[None, :]
+        valid = owners[None, :] != owners[attacker_rows, None]
+        valid &= np.where(targets[:, None] == GROUND, ~flying[None, :],
+                          np.where(targets[:, None] == AIR, flying[None, :], True))
+        # Units before structures, then the closest.
+        score = np.where(valid, gaps + structures[None, :] * 1000.0, np.inf)
+        in_range = valid & (gaps <= ranges[:, None])
+        closest = np.where(in_range, score, np.inf).argmin(axis=1)
+        sighted = score.argmin(axis=1)
+
+        damage = np.zeros(len(fighters))
+        engaged: Dict[int, Tuple[float, float]] = {}
+        for row, unit in enumerate(attackers):
+            target_row = None
+            if unit.orders and isinstance(unit.orders[0].target, int):
+                explicit = index.get(unit.orders[0].target)
+                if explicit is not None and in_range[row, explicit]:
+                    target_row = explicit
+                elif explicit is not None:
+                    # Go for the target itself.
+                    continue
+            if target_row is None and in_range[row, closest[row]]:
+                target_row = closest[row]
+            if target_row is not None:
+                damage[target_row] += unit.stats.dps * seconds
+                engaged[unit.tag] = (unit.x, unit.y)
+            elif np.isfinite(score[row, sighted[row]]) and gaps[row, sighted[row]] <= SIGHT_RANGE and unit.stats.speed:
+                enemy = fighters[sighted[row]]
+                engaged[unit.tag] = (enemy.x, enemy.y)
+                if not unit.orders:
+                    # Idle units defend themselves.
+                    self.__move(unit, enemy.x, enemy.y, seconds)
+
+        for row in np.flatnonzero(damage):
+            unit = fighters[row]
+            unit.health -= damage[row]
+            if unit.health <= 0 and unit.tag in self.units:
+                self.remove_unit(unit)
+                if unit.add_on_tag in self.units:
+                    self.units[unit.add_on_tag].owner = unit.owner
+        return engaged
+
+    def __opponent(self, seconds: float) -> None:
+        for player in self.players.values():
+            if player.difficulty is None:
+                continue
+            townhall = next((unit for unit in self.units.values() if unit.owner == player.player_id
+                             and unit.unit_type in TOWNHALL_TYPES), None)
+            self.__spawn_timer -= seconds
+            if self.__spawn_timer <= 0 and townhall is not None:
+                self.__spawn_timer = self.spawn_seconds
+                army = OPPONENT_ARMY[player.race]
+                for count in range(2 if army == U.ZERGLING else 1):
+                    self.__spawn_near(army, townhall)
+            self.__wave_timer -= seconds
+            if self.__wave_timer <= 0:
+                self.__wave_timer = self.wave_seconds
+                self.__attack_wave(player)
+
+    def __attack_wave(self, player: LocalPlayer) -> None:
+        enemies = [unit for unit in self.units.values()
+                   if unit.owner not in (player.player_id, NEUTRAL_PLAYER) and unit.stats.is_structure]
+        if not enemies:
+            return
+        army = OPPONENT_ARMY[player.race]
+        for unit in self.units.values():
+            if unit.owner == player.player_id and unit.unit_type == army and not unit.orders:
+                target = min(enemies, key=lambda enemy: enemy.distance_to(unit.x, unit.y))
+                unit.orders.append(LocalOrder("attack", AbilityId.ATTACK_ATTACK.value, (target.x, target.y)))
+
+    def __check_result(self) -> None:
+        alive = {unit.owner for unit in self.units.values() if unit.stats.is_structure}
+        losers = [player_id for player_id in self.players if player_id not in alive]
+        if not losers:
+            return
+        if len(losers) == len(self.players):
+            self.result = {player_id: Result.Tie for player_id in self.players}
+        else:
+            self.result = {player_id: Result.Defeat if player_id in losers else Result.Victory
+                           for player_id in self.players}
+
+    # Observations
+
+    def observation(self, player_id: int) -> sc_pb.ResponseObservation:
+        """
+        :return: What the player sees, everything as there is no fog of war.
+        """
+        response = sc_pb.ResponseObservation()
+        observation = response.observation
+        observation.game_loop = self.game_loop
+        player = self.players[player_id]
+        used, cap = self.food(player_id)
+        common = observation.player_common
+        common.player_id = player_id
+        common.minerals = int(player.minerals)
+        common.vespene = int(player.vespene)
+        common.food_cap = int(cap)
+        common.food_used = int(math.ceil(used))
+
+        raw = observation.raw_data
+        raw.player.upgrade_ids.extend(upgrade.value for upgrade in player.upgrades)
+        raw.player.camera.x, raw.player.camera.y = player.start
+        raw.map_state.visibility.bits_per_pixel = 8
+        raw.map_state.visibility.size.x, raw.map_state.visibility.size.y = self.map.width, self.map.height
+        raw.map_state.visibility.data = self.visibility
+        raw.map_state.creep.bits_per_pixel = 1
+        raw.map_state.creep.size.x, raw.map_state.creep.size.y = self.map.width, self.map.height
+        raw.map_state.creep.data = self.creep
+        raw.event.dead_units.extend(self.__dead[player_id])
+        self.__dead[player_id] = []
+
+        harvesters = self.__harvesters()
+        workers = army = idle_workers = larvae = 0
+        worker_types = set(WORKERS.values())
+        for unit in self.units.values():
+            proto = raw.units.add()
+            proto.display_type = raw_pb.Visible
+            proto.alliance = _SELF if unit.owner == player_id else _NEUTRAL if unit.owner == NEUTRAL_PLAYER else _ENEMY
+            proto.tag = unit.tag
+            proto.unit_type = unit.unit_type.value
+            proto.owner = unit.owner
+            proto.pos.x, proto.pos.y, proto.pos.z = unit.x, unit.y, self.map.height_at(unit.x, unit.y)
+            proto.radius = unit.stats.radius
+            proto.build_progress = unit.build_progress
+            proto.cloak = raw_pb.NotCloaked
+            proto.is_flying = unit.stats.flying
+            if unit.owner == NEUTRAL_PLAYER:
+                if unit.unit_type == U.MINERALFIELD:
+                    proto.mineral_contents = int(unit.contents)
+                else:
+                    proto.vespene_contents = int(unit.contents)
+                continue
+            proto.health = unit.health
+            proto.health_max = unit.stats.health
+            if unit.owner != player_id:
+                continue
+            proto.is_powered = True
+            proto.is_active = bool(unit.orders)
+            if unit.unit_type == U.QUEEN:
+                proto.energy, proto.energy_max = unit.energy, MAX_ENERGY
+            if unit.add_on_tag:
+                proto.add_on_tag = unit.add_on_tag
+            if unit.unit_type in GAS_BUILDINGS:
+                proto.vespene_contents = int(unit.contents)
+            assigned, ideal = harvesters.get(unit.tag, (0, 0))
+            if ideal:
+                proto.assigned_harvesters, proto.ideal_harvesters = assigned, ideal
+            for order in unit.orders:
+                order_proto = proto.orders.add(ability_id=order.ability)
+                if isinstance(order.target, int):
+                    order_proto.target_unit_tag = order.target
+                elif order.target is not None:
+                    order_proto.target_world_space_pos.x, order_proto.target_world_space_pos.y = order.target
+                if order.production is not None:
+                    order_proto.progress = order.progress
+            if unit.unit_type in worker_types:
+                workers += 1
+                idle_workers += not unit.orders
+            elif unit.unit_type == U.LARVA:
+                larvae += 1
+            elif unit.stats.food and not unit.stats.is_structure:
+                army += 1
+        common.food_workers = workers
+        common.food_army = int(used) - workers
+        common.idle_worker_count = idle_workers
+        common.army_count = army
+        common.larva_count = larvae
+
+        if self.result is not None:
+            for result_player, result in sorted(self.result.items()):
+                response.player_result.add(player_id=result_player, result=result.value)
+        return response
+
+    def __harvesters(self) -> Dict[int, Tuple[int, int]]:
+        """
+        :return: Assigned and ideal harvesters of every finished townhall and gas building.
+        """
+        gathering: Dict[int, int] = {}
+        for unit in self.units.values():
+            if unit.orders and unit.orders[0].kind == "gather":
+                gathering[unit.orders[0].target] = gathering.get(unit.orders[0].target, 0) + 1
+        minerals = [unit for unit in self.units.values() if unit.unit_type == U.MINERALFIELD]
+        harvesters = {}
+        for unit in self.units.values():
+            if unit.build_progress < 1:
+                continue
+            if unit.unit_type in TOWNHALL_TYPES:
+                fields = [mineral for mineral in minerals if mineral.distance_to(unit.x, unit.y) < BASE_RADIUS]
+                harvesters[unit.tag] = (sum(gathering.get(field.tag, 0) for field in fields), 2 * len(fields))
+            elif unit.unit_type in GAS_BUILDINGS:
+                harvesters[unit.tag] = (gathering.get(unit.tag, 0), 3 if unit.contents > 0 else 0)
+        return harvesters
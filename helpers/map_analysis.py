@@ -0,0 +1,205 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import hashlib
+import os
+import re
+
+import numpy as np
+
+# Bump when the content or the layout of the analysis changes, older cache files are then recomputed.
+MAP_ANALYSIS_VERSION: int = 1
+DEFAULT_CACHE_DIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "map_cache")
+UNREACHABLE: int = np.iinfo(np.uint16).max
+
+# Neighbour offsets of the 8-connected grid.
+_NEIGHBOURS = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx]
+
+
+def map_hash(map_name: str, *grids: np.ndarray) -> str:
+    """
+    :return: Hash identifying a map by its name and its static grids (placement, terrain height...).
+    """
+    digest = hashlib.sha1(map_name.encode("utf-8"))
+    for grid in grids:
+        digest.update(str(grid.shape).encode("utf-8"))
+        digest.update(np.ascontiguousarray(grid).tobytes())
+    return digest.hexdigest()
+
+
+def distance_field(pathable: np.ndarray, seed: Tuple[float, float], seed_radius: int = 2) -> np.ndarray:
+    """
+    Breadth-first walking distance, in grid steps, from a point to every cell of the map.
+    :param pathable: (height, width) boolean grid indexed [y, x].
+    :param seed: Origin of the field. The square of `seed_radius` cells around it counts as pathable,
+    so a base center covered by its townhall still spreads.
+    :return: (height, width) uint16 array, UNREACHABLE where the cell can't be reached.
+    """
+    height, width = pathable.shape
+    x, y = int(seed[0]), int(seed[1])
+    pathable = pathable.copy()
+    pathable[max(0, y - seed_radius):y + seed_radius + 1, max(0, x - seed_radius):x + seed_radius + 1] = True
+
+    field = np.full((height, width), UNREACHABLE, dtype=np.uint16)
+    reached = np.zeros((height, width), dtype=bool)
+    frontier = np.zeros((height, width), dtype=bool)
+    frontier[min(max(y, 0), height - 1), min(max(x, 0), width - 1)] = True
+    step = 0
+    while frontier.any():
+        field[frontier] = step
+        reached |= frontier
+        spread = np.zeros_like(frontier)
+        for dy, dx in _NEIGHBOURS:
+            spread[max(0, dy):height + min(0, dy), max(0, dx):width + min(0, dx)] |= \
+                frontier[max(0, -dy):height + min(0, -dy), max(0, -dx):width + min(0, -dx)]
+        frontier = spread & pathable & ~reached
+        step += 1
+    return field
+
+
+class MapAnalysis(object):
+    """
+    Static facts about a map, computed once and stored in a compressed file next to the other maps analysed.
+    Positions are (x, y) tuples, bases are identified by their index in `expansions`.
+    :param expansions: (n, 2) townhall positions of the bases.
+    :param geysers: (g, 3) rows of [base index, x, y].
+    :param ramps: (r, 5) rows of [top x, top y, bottom x, bottom y, number of upper points].
+    :param main_ramps: (s, 10) rows of [start x, start y, barracks x, y, middle depot x, y, corner depots x, y, x, y].
+    :param base_distances: (n, n) walking distance between the bases, inf when not connected.
+    :param distance_fields: (n, height, width) walking distance from every base, see distance_field.
+    """
+
+    def __init__(self, map_name: str, map_hash: str, expansions: np.ndarray, geysers: np.ndarray, ramps: np.ndarray,
+                 main_ramps: np.ndarray, base_distances: np.ndarray, distance_fields: np.ndarray):
+        self.map_name = map_name
+        self.map_hash = map_hash
+        self.expansions = expansions.reshape(-1, 2)
+        self.geysers = geysers.reshape(-1, 3)
+        self.ramps = ramps.reshape(-1, 5)
+        self.main_ramps = main_ramps.reshape(-1, 10)
+        self.base_distances = base_distances
+        self.distance_fields = distance_fields
+
+    @staticmethod
+    def cache_path(directory: str, map_name: str, map_hash: str) -> str:
+        name = re.sub(r"[^A-Za-z0-9_-]+", "_", map_name) or "map"
+        return os.path.join(directory, "{}-{}.npz".format(name, map_hash[:16]))
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write next to the target and rename, games running in parallel may read the file meanwhile.
+        temporary_path = "{}.{}.tmp.npz".format(path[:-len(".npz")], os.getpid())
+        np.savez_compressed(
+            temporary_path,
+            version=np.array(MAP_ANALYSIS_VERSION),
+            map_name=np.array(self.map_name),
+            map_hash=np.array(self.map_hash),
+            expansions=self.expansions,
+            geysers=self.geysers,
+            ramps=self.ramps,
+            main_ramps=self.main_ramps,
+            base_distances=self.base_distances,
+            distance_fields=self.distance_fields,
+        )
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str, map_hash: Optional[str] = None) -> Optional["MapAnalysis"]:
+        """
+        :return: The analysis stored in the file, or None when it is missing, unreadable, from another version
+        of the analysis or for another map.
+        """
+        try:
+            with np.load(path) as stored:
+                if int(stored["version"]) != MAP_ANALYSIS_VERSION:
+                    return None
+                if map_hash is not None and str(stored["map_hash"]) != map_hash:
+                    return None
+                return cls(
+                    str(stored["map_name"]), str(stored["map_hash"]), stored["expansions"], stored["geysers"],
+                    stored["ramps"], stored["main_ramps"], stored["base_distances"], stored["distance_fields"],
+                )
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def closest_base(self, position) -> int:
+        difference = self.expansions - np.array([position[0], position[1]])
+        return int(np.einsum("ij,ij->i", difference, difference).argmin())
+
+    def geysers_of(self, base: int) -> List[Tuple[float, float]]:
+        return [(x, y) for index, x, y in self.geysers.tolist() if int(index) == base]
+
+    def walking_distance(self, base: int, position) -> float:
+        """
+        :return: Walking distance in grid steps from a base to a position, inf when it can't be reached.
+        """
+        field = self.distance_fields[base]
+        x = min(max(int(position[0]), 0), field.shape[1] - 1)
+        y = min(max(int(position[1]), 0), field.shape[0] - 1)
+        value = int(field[y, x])
+        return float("inf") if value == UNREACHABLE else float(value)
+
+    @property
+    def chokes(self) -> List[Tuple[float, float, int]]:
+        """
+        :return: Center and width, in upper points, of every ramp.
+        """
+        return [
+            ((top_x + bottom_x) / 2, (top_y + bottom_y) / 2, int(width))
+            for top_x, top_y, bottom_x, bottom_y, width in self.ramps.tolist()
+        ]
+
+    def main_ramp(self, start_location) -> Optional[Dict]:
+        """
+        :return: The wall positions of the main ramp of a start location: "barracks", "depot_in_middle" and
+        "corner_depots", or None when the start location wasn't analysed.
+        """
+        for row in self.main_ramps.tolist():
+            if abs(row[0] - start_location[0]) < 0.5 and abs(row[1] - start_location[1]) < 0.5:
+                return {
+                    "barracks": (row[2], row[3]),
+                    "depot_in_middle": (row[4], row[5]),
+                    "corner_depots": [(row[6], row[7]), (row[8], row[9])],
+                }
+        return None
+
+
+def analyze_map(map_name: str, map_hash: str, pathable: np.ndarray, expansions: Sequence, geysers: Iterable,
+                ramps: Iterable[Sequence[float]], main_ramps: Iterable[Sequence[float]]) -> MapAnalysis:
+    """
+    :param pathable: (height, width) pathing grid at the start of the game, indexed [y, x].
+    :param expansions: Townhall positions of the bases.
+    :param geysers: Positions of the vespene geysers, grouped with the closest base.
+    :param ramps: Rows of [top x, top y, bottom x, bottom y, number of upper points].
+    :param main_ramps: Rows of [start x, start y, barracks x, y, middle depot x, y, corner depots x, y, x, y].
+    """
+    expansions = np.array([(position[0], position[1]) for position in expansions], dtype=float).reshape(-1, 2)
+    pathable = np.asarray(pathable) != 0
+
+    fields = np.stack([distance_field(pathable, base) for base in expansions]) if len(expansions) \
+        else np.empty((0,) + pathable.shape, dtype=np.uint16)
+    base_distances = np.full((len(expansions), len(expansions)), np.inf)
+    for index, field in enumerate(fields):
+        for other, base in enumerate(expansions):
+            value = field[min(int(base[1]), field.shape[0] - 1), min(int(base[0]), field.shape[1] - 1)]
+            if value != UNREACHABLE:
+                base_distances[index, other] = value
+
+    geyser_rows = []
+    for geyser in geysers:
+        if len(expansions):
+            difference = expansions - np.array([geyser[0], geyser[1]])
+            base = int(np.einsum("ij,ij->i", difference, difference).argmin())
+            geyser_rows.append((base, geyser[0], geyser[1]))
+
+    return MapAnalysis(
+        map_name,
+        map_hash,
+        expansions,
+        np.array(geyser_rows, dtype=float).reshape(-1, 3),
+        np.array(list(ramps), dtype=float).reshape(-1, 5),
+        np.array(list(main_ramps), dtype=float).reshape(-1, 10),
+        base_distances,
+        fields,
+    )
@@ -0,0 +1,210 @@
+"""
+Runs many games at once, each one in its own worker process, and gathers their results.
+The function playing a game (the launcher) is a parameter, so the runner can be driven by a stand-in that doesn't
+need the StarCraft II client. Launchers must be module level functions, they are sent to the workers by name.
+"""
+from multiprocessing import get_context
+from timeit import default_timer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import importlib
+import itertools
+import os
+import traceback
+
+DEFAULT_MAP: str = "AcropolisLE"
+
+# Bot name -> ("module:Class", race).
+BOTS: Dict[str, tuple] = {
+    "terran": ("bots.terran_bot:TerranBot", "Terran"),
+    "zerg": ("bots.zerg_bot:BaseZergBot", "Zerg"),
+    "broodlord": ("bots.zerg_bot:BroodlordZergBot", "Zerg"),
+    "terranBC": ("terranBC_bot:TerranBot", "Terran"),
+}
+
+
+class MatchSpec(object):
+    """
+    A game to play: one of our bots against the built-in AI.
+    :param bot: Name of the bot in BOTS.
+    :param opponent_race: Race name of the built-in AI (Terran, Zerg, Protoss or Random).
+    :param difficulty: Difficulty name of the built-in AI (Easy, Medium, Hard, VeryHard...).
+    :param seed: Random seed of the game, the client picks one when None.
+    :param bot_kwargs: Arguments of the bot class.
+    """
+
+    def __init__(self, bot: str, opponent_race: str = "Random", difficulty: str = "Easy", map_name: str = DEFAULT_MAP,
+                 realtime: bool = False, seed: Optional[int] = None, game_time_limit: Optional[int] = None,
+                 bot_kwargs: Optional[Dict] = None):
+        self.bot = bot
+        self.opponent_race = opponent_race
+        self.difficulty = difficulty
+        self.map_name = map_name
+        self.realtime = realtime
+        self.seed = seed
+        self.game_time_limit = game_time_limit
+        self.bot_kwargs = dict(bot_kwargs or {})
+
+    @property
+    def pairing(self) -> str:
+        return "{} vs {} {}".format(self.bot, self.opponent_race, self.difficulty)
+
+    def __repr__(self) -> str:
+        return "MatchSpec({} on {})".format(self.pairing, self.map_name)
+
+
+class MatchResult(object):
+    """
+    :param result: Name of the sc2 Result (Victory, Defeat, Tie...), None when the game crashed.
+    :param seconds: Wall time of the game, in the worker.
+    :param error: Traceback of the crash.
+    """
+
+    def __init__(self, index: int, spec: MatchSpec, result: Optional[str], seconds: float,
+                 error: Optional[str] = None, worker: Optional[int] = None):
+        self.index = index
+        self.spec = spec
+        self.result = result
+        self.seconds = seconds
+        self.error = error
+        self.worker = worker
+
+
+def match_matrix(bots: Sequence[str], opponent_races: Sequence[str], difficulties: Sequence[str],
+                 games: int = 1, **kwargs) -> List[MatchSpec]:
+    """
+    :param games: Games played by every combination of bot, opponent race and difficulty.
+    :param kwargs: Other MatchSpec arguments, shared by all the games.
+    :return: The games of every combination.
+    """
+    return [
+        MatchSpec(bot, race, difficulty, **kwargs)
+        for bot, race, difficulty in itertools.product(bots, opponent_races, difficulties)
+        for _ in range(games)
+    ]
+
+
+def launch_game(spec: MatchSpec) -> str:
+    """
+    Launcher playing the game with the StarCraft II client.
+    :return: Name of the result of our bot.
+    """
+    from sc2 import maps
+    from sc2.data import Difficulty, Race
+    from sc2.main import run_game
+    from sc2.player import Bot, Computer
+
+    path, race = BOTS[spec.bot]
+    module_name, class_name = path.split(":")
+    bot_class = getattr(importlib.import_module(module_name), class_name)
+    result = run_game(
+        maps.get(spec.map_name),
+        [Bot(Race[race], bot_class(**spec.bot_kwargs)), Computer(Race[spec.opponent_race], Difficulty[spec.difficulty])],
+        realtime=spec.realtime,
+        random_seed=spec.seed,
+        game_time_limit=spec.game_time_limit,
+    )
+    if isinstance(result, list):
+        result = result[0]
+    return result.name if result is not None else None
+
+
+def launch_local_game(spec: MatchSpec) -> str:
+    """
+    Launcher playing the game against the local stand-in game (see helpers.local_server), without the client.
+    The map of the spec is ignored, the local game has its own.
+    :return: Name of the result of our bot.
+    """
+    from sc2.data import Difficulty, Race
+    from sc2.player import Bot, Computer
+
+    from helpers.local_server import run_local_game
+
+    path, race = BOTS[spec.bot]
+    module_name, class_name = path.split(":")
+    bot_class = getattr(importlib.import_module(module_name), class_name)
+    result = run_local_game(
+        [Bot(Race[race], bot_class(**spec.bot_kwargs)), Computer(Race[spec.opponent_race], Difficulty[spec.difficulty])],
+        realtime=spec.realtime,
+        random_seed=spec.seed,
+        game_time_limit=spec.game_time_limit,
+    )
+    return result.name if result is not None else None
+
+
+def play_match(launcher: Callable[[MatchSpec], str], index: int, spec: MatchSpec) -> MatchResult:
+    """
+    Play one game in the current process. A crash is reported in the result instead of stopping the run.
+    """
+    start = default_timer()
+    try:
+        result, error = launcher(spec), None
+    except Exception:
+        result, error = None, traceback.format_exc()
+    return MatchResult(index, spec, result, default_timer() - start, error, os.getpid())
+
+
+def _play_match(arguments) -> MatchResult:
+    return play_match(*arguments)
+
+
+def run_matches(specs: Iterable[MatchSpec], launcher: Callable[[MatchSpec], str] = launch_game,
+                workers: Optional[int] = None,
+                on_result: Optional[Callable[[MatchResult], None]] = None) -> List[MatchResult]:
+    """
+    Play the games, `workers` at a time. Every game gets a fresh worker process, so nothing a game leaves behind
+    (client connection, bot state, module globals) leaks into the next one.
+    :param workers: Games played at the same time, the number of CPUs by default. 0 plays them in this process,
+    one after the other.
+    :param on_result: Called with every result as soon as its game ends.
+    :return: The results, in the order of the specs.
+    """
+    specs = list(specs)
+    jobs = [(launcher, index, spec) for index, spec in enumerate(specs)]
+    results: List[MatchResult] = []
+    if workers == 0:
+        for result in map(_play_match, jobs):
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    else:
+        processes = min(workers or os.cpu_count() or 1, max(1, len(jobs)))
+        # Spawned workers start from a clean interpreter, one game each.
+        with get_context("spawn").Pool(processes, maxtasksperchild=1) as pool:
+            for result in pool.imap_unordered(_play_match, jobs):
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+    return sorted(results, key=lambda result: result.index)
+
+
+def summarize(results: Iterable[MatchResult]) -> Dict[str, Dict]:
+    """
+    :return: For every pairing, the number of games of every result ("Error" for crashes), the win rate and
+    the mean game time in seconds.
+    """
+    summary: Dict[str, Dict] = {}
+    for result in results:
+        pairing = summary.setdefault(result.spec.pairing, {"games": 0, "results": {}, "seconds": 0.0})
+        pairing["games"] += 1
+        name = (result.result or "Unknown") if result.error is None else "Error"
+        pairing["results"][name] = pairing["results"].get(name, 0) + 1
+        pairing["seconds"] += result.seconds
+    for pairing in summary.values():
+        pairing["win_rate"] = pairing["results"].get("Victory", 0) / pairing["games"]
+        pairing["mean_seconds"] = pairing.pop("seconds") / pairing["games"]
+    return summary
+
+
+def format_summary(summary: Dict[str, Dict], wall_seconds: Optional[float] = None) -> str:
+    lines = ["{:<36} {:>6} {:>8} {:>10}  {}".format("pairing", "games", "win rate", "mean s", "results")]
+    for pairing, row in sorted(summary.items()):
+        results = ", ".join("{} {}".format(name, count) for name, count in sorted(row["results"].items()))
+        lines.append("{:<36} {:>6} {:>8.0%} {:>10.1f}  {}".format(
+            pairing, row["games"], row["win_rate"], row["mean_seconds"], results))
+    if wall_seconds is not None:
+        games = sum(row["games"] for row in summary.values())
+        game_seconds = sum(row["games"] * row["mean_seconds"] for row in summary.values())
+        lines.append("{} games in {:.1f} s of wall time ({:.1f} s of game time)".format(
+            games, wall_seconds, game_seconds))
+    return "\n".join(lines)
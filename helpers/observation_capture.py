@@ -0,0 +1,159 @@
+"""
+Capture of what the game sent to a bot, to replay its decisions offline (see helpers.observation_replay).
+
+A capture is a gzip stream of records: a kind byte, the payload length as uint32 and the payload.
+    HEADER       JSON: player id, base build, game step and random seed of the bot
+    GAME_INFO    ResponseGameInfo at the start of the game
+    GAME_DATA    ResponseData, only the entries the bot kept
+    PATHING      Pathing grid bytes the bot started on, when they differ from the game info
+    START        ResponseObservation the bot started on
+    PLACEMENTS   JSON list of [ability id, x, y, answer] the game gave during the step
+    PATHING      Pathing grid bytes, only when they changed since the last step
+    OBSERVATION  ResponseObservation of the step
+    ACTIONS      JSON list of the commands of the step, closes the step
+"""
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import gzip
+import json
+import os
+import struct
+
+HEADER, GAME_INFO, GAME_DATA, START, PLACEMENTS, PATHING, OBSERVATION, ACTIONS = range(1, 9)
+_RECORD = struct.Struct("<BI")
+
+
+def command_record(action) -> List:
+    """
+    :return: JSON form of a UnitCommand: [ability id, unit tag, target, queued], the target being a unit tag,
+    [x, y] or None.
+    """
+    target = action.target
+    if target is not None:
+        tag = getattr(target, "tag", None)
+        target = tag if tag is not None else [round(float(target[0]), 2), round(float(target[1]), 2)]
+    return [action.ability.value, action.unit.tag, target, bool(action.queue)]
+
+
+class ObservationRecorder(object):
+    """
+    Writes a capture while the game runs.
+    :param compresslevel: gzip level, low levels keep the cost per step small.
+    """
+
+    def __init__(self, path: str, compresslevel: int = 1):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.__file = gzip.open(path, "wb", compresslevel=compresslevel)
+        self.__pathing: Optional[bytes] = None
+        self.steps = 0
+
+    def __write(self, kind: int, payload: bytes) -> None:
+        self.__file.write(_RECORD.pack(kind, len(payload)))
+        self.__file.write(payload)
+
+    def __write_json(self, kind: int, value) -> None:
+        self.__write(kind, json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+    def start(self, header: Dict, game_info, game_data, observation, pathing: bytes) -> None:
+        """
+        :param game_info: ResponseGameInfo proto.
+        :param game_data: ResponseData proto.
+        :param observation: ResponseObservation proto of the first step.
+        :param pathing: Pathing grid data of the first step.
+        """
+        self.__write_json(HEADER, header)
+        self.__write(GAME_INFO, game_info.SerializeToString())
+        self.__write(GAME_DATA, game_data.SerializeToString())
+        self.__pathing = bytes(game_info.start_raw.pathing_grid.data)
+        if pathing != self.__pathing:
+            self.__pathing = pathing
+            self.__write(PATHING, pathing)
+        self.__write(START, observation.SerializeToString())
+
+    def placements(self, answers: List) -> None:
+        self.__write_json(PLACEMENTS, answers)
+
+    def step(self, observation, pathing: bytes, actions: List) -> None:
+        """
+        :param pathing: Pathing grid data of the step.
+        :param actions: The commands of the step, see command_record.
+        """
+        if pathing != self.__pathing:
+            self.__pathing = pathing
+            self.__write(PATHING, pathing)
+        self.__write(OBSERVATION, observation.SerializeToString())
+        self.__write_json(ACTIONS, actions)
+        self.steps += 1
+
+    def close(self) -> None:
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+def read_records(path: str) -> Iterator[Tuple[int, bytes]]:
+    """
+    :return: The (kind, payload) records of a capture. A record cut short by a crash ends the capture.
+    """
+    with gzip.open(path, "rb") as stream:
+        while True:
+            try:
+                head = stream.read(_RECORD.size)
+                if len(head) < _RECORD.size:
+                    return
+                kind, length = _RECORD.unpack(head)
+                payload = stream.read(length)
+            except EOFError:
+                # The gzip stream itself was cut.
+                return
+            if len(payload) < length:
+                return
+            yield kind, payload
+
+
+class Capture(object):
+    """
+    A capture read back: the start of the game and its steps. The bot starts on `start` and `start_pathing`,
+    every step is a dict with the "observation"
+    (ResponseObservation), the "pathing" grid bytes, the "placements" answers and the recorded "actions".
+    """
+
+    def __init__(self, path: str):
+        from s2clientprotocol import sc2api_pb2 as sc_pb
+
+        self.header: Dict = {}
+        self.game_info = sc_pb.ResponseGameInfo()
+        self.game_data = sc_pb.ResponseData()
+        self.start = sc_pb.ResponseObservation()
+        self.start_pathing: bytes = b""
+        self.steps: List[Dict] = []
+        step: Dict = {"placements": []}
+        pathing = None
+        for kind, payload in read_records(path):
+            if kind == HEADER:
+                self.header = json.loads(payload.decode("utf-8"))
+            elif kind == GAME_INFO:
+                self.game_info.ParseFromString(payload)
+                pathing = bytes(self.game_info.start_raw.pathing_grid.data)
+            elif kind == GAME_DATA:
+                self.game_data.ParseFromString(payload)
+            elif kind == START:
+                self.start.ParseFromString(payload)
+                self.start_pathing = pathing
+            elif kind == PLACEMENTS:
+                step["placements"].extend(json.loads(payload.decode("utf-8")))
+            elif kind == PATHING:
+                pathing = payload
+            elif kind == OBSERVATION:
+                step["observation"] = sc_pb.ResponseObservation.FromString(payload)
+            elif kind == ACTIONS:
+                step["pathing"] = pathing
+                step["actions"] = json.loads(payload.decode("utf-8"))
+                self.steps.append(step)
+                step = {"placements": []}
+
+    def __len__(self) -> int:
+        return len(self.steps)
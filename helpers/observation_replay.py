@@ -0,0 +1,171 @@
+"""
+Runs a bot again on the steps of a capture (see helpers.observation_capture), without the StarCraft II client,
+to time its decisions on real game states and compare its commands with the recorded ones.
+"""
+from collections import Counter
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+import asyncio
+import random
+
+import numpy as np
+from s2clientprotocol import query_pb2 as query_pb
+from s2clientprotocol import sc2api_pb2 as sc_pb
+from sc2.game_data import GameData
+from sc2.game_info import GameInfo
+from sc2.game_state import GameState
+
+from helpers.observation_capture import Capture, command_record
+
+
+def _command_key(record: List) -> Tuple:
+    ability, tag, target, queue = record
+    return ability, tag, tuple(target) if isinstance(target, list) else target, queue
+
+
+class ReplayClient(object):
+    """
+    Stands in for sc2.client.Client during a replay. Placement questions get the answers the game gave in the
+    recorded step, the questions the game was never asked (the bot decided differently) are answered "can't place".
+    Commands and debug drawings go nowhere.
+    """
+
+    def __init__(self, game_step: int = 1):
+        self.game_step = game_step
+        self.__answers: Dict[Tuple[int, float, float], bool] = {}
+        # Over the whole replay.
+        self.unanswered = 0
+
+    def set_placements(self, answers: List) -> None:
+        """
+        :param answers: [ability id, x, y, answer] of the recorded step.
+        """
+        self.__answers = {(ability, x, y): answer for ability, x, y, answer in answers}
+
+    async def _execute(self, **kwargs):
+        query = kwargs.get("query")
+        if query is None or not query.placements:
+            raise NotImplementedError("The replay only answers placement queries, not {}".format(list(kwargs)))
+        results = []
+        for placement in query.placements:
+            key = (placement.ability_id, round(placement.target_pos.x, 2), round(placement.target_pos.y, 2))
+            answer = self.__answers.get(key)
+            if answer is None:
+                self.unanswered += 1
+            # 1 is ActionResult.Success, 2 ActionResult.NotSupported.
+            results.append(query_pb.ResponseQueryBuildingPlacement(result=1 if answer else 2))
+        return sc_pb.Response(query=query_pb.ResponseQuery(placements=results))
+
+    async def actions(self, actions, return_successes: bool = False) -> List:
+        return []
+
+    async def _send_debug(self) -> None:
+        pass
+
+
+class ReplayReport(object):
+    """
+    Per step: game loop, time spent in on_step and the commands matching the capture, missing from the replay
+    and only in the replay.
+    """
+
+    def __init__(self, steps: int):
+        self.game_loops = np.zeros(steps, dtype=np.uint32)
+        self.step_seconds = np.zeros(steps, dtype=np.float64)
+        self.matched = np.zeros(steps, dtype=np.uint32)
+        self.missing = np.zeros(steps, dtype=np.uint32)
+        self.extra = np.zeros(steps, dtype=np.uint32)
+        self.unanswered_placements = 0
+        # First steps whose commands differ: (game loop, missing commands, extra commands).
+        self.divergences: List[Tuple[int, List, List]] = []
+
+    def summary(self) -> Dict:
+        milliseconds = self.step_seconds * 1000
+        steps = len(milliseconds)
+        return {
+            "steps": steps,
+            "mean_ms": float(milliseconds.mean()) if steps else 0.0,
+            "p50_ms": float(np.percentile(milliseconds, 50)) if steps else 0.0,
+            "p95_ms": float(np.percentile(milliseconds, 95)) if steps else 0.0,
+            "max_ms": float(milliseconds.max()) if steps else 0.0,
+            "commands_matched": int(self.matched.sum()),
+            "commands_missing": int(self.missing.sum()),
+            "commands_extra": int(self.extra.sum()),
+            "steps_diverged": int(np.count_nonzero(self.missing + self.extra)),
+            "unanswered_placements": self.unanswered_placements,
+        }
+
+    def format_report(self) -> str:
+        summary = self.summary()
+        lines = [
+            "{steps} steps, on_step mean {mean_ms:.3f} ms, p50 {p50_ms:.3f} ms, p95 {p95_ms:.3f} ms, "
+            "max {max_ms:.3f} ms".format(**summary),
+            "commands: {commands_matched} as recorded, {commands_missing} missing, {commands_extra} extra "
+            "({steps_diverged} steps differ, {unanswered_placements} placement questions not in the capture)".format(
+                **summary),
+        ]
+        for game_loop, missing, extra in self.divergences:
+            lines.append("  loop {}: missing {} extra {}".format(game_loop, missing, extra))
+        return "\n".join(lines)
+
+
+async def replay_capture(capture: Capture, ai, steps: Optional[int] = None, divergences: int = 5) -> ReplayReport:
+    """
+    Start the bot on the capture and run its on_step on every recorded step, the way sc2.main plays a game.
+    :param ai: A new bot, built with the arguments of the recorded one but no capture path.
+    :param steps: Steps replayed, all of them by default.
+    :param divergences: Steps whose differing commands are kept in the report.
+    """
+    header = capture.header
+    recorded = capture.steps if steps is None else capture.steps[:steps]
+    report = ReplayReport(len(recorded))
+    client = ReplayClient(header.get("game_step", 1))
+    game_info = sc_pb.Response(game_info=capture.game_info)
+    pathing = game_info.game_info.start_raw.pathing_grid
+
+    ai._initialize_variables()
+    ai._prepare_start(client, header["player_id"], GameInfo(capture.game_info), GameData(capture.game_data),
+                      realtime=False, base_build=header.get("base_build", -1))
+    pathing.data = capture.start_pathing
+    ai._prepare_step(GameState(capture.start), game_info)
+    await ai.on_before_start()
+    ai._prepare_first_step()
+    # The capture seeds the generator right before on_start.
+    random.seed(header["seed"])
+    if recorded:
+        client.set_placements(recorded[0]["placements"])
+    await ai.on_start()
+
+    for index, step in enumerate(recorded):
+        client.set_placements(step["placements"])
+        if step["pathing"] != pathing.data:
+            pathing.data = step["pathing"]
+        state = GameState(step["observation"])
+        ai._prepare_step(state, game_info)
+        await ai.issue_events()
+        start = perf_counter()
+        await ai.on_step(index)
+        report.step_seconds[index] = perf_counter() - start
+        report.game_loops[index] = state.game_loop
+
+        commands = Counter(_command_key(command_record(action)) for action in ai.actions)
+        expected = Counter(_command_key(record) for record in step["actions"])
+        missing, extra = expected - commands, commands - expected
+        report.missing[index] = sum(missing.values())
+        report.extra[index] = sum(extra.values())
+        report.matched[index] = sum(expected.values()) - report.missing[index]
+        if (missing or extra) and len(report.divergences) < divergences:
+            report.divergences.append((state.game_loop, list(missing.elements()), list(extra.elements())))
+        ai.actions.clear()
+        ai.unit_tags_received_action.clear()
+
+    report.unanswered_placements = client.unanswered
+    return report
+
+
+def replay(path: str, ai, steps: Optional[int] = None) -> ReplayReport:
+    """
+    Replay a capture file, see replay_capture.
+    """
+    return asyncio.run(replay_capture(Capture(path), ai, steps))
@@ -0,0 +1,119 @@
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import asyncio
+
+# A placement question: creation ability id of the structure and (x, y) position.
+PlacementKey = Tuple[int, Tuple[float, float]]
+
+
+@lru_cache(maxsize=None)
+def ring_offsets(distance: int, step: int) -> Tuple[Tuple[int, int], ...]:
+    return tuple(
+        [(dx, -distance) for dx in range(-distance, distance + 1, step)]
+        + [(dx, distance) for dx in range(-distance, distance + 1, step)]
+        + [(-distance, dy) for dy in range(-distance, distance + 1, step)]
+        + [(distance, dy) for dy in range(-distance, distance + 1, step)]
+    )
+
+
+def ring_positions(near, distance: int, step: int) -> List[Tuple[float, float]]:
+    """
+    :return: The positions find_placement tries at `distance` from `near`, in the same order.
+    """
+    x, y = float(near[0]), float(near[1])
+    return [(x + dx, y + dy) for dx, dy in ring_offsets(distance, step)]
+
+
+class PlacementBatcher(object):
+    """
+    Collects the placement questions of a step and sends them to the game together.
+    The questions asked before the event loop gets back to the batcher (every ring of a find_placement, the
+    questions of the routines running concurrently) go out in a single query. The game answers one request at a
+    time on its connection, so a batch only leaves once the previous one was answered, and the questions asked
+    meanwhile join it. Answers are kept until the next game loop, so asking again about the same structure and
+    position costs nothing.
+    :param send: Coroutine function answering a list of placement questions with a list of booleans,
+    in one request to the game.
+    """
+
+    def __init__(self, send: Callable[[List[PlacementKey]], Awaitable[List[bool]]]):
+        self.__send = send
+        self.__game_loop: Optional[int] = None
+        self.__answers: Dict[PlacementKey, bool] = {}
+        # Questions of the next batch, and the batch every unanswered question is waiting on.
+        self.__pending: Dict[PlacementKey, None] = {}
+        self.__batch: Optional[asyncio.Future] = None
+        self.__waiting: Dict[PlacementKey, asyncio.Future] = {}
+        self.__sending = asyncio.Lock()
+        # Batches being sent, kept until they are done.
+        self.__flushes: Set[asyncio.Task] = set()
+        # Over the whole game: positions asked, answers reused and requests sent to the game.
+        self.questions = 0
+        self.reused = 0
+        self.requests = 0
+
+    def refresh(self, game_loop: int) -> None:
+        if game_loop != self.__game_loop:
+            self.__game_loop = game_loop
+            self.__answers.clear()
+
+    async def query(self, ability_id: int, positions: Iterable) -> List[bool]:
+        """
+        :return: For every position, whether the structure built by the ability can be placed there.
+        """
+        return await self.answer([(ability_id, position) for position in positions])
+
+    async def answer(self, questions: Iterable[PlacementKey]) -> List[bool]:
+        """
+        :param questions: Ability id and position pairs, the structures can differ.
+        :return: For every question, whether the structure can be placed.
+        """
+        keys = [(ability_id, (float(position[0]), float(position[1]))) for ability_id, position in questions]
+        self.questions += len(keys)
+        known = self.__answers
+        answers = {key: known[key] for key in keys if key in known}
+        self.reused += len(answers)
+        batches, new = [], []
+        for key in keys:
+            if key in answers:
+                continue
+            batch = self.__waiting.get(key)
+            if batch is None:
+                new.append(key)
+            elif batch not in batches:
+                batches.append(batch)
+        if new:
+            batches.append(self.__ask(new))
+        for batch in batches:
+            answers.update(await asyncio.shield(batch))
+        return [answers[key] for key in keys]
+
+    def __ask(self, keys: List[PlacementKey]) -> asyncio.Future:
+        if self.__batch is None:
+            loop = asyncio.get_running_loop()
+            self.__batch = loop.create_future()
+            # The batch leaves once the routines running now are all waiting.
+            flush = loop.create_task(self.__flush(self.__batch))
+            self.__flushes.add(flush)
+            flush.add_done_callback(self.__flushes.discard)
+        self.__pending.update(dict.fromkeys(keys))
+        self.__waiting.update(dict.fromkeys(keys, self.__batch))
+        return self.__batch
+
+    async def __flush(self, batch: asyncio.Future) -> None:
+        async with self.__sending:
+            keys, self.__pending, self.__batch = list(self.__pending), {}, None
+            try:
+                answers = dict(zip(keys, await self.__send(keys)))
+            except Exception as error:
+                batch.set_exception(error)
+                answers = None
+            finally:
+                for key in keys:
+                    self.__waiting.pop(key, None)
+        if answers is None:
+            return
+        self.requests += 1
+        self.__answers.update(answers)
+        batch.set_result(answers)
@@ -0,0 +1,127 @@
+from collections import deque
+from timeit import default_timer
+from typing import Dict
+
+import inspect
+import json
+
+
+def percentile(sorted_samples: list, fraction: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, int(round(fraction * len(sorted_samples))) - 1))
+    return sorted_samples[index]
+
+
+class PhaseStats(object):
+    """
+    Timing of one phase of the step. Percentiles are computed over the last `window` steps.
+    """
+
+    def __init__(self, window: int):
+        self.calls = 0
+        self.steps = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.samples = deque(maxlen=window)
+
+    def add_step(self, elapsed: float, calls: int) -> None:
+        self.calls += calls
+        self.steps += 1
+        self.total_time += elapsed
+        self.samples.append(elapsed)
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+
+    def summary(self) -> Dict[str, float]:
+        samples = sorted(self.samples)
+        return {
+            "calls": self.calls,
+            "steps": self.steps,
+            "total_ms": self.total_time * 1000,
+            "mean_ms": self.total_time / self.steps * 1000 if self.steps else 0.0,
+            "p50_ms": percentile(samples, 0.5) * 1000,
+            "p95_ms": percentile(samples, 0.95) * 1000,
+            "max_ms": self.max_time * 1000,
+        }
+
+
+class StepProfiler(object):
+    """
+    Records the wall time and call count of each phase of a bot step.
+    Times are accumulated during the step and folded into the per-phase statistics by end_step.
+    """
+
+    STEP: str = "step"
+
+    def __init__(self, window: int = 1000):
+        self.__window = window
+        self.__phases = {}
+        self.__counters = {}
+        self.__current = {}
+        self.__step_start = None
+
+    def begin_step(self) -> None:
+        self.__current.clear()
+        self.__step_start = default_timer()
+
+    def end_step(self) -> None:
+        if self.__step_start is None:
+            return
+        self.record(StepProfiler.STEP, default_timer() - self.__step_start)
+        for name, (elapsed, calls) in self.__current.items():
+            stats = self.__phases.get(name)
+            if stats is None:
+                stats = self.__phases[name] = PhaseStats(self.__window)
+            stats.add_step(elapsed, calls)
+        self.__current.clear()
+        self.__step_start = None
+
+    def record(self, name: str, elapsed: float) -> None:
+        elapsed_so_far, calls = self.__current.get(name, (0.0, 0))
+        self.__current[name] = (elapsed_so_far + elapsed, calls + 1)
+
+    def count(self, name: str, value: float) -> None:
+        """
+        Set a counter reported next to the phase timings.
+        """
+        self.__counters[name] = value
+
+    async def measure(self, name: str, phase, *args):
+        """
+        Call a phase and record how long it took. Coroutines returned by the phase are awaited.
+        :param name: Name of the phase in the report.
+        :param phase: Function or coroutine function.
+        :return: The result of the phase.
+        """
+        start = default_timer()
+        result = phase(*args)
+        if inspect.isawaitable(result):
+            result = await result
+        self.record(name, default_timer() - start)
+        return result
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """
+        :return: The statistics of every phase, slowest mean first.
+        """
+        summaries = {name: stats.summary() for name, stats in self.__phases.items()}
+        return dict(sorted(summaries.items(), key=lambda item: item[1]["mean_ms"], reverse=True))
+
+    def format_report(self) -> str:
+        lines = ["{:<32} {:>8} {:>10} {:>10} {:>10} {:>10}".format(
+            "phase", "calls", "mean ms", "p50 ms", "p95 ms", "max ms")]
+        for name, summary in self.report().items():
+            lines.append("{:<32} {:>8} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f}".format(
+                name, summary["calls"], summary["mean_ms"], summary["p50_ms"],
+                summary["p95_ms"], summary["max_ms"]))
+        for name, value in self.__counters.items():
+            lines.append("{:<32} {:>8}".format(name, value))
+        return "\n".join(lines)
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as report_file:
+            json.dump({"phases": self.report(), "counters": self.__counters}, report_file, indent=2)
@@ -0,0 +1,90 @@
+from typing import Dict, Iterable, Optional
+
+
+class UnitQueryCache(object):
+    """
+    Per-step indexes of the bot's units, structures and townhalls by type, readiness and idle state.
+    Each group is indexed with one pass over the observation the first time it is queried in a step,
+    and the results of the queries are kept until the game loop changes.
+    """
+
+    GROUPS = ("units", "structures", "townhalls")
+
+    def __init__(self):
+        self.__bot = None
+        self.__game_loop: Optional[int] = None
+        self.__indexes: Dict[str, Dict] = {}
+        self.__results: Dict[tuple, object] = {}
+        # Number of queries answered and number of passes over a unit group needed to answer them.
+        self.queries = 0
+        self.index_passes = 0
+
+    @property
+    def filter_passes_saved(self) -> int:
+        """
+        Passes over a unit group avoided by answering queries from the indexes.
+        """
+        return self.queries - self.index_passes
+
+    def refresh(self, bot, game_loop: int) -> None:
+        """
+        Drop the indexes when the observation changed since the last query.
+        """
+        if game_loop != self.__game_loop or bot is not self.__bot:
+            self.__bot = bot
+            self.__game_loop = game_loop
+            self.__indexes.clear()
+            self.__results.clear()
+
+    def __index(self, group: str) -> Dict:
+        index = self.__indexes.get(group)
+        if index is None:
+            index = {}
+            for unit in getattr(self.__bot, group):
+                index.setdefault(unit.type_id, []).append(unit)
+            self.__indexes[group] = index
+            self.index_passes += 1
+        return index
+
+    def __query(self, group: str, type_ids, ready: bool, idle: bool):
+        if type_ids is None or isinstance(type_ids, (set, frozenset, list, tuple)):
+            type_ids = None if type_ids is None else frozenset(type_ids)
+        key = (group, type_ids, ready, idle)
+        self.queries += 1
+
+        result = self.__results.get(key)
+        if result is None:
+            index = self.__index(group)
+            if type_ids is None:
+                units: Iterable = getattr(self.__bot, group)
+            elif isinstance(type_ids, frozenset):
+                units = [unit for type_id in type_ids for unit in index.get(type_id, ())]
+            else:
+                units = index.get(type_ids, ())
+            if ready:
+                units = [unit for unit in units if unit.is_ready]
+            if idle:
+                units = [unit for unit in units if unit.is_idle]
+            result = self.__results[key] = getattr(self.__bot, group).subgroup(units)
+        return result
+
+    def units(self, type_ids=None, ready: bool = False, idle: bool = False):
+        """
+        Own units of the given type or types, like `bot.units(type_ids)`.
+        :param type_ids: A UnitTypeId, an iterable of UnitTypeId or None for all the units.
+        :param ready: Keep only the units that are completed.
+        :param idle: Keep only the units without orders.
+        """
+        return self.__query("units", type_ids, ready, idle)
+
+    def structures(self, type_ids=None, ready: bool = False, idle: bool = False):
+        return self.__query("structures", type_ids, ready, idle)
+
+    def townhalls(self, type_ids=None, ready: bool = False, idle: bool = False):
+        return self.__query("townhalls", type_ids, ready, idle)
+
+    def type_counts(self, group: str = "units") -> Dict:
+        """
+        :return: Number of units of every type in the group, from the index of the step.
+        """
+        return {type_id: len(units) for type_id, units in self.__index(group).items()}
@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+
+
+class StepReservations(object):
+    """
+    Minerals, vespene and supply held by the routines of the step that decided to make something and wait on the
+    game (for a placement) before sending the command.
+    Routines running at the same time (see Routine.concurrent) check their costs against what is left once the
+    holds are taken out, so two of them can't spend the same resources. A hold ends when its command is sent:
+    the command takes its cost from the bot's resources itself (BotAI.do with subtract_cost).
+    """
+
+    def __init__(self):
+        self.minerals = 0
+        self.vespene = 0
+        self.supply = 0.0
+        # Holds taken and costs refused because of a hold, over the whole game.
+        self.holds = 0
+        self.refused = 0
+
+    @property
+    def held(self) -> bool:
+        return bool(self.minerals or self.vespene or self.supply)
+
+    def fits(self, minerals: int, vespene: int, supply: float, available_minerals: float, available_vespene: float,
+             supply_left: float) -> bool:
+        """
+        :return: True when the cost fits in the resources and supply that are not held.
+        """
+        if minerals > available_minerals - self.minerals or vespene > available_vespene - self.vespene or \
+                (supply and supply > supply_left - self.supply):
+            self.refused += 1
+            return False
+        return True
+
+    @contextmanager
+    def hold(self, minerals: int, vespene: int, supply: float = 0):
+        """
+        Hold a cost for the duration of the with block.
+        """
+        self.minerals += minerals
+        self.vespene += vespene
+        self.supply += supply
+        self.holds += 1
+        try:
+            yield
+        finally:
+            self.minerals -= minerals
+            self.vespene -= vespene
+            self.supply -= supply
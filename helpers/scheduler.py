@@ -0,0 +1,155 @@
+from .enum import TaskStatus
+
+import heapq
+import itertools
+
+
+class QueueEntry(object):
+    """
+    A task waiting in one of the scheduler queues.
+    """
+    __slots__ = ("priority", "task", "trigger_event", "tag", "time", "finished")
+
+    def __init__(self, priority: int, task, trigger_event, tag: str = "", time: float = 0):
+        self.priority = priority
+        self.task = task
+        self.trigger_event = trigger_event
+        self.tag = tag
+        self.time = time
+        self.finished = False
+
+
+class TaskScheduler(object):
+    """
+    Priority scheduler for the unit task queues and the global task queue.
+    Higher priorities run first and tasks with the same priority run in the order they were added.
+    Finished or cancelled tasks are only flagged and get dropped from the heaps lazily.
+    """
+
+    def __init__(self):
+        self.__counter = itertools.count()
+        # Unit tag -> heap of (-priority, sequence, entry). Only units with queued tasks have a heap.
+        self.__unit_queues = {}
+        self.__global_queue = []
+
+    def __push(self, heap: list, entry: QueueEntry) -> None:
+        heapq.heappush(heap, (-entry.priority, next(self.__counter), entry))
+
+    def add_unit_task(self, unit_tag: int, entry: QueueEntry) -> QueueEntry:
+        heap = self.__unit_queues.get(unit_tag)
+        if heap is None:
+            heap = self.__unit_queues[unit_tag] = []
+        self.__push(heap, entry)
+        return entry
+
+    def add_global_task(self, entry: QueueEntry) -> QueueEntry:
+        self.__push(self.__global_queue, entry)
+        return entry
+
+    def cancel(self, entry: QueueEntry) -> None:
+        """
+        Cancel a queued task. Its on_end is not called.
+        :param entry: The entry returned when the task was added.
+        :return:
+        """
+        entry.finished = True
+
+    @staticmethod
+    def __drain(heap: list) -> list:
+        """
+        Empty a heap, skipping the finished entries.
+        :return: The pending entries in the order they will run.
+        """
+        entries = []
+        while heap:
+            entry = heapq.heappop(heap)[2]
+            if not entry.finished:
+                entries.append(entry)
+        return entries
+
+    def unit_tasks(self, unit_tag: int) -> list:
+        """
+        :return: The pending entries of a unit in the order they will run.
+        """
+        return self.__drain(list(self.__unit_queues.get(unit_tag, [])))
+
+    def global_tasks(self) -> list:
+        return self.__drain(list(self.__global_queue))
+
+    def drop_unit(self, unit_tag: int) -> list:
+        """
+        Remove the queue of a unit.
+        :return: The entries that were still pending, in the order they would have run.
+        """
+        return self.__drain(self.__unit_queues.pop(unit_tag, []))
+
+    def fail_unit_tasks(self, bot, unit_tag: int) -> int:
+        """
+        Remove the queue of a unit that no longer exists and end its pending tasks as failed.
+        :return: The number of tasks that were failed.
+        """
+        entries = self.drop_unit(unit_tag)
+        for entry in entries:
+            entry.finished = True
+            entry.task.on_end(bot, TaskStatus.FAILED)
+        return len(entries)
+
+    def queued_unit_count(self) -> int:
+        """
+        :return: The number of units that currently hold a task queue.
+        """
+        return len(self.__unit_queues)
+
+    def __run(self, bot, entry: QueueEntry) -> bool:
+        """
+        Run a task if its trigger allows it.
+        :return: True when the task has ended.
+        """
+        if not entry.trigger_event.should_trigger(bot):
+            return False
+
+        entry.task.on_step(bot)
+        status = entry.task.get_status(bot)
+        if (not entry.trigger_event.constant) or (status != TaskStatus.RUNNING):
+            entry.finished = True
+            entry.task.on_end(bot, status)
+            return True
+        return False
+
+    def exec_unit_tasks(self, bot) -> None:
+        """
+        Run the highest priority task of every unit that has queued tasks.
+        """
+        for unit_tag, heap in list(self.__unit_queues.items()):
+            while heap and heap[0][2].finished:
+                heapq.heappop(heap)
+            if not heap:
+                if self.__unit_queues.get(unit_tag) is heap:
+                    del self.__unit_queues[unit_tag]
+                continue
+
+            entry = heap[0][2]
+            if self.__run(bot, entry) and heap and heap[0][2] is entry:
+                heapq.heappop(heap)
+
+    def exec_global_tasks(self, bot) -> None:
+        """
+        Run every global task in priority order.
+        """
+        # Tasks added while the queue runs go to a new heap and run on the next step.
+        heap, self.__global_queue = self.__global_queue, []
+        pending = []
+        try:
+            while heap:
+                item = heapq.heappop(heap)
+                # Kept in the queue when it raises.
+                pending.append(item)
+                if item[2].finished or self.__run(bot, item[2]):
+                    pending.pop()
+        finally:
+            # The entries still pending were popped in order, and a sorted list is a valid heap.
+            if heap or self.__global_queue:
+                pending.extend(heap)
+                pending.extend(self.__global_queue)
+                heapq.heapify(pending)
+            self.__global_queue = pending
@@ -0,0 +1,144 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import heapq
+import math
+
+
+class GridIndex(object):
+    """
+    Uniform grid hash over objects with a `position` (an (x, y) pair, e.g. Unit or Point2 holders).
+    Distances are measured between positions, like Units.closer_than.
+    :param items: Objects to index.
+    :param cell_size: Side of a grid cell. Queries with a radius close to the cell size are the cheapest.
+    """
+
+    def __init__(self, items: Iterable, cell_size: float = 8.0):
+        self.cell_size = cell_size
+        self.__cells: Dict[Tuple[int, int], List] = {}
+        self.__size = 0
+        for item in items:
+            position = item.position
+            key = (int(position[0] // cell_size), int(position[1] // cell_size))
+            cell = self.__cells.get(key)
+            if cell is None:
+                cell = self.__cells[key] = []
+            cell.append((position[0], position[1], item))
+            self.__size += 1
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __cells_around(self, x: float, y: float, radius: float):
+        size = self.cell_size
+        min_x, max_x = int((x - radius) // size), int((x + radius) // size)
+        min_y, max_y = int((y - radius) // size), int((y + radius) // size)
+        cells = self.__cells
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(cells):
+            # The query covers more cells than exist, visiting the occupied ones is cheaper.
+            for (cell_x, cell_y), cell in cells.items():
+                if min_x <= cell_x <= max_x and min_y <= cell_y <= max_y:
+                    yield cell
+            return
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                cell = cells.get((cell_x, cell_y))
+                if cell:
+                    yield cell
+
+    def query_radius(self, position, radius: float) -> List:
+        """
+        :return: The items strictly closer than `radius` to `position`.
+        """
+        x, y = position[0], position[1]
+        radius_squared = radius * radius
+        return [
+            item
+            for cell in self.__cells_around(x, y, radius)
+            for item_x, item_y, item in cell
+            if (item_x - x) ** 2 + (item_y - y) ** 2 < radius_squared
+        ]
+
+    def any_within(self, position, radius: float) -> bool:
+        """
+        :return: True when at least one item is strictly closer than `radius` to `position`.
+        """
+        x, y = position[0], position[1]
+        radius_squared = radius * radius
+        for cell in self.__cells_around(x, y, radius):
+            for item_x, item_y, item in cell:
+                if (item_x - x) ** 2 + (item_y - y) ** 2 < radius_squared:
+                    return True
+        return False
+
+    def nearest(self, position, k: int = 1, max_distance: Optional[float] = None) -> List:
+        """
+        :return: Up to `k` items sorted by distance to `position`.
+        """
+        if not self.__size or k <= 0:
+            return []
+        x, y = position[0], position[1]
+        size = self.cell_size
+        center_x, center_y = int(x // size), int(y // size)
+        limit = math.inf if max_distance is None else max_distance
+        found: List[Tuple[float, int, object]] = []
+        visited = 0
+        ring = 0
+        while visited < len(self.__cells):
+            for cell_x in range(center_x - ring, center_x + ring + 1):
+                for cell_y in range(center_y - ring, center_y + ring + 1):
+                    if max(abs(cell_x - center_x), abs(cell_y - center_y)) != ring:
+                        continue
+                    cell = self.__cells.get((cell_x, cell_y))
+                    if cell is None:
+                        continue
+                    visited += 1
+                    for item_x, item_y, item in cell:
+                        distance = math.hypot(item_x - x, item_y - y)
+                        if distance <= limit:
+                            found.append((distance, id(item), item))
+            # Everything outside the visited rings is at least `ring * size` away.
+            if len(found) >= k:
+                found = heapq.nsmallest(k, found)
+                if found[-1][0] <= ring * size:
+                    break
+            if ring * size > limit:
+                break
+            ring += 1
+        return [item for _, _, item in sorted(found)[:k]]
+
+
+class SpatialIndexes(object):
+    """
+    Per-step grid indexes over groups of units of the bot (e.g. "units", "enemy_units", "mineral_field").
+    A group is indexed the first time it is queried in a step.
+    """
+
+    def __init__(self, cell_size: float = 8.0):
+        self.cell_size = cell_size
+        self.__bot = None
+        self.__game_loop: Optional[int] = None
+        self.__indexes: Dict[str, GridIndex] = {}
+
+    def refresh(self, bot, game_loop: int) -> None:
+        if game_loop != self.__game_loop or bot is not self.__bot:
+            self.__bot = bot
+            self.__game_loop = game_loop
+            self.__indexes.clear()
+
+    def index(self, group: str) -> GridIndex:
+        """
+        :param group: Name of a Units attribute of the bot.
+        """
+        grid = self.__indexes.get(group)
+        if grid is None:
+            grid = self.__indexes[group] = GridIndex(getattr(self.__bot, group), self.cell_size)
+        return grid
+
+    def query_radius(self, group: str, position, radius: float) -> List:
+        return self.index(group).query_radius(position, radius)
+
+    def any_within(self, group: str, position, radius: float) -> bool:
+        return self.index(group).any_within(position, radius)
+
+    def nearest(self, group: str, position, k: int = 1, max_distance: Optional[float] = None) -> List:
+        return self.index(group).nearest(position, k, max_distance)
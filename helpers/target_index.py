@@ -0,0 +1,122 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Weights of the target score: damage per second of the target, cost of the target per 100 resources, and the
+# distance to the army at which the score is halved.
+THREAT_WEIGHT: float = 1.0
+VALUE_WEIGHT: float = 1.0
+DISTANCE_SCALE: float = 30.0
+# Units engage the best target closer than this before the best target of the whole index.
+ENGAGE_RADIUS: float = 15.0
+
+
+class TargetIndex(object):
+    """
+    Enemy units and structures scored once per step, shared by the attack routines so every routine focuses the
+    same targets instead of picking random ones.
+    The score of a target grows with its threat (damage per second), its value (resource cost) and how damaged it
+    is, and falls with its distance to the centroid of the army. The index is built the first time it is queried in
+    a step.
+    """
+
+    def __init__(self):
+        self.__bot = None
+        self.__game_loop: Optional[int] = None
+        self.__built = False
+        self.__values: Dict = {}
+        self.targets: List = []
+        self.unit_count = 0
+        self.positions = np.empty((0, 2))
+        self.scores = np.empty(0)
+        self.army_center: Optional[np.ndarray] = None
+        # Number of indexes built and of queries answered, over the whole game.
+        self.builds = 0
+        self.queries = 0
+
+    def refresh(self, bot, game_loop: int) -> None:
+        if game_loop != self.__game_loop or bot is not self.__bot:
+            self.__bot = bot
+            self.__game_loop = game_loop
+            self.__built = False
+
+    def __value(self, type_id) -> float:
+        value = self.__values.get(type_id)
+        if value is None:
+            data = self.__bot.game_data.units.get(type_id.value)
+            cost = data.cost if data is not None else None
+            value = self.__values[type_id] = (cost.minerals + cost.vespene) / 100 if cost is not None else 0.0
+        return value
+
+    def __build(self) -> None:
+        self.queries += 1
+        if self.__built:
+            return
+        self.__built = True
+        self.builds += 1
+        bot = self.__bot
+        # Units first, the structures after them: queries on units only look at the first `unit_count` targets.
+        self.targets = list(bot.enemy_units) + list(bot.enemy_structures)
+        self.unit_count = len(bot.enemy_units)
+        if not self.targets:
+            self.positions, self.scores = np.empty((0, 2)), np.empty(0)
+            return
+        # One pass over the targets: position, damage per second, cost and fraction of life left.
+        values, rows = self.__values, []
+        for target in self.targets:
+            value = values.get(target.type_id)
+            if value is None:
+                value = self.__value(target.type_id)
+            x, y = target.position_tuple
+            rows.append((x, y, target.ground_dps + target.air_dps, value,
+                         (target.health + target.shield) / max(1.0, target.health_max + target.shield_max)))
+        table = np.array(rows, dtype=float)
+        self.positions = table[:, :2]
+        threat, value, life = table[:, 2], table[:, 3], table[:, 4]
+        # Targets close to dying are worth finishing.
+        self.scores = (1 + THREAT_WEIGHT * threat) * (1 + VALUE_WEIGHT * value) * (2 - life)
+
+        workers = {worker.tag for worker in bot.workers}
+        army = [unit.position_tuple for unit in bot.units
+                if unit.ground_dps + unit.air_dps > 0 and unit.tag not in workers]
+        if army:
+            self.army_center = np.array(army, dtype=float).mean(axis=0)
+            distances = np.sqrt(((self.positions - self.army_center) ** 2).sum(axis=1))
+            self.scores = self.scores / (1 + distances / DISTANCE_SCALE)
+        else:
+            self.army_center = None
+
+    def __len__(self) -> int:
+        self.__build()
+        return len(self.targets)
+
+    def __count(self, units_only: bool) -> int:
+        return self.unit_count if units_only else len(self.targets)
+
+    def best(self, units_only: bool = False):
+        """
+        :param units_only: Leave the structures out.
+        :return: The target with the best score, or None when there is none.
+        """
+        self.__build()
+        count = self.__count(units_only)
+        if not count:
+            return None
+        return self.targets[int(self.scores[:count].argmax())]
+
+    def best_for(self, positions, units_only: bool = False, radius: float = ENGAGE_RADIUS) -> List:
+        """
+        :param positions: (n, 2) array of the positions of the attacking units.
+        :return: For every position, the best target closer than `radius`, else the best target of the index.
+        Empty when there is no target.
+        """
+        self.__build()
+        count = self.__count(units_only)
+        if not count:
+            return []
+        difference = positions[:, np.newaxis, :] - self.positions[np.newaxis, :count, :]
+        in_range = np.einsum("ijk,ijk->ij", difference, difference) < radius * radius
+        scores = np.where(in_range, self.scores[np.newaxis, :count], -1.0)
+        best = int(self.scores[:count].argmax())
+        return [self.targets[int(index) if row[index] >= 0 else best]
+                for row, index in zip(scores, scores.argmax(axis=1))]
@@ -1,6 +1,8 @@
 from .enum import TaskStatus
 
 class Task(object):
+    # Tasks are created for every unit, slots keep them small.
+    __slots__ = ("__start_func", "__step_func", "__end_func", "__get_status_func", "__start_called")
 
     def __init__(self, start = None, step = None,
                 end = None, get_status = None):
@@ -0,0 +1,148 @@
+"""
+Per-step numbers of a game stored in a compact binary file, and read back as NumPy columns.
+
+The file is a sequence of self-describing chunks, appended as the game goes, so a game that crashed keeps
+everything up to its last chunk. A chunk is:
+    header      uint32 magic, uint32 rows, uint32 unit types
+    unit types  int32[unit types], UnitTypeId value of every unit count column
+    steps       STEP_DTYPE[rows]
+    unit counts uint16[rows, unit types]
+"""
+from typing import Dict, Iterable, List
+
+import os
+
+import numpy as np
+
+TELEMETRY_MAGIC: int = 0x314D4C54  # "TLM1"
+CHUNK_ROWS: int = 2048
+# Unit types counted per game, the types seen after that are left out of the counts.
+MAX_UNIT_TYPES: int = 128
+
+STEP_DTYPE = np.dtype([
+    ("game_loop", "<u4"),
+    ("minerals", "<u4"),
+    ("vespene", "<u4"),
+    ("supply_used", "<u2"),
+    ("supply_cap", "<u2"),
+    ("workers", "<u2"),
+    ("units", "<u2"),
+    ("structures", "<u2"),
+    ("unit_queues", "<u2"),
+    ("global_tasks", "<u2"),
+    ("actions", "<u2"),
+    ("step_ms", "<f4"),
+])
+_HEADER_DTYPE = np.dtype("<u4")
+
+
+class TelemetryRecorder(object):
+    """
+    Records one row per step in preallocated buffers, written to `path` every `chunk_rows` steps and on close.
+    :param path: File the game is written to. It is replaced when it exists.
+    """
+
+    def __init__(self, path: str, chunk_rows: int = CHUNK_ROWS, max_unit_types: int = MAX_UNIT_TYPES):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.__file = open(path, "wb")
+        self.__steps = np.zeros(chunk_rows, dtype=STEP_DTYPE)
+        self.__counts = np.zeros((chunk_rows, max_unit_types), dtype=np.uint16)
+        # Unit type -> column of the counts.
+        self.__columns: Dict = {}
+        self.__row = 0
+        self.rows = 0
+
+    def record(self, game_loop: int, minerals: int, vespene: int, supply_used: float, supply_cap: float,
+               workers: int, units: int, structures: int, unit_queues: int, global_tasks: int, actions: int,
+               step_seconds: float, unit_counts: Dict = None) -> None:
+        """
+        :param unit_counts: Number of own units and structures of every type.
+        """
+        row = self.__row
+        self.__steps[row] = (game_loop, minerals, vespene, supply_used, supply_cap, workers, units, structures,
+                             unit_queues, global_tasks, actions, step_seconds * 1000)
+        counts = self.__counts[row]
+        columns = self.__columns
+        for unit_type, count in (unit_counts or {}).items():
+            column = columns.get(unit_type)
+            if column is None:
+                if len(columns) >= counts.shape[0]:
+                    continue
+                column = columns[unit_type] = len(columns)
+            counts[column] = count
+        self.__row += 1
+        self.rows += 1
+        if self.__row == len(self.__steps):
+            self.flush()
+
+    def flush(self) -> None:
+        rows, types = self.__row, len(self.__columns)
+        if not rows or self.__file is None:
+            return
+        self.__file.write(np.array([TELEMETRY_MAGIC, rows, types], dtype=_HEADER_DTYPE).tobytes())
+        self.__file.write(np.fromiter((getattr(unit_type, "value", unit_type) for unit_type in self.__columns),
+                                      dtype="<i4", count=types).tobytes())
+        self.__file.write(self.__steps[:rows].tobytes())
+        self.__file.write(np.ascontiguousarray(self.__counts[:rows, :types]).tobytes())
+        self.__file.flush()
+        self.__counts[:rows] = 0
+        self.__row = 0
+
+    def close(self) -> None:
+        if self.__file is None:
+            return
+        self.flush()
+        self.__file.close()
+        self.__file = None
+
+
+def load_telemetry(path: str) -> Dict[str, np.ndarray]:
+    """
+    Read a whole game.
+    :return: One array per STEP_DTYPE field, "unit_types" with the UnitTypeId value of every count column and
+    "unit_counts" with one row of counts per step.
+    """
+    data = np.fromfile(path, dtype=np.uint8)
+    chunks: List = []
+    types: List[int] = []
+    offset = 0
+    while offset + 3 * _HEADER_DTYPE.itemsize <= len(data):
+        magic, rows, type_count = (int(value) for value in
+                                   np.frombuffer(data, dtype=_HEADER_DTYPE, count=3, offset=offset))
+        if magic != TELEMETRY_MAGIC:
+            raise ValueError("{} is not a telemetry file (offset {})".format(path, offset))
+        offset += 3 * _HEADER_DTYPE.itemsize
+        if offset + 4 * type_count + rows * (STEP_DTYPE.itemsize + 2 * type_count) > len(data):
+            # Chunk cut short by a crash while it was written.
+            break
+        chunk_types = np.frombuffer(data, dtype="<i4", count=type_count, offset=offset)
+        offset += chunk_types.nbytes
+        steps = np.frombuffer(data, dtype=STEP_DTYPE, count=rows, offset=offset)
+        offset += steps.nbytes
+        counts = np.frombuffer(data, dtype=np.uint16, count=rows * type_count, offset=offset).reshape(rows, type_count)
+        offset += counts.nbytes
+        # Columns only get added, a chunk knows every type of the chunks before it.
+        types = chunk_types.tolist()
+        chunks.append((steps, counts))
+
+    steps = np.concatenate([chunk[0] for chunk in chunks]) if chunks else np.zeros(0, dtype=STEP_DTYPE)
+    unit_counts = np.zeros((len(steps), len(types)), dtype=np.uint16)
+    row = 0
+    for chunk_steps, counts in chunks:
+        unit_counts[row:row + len(chunk_steps), :counts.shape[1]] = counts
+        row += len(chunk_steps)
+
+    game = {name: steps[name] for name in STEP_DTYPE.names}
+    game["unit_types"] = np.array(types, dtype=np.int32)
+    game["unit_counts"] = unit_counts
+    return game
+
+
+def load_games(paths: Iterable[str]) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    :return: The games of every file, by path.
+    """
+    return {path: load_telemetry(path) for path in paths}
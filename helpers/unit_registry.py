@@ -0,0 +1,125 @@
+from .enum import States
+
+
+class UnitRecord(object):
+    """
+    Registry entry of a unit. Item access (record["state"]) is kept for the code written against the former
+    dict entries.
+    """
+    __slots__ = ("type_id", "state", "display_state", "target_location", "target_type")
+
+    def __init__(self, type_id, state: States = States.IDLE, display_state: str = "", target_location=None,
+                 target_type=None):
+        self.type_id = type_id
+        self.state = state
+        self.display_state = display_state
+        self.target_location = target_location
+        self.target_type = target_type
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key: str, value) -> None:
+        if key not in UnitRecord.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __repr__(self) -> str:
+        return "UnitRecord({})".format(", ".join("{}={!r}".format(key, getattr(self, key))
+                                                 for key in UnitRecord.__slots__))
+
+
+class UnitRegistry(object):
+    """
+    Persistent registry of our own units, keyed by unit tag.
+    The registry is never rebuilt: it is kept up to date from the new, removed and changed
+    units reported for each step, so the per-step cost only depends on how much changed.
+    """
+
+    def __init__(self):
+        self.__entries = {}
+        self.__new = {}
+        self.__removed = set()
+        self.__changed = {}
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __contains__(self, tag: int) -> bool:
+        return tag in self.__entries
+
+    def __getitem__(self, tag: int) -> UnitRecord:
+        return self.__entries[tag]
+
+    def __iter__(self):
+        return iter(self.__entries)
+
+    def get(self, tag: int, default=None):
+        """
+        O(1) lookup of the registry entry of a unit.
+        :param tag: Tag of the unit.
+        :param default: Returned when the tag is not registered.
+        :return:
+        """
+        return self.__entries.get(tag, default)
+
+    def tags(self):
+        return self.__entries.keys()
+
+    def mark_new(self, unit) -> None:
+        """
+        Report a unit that appeared this step.
+        :param unit:
+        :return:
+        """
+        self.__removed.discard(unit.tag)
+        if unit.tag not in self.__entries:
+            self.__new[unit.tag] = unit
+
+    def mark_removed(self, tag: int) -> None:
+        """
+        Report a unit that disappeared this step. Unknown tags (e.g. enemy units) are ignored.
+        :param tag:
+        :return:
+        """
+        if self.__new.pop(tag, None) is not None:
+            return
+        self.__changed.pop(tag, None)
+        if tag in self.__entries:
+            self.__removed.add(tag)
+
+    def mark_changed(self, unit) -> None:
+        """
+        Report a unit whose type changed this step (e.g. a morph that keeps the tag).
+        :param unit:
+        :return:
+        """
+        if unit.tag in self.__new:
+            self.__new[unit.tag] = unit
+        elif unit.tag in self.__entries:
+            self.__changed[unit.tag] = unit
+        else:
+            self.mark_new(unit)
+
+    def apply_changes(self):
+        """
+        Apply the changes reported since the last call.
+        :return: Tuple with the new units, the removed entries as (tag, entry) pairs and the changed units.
+        """
+        new_units = list(self.__new.values())
+        for unit in new_units:
+            self.__entries[unit.tag] = UnitRecord(unit.type_id)
+
+        removed = [(tag, self.__entries.pop(tag)) for tag in self.__removed]
+
+        changed_units = list(self.__changed.values())
+        for unit in changed_units:
+            self.__entries[unit.tag].type_id = unit.type_id
+
+        self.__new.clear()
+        self.__removed.clear()
+        self.__changed.clear()
+        return new_units, removed, changed_units
@@ -0,0 +1,188 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import math
+
+from helpers.cadence import LOOPS_PER_SECOND
+
+# Workers a resource takes before it is saturated. A mineral field still pays for a third worker, the workers
+# beyond that stack on the fields without adding income.
+MINERAL_HARVESTERS: int = 2
+MINERAL_HARVESTERS_MAX: int = 3
+GAS_HARVESTERS: int = 3
+
+# Priority of the slots of the resources, lower slots are filled first: gas, the first two workers of a mineral
+# field, its third worker, then the extra workers. Workers without a resource come last.
+GAS_SLOT, MINERAL_SLOT, THIRD_MINERAL_SLOT, EXTRA_SLOT, NO_SLOT = range(5)
+
+# Game loops an assigned worker keeps its resource while it is missing from the observation: a worker inside a gas
+# building is not observed for about a second and a half.
+AWAY_LOOPS: int = int(3 * LOOPS_PER_SECOND)
+
+
+class WorkerAssignment(object):
+    """
+    Worker to mineral field or gas building assignment kept from step to step.
+    The assignment is only worked out again when the workers or the resources change (a new worker, a worker
+    taken to build, a depleted field, a new base, a gas building finished), and only the workers whose resource
+    changed get an order. Free workers go to the closest resource with the most needed free slot, and workers
+    are moved off the oversaturated resources to the resources missing workers.
+    An assigned worker missing from the workers keeps its resource for AWAY_LOOPS game loops (it may be inside
+    a gas building), unless it is busy with something else or forgotten.
+    """
+
+    def __init__(self):
+        self.__positions: Dict[int, Tuple[float, float]] = {}
+        self.__gas: Set[int] = set()
+        # Workers on every resource, and the resource of every assigned worker.
+        self.__assigned: Dict[int, Set[int]] = {}
+        self.__resource_of: Dict[int, int] = {}
+        self.__workers: Dict[int, Tuple[float, float]] = {}
+        # Assigned workers missing from the workers, with the game loop they went missing at.
+        self.__away: Dict[int, int] = {}
+        self.__forgotten = False
+        # Numbers of updates, of updates that rebalanced the workers and of workers moved, over the whole game.
+        self.updates = 0
+        self.rebalances = 0
+        self.moves = 0
+
+    def __len__(self) -> int:
+        return len(self.__resource_of)
+
+    def resource_of(self, worker_tag: int) -> Optional[int]:
+        return self.__resource_of.get(worker_tag)
+
+    def harvesters(self, resource_tag: int) -> int:
+        return len(self.__assigned.get(resource_tag, ()))
+
+    def forget(self, worker_tag: int) -> None:
+        """
+        Free the resource of a worker that is gone for good (destroyed). The next update fills the slot.
+        """
+        self.__away.pop(worker_tag, None)
+        self.__workers.pop(worker_tag, None)
+        if self.__release(worker_tag):
+            self.__forgotten = True
+
+    def __release(self, worker: int) -> bool:
+        resource = self.__resource_of.pop(worker, None)
+        if resource is None:
+            return False
+        self.__assigned[resource].discard(worker)
+        return True
+
+    def update(self, workers: Dict[int, Tuple[float, float]], minerals: Dict[int, Tuple[float, float]],
+               gas: Dict[int, Tuple[float, float]], game_loop: int, busy: Iterable[int] = ()) -> Dict[int, int]:
+        """
+        :param workers: Positions of the workers free to harvest, by tag: the idle and the harvesting workers.
+        :param minerals: Positions of the mineral fields of the bases, by tag.
+        :param gas: Positions of the finished gas buildings of the bases that still have gas, by tag.
+        :param game_loop: Game loop of the observation.
+        :param busy: Tags of the workers busy with something else than harvesting, they lose their resource.
+        :return: The new resource of every worker whose resource changed.
+        """
+        self.updates += 1
+        changed, self.__forgotten = self.__forgotten, False
+        busy = set(busy)
+        for resource in [resource for resource in self.__assigned if resource not in minerals and
+                         resource not in gas]:
+            for worker in self.__assigned.pop(resource):
+                del self.__resource_of[worker]
+            self.__gas.discard(resource)
+            del self.__positions[resource]
+            changed = True
+        for resources, is_gas in ((minerals, False), (gas, True)):
+            for resource, position in resources.items():
+                if resource not in self.__assigned:
+                    self.__assigned[resource] = set()
+                    self.__positions[resource] = position
+                    if is_gas:
+                        self.__gas.add(resource)
+                    changed = True
+        for worker in self.__workers:
+            if worker in workers:
+                continue
+            if worker in self.__resource_of and worker not in busy:
+                self.__away[worker] = game_loop
+            elif self.__release(worker):
+                changed = True
+        for worker, since in list(self.__away.items()):
+            if worker in workers or worker not in self.__resource_of:
+                del self.__away[worker]
+            elif worker in busy or game_loop - since > AWAY_LOOPS:
+                del self.__away[worker]
+                self.__release(worker)
+                changed = True
+        if not changed and any(worker not in self.__workers and worker not in self.__resource_of
+                               for worker in workers):
+            changed = True
+        self.__workers = workers
+        if not changed:
+            return {}
+
+        self.rebalances += 1
+        before = dict(self.__resource_of)
+        self.__rebalance()
+        moved = {worker: resource for worker, resource in self.__resource_of.items()
+                 if before.get(worker) != resource}
+        self.moves += len(moved)
+        return moved
+
+    def __slot(self, resource: int, count: int) -> Optional[int]:
+        """
+        :return: Priority of the slot of the resource taken by its worker number `count` (from 0), None when the
+        resource can't take that many workers.
+        """
+        if resource in self.__gas:
+            return GAS_SLOT if count < GAS_HARVESTERS else None
+        if count < MINERAL_HARVESTERS:
+            return MINERAL_SLOT
+        return THIRD_MINERAL_SLOT if count < MINERAL_HARVESTERS_MAX else EXTRA_SLOT
+
+    def __distance(self, worker: int, resource: int) -> float:
+        worker_position, resource_position = self.__workers[worker], self.__positions[resource]
+        return math.hypot(worker_position[0] - resource_position[0], worker_position[1] - resource_position[1])
+
+    def __move(self, worker: int, resource: int) -> None:
+        previous = self.__resource_of.get(worker)
+        if previous is not None:
+            self.__assigned[previous].discard(worker)
+        self.__assigned[resource].add(worker)
+        self.__resource_of[worker] = resource
+
+    def __rebalance(self) -> None:
+        """
+        Fill the most needed free slot, one worker at a time, with a free worker or else a worker holding a less
+        needed slot. Every move puts a worker on a more needed slot than the one it held, so it ends.
+        """
+        free: List[int] = sorted(worker for worker in self.__workers if worker not in self.__resource_of)
+        while True:
+            priority, targets = NO_SLOT, []
+            for resource, workers in self.__assigned.items():
+                slot = self.__slot(resource, len(workers))
+                if slot is None or slot > priority:
+                    continue
+                if slot < priority:
+                    priority, targets = slot, []
+                targets.append(resource)
+            if not targets:
+                return
+
+            if free:
+                worker = free.pop(0)
+                self.__move(worker, min(targets, key=lambda resource: self.__distance(worker, resource)))
+                continue
+
+            # Take a worker from the resources whose last worker holds the least needed slot.
+            held, donors = priority, []
+            for resource, workers in self.__assigned.items():
+                slot = self.__slot(resource, len(workers) - 1) if workers else None
+                if slot is None or slot <= priority or slot < held:
+                    continue
+                if slot > held:
+                    held, donors = slot, []
+                # The workers away can't be given an order.
+                donors.extend(worker for worker in workers if worker in self.__workers)
+            if not donors:
+                return
+            target = targets[0]
+            self.__move(min(donors, key=lambda worker: self.__distance(worker, target)), target)
@@ -1,27 +1,56 @@
-from sc2 import maps
-from sc2.player import Bot, Computer
-from sc2.main import run_game
-from sc2.data import Race, Difficulty
-from bots.zerg_bot import BaseZergBot, BroodlordZergBot
-from bots.terran_bot import TerranBot
-from bots.base_bot import BaseBot
+"""
+Plays our bots against the built-in AI, several games at a time.
+    python main.py                                          # TerranBot against a random Easy AI, forever
+    python main.py --bots terran zerg --races Zerg Protoss --difficulties Medium Hard --games 4 --workers 8
+    python main.py --local --games 1 --time-limit 600       # against the local stand-in game, no client needed
+"""
+from timeit import default_timer
 
-# The map always will be AcropolisLE
-_MAP = maps.get("AcropolisLE")
+import argparse
+import os
+
+from helpers.match_runner import (
+    BOTS, DEFAULT_MAP, format_summary, launch_game, launch_local_game, match_matrix, run_matches, summarize,
+)
+
+
+def report(result) -> None:
+    if result.error is not None:
+        print("game {} ({}) crashed:\n{}".format(result.index, result.spec.pairing, result.error))
+    else:
+        print("game {} ({}): {} in {:.1f} s".format(result.index, result.spec.pairing, result.result, result.seconds))
 
 
 def main():
-    players = [
-        Bot(Race.Terran, TerranBot()),
-        Computer(Race.Random)
-    ]
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bots", nargs="+", default=["terran"], choices=sorted(BOTS))
+    parser.add_argument("--races", nargs="+", default=["Random"], help="races of the built-in AI")
+    parser.add_argument("--difficulties", nargs="+", default=["Easy"], help="difficulties of the built-in AI")
+    parser.add_argument("--games", type=int, default=None,
+                        help="games of every pairing, one round of as many games as workers when not given")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="games played at the same time")
+    parser.add_argument("--map", default=DEFAULT_MAP)
+    parser.add_argument("--realtime", action="store_true")
+    parser.add_argument("--local", action="store_true",
+                        help="play against the local stand-in game (helpers.local_server) instead of StarCraft II")
+    parser.add_argument("--time-limit", type=int, default=None, help="game seconds after which a game is a tie")
+    args = parser.parse_args()
 
+    forever = args.games is None
+    pairings = len(args.bots) * len(args.races) * len(args.difficulties)
+    games = args.games or max(1, (args.workers or 1) // pairings)
     while True:
-        run_game(
-            map_settings=_MAP,
-            players=players,
-            realtime=False,
+        start = default_timer()
+        results = run_matches(
+            match_matrix(args.bots, args.races, args.difficulties, games, map_name=args.map, realtime=args.realtime,
+                         game_time_limit=args.time_limit),
+            launcher=launch_local_game if args.local else launch_game,
+            workers=args.workers,
+            on_result=report,
         )
+        print(format_summary(summarize(results), default_timer() - start))
+        if not forever:
+            break
 
 
 if __name__ == "__main__":
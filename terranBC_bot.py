@@ -1,3 +1,4 @@
+import os
 import random
 
 from sc2.constants import *
@@ -16,6 +17,8 @@ from typing import Set, List, Tuple
 
 from enum import IntEnum
 
+from helpers.match_runner import format_summary, match_matrix, run_matches, summarize
+
 # The map always will be AcropolisLE
 MAP = maps.get("AcropolisLE")
 
@@ -688,16 +691,10 @@ class TerranBot(BaseBot):
 
 
 def main():
-    players = [
-        Bot(Race.Terran, TerranBot()),
-        Computer(Race.Random, Difficulty.Hard)
-    ]
-
+    # One round of games against the Hard AI on every core, forever.
     while True:
-        run_game(
-            map_settings=MAP,
-            players=players,
-        )
+        results = run_matches(match_matrix(["terranBC"], ["Random"], ["Hard"], games=os.cpu_count() or 1))
+        print(format_summary(summarize(results)))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,1030 @@
+"""
+Fakes shared by the tests and the benchmarks, used to run the bots and helpers without a StarCraft II client.
+They need the python-sc2 package (for the ids, Point2 and UnitCommand) but not the game binary.
+
+A SyntheticGame generates own units, structures, enemies and resources at a configurable scale and
+exposes them to a bot through SyntheticGameMixin, which replaces the BotAI methods that would query
+the game client (placement, pathing, costs, pending orders) with cheap deterministic answers.
+The other fakes stand in for the placement queries, the unit churn of a game, the trigger inputs, a map and
+a late game observation.
+"""
+from collections import namedtuple
+from s2clientprotocol import common_pb2 as common_pb
+from s2clientprotocol import raw_pb2 as raw_pb
+from s2clientprotocol import sc2api_pb2 as sc_pb
+from sc2.bot_ai import BotAI
+from sc2.data import Alliance, Race
+from sc2.game_data import Cost
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.ids.upgrade_id import UpgradeId
+from sc2.position import Point2
+from sc2.unit_command import UnitCommand
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Type, Union
+
+import math
+import random
+import tracemalloc
+
+import numpy as np
+
+from bots.base_bot import BaseBot
+from events.trigger_event import TriggerEvent
+from helpers.change_tracker import ChangeTracker
+from helpers.enum import Dependency, TaskStatus
+from helpers.map_analysis import MapAnalysis, analyze_map
+from helpers.placement_batcher import PlacementBatcher
+from helpers.scheduler import QueueEntry, TaskScheduler
+from helpers.task import Task
+from helpers.unit_registry import UnitRegistry
+
+GAME_LOOPS_PER_SECOND: float = 22.4
+MAP_SIZE: Tuple[int, int] = (176, 172)
+# Own units see the cells closer than this.
+SIGHT_RANGE: float = 11
+
+# Minerals, vespene and supply used by the synthetic costs.
+COSTS: Dict[UnitTypeId, Tuple[int, int, float]] = {
+    UnitTypeId.SCV: (50, 0, 1),
+    UnitTypeId.DRONE: (50, 0, 1),
+    UnitTypeId.MARINE: (50, 0, 1),
+    UnitTypeId.MARAUDER: (100, 25, 2),
+    UnitTypeId.HELLION: (100, 0, 2),
+    UnitTypeId.SIEGETANK: (150, 125, 3),
+    UnitTypeId.BATTLECRUISER: (400, 300, 6),
+    UnitTypeId.ZERGLING: (50, 0, 1),
+    UnitTypeId.QUEEN: (150, 0, 2),
+    UnitTypeId.OVERLORD: (100, 0, 0),
+    UnitTypeId.CORRUPTOR: (150, 100, 2),
+    UnitTypeId.BROODLORD: (150, 150, 2),
+    UnitTypeId.COMMANDCENTER: (400, 0, 0),
+    UnitTypeId.HATCHERY: (300, 0, 0),
+    UnitTypeId.SUPPLYDEPOT: (100, 0, 0),
+    UnitTypeId.REFINERY: (75, 0, 0),
+    UnitTypeId.EXTRACTOR: (25, 0, 0),
+    UnitTypeId.BARRACKS: (150, 0, 0),
+    UnitTypeId.ENGINEERINGBAY: (125, 0, 0),
+    UnitTypeId.FACTORY: (150, 100, 0),
+    UnitTypeId.STARPORT: (150, 100, 0),
+    UnitTypeId.FUSIONCORE: (150, 150, 0),
+    UnitTypeId.BARRACKSTECHLAB: (50, 25, 0),
+    UnitTypeId.FACTORYTECHLAB: (50, 25, 0),
+    UnitTypeId.STARPORTTECHLAB: (50, 25, 0),
+    UnitTypeId.SPAWNINGPOOL: (200, 0, 0),
+    UnitTypeId.LAIR: (150, 100, 0),
+    UnitTypeId.HIVE: (200, 150, 0),
+    UnitTypeId.INFESTATIONPIT: (100, 100, 0),
+    UnitTypeId.SPIRE: (200, 200, 0),
+    UnitTypeId.GREATERSPIRE: (100, 150, 0),
+}
+
+WORKER_TYPES: Set[UnitTypeId] = {UnitTypeId.SCV, UnitTypeId.DRONE, UnitTypeId.PROBE}
+
+TOWNHALL_TYPES: Set[UnitTypeId] = {
+    UnitTypeId.COMMANDCENTER,
+    UnitTypeId.ORBITALCOMMAND,
+    UnitTypeId.PLANETARYFORTRESS,
+    UnitTypeId.HATCHERY,
+    UnitTypeId.LAIR,
+    UnitTypeId.HIVE,
+    UnitTypeId.NEXUS,
+}
+
+GAS_BUILDING_TYPES: Set[UnitTypeId] = {UnitTypeId.REFINERY, UnitTypeId.EXTRACTOR, UnitTypeId.ASSIMILATOR}
+
+# Army composition of the generated armies, as fractions of the non-worker units.
+ARMY_MIX: Dict[Race, Dict[UnitTypeId, float]] = {
+    Race.Terran: {
+        UnitTypeId.MARINE: 0.4,
+        UnitTypeId.MARAUDER: 0.2,
+        UnitTypeId.HELLION: 0.15,
+        UnitTypeId.SIEGETANK: 0.15,
+        UnitTypeId.BATTLECRUISER: 0.1,
+    },
+    Race.Zerg: {
+        UnitTypeId.ZERGLING: 0.6,
+        UnitTypeId.QUEEN: 0.05,
+        UnitTypeId.CORRUPTOR: 0.2,
+        UnitTypeId.BROODLORD: 0.15,
+    },
+}
+
+ENEMY_MIX: Dict[UnitTypeId, float] = {
+    UnitTypeId.ZEALOT: 0.4,
+    UnitTypeId.STALKER: 0.4,
+    UnitTypeId.COLOSSUS: 0.1,
+    UnitTypeId.VOIDRAY: 0.1,
+}
+
+STRUCTURES: Dict[Race, List[UnitTypeId]] = {
+    Race.Terran: [
+        UnitTypeId.SUPPLYDEPOT,
+        UnitTypeId.SUPPLYDEPOTLOWERED,
+        UnitTypeId.BARRACKS,
+        UnitTypeId.ENGINEERINGBAY,
+        UnitTypeId.FACTORY,
+        UnitTypeId.STARPORT,
+        UnitTypeId.STARPORT,
+        UnitTypeId.FUSIONCORE,
+    ],
+    Race.Zerg: [
+        UnitTypeId.SPAWNINGPOOL,
+        UnitTypeId.INFESTATIONPIT,
+        UnitTypeId.SPIRE,
+    ],
+}
+
+TOWNHALL: Dict[Race, UnitTypeId] = {Race.Terran: UnitTypeId.COMMANDCENTER, Race.Zerg: UnitTypeId.HATCHERY}
+WORKER: Dict[Race, UnitTypeId] = {Race.Terran: UnitTypeId.SCV, Race.Zerg: UnitTypeId.DRONE}
+GAS_BUILDING: Dict[Race, UnitTypeId] = {Race.Terran: UnitTypeId.REFINERY, Race.Zerg: UnitTypeId.EXTRACTOR}
+
+def ability_for(prefixes: Iterable[str], type_id: Union[UnitTypeId, UpgradeId]) -> AbilityId:
+    """
+    Best effort mapping of a train/build/research order to its AbilityId, falling back to SMART.
+    """
+    for prefix in prefixes:
+        ability = getattr(AbilityId, prefix + type_id.name, None)
+        if ability is not None:
+            return ability
+    return AbilityId.SMART
+
+
+# Item produced by the train and build abilities of the synthetic units, for the cost of their commands.
+ABILITY_COSTS: Dict[AbilityId, UnitTypeId] = {
+    ability: type_id
+    for type_id in COSTS
+    for ability in AbilityId
+    if "_" in ability.name and ability.name.split("_", 1)[1] == type_id.name and any(
+        verb in ability.name.split("_")[0] for verb in ("TRAIN", "BUILD", "UPGRADETO"))
+}
+
+
+class FakeCommand(UnitCommand):
+    """
+    UnitCommand issued by a FakeUnit. Skips the checks UnitCommand makes on the real Unit class.
+    """
+
+    def __init__(self, ability: AbilityId, unit, target=None, queue: bool = False):
+        self.ability = ability
+        self.unit = unit
+        self.target = target
+        self.queue = queue
+
+
+class FakeAbility(object):
+    def __init__(self, ability_id: AbilityId):
+        self.id = ability_id
+
+
+class FakeOrder(object):
+    """
+    Stand-in for UnitOrder. The target is a Point2 or a unit tag, like in the real observation.
+    """
+
+    def __init__(self, ability_id: AbilityId, target=None):
+        self.ability = FakeAbility(ability_id)
+        self.target = target
+
+
+class FakeUnit(object):
+    """
+    Stand-in for sc2.unit.Unit with the attributes the bots read.
+    Orders issued through it become UnitCommands in bot.actions and are applied on the next step.
+    """
+
+    def __init__(self, bot, tag: int, type_id: UnitTypeId, position: Point2, is_structure: bool = False,
+                 is_mine: bool = True, build_progress: float = 1.0):
+        self._bot_object = bot
+        self.tag = tag
+        self.type_id = type_id
+        self.position = position
+        self.is_structure = is_structure
+        self.is_mine = is_mine
+        self.is_enemy = not is_mine
+        self.alliance = Alliance.Self if is_mine else Alliance.Enemy
+        self.build_progress = build_progress
+        self.orders: List[FakeOrder] = []
+        self.add_on_tag = 0
+        self.assigned_harvesters = 0
+        self.ideal_harvesters = 0
+        self.energy = 50.0
+        self.health = 100.0
+        self.health_max = 100.0
+        self.shield = 0.0
+        self.shield_max = 0.0
+        self.radius = 2.5 if is_structure else 0.5
+        self.mineral_contents = 0
+        self.vespene_contents = 0
+        self.ground_dps = 0.0 if is_structure else 10.0
+        self.air_dps = 0.0 if is_structure else 5.0
+
+    def __repr__(self) -> str:
+        return "FakeUnit({}, {})".format(self.type_id.name, self.tag)
+
+    def __hash__(self) -> int:
+        return self.tag
+
+    def __eq__(self, other) -> bool:
+        return getattr(other, "tag", None) == self.tag
+
+    @property
+    def position_tuple(self) -> Tuple[float, float]:
+        return self.position.x, self.position.y
+
+    @property
+    def is_ready(self) -> bool:
+        return self.build_progress == 1
+
+    @property
+    def is_idle(self) -> bool:
+        return not self.orders
+
+    @property
+    def has_add_on(self) -> bool:
+        return bool(self.add_on_tag)
+
+    @property
+    def surplus_harvesters(self) -> int:
+        return self.assigned_harvesters - self.ideal_harvesters
+
+    def __is_ordered(self, ability_id: AbilityId) -> bool:
+        return bool(self.orders) and self.orders[0].ability.id == ability_id
+
+    @property
+    def is_moving(self) -> bool:
+        return self.__is_ordered(AbilityId.MOVE)
+
+    @property
+    def is_attacking(self) -> bool:
+        return self.__is_ordered(AbilityId.ATTACK)
+
+    @property
+    def is_gathering(self) -> bool:
+        return self.__is_ordered(AbilityId.HARVEST_GATHER)
+
+    @property
+    def is_repairing(self) -> bool:
+        return self.__is_ordered(AbilityId.EFFECT_REPAIR)
+
+    @property
+    def is_flying(self) -> bool:
+        return self.type_id in {UnitTypeId.BATTLECRUISER, UnitTypeId.CORRUPTOR, UnitTypeId.BROODLORD,
+                                UnitTypeId.VOIDRAY, UnitTypeId.OVERLORD}
+
+    def distance_to(self, target) -> float:
+        position = target.position if hasattr(target, "position") else target
+        return math.hypot(self.position.x - position[0], self.position.y - position[1])
+
+    def __call__(self, ability: AbilityId, target=None, queue: bool = False, can_afford_check: bool = False) -> bool:
+        return self._bot_object.do(FakeCommand(ability, self, target=target, queue=queue),
+                                   can_afford_check=can_afford_check)
+
+    def attack(self, target, queue: bool = False) -> bool:
+        return self(AbilityId.ATTACK, target, queue)
+
+    def move(self, target, queue: bool = False) -> bool:
+        return self(AbilityId.MOVE, target, queue)
+
+    def gather(self, target, queue: bool = False) -> bool:
+        return self(AbilityId.HARVEST_GATHER, target, queue)
+
+    def repair(self, target, queue: bool = False) -> bool:
+        return self(AbilityId.EFFECT_REPAIR, target, queue)
+
+    def train(self, unit_type: UnitTypeId, queue: bool = False) -> bool:
+        return self(ability_for([self.type_id.name + "TRAIN_", "TRAIN_"], unit_type), None, queue)
+
+    def build(self, unit_type: UnitTypeId, position=None, queue: bool = False, can_afford_check: bool = False) -> bool:
+        prefixes = ["TERRANBUILD_", "ZERGBUILD_", "PROTOSSBUILD_", "BUILD_", "UPGRADETO", "MORPH_"]
+        return self(ability_for(prefixes, unit_type), position, queue, can_afford_check)
+
+    def research(self, upgrade: UpgradeId, queue: bool = False) -> bool:
+        return self(ability_for(["RESEARCH_"], upgrade), None, queue)
+
+
+class FakeUnits(list):
+    """
+    Stand-in for sc2.units.Units: a list of FakeUnit with the filters the bots use.
+    """
+
+    def __init__(self, units: Iterable[FakeUnit] = (), bot=None):
+        super().__init__(units)
+        self._bot_object = bot
+
+    def subgroup(self, units: Iterable[FakeUnit]) -> "FakeUnits":
+        return FakeUnits(units, self._bot_object)
+
+    def __call__(self, type_ids) -> "FakeUnits":
+        return self.of_type(type_ids)
+
+    def __add__(self, other) -> "FakeUnits":
+        return self.subgroup(list.__add__(self, other))
+
+    def __or__(self, other) -> "FakeUnits":
+        tags = self.tags
+        return self.subgroup(list(self) + [unit for unit in other if unit.tag not in tags])
+
+    def filter(self, predicate) -> "FakeUnits":
+        return self.subgroup(unit for unit in self if predicate(unit))
+
+    def of_type(self, type_ids) -> "FakeUnits":
+        if isinstance(type_ids, UnitTypeId):
+            type_ids = {type_ids}
+        type_ids = set(type_ids)
+        return self.filter(lambda unit: unit.type_id in type_ids)
+
+    def exclude_type(self, type_ids) -> "FakeUnits":
+        if isinstance(type_ids, UnitTypeId):
+            type_ids = {type_ids}
+        type_ids = set(type_ids)
+        return self.filter(lambda unit: unit.type_id not in type_ids)
+
+    def by_tag(self, tag: int) -> Optional[FakeUnit]:
+        for unit in self:
+            if unit.tag == tag:
+                return unit
+        return None
+
+    find_by_tag = by_tag
+
+    def closer_than(self, distance: float, position) -> "FakeUnits":
+        return self.filter(lambda unit: unit.distance_to(position) < distance)
+
+    def further_than(self, distance: float, position) -> "FakeUnits":
+        return self.filter(lambda unit: unit.distance_to(position) > distance)
+
+    def closest_to(self, position) -> FakeUnit:
+        return min(self, key=lambda unit: unit.distance_to(position))
+
+    def closest_distance_to(self, position) -> float:
+        return min(unit.distance_to(position) for unit in self)
+
+    def furthest_to(self, position) -> FakeUnit:
+        return max(self, key=lambda unit: unit.distance_to(position))
+
+    def sorted_by_distance_to(self, position) -> "FakeUnits":
+        return self.subgroup(sorted(self, key=lambda unit: unit.distance_to(position)))
+
+    def random_or(self, other=None):
+        return random.choice(self) if self else other
+
+    @property
+    def amount(self) -> int:
+        return len(self)
+
+    @property
+    def empty(self) -> bool:
+        return not self
+
+    @property
+    def exists(self) -> bool:
+        return bool(self)
+
+    @property
+    def first(self) -> FakeUnit:
+        return self[0]
+
+    @property
+    def random(self) -> FakeUnit:
+        return random.choice(self)
+
+    @property
+    def tags(self) -> Set[int]:
+        return {unit.tag for unit in self}
+
+    @property
+    def ready(self) -> "FakeUnits":
+        return self.filter(lambda unit: unit.is_ready)
+
+    @property
+    def not_ready(self) -> "FakeUnits":
+        return self.filter(lambda unit: not unit.is_ready)
+
+    @property
+    def idle(self) -> "FakeUnits":
+        return self.filter(lambda unit: unit.is_idle)
+
+    @property
+    def gathering(self) -> "FakeUnits":
+        return self.filter(lambda unit: unit.is_gathering)
+
+    @property
+    def center(self) -> Point2:
+        return Point2((sum(unit.position.x for unit in self) / len(self),
+                       sum(unit.position.y for unit in self) / len(self)))
+
+
+class FakeRamp(object):
+    def __init__(self, top: Point2):
+        self.top_center = top
+        self.barracks_correct_placement = top.offset((1.5, -3.5))
+        self.depot_in_middle = top.offset((0.0, -1.0))
+        self.corner_depots = {top.offset((-2.0, -1.0)), top.offset((2.0, -1.0))}
+
+
+class FakeGameInfo(object):
+    def __init__(self):
+        self.map_size = MAP_SIZE
+        self.map_center = Point2((MAP_SIZE[0] / 2, MAP_SIZE[1] / 2))
+        self.map_name = "Synthetic"
+
+
+class FakeUnitTypeData(object):
+    def __init__(self, minerals: int, vespene: int):
+        self.cost = Cost(minerals, vespene)
+
+
+class FakeGameData(object):
+    """
+    Stand-in for GameData with the unit costs of COSTS.
+    """
+
+    def __init__(self):
+        self.units = {type_id.value: FakeUnitTypeData(minerals, vespene)
+                      for type_id, (minerals, vespene, supply) in COSTS.items()}
+
+
+class FakeState(object):
+    def __init__(self):
+        self.game_loop = 0
+        self.upgrades: Set[UpgradeId] = set()
+
+
+class SyntheticGameMixin(object):
+    """
+    Replaces the BotAI methods that need a game client. Put it before the bot class in the bases.
+    """
+
+    synthetic_game: "SyntheticGame"
+
+    @property
+    def time(self) -> float:
+        return self.state.game_loop / GAME_LOOPS_PER_SECOND
+
+    @property
+    def start_location(self) -> Point2:
+        return self.synthetic_game.start_location
+
+    @property
+    def enemy_start_locations(self) -> List[Point2]:
+        return [self.synthetic_game.enemy_start_location]
+
+    @property
+    def main_base_ramp(self) -> FakeRamp:
+        return self.synthetic_game.ramp
+
+    @property
+    def expansion_locations_list(self) -> List[Point2]:
+        return self.synthetic_game.expansions
+
+    def load_map_analysis(self) -> Tuple[MapAnalysis, bool]:
+        """ Analyse the synthetic map in memory, the tests and benchmarks don't touch the map cache. """
+        game = self.synthetic_game
+        ramp = game.ramp
+        corners = sorted(ramp.corner_depots)
+        main_ramp = (
+            game.start_location.x, game.start_location.y,
+            ramp.barracks_correct_placement.x, ramp.barracks_correct_placement.y,
+            ramp.depot_in_middle.x, ramp.depot_in_middle.y,
+            corners[0].x, corners[0].y, corners[1].x, corners[1].y,
+        )
+        top = ramp.top_center
+        analysis = analyze_map(
+            self.game_info.map_name, "synthetic", game.pathing_grid(), game.expansions,
+            [geyser.position for geyser in game.geysers], [(top.x, top.y, top.x - 3, top.y - 3, 2)], [main_ramp],
+        )
+        return analysis, False
+
+    def calculate_cost(self, item_id) -> Cost:
+        minerals, vespene, supply = COSTS.get(item_id, (100, 100, 0))
+        return Cost(minerals, vespene)
+
+    def calculate_supply_cost(self, unit_type: UnitTypeId) -> float:
+        return COSTS.get(unit_type, (100, 100, 0))[2]
+
+    def command_cost(self, action: UnitCommand) -> Tuple[int, int]:
+        type_id = ABILITY_COSTS.get(action.ability)
+        if type_id is None:
+            return 0, 0
+        minerals, vespene, supply = COSTS[type_id]
+        return minerals, vespene
+
+    def already_pending(self, unit_type) -> int:
+        return self.synthetic_game.pending.get(unit_type, 0)
+
+    def in_map_bounds(self, position) -> bool:
+        return 0 <= position[0] < MAP_SIZE[0] and 0 <= position[1] < MAP_SIZE[1]
+
+    def in_placement_grid(self, position) -> bool:
+        return self.in_map_bounds(position) and self.synthetic_game.is_open(position)
+
+    def in_pathing_grid(self, position) -> bool:
+        return self.in_map_bounds(position) and self.synthetic_game.is_open(position)
+
+    def is_visible(self, position) -> bool:
+        """ Cells in sight range of an own unit. """
+        return bool(self.all_own_units.closer_than(SIGHT_RANGE, position))
+
+    def creation_ability(self, building) -> Optional[AbilityId]:
+        if isinstance(building, UnitTypeId):
+            return ability_for(["TERRANBUILD_", "ZERGBUILD_", "PROTOSSBUILD_", "BUILD_"], building)
+        return building
+
+    async def send_placement_queries(self, queries) -> List[bool]:
+        self.synthetic_game.placement_requests += 1
+        return [self.synthetic_game.is_open(position) for ability_id, position in queries]
+
+    async def get_next_expansion(self) -> Optional[Point2]:
+        taken = {townhall.position for townhall in self.townhalls}
+        for expansion in self.expansions_by_distance():
+            if expansion not in taken:
+                return expansion
+        return None
+
+    def expansions_by_distance(self) -> List[Point2]:
+        return sorted(self.expansion_locations_list, key=lambda point: point.distance_to(self.start_location))
+
+    async def distribute_workers(self, resource_ratio: float = 2) -> None:
+        if not self.mineral_field:
+            return
+        for worker in self.workers.idle:
+            worker.gather(self.mineral_field.closest_to(worker))
+
+    def train(self, unit_type: UnitTypeId, amount: int = 1, closest_to=None, train_only_idle_buildings=True) -> int:
+        trained = 0
+        for structure in self.structures.ready.idle:
+            if trained >= amount or not self.can_afford(unit_type):
+                break
+            structure.train(unit_type)
+            trained += 1
+        return trained
+
+    def research(self, upgrade_type: UpgradeId) -> bool:
+        for structure in self.structures.ready.idle:
+            return structure.research(upgrade_type)
+        return False
+
+
+def synthetic_bot(bot_class: Type[BotAI], *args, **kwargs) -> BotAI:
+    """
+    Instantiate a bot class with the synthetic client surface mixed in.
+    """
+    synthetic_class = type("Synthetic" + bot_class.__name__, (SyntheticGameMixin, bot_class), {})
+    return synthetic_class(*args, **kwargs)
+
+
+class SyntheticGame(object):
+    """
+    Deterministic synthetic game state driving a bot without a game client.
+    :param bot: A bot created with synthetic_bot.
+    :param race: Race of the bot (Terran or Zerg).
+    :param own_units: Number of own non-structure units.
+    :param enemies: Number of visible enemy units.
+    :param seed: Seed of the generator, so every run sees the same states.
+    """
+
+    def __init__(self, bot, race: Race, own_units: int = 50, enemies: int = 0, seed: int = 0):
+        self.bot = bot
+        self.race = race
+        self.own_units = own_units
+        self.enemies = enemies
+        self.random = random.Random(seed)
+        self.next_tag = 1
+        self.iteration = 0
+        self.pending: Dict[UnitTypeId, int] = {}
+        self.placement_requests = 0
+
+        self.start_location = Point2((30.5, 30.5))
+        self.enemy_start_location = Point2((MAP_SIZE[0] - 30.5, MAP_SIZE[1] - 30.5))
+        self.ramp = FakeRamp(self.start_location.offset((8, 8)))
+        self.expansions = [
+            Point2((x + 0.5, y + 0.5))
+            for x in range(30, MAP_SIZE[0] - 20, 36)
+            for y in range(30, MAP_SIZE[1] - 20, 36)
+        ]
+        self.blocked: Set[Tuple[int, int]] = set()
+
+        self.units: List[FakeUnit] = []
+        self.structures: List[FakeUnit] = []
+        self.enemy_units: List[FakeUnit] = []
+        self.enemy_structures: List[FakeUnit] = []
+        self.mineral_fields: List[FakeUnit] = []
+        self.geysers: List[FakeUnit] = []
+        self.__generate()
+        self.__prepare_bot()
+
+    def __tag(self) -> int:
+        tag = self.next_tag
+        self.next_tag += 1
+        return tag
+
+    def __point_near(self, center: Point2, spread: float) -> Point2:
+        return Point2((
+            min(MAP_SIZE[0] - 1, max(0, center.x + self.random.uniform(-spread, spread))),
+            min(MAP_SIZE[1] - 1, max(0, center.y + self.random.uniform(-spread, spread))),
+        ))
+
+    def __unit(self, type_id: UnitTypeId, position: Point2, **kwargs) -> FakeUnit:
+        return FakeUnit(self.bot, self.__tag(), type_id, position, **kwargs)
+
+    def is_open(self, position) -> bool:
+        return (int(position[0]), int(position[1])) not in self.blocked
+
+    def pathing_grid(self) -> np.ndarray:
+        """ (height, width) grid of the open cells, indexed [y, x]. """
+        grid = np.ones((MAP_SIZE[1], MAP_SIZE[0]), dtype=bool)
+        for x, y in self.blocked:
+            grid[y, x] = False
+        return grid
+
+    def __generate(self) -> None:
+        bases = max(1, min(len(self.expansions), 1 + self.own_units // 150))
+        base_positions = [self.start_location] + [
+            expansion for expansion in sorted(self.expansions, key=lambda p: p.distance_to(self.start_location))
+            if expansion != self.start_location
+        ][:bases - 1]
+
+        for base in base_positions:
+            townhall = self.__unit(TOWNHALL[self.race], base, is_structure=True)
+            townhall.ideal_harvesters = 16
+            self.structures.append(townhall)
+            for index in range(8):
+                angle = index * math.pi / 8
+                field = self.__unit(UnitTypeId.MINERALFIELD, base.offset((7 * math.cos(angle), 7 * math.sin(angle))),
+                                    is_structure=True, is_mine=False)
+                field.mineral_contents = 1500
+                self.mineral_fields.append(field)
+            for offset in ((-7, 3), (3, -7)):
+                geyser = self.__unit(UnitTypeId.VESPENEGEYSER, base.offset(offset), is_structure=True, is_mine=False)
+                geyser.vespene_contents = 2250
+                self.geysers.append(geyser)
+                gas_building = self.__unit(GAS_BUILDING[self.race], geyser.position, is_structure=True)
+                gas_building.ideal_harvesters = 3
+                gas_building.vespene_contents = geyser.vespene_contents
+                gas_building.assigned_harvesters = self.random.randint(0, 3)
+                self.structures.append(gas_building)
+
+        for index, type_id in enumerate(STRUCTURES[self.race]):
+            position = self.start_location.offset((-12 + 4 * (index % 4), 6 + 4 * (index // 4)))
+            structure = self.__unit(type_id, position, is_structure=True)
+            self.structures.append(structure)
+            self.blocked.add((int(position.x), int(position.y)))
+
+        workers = min(self.own_units, 16 * bases + 6 * bases)
+        for _ in range(workers):
+            base = self.random.choice(base_positions)
+            worker = self.__unit(WORKER[self.race], self.__point_near(base, 6))
+            field = self.random.choice(self.mineral_fields)
+            worker.orders = [FakeOrder(AbilityId.HARVEST_GATHER, field.tag)]
+            self.units.append(worker)
+
+        army = self.own_units - workers
+        for type_id, fraction in ARMY_MIX[self.race].items():
+            for _ in range(int(round(army * fraction))):
+                self.units.append(self.__unit(type_id, self.__point_near(self.ramp.top_center, 12)))
+        if self.race == Race.Zerg:
+            for _ in range(3):
+                self.units.append(self.__unit(UnitTypeId.LARVA, self.__point_near(self.start_location, 3)))
+
+        front = self.start_location.towards(self.enemy_start_location, 40)
+        for type_id, fraction in ENEMY_MIX.items():
+            for _ in range(int(round(self.enemies * fraction))):
+                self.enemy_units.append(self.__unit(type_id, self.__point_near(front, 25), is_mine=False))
+        self.enemy_structures.append(
+            self.__unit(UnitTypeId.NEXUS, self.enemy_start_location, is_structure=True, is_mine=False))
+
+    def __prepare_bot(self) -> None:
+        bot = self.bot
+        bot.synthetic_game = self
+        if hasattr(bot, "_initialize_variables"):
+            bot._initialize_variables()
+        bot.race = self.race
+        bot.state = FakeState()
+        bot.game_info = FakeGameInfo()
+        bot.game_data = FakeGameData()
+        bot.minerals = 2000
+        bot.vespene = 1000
+        self.__refresh_bot()
+
+    def __refresh_bot(self) -> None:
+        bot = self.bot
+
+        def group(units):
+            return FakeUnits(units, bot)
+
+        bot.units = group(self.units)
+        bot.structures = group(self.structures)
+        bot.all_own_units = bot.units + bot.structures
+        bot.townhalls = bot.structures.filter(lambda unit: unit.type_id in TOWNHALL_TYPES)
+        bot.gas_buildings = bot.structures.filter(lambda unit: unit.type_id in GAS_BUILDING_TYPES)
+        bot.workers = bot.units.filter(lambda unit: unit.type_id in WORKER_TYPES)
+        bot.larva = bot.units(UnitTypeId.LARVA)
+        bot.enemy_units = group(self.enemy_units)
+        bot.enemy_structures = group(self.enemy_structures)
+        bot.all_enemy_units = bot.enemy_units + bot.enemy_structures
+        bot.mineral_field = group(self.mineral_fields)
+        bot.vespene_geyser = group(self.geysers)
+        bot.resources = bot.mineral_field + bot.vespene_geyser
+        bot.placeholders = group([])
+        bot.supply_workers = float(len(bot.workers))
+        bot.supply_army = float(sum(COSTS.get(unit.type_id, (0, 0, 1))[2] for unit in self.units
+                                    if unit.type_id not in WORKER_TYPES))
+        bot.supply_used = bot.supply_workers + bot.supply_army
+        bot.supply_cap = min(200.0, bot.supply_used + 8 + 8 * self.iteration % 3)
+        bot.supply_left = bot.supply_cap - bot.supply_used
+
+    def __apply_actions(self) -> List[UnitCommand]:
+        actions = list(getattr(self.bot, "actions", []))
+        for action in actions:
+            unit = action.unit
+            target = action.target.tag if hasattr(action.target, "tag") else action.target
+            if action.queue and unit.orders:
+                unit.orders.append(FakeOrder(action.ability, target))
+            else:
+                unit.orders = [FakeOrder(action.ability, target)]
+        if hasattr(self.bot, "actions"):
+            self.bot.actions.clear()
+        if hasattr(self.bot, "unit_tags_received_action"):
+            self.bot.unit_tags_received_action.clear()
+        return actions
+
+    def __advance(self) -> Tuple[List[FakeUnit], List[int]]:
+        """
+        Move the world forward by one step: finish some orders, move units and trade a few units away.
+        :return: The created units and the tags of the destroyed units.
+        """
+        for unit in self.units:
+            if unit.orders and self.random.random() < 0.2:
+                unit.orders.pop(0)
+            if unit.type_id not in WORKER_TYPES:
+                unit.position = self.__point_near(unit.position, 1)
+        for unit in self.enemy_units:
+            unit.position = self.__point_near(unit.position.towards(self.start_location, 0.5), 0.5)
+
+        created, destroyed = [], []
+        army = [unit for unit in self.units if unit.type_id not in WORKER_TYPES]
+        if army and self.enemy_units and self.random.random() < 0.5:
+            lost = self.random.choice(army)
+            self.units.remove(lost)
+            destroyed.append(lost.tag)
+            enemy = self.random.choice(self.enemy_units)
+            self.enemy_units.remove(enemy)
+            self.enemy_units.append(self.__unit(enemy.type_id, self.__point_near(self.enemy_start_location, 10),
+                                                is_mine=False))
+            replacement = self.__unit(lost.type_id, self.__point_near(self.ramp.top_center, 6))
+            self.units.append(replacement)
+            created.append(replacement)
+        return created, destroyed
+
+    async def start(self) -> None:
+        await self.bot.on_start()
+
+    async def step(self) -> List[UnitCommand]:
+        """
+        Run one bot step on the next synthetic state.
+        :return: The actions the bot issued during the step.
+        """
+        self.bot._all_units_previous_map = {unit.tag: unit for unit in self.bot.all_own_units + self.bot.all_enemy_units}
+        created, destroyed = self.__advance()
+        self.bot.state.game_loop += 8
+        self.bot.minerals = 2000 + self.random.randint(-500, 500)
+        self.bot.vespene = 1000 + self.random.randint(-300, 300)
+        self.__refresh_bot()
+
+        for tag in destroyed:
+            await self.bot.on_unit_destroyed(tag)
+        for unit in created:
+            await self.bot.on_unit_created(unit)
+
+        await self.bot.on_step(self.iteration)
+        self.iteration += 1
+        return self.__apply_actions()
+
+
+# Share of the cells of a Grid taken by structures.
+BLOCKED: float = 0.6
+
+
+class Grid(object):
+    """ Placement grid with random blocked cells, counting the placement requests asked about it. """
+
+    def __init__(self, seed: int = 0):
+        generator = random.Random(seed)
+        self.blocked: Set[Tuple[int, int]] = {
+            (x, y) for x in range(200) for y in range(200) if generator.random() < BLOCKED
+        }
+        self.requests = 0
+
+    def is_open(self, position) -> bool:
+        return (int(position[0]), int(position[1])) not in self.blocked
+
+
+class LegacyClient(object):
+    def __init__(self, grid: Grid):
+        self.grid = grid
+
+    async def _query_building_placement_fast(self, ability, positions, ignore_resources: bool = True) -> List[bool]:
+        self.grid.requests += 1
+        return [self.grid.is_open(position) for position in positions]
+
+
+class LegacyBot(object):
+    """ BotAI.find_placement, one request for `near` and one per ring. """
+    find_placement = BotAI.find_placement
+    can_place_single = BotAI.can_place_single
+
+    def __init__(self, grid: Grid):
+        self.client = LegacyClient(grid)
+
+
+class BatchedBot(object):
+    """ BaseBot.find_placement on the placement batcher. """
+    find_placement = BaseBot.find_placement
+    free_placements = BaseBot.free_placements
+    creation_ability = BaseBot.creation_ability
+
+    def __init__(self, grid: Grid):
+        self.grid = grid
+        self.placements = PlacementBatcher(self.send)
+
+    async def send(self, queries) -> List[bool]:
+        self.grid.requests += 1
+        return [self.grid.is_open(position) for ability_id, position in queries]
+
+
+RegistryUnit = namedtuple("RegistryUnit", ["tag", "type_id"])
+
+
+def rebuild_step(world: Dict, live_units: List[RegistryUnit]) -> None:
+    """ The former detect_changes: rebuild the id sets from scratch every step. """
+    units_by_id = {unit.tag: unit for unit in live_units}
+    units_ids = set(units_by_id.keys())
+    world_units_ids = set(world.keys())
+
+    for unit_id in units_ids.difference(world_units_ids):
+        world[unit_id] = {"state": 1}
+    for unit_id in world_units_ids.difference(units_ids):
+        world.pop(unit_id)
+
+
+def registry_game(steps: int, max_live_units: int, sample_every: int, seed: int = 0) -> Tuple:
+    """
+    Registry and unit tasks over a synthetic game with constant unit production and losses. Every unit gets a
+    queued task, and every removed unit is evicted together with its queue.
+    :param steps: Steps of the game.
+    :param max_live_units: The army grows up to this many units, then production only replaces the losses.
+    :param sample_every: Steps between two samples of the traced memory.
+    :return: Units created, tasks evicted, number of tasks ended by end status, live units and the samples:
+             (live units, traced bytes) by sample number.
+    """
+    generator = random.Random(seed)
+    registry = UnitRegistry()
+    scheduler = TaskScheduler()
+    ended: Dict = {}
+    evicted = 0
+    live = {}
+    next_tag = 1
+    created = 0
+    samples = {}
+
+    tracemalloc.start()
+    for step in range(steps):
+        # Production ramps the army up to the cap and fights keep trading units away.
+        target = min(max_live_units, 12 + step // 10)
+        for _ in range(generator.randint(0, 3)):
+            if len(live) < target:
+                unit = RegistryUnit(next_tag, 0)
+                live[unit.tag] = unit
+                registry.mark_new(unit)
+                next_tag += 1
+                created += 1
+        if len(live) > 20:
+            for tag in generator.sample(list(live), generator.randint(0, 2)):
+                live.pop(tag)
+                registry.mark_removed(tag)
+
+        new_units, removed, _ = registry.apply_changes()
+        for unit in new_units:
+            scheduler.add_unit_task(unit.tag, QueueEntry(
+                0,
+                Task(end=lambda bot, status: ended.update({status: ended.get(status, 0) + 1})),
+                TriggerEvent(lambda bot: False, constant=True),
+            ))
+        for tag, entry in removed:
+            evicted += scheduler.fail_unit_tasks(None, tag)
+        scheduler.exec_unit_tasks(None)
+
+        if step % sample_every == 0:
+            samples[step // sample_every] = (len(live), tracemalloc.get_traced_memory()[0])
+
+    tracemalloc.stop()
+    return created, evicted, ended, len(live), samples
+
+
+class TriggerBot(object):
+    """
+    Resources change every few steps and a unit is lost from time to time, see trigger_step.
+    :param track: Whether the triggers are given a ChangeTracker (bot.changes) or polled on every step.
+    :param structures: Structures that never have a task, in front of the ones that do.
+    """
+
+    def __init__(self, track: bool, structures: int = 60):
+        self.state = FakeState()
+        self.minerals = 400
+        self.vespene = 200
+        self.supply_used = 20
+        self.supply_cap = 30
+        self.alive: Set[int] = set()
+        # Looked up by a linear scan, like Units.by_tag.
+        self.structures: List[int] = list(range(-structures, 0))
+        self.checks = 0
+        self.__tracker = ChangeTracker() if track else None
+
+    @property
+    def changes(self):
+        if self.__tracker is None:
+            return None
+        self.__tracker.refresh(self, self.state.game_loop)
+        return self.__tracker
+
+
+def trigger_tasks(bot: TriggerBot, task_count: int) -> Tuple[TaskScheduler, List[int]]:
+    """
+    Give `task_count` new structures of the bot a constant task triggered while the structure is there and the
+    resources are high enough.
+    :return: The scheduler of the tasks, and a list holding the number of task runs.
+    """
+    scheduler = TaskScheduler()
+    runs = [0]
+    for tag in range(task_count):
+        bot.alive.add(tag)
+        bot.structures.append(tag)
+
+        def trigger(bot, tag=tag):
+            bot.checks += 1
+            return any(structure == tag for structure in bot.structures) and bot.minerals > 300 and bot.vespene > 150
+
+        scheduler.add_unit_task(tag, QueueEntry(
+            0,
+            Task(step=lambda bot: runs.__setitem__(0, runs[0] + 1), get_status=lambda bot: TaskStatus.RUNNING),
+            TriggerEvent(trigger, constant=True, depends_on=Dependency.RESOURCES, tags=[tag]),
+        ))
+    return scheduler, runs
+
+
+def trigger_step(bot: TriggerBot, step: int, generator: random.Random) -> None:
+    """
+    Move the trigger inputs to the next step: new resources every 4 steps, a structure lost every 25 steps.
+    """
+    bot.state.game_loop += 8
+    if step % 4 == 0:
+        bot.minerals = generator.randint(200, 600)
+        bot.vespene = generator.randint(100, 300)
+    if step % 25 == 0 and bot.alive:
+        lost = generator.choice(sorted(bot.alive))
+        bot.alive.discard(lost)
+        bot.structures.remove(lost)
+        if bot.changes is not None:
+            bot.changes.mark_units([], [lost])
+
+
+def synthetic_map(generator: random.Random):
+    """ Open map crossed by a few walls, with 16 bases and two geysers per base. """
+    pathable = np.ones((MAP_SIZE[1], MAP_SIZE[0]), dtype=bool)
+    for _ in range(12):
+        x, y = generator.randrange(10, MAP_SIZE[0] - 30), generator.randrange(10, MAP_SIZE[1] - 30)
+        if generator.random() < 0.5:
+            pathable[y:y + 3, x:x + 25] = False
+        else:
+            pathable[y:y + 25, x:x + 3] = False
+    expansions = [(x + 0.5, y + 0.5) for x in range(20, 160, 38) for y in range(20, 160, 38)]
+    for x, y in expansions:
+        pathable[int(y) - 3:int(y) + 4, int(x) - 3:int(x) + 4] = True
+    geysers = [(x + dx, y + dy) for x, y in expansions for dx, dy in ((-7, 3), (3, -7))]
+    ramps = [(x, y, x - 3, y - 3, 2) for x, y in expansions[:4]]
+    main_ramps = [(x, y, x + 6, y + 4, x + 5, y + 6, x + 3, y + 6, x + 7, y + 6) for x, y in expansions[:2]]
+    return pathable, expansions, geysers, ramps, main_ramps
+
+
+def late_game_observation(game_loop: int, units: int = 400) -> sc_pb.ResponseObservation:
+    """
+    :return: An observation with `units` moving units of both players, about the size of a late game one.
+    """
+    generator = random.Random(game_loop)
+    observation = sc_pb.ResponseObservation()
+    observation.observation.game_loop = game_loop
+    observation.observation.player_common.minerals = 1000
+    for tag in range(units):
+        unit = observation.observation.raw_data.units.add()
+        unit.tag = 0x100000 + tag
+        unit.unit_type = 48
+        unit.alliance = raw_pb.Self if tag % 2 else raw_pb.Enemy
+        unit.owner = 1 if tag % 2 else 2
+        unit.pos.x, unit.pos.y, unit.pos.z = generator.uniform(20, 150), generator.uniform(20, 150), 10.0
+        unit.facing = generator.uniform(0, 6.28)
+        unit.health, unit.health_max = 45.0, 45.0
+        unit.build_progress = 1.0
+        unit.display_type = raw_pb.Visible
+        unit.radius = 0.375
+        unit.orders.add(ability_id=23, target_world_space_pos=common_pb.Point(x=100.0, y=100.0))
+    return observation
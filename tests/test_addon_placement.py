@@ -0,0 +1,28 @@
+import asyncio
+
+from sc2.data import Race
+from sc2.ids.unit_typeid import UnitTypeId
+
+from tests.fakes import FakeUnit, SyntheticGame, synthetic_bot
+from bots.terran_bot import TerranBot
+
+
+def test_lowering_a_depot_invalidates_the_cached_addon_checks():
+    async def play():
+        bot = synthetic_bot(TerranBot)
+        game = SyntheticGame(bot, Race.Terran, own_units=20, seed=0)
+        await game.start()
+        barracks = bot.structures(UnitTypeId.BARRACKS).first
+        assert bot.can_build_addon(barracks)
+
+        position = barracks.position
+        depot = FakeUnit(bot, 9999, UnitTypeId.SUPPLYDEPOT, position.offset((3, 0)), is_structure=True)
+        for point in bot.starport_points_to_build_addon(position):
+            game.blocked.add((int(point[0]), int(point[1])))
+        # Nothing reported near the barracks yet, the cached answer is kept.
+        assert bot.can_build_addon(barracks)
+
+        await bot.on_unit_type_changed(depot, UnitTypeId.SUPPLYDEPOTLOWERED)
+        assert not bot.can_build_addon(barracks)
+
+    asyncio.run(play())
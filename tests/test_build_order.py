@@ -0,0 +1,108 @@
+from collections import Counter
+
+import asyncio
+
+from sc2.ids.unit_typeid import UnitTypeId
+
+from helpers.build_order import BLOCKED, DONE, OPEN, BuildNode, BuildOrder
+
+
+class FakeState(object):
+    def __init__(self):
+        self.upgrades = set()
+
+
+class BuildBot(object):
+    """ Counts the ready structures itself and records what the build order makes. """
+
+    def __init__(self):
+        self.state = FakeState()
+        self.ready = Counter()
+        self.made = []
+        self.pending = Counter()
+        self.trained = []
+
+    @property
+    def query(self):
+        return self
+
+    def structures(self, types, ready: bool = False):
+        return [type_id for type_id, count in self.ready.items() if type_id in types for _ in range(count)]
+
+    def units(self, types, ready: bool = False):
+        return []
+
+    def already_pending(self, item) -> int:
+        return self.pending[item]
+
+    def can_afford(self, item) -> bool:
+        return True
+
+    def train(self, item, amount: int = 1) -> int:
+        self.trained.append((item, amount))
+        return amount
+
+
+def build_order(bot: BuildBot) -> BuildOrder:
+    return BuildOrder([
+        BuildNode(UnitTypeId.REFINERY, 2, per=UnitTypeId.COMMANDCENTER,
+                  action=lambda: bot.made.append(UnitTypeId.REFINERY)),
+        BuildNode(UnitTypeId.BARRACKS, action=lambda: bot.made.append(UnitTypeId.BARRACKS)),
+        BuildNode(UnitTypeId.FACTORY, requires=[UnitTypeId.BARRACKS],
+                  action=lambda: bot.made.append(UnitTypeId.FACTORY)),
+    ])
+
+
+def test_nodes_wait_for_their_prerequisites():
+    bot = BuildBot()
+    bot.ready[UnitTypeId.COMMANDCENTER] = 1
+    order = build_order(bot)
+    refinery, barracks, factory = order.nodes
+
+    asyncio.run(order.run(bot))
+    assert bot.made == [UnitTypeId.REFINERY, UnitTypeId.BARRACKS]
+    assert factory.state == BLOCKED and order.open_nodes == [refinery, barracks]
+
+    # The factory is only evaluated again once a barracks is reported ready.
+    bot.ready[UnitTypeId.BARRACKS] = 1
+    evaluations = order.evaluations
+    asyncio.run(order.run(bot))
+    assert order.evaluations == evaluations + 2
+    assert barracks.state == DONE and factory.state == BLOCKED
+
+    order.unit_ready(UnitTypeId.BARRACKS)
+    assert factory.state == OPEN and order.wake_ups == 1
+    asyncio.run(order.run(bot))
+    assert bot.made[-1] == UnitTypeId.FACTORY
+
+
+def test_done_nodes_wake_on_loss_and_on_more_structures_of_per():
+    bot = BuildBot()
+    bot.ready.update({UnitTypeId.COMMANDCENTER: 1, UnitTypeId.REFINERY: 2, UnitTypeId.BARRACKS: 1})
+    order = build_order(bot)
+    refinery, barracks, factory = order.nodes
+    asyncio.run(order.run(bot))
+    assert refinery.state == DONE and barracks.state == DONE
+
+    bot.ready[UnitTypeId.BARRACKS] = 0
+    order.unit_lost(UnitTypeId.BARRACKS)
+    assert barracks.state == OPEN
+
+    # Two refineries per command center: a second command center raises the count.
+    bot.ready[UnitTypeId.COMMANDCENTER] = 2
+    order.unit_ready(UnitTypeId.COMMANDCENTER)
+    assert refinery.state == OPEN
+    bot.made.clear()
+    asyncio.run(order.run(bot))
+    assert bot.made == [UnitTypeId.REFINERY, UnitTypeId.BARRACKS]
+    assert [node.index for node in order.open_nodes] == sorted(node.index for node in order.open_nodes)
+
+
+def test_unit_nodes_train_on_every_idle_producer_up_to_the_count():
+    bot = BuildBot()
+    bot.ready[UnitTypeId.BATTLECRUISER] = 2
+    bot.pending[UnitTypeId.BATTLECRUISER] = 1
+    order = BuildOrder([BuildNode(UnitTypeId.BATTLECRUISER, 8)])
+
+    asyncio.run(order.run(bot))
+    assert bot.trained == [(UnitTypeId.BATTLECRUISER, 5)]
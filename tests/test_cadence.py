@@ -0,0 +1,38 @@
+from helpers.cadence import CadenceScheduler, Routine
+from helpers.enum import EventTypes
+
+GAME_STEP: int = 8
+
+
+def noop():
+    pass
+
+
+def test_woken_routine_runs_on_the_next_step_only():
+    routine = Routine(noop, 1000, offset=0, wake_on=[EventTypes.STRUCTURE_COMPLETE])
+    scheduler = CadenceScheduler([routine])
+    assert scheduler.due(0) == [noop]
+    assert scheduler.due(8) == []
+    scheduler.wake(EventTypes.STRUCTURE_COMPLETE)
+    assert scheduler.due(16) == [noop]
+    assert scheduler.due(24) == []
+    assert scheduler.report()["wake_ups"] == 1
+
+
+def test_routine_runs_once_per_cadence_window():
+    scheduler = CadenceScheduler([Routine(noop, 22, offset=0)])
+    runs = sum(len(scheduler.due(step * GAME_STEP)) for step in range(110))
+    # 880 game loops, one run per window of 22.
+    assert runs == 40
+    assert scheduler.report()["skipped"] == 110 - 40
+
+
+def test_staggered_cadences_spread_the_load():
+    cadences = [11, 22, 22, 44, 44, 44, 44]
+    aligned = CadenceScheduler([Routine(noop, cadence, offset=0) for cadence in cadences])
+    staggered = CadenceScheduler([Routine(noop, cadence) for cadence in cadences])
+    aligned_calls = [len(aligned.due(step * GAME_STEP)) for step in range(200)]
+    staggered_calls = [len(staggered.due(step * GAME_STEP)) for step in range(200)]
+    assert sum(staggered_calls) == sum(aligned_calls)
+    # Every routine runs on the first step, the schedules differ afterwards.
+    assert max(staggered_calls[1:]) < max(aligned_calls[1:])
@@ -0,0 +1,78 @@
+import random
+
+from events.trigger_event import TriggerEvent
+from helpers.change_tracker import ChangeTracker
+from helpers.enum import Dependency
+from tests.fakes import FakeState, TriggerBot, trigger_step, trigger_tasks
+
+
+def trigger_runs(track: bool) -> int:
+    generator = random.Random(0)
+    bot = TriggerBot(track)
+    scheduler, runs = trigger_tasks(bot, 100)
+    for step in range(500):
+        trigger_step(bot, step, generator)
+        scheduler.exec_unit_tasks(bot)
+    return runs[0]
+
+
+def test_tracked_triggers_run_like_polled_triggers():
+    assert trigger_runs(track=False) == trigger_runs(track=True)
+
+
+def test_removed_units_report_a_change_and_are_no_longer_followed():
+    tracker = ChangeTracker()
+    mask = tracker.mask(Dependency.UNITS, tags=[1])
+    tracker.watch([1, 2])
+    version = tracker.version
+    assert not tracker.changed_since(version, mask, [1])
+
+    # Another unit appearing doesn't matter to a trigger that only checks its own units.
+    tracker.mark_units([3])
+    assert not tracker.changed_since(version, mask, [1])
+
+    tracker.mark_units([], [1])
+    assert tracker.changed_since(version, mask, [1])
+    assert not tracker.changed_since(version, mask, [2])
+    # A unit no longer followed reads as changed even at the latest version, a followed one doesn't.
+    tracker.mark_units([1, 2])
+    assert tracker.changed_since(tracker.version, mask, [1])
+    assert not tracker.changed_since(tracker.version, mask, [2])
+
+
+class Bot(object):
+    def __init__(self):
+        self.state = FakeState()
+        self.minerals = 50
+        self.vespene = 0
+        self.supply_used = 12
+        self.supply_cap = 15
+        self.structures = {7}
+        self.checks = 0
+        self.tracker = ChangeTracker()
+
+    @property
+    def changes(self) -> ChangeTracker:
+        self.tracker.refresh(self, self.state.game_loop)
+        return self.tracker
+
+
+def test_trigger_on_its_unit_skips_the_steps_where_only_the_resources_change():
+    bot = Bot()
+
+    def trigger(bot):
+        bot.checks += 1
+        return 7 in bot.structures
+
+    event = TriggerEvent(trigger, constant=True, depends_on=Dependency.NONE, tags=[7])
+    for step in range(10):
+        bot.state.game_loop = step
+        bot.minerals += 25
+        bot.vespene += 10
+        assert event.should_trigger(bot)
+    assert bot.checks == 1 and bot.tracker.skipped_evaluations == 9
+
+    bot.structures.discard(7)
+    bot.tracker.mark_units([], [7])
+    assert not event.should_trigger(bot)
+    assert bot.checks == 2
@@ -0,0 +1,46 @@
+from sc2.data import Race
+from sc2.ids.ability_id import AbilityId
+from sc2.ids.unit_typeid import UnitTypeId
+from sc2.position import Point2
+
+import asyncio
+
+from bots.terran_bot import TerranBot
+from helpers.command_filter import CommandFilter
+from tests.fakes import FakeOrder, SyntheticGame, synthetic_bot
+
+
+def test_redundant_commands():
+    commands = CommandFilter(window=11)
+    # Same ability and target as the current order.
+    assert commands.is_redundant(1, AbilityId.HARVEST_GATHER, 7, False, 0, [FakeOrder(AbilityId.HARVEST_GATHER, 7)])
+    assert not commands.is_redundant(1, AbilityId.HARVEST_GATHER, 8, False, 0, [FakeOrder(AbilityId.HARVEST_GATHER, 7)])
+    # Same command again within the window, positions compared to a tenth of a cell.
+    commands.record(2, AbilityId.ATTACK, Point2((10.0, 10.0)), False, 0)
+    assert commands.is_redundant(2, AbilityId.ATTACK, Point2((10.01, 10.0)), False, 8)
+    assert not commands.is_redundant(2, AbilityId.ATTACK, Point2((10.0, 10.0)), False, 11)
+    assert not commands.is_redundant(2, AbilityId.MOVE, Point2((10.0, 10.0)), False, 8)
+    commands.forget(2)
+    assert not commands.is_redundant(2, AbilityId.ATTACK, Point2((10.0, 10.0)), False, 8)
+    assert commands.suppressed == 2
+
+
+def test_bot_drops_repeated_free_commands_only():
+    async def run():
+        bot = synthetic_bot(TerranBot)
+        game = SyntheticGame(bot, Race.Terran, own_units=60, seed=0)
+        await game.start()
+        marine = next(unit for unit in bot.units if unit.type_id == UnitTypeId.MARINE)
+        barracks = bot.structures(UnitTypeId.BARRACKS).first
+        bot.actions.clear()
+        marine.move(Point2((50.0, 50.0)))
+        marine.move(Point2((50.0, 50.0)))
+        barracks.train(UnitTypeId.MARINE)
+        barracks.train(UnitTypeId.MARINE)
+        bot.filter_commands()
+        return [action.ability for action in bot.actions], bot.command_filter
+
+    abilities, commands = asyncio.run(run())
+    assert abilities.count(AbilityId.MOVE) == 1
+    assert abilities.count(AbilityId.BARRACKSTRAIN_MARINE) == 2
+    assert commands.suppressed == 1
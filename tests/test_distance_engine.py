@@ -0,0 +1,45 @@
+from collections import namedtuple
+from typing import List
+
+import math
+import random
+
+from helpers.distance_engine import DistanceEngine
+
+Positioned = namedtuple("Positioned", ["tag", "position"])
+
+
+def distance(a, b) -> float:
+    return math.hypot(a.position[0] - b.position[0], a.position[1] - b.position[1])
+
+
+def random_units(count: int, center, spread: float, rng: random.Random) -> List[Positioned]:
+    return [
+        Positioned(index, (center[0] + rng.uniform(-spread, spread), center[1] + rng.uniform(-spread, spread)))
+        for index in range(count)
+    ]
+
+
+def test_queries_match_scalar_distances():
+    rng = random.Random(0)
+    engine = DistanceEngine()
+    units = random_units(200, (60, 60), 40, rng)
+    enemies = random_units(150, (90, 90), 40, rng)
+
+    matrix = engine.distance_matrix(units, enemies)
+    for i, unit in enumerate(units):
+        for j, enemy in enumerate(enemies):
+            assert abs(matrix[i, j] - distance(unit, enemy)) < 1e-9
+    assert list(engine.closest_indexes(units, enemies)) == [
+        min(range(len(enemies)), key=lambda index: distance(unit, enemies[index])) for unit in units
+    ]
+    assert list(engine.any_within(units, enemies, 10)) == [
+        any(distance(unit, enemy) < 10 for enemy in enemies) for unit in units
+    ]
+    for unit, indexes in zip(units, engine.within_indexes(units, enemies, 10)):
+        assert set(indexes) == {index for index, enemy in enumerate(enemies) if distance(unit, enemy) < 10}
+
+
+def test_no_enemies():
+    units = random_units(5, (60, 60), 10, random.Random(0))
+    assert DistanceEngine().min_distances(units, []).tolist() == [math.inf] * len(units)
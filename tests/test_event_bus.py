@@ -0,0 +1,47 @@
+from collections import namedtuple
+
+from sc2.data import Alliance
+from sc2.ids.unit_typeid import UnitTypeId
+
+from events.event_bus import EventBus
+from events.passive_event import PassiveEvent
+from helpers.enum import EventTypes
+
+FakeUnit = namedtuple("FakeUnit", ["tag", "type_id", "alliance"])
+
+
+def test_only_matching_events_run_in_subscription_order():
+    bus = EventBus()
+    calls = []
+    bus.subscribe(PassiveEvent(lambda bot, unit: calls.append("any"), EventTypes.NEW_UNIT))
+    bus.subscribe(PassiveEvent(lambda bot, unit: calls.append("ebay"), EventTypes.NEW_UNIT,
+                               unit_types={UnitTypeId.ENGINEERINGBAY}))
+    bus.subscribe(PassiveEvent(lambda bot, unit: calls.append("enemy"), EventTypes.NEW_UNIT, alliance=Alliance.Enemy))
+    bus.subscribe(PassiveEvent(lambda bot, unit: calls.append("odd"), EventTypes.NEW_UNIT,
+                               predicate=lambda bot, unit: unit.tag % 2 == 1))
+    bus.subscribe(PassiveEvent(lambda bot, tag, entry: calls.append("removed"), EventTypes.REMOVED_UNIT))
+
+    ebay = FakeUnit(1, UnitTypeId.ENGINEERINGBAY, Alliance.Self)
+    assert bus.dispatch(None, EventTypes.NEW_UNIT, ebay, unit_type=ebay.type_id, alliance=ebay.alliance) == 3
+    assert calls == ["any", "ebay", "odd"]
+    calls.clear()
+    zealot = FakeUnit(2, UnitTypeId.ZEALOT, Alliance.Enemy)
+    bus.dispatch(None, EventTypes.NEW_UNIT, zealot, unit_type=zealot.type_id, alliance=zealot.alliance)
+    assert calls == ["any", "enemy"]
+    assert bus.stats(EventTypes.NEW_UNIT)["dispatches"] == 2
+    assert bus.stats(EventTypes.NEW_UNIT)["handler_calls"] == 5
+
+
+def test_indexed_dispatch_matches_checking_handlers():
+    types = [UnitTypeId.SCV, UnitTypeId.MARINE, UnitTypeId.BARRACKS]
+    units = [FakeUnit(tag, types[tag % len(types)], Alliance.Self) for tag in range(30)]
+    bus = EventBus()
+    handled = []
+    for type_id in [UnitTypeId.MARINE, UnitTypeId.BARRACKS, UnitTypeId.MARINE]:
+        bus.subscribe(PassiveEvent(lambda bot, unit: handled.append(unit.tag), EventTypes.NEW_UNIT,
+                                   unit_types={type_id}))
+    for unit in units:
+        bus.dispatch(None, EventTypes.NEW_UNIT, unit, unit_type=unit.type_id, alliance=unit.alliance)
+    expected = [unit.tag for unit in units for type_id in [UnitTypeId.MARINE, UnitTypeId.BARRACKS, UnitTypeId.MARINE]
+                if unit.type_id == type_id]
+    assert sorted(handled) == sorted(expected)
@@ -0,0 +1,62 @@
+from sc2.data import Race
+from sc2.position import Point2
+
+import asyncio
+import random
+
+from tests.fakes import FakeOrder, SyntheticGame, synthetic_bot
+from bots.terran_bot import TerranBot
+from helpers.expansion_planner import ExpansionPlanner
+
+SITES = [Point2((10.5, 10.5)), Point2((50.5, 50.5)), Point2((90.5, 90.5))]
+
+
+def test_enemy_claims_expire_only_when_seen_free():
+    planner = ExpansionPlanner(SITES, [0, 10, 20])
+    planner.occupy(1, (10.5, 10.5))
+    planner.occupy(2, (50, 50), enemy=True)
+    assert planner.next_site() == SITES[2] and planner.enemy_claims == 1
+
+    # Not visible, or still seen, the claim holds.
+    assert planner.expire_enemy_claims(lambda site: False, set()) == 0
+    assert planner.expire_enemy_claims(lambda site: True, {2}) == 0
+    assert planner.expire_enemy_claims(lambda site: True, set()) == 1
+    assert planner.next_site() == SITES[1] and planner.enemy_claims == 0
+
+
+def test_released_enemy_claims_are_dropped():
+    planner = ExpansionPlanner(SITES, [0, 10, 20])
+    planner.occupy(3, (50, 50), enemy=True)
+    planner.release(3)
+    assert planner.enemy_claims == 0
+
+
+def test_expand_hands_the_site_out_again_when_the_order_is_dropped():
+    async def run():
+        random.seed(0)
+        bot = synthetic_bot(TerranBot)
+        game = SyntheticGame(bot, Race.Terran, own_units=50, seed=0)
+        await game.start()
+        planner, game_loop = bot.expansion_planner, bot.state.game_loop
+        site, minerals = planner.next_site(game_loop), bot.minerals
+        bot.minerals = 0
+        await bot.expand()
+        unaffordable = bot.actions, planner.next_site(game_loop)
+        bot.minerals = minerals
+        await bot.expand()
+        (command,) = bot.actions
+        bot.actions.clear()
+        reserved = planner.next_site(game_loop)
+        # Still on its way, then the order is dropped.
+        command.unit.orders = [FakeOrder(command.ability, command.target)]
+        await bot.expand()
+        kept = planner.next_site(game_loop)
+        command.unit.orders = []
+        bot.minerals = 0
+        await bot.expand()
+        return site, unaffordable, reserved, kept, planner.next_site(game_loop)
+
+    site, unaffordable, reserved, kept, freed = asyncio.run(run())
+    assert unaffordable == ([], site)
+    assert reserved is None and kept is None
+    assert freed == site
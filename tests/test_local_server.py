@@ -0,0 +1,19 @@
+from sc2.data import Difficulty, Race
+from sc2.player import Bot, Computer
+
+from bots.terran_bot import TerranBot
+from helpers.local_server import run_local_game
+from helpers.observation_replay import replay
+
+
+def test_a_local_game_replays_with_the_same_decisions(tmp_path):
+    path = str(tmp_path / "terran.sc2obs")
+    bot = TerranBot(capture_path=path)
+    run_local_game([Bot(Race.Terran, bot), Computer(Race.Random, Difficulty.Easy)], game_time_limit=60,
+                   random_seed=0)
+    assert bot.state.game_loop > 0
+
+    summary = replay(path, TerranBot()).summary()
+    assert summary["steps"] > 0
+    assert summary["commands_matched"] > 0
+    assert summary["steps_diverged"] == 0
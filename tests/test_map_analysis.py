@@ -0,0 +1,37 @@
+import random
+
+import numpy as np
+
+from helpers.map_analysis import MapAnalysis, analyze_map, map_hash
+from tests.fakes import synthetic_map
+
+
+def analysis():
+    pathable, expansions, geysers, ramps, main_ramps = synthetic_map(random.Random(0))
+    key = map_hash("Synthetic", pathable)
+    return key, expansions, analyze_map("Synthetic", key, pathable, expansions, geysers, ramps, main_ramps)
+
+
+def test_cache_round_trip(tmp_path):
+    key, expansions, analysed = analysis()
+    path = MapAnalysis.cache_path(str(tmp_path), "Synthetic", key)
+    analysed.save(path)
+    assert MapAnalysis.load(path, "another map") is None
+
+    loaded = MapAnalysis.load(path, key)
+    assert loaded is not None
+    assert np.array_equal(loaded.distance_fields, analysed.distance_fields)
+    assert np.array_equal(loaded.base_distances, analysed.base_distances)
+    assert loaded.geysers_of(0) == analysed.geysers_of(0) and len(loaded.geysers_of(0)) == 2
+    assert loaded.main_ramp(expansions[1])["barracks"] == (expansions[1][0] + 6, expansions[1][1] + 4)
+    assert loaded.main_ramp((0, 0)) is None
+
+
+def test_walking_distances():
+    key, expansions, analysed = analysis()
+    # Symmetric and never shorter than the straight line in grid steps.
+    assert np.allclose(analysed.base_distances, analysed.base_distances.T)
+    for index, (x, y) in enumerate(expansions):
+        other = expansions[(index + 1) % len(expansions)]
+        assert analysed.base_distances[index, (index + 1) % len(expansions)] >= \
+            max(abs(int(x) - int(other[0])), abs(int(y) - int(other[1])))
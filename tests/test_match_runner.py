@@ -0,0 +1,31 @@
+from helpers.match_runner import MatchSpec, match_matrix, run_matches, summarize
+
+
+def stand_in_game(spec: MatchSpec) -> str:
+    """ Wins against Easy and loses against Hard. """
+    return "Victory" if spec.difficulty == "Easy" else "Defeat"
+
+
+def crashing_game(spec: MatchSpec) -> str:
+    if spec.opponent_race == "Zerg":
+        raise RuntimeError("stand-in crash")
+    return stand_in_game(spec)
+
+
+def specs():
+    return match_matrix(["terran", "zerg"], ["Terran", "Zerg"], ["Easy", "Hard"], games=1)
+
+
+def test_results_in_spec_order_and_one_worker_per_game():
+    results = run_matches(specs(), stand_in_game, workers=2)
+    assert [result.index for result in results] == list(range(len(results)))
+    assert len({result.worker for result in results}) == len(results)
+    summary = summarize(results)
+    assert summary["terran vs Terran Easy"]["win_rate"] == 1.0
+    assert summary["zerg vs Zerg Hard"]["win_rate"] == 0.0
+
+
+def test_a_crash_only_loses_its_own_game():
+    summary = summarize(run_matches(specs(), crashing_game, workers=0))
+    assert summary["terran vs Terran Easy"]["win_rate"] == 1.0
+    assert summary["zerg vs Zerg Hard"]["results"] == {"Error": 1}
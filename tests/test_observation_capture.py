@@ -0,0 +1,44 @@
+from s2clientprotocol import sc2api_pb2 as sc_pb
+
+import os
+
+from tests.fakes import late_game_observation
+from helpers.observation_capture import Capture, ObservationRecorder
+
+STEPS: int = 40
+PATHING_SIZE: int = 176 * 172 // 8
+
+
+def record(path: str):
+    game_info = sc_pb.ResponseGameInfo(map_name="Synthetic")
+    game_info.start_raw.pathing_grid.data = bytes(PATHING_SIZE)
+    observations = [late_game_observation(game_loop, units=50) for game_loop in range(0, 40, 8)]
+    recorder = ObservationRecorder(path)
+    recorder.start({"player_id": 1, "seed": 0}, game_info, sc_pb.ResponseData(), observations[0],
+                   bytes(PATHING_SIZE))
+    for step in range(STEPS):
+        recorder.placements([[319, 40.5, 60.5, step % 2 == 0]])
+        recorder.step(observations[step % len(observations)], bytes([step // 10]) * PATHING_SIZE,
+                      [[23, 0x100001, [100.0, 100.0], False]])
+    recorder.close()
+    return observations
+
+
+def test_steps_read_back(tmp_path):
+    path = str(tmp_path / "game.sc2obs")
+    observations = record(path)
+
+    capture = Capture(path)
+    assert len(capture) == STEPS
+    assert capture.steps[-1]["observation"] == observations[(STEPS - 1) % len(observations)]
+    assert capture.steps[-1]["pathing"][0] == (STEPS - 1) // 10
+    assert capture.steps[0]["placements"] == [[319, 40.5, 60.5, True]]
+    assert capture.steps[1]["placements"] == [[319, 40.5, 60.5, False]]
+
+
+def test_a_capture_cut_short_keeps_its_complete_steps(tmp_path):
+    path = str(tmp_path / "game.sc2obs")
+    record(path)
+    with open(path, "rb") as stored, open(path + ".cut", "wb") as cut:
+        cut.write(stored.read()[:os.path.getsize(path) // 2])
+    assert 0 < len(Capture(path + ".cut")) < STEPS
@@ -0,0 +1,86 @@
+from sc2.data import Race
+from sc2.ids.ability_id import AbilityId
+from sc2.position import Point2
+
+import asyncio
+import random
+
+from bots.terran_bot import TerranBot
+from tests.fakes import BatchedBot, Grid, LegacyBot, SyntheticGame, synthetic_bot
+
+
+def test_find_placement_matches_botai():
+    async def run():
+        generator = random.Random(1)
+        legacy, batched = LegacyBot(Grid()), BatchedBot(Grid())
+        for _ in range(100):
+            near = Point2((generator.randint(30, 170) + 0.5, generator.randint(30, 170) + 0.5))
+            expected = await legacy.find_placement(AbilityId.TERRANBUILD_BARRACKS, near, random_alternative=False)
+            found = await batched.find_placement(AbilityId.TERRANBUILD_BARRACKS, near, random_alternative=False)
+            assert found == expected, near
+        return legacy.client.grid.requests, batched.grid.requests
+
+    legacy_requests, batched_requests = asyncio.run(run())
+    assert batched_requests <= legacy_requests
+
+
+def test_free_near_costs_one_request():
+    async def run():
+        bot = BatchedBot(Grid())
+        bot.grid.blocked.clear()
+        near = Point2((50.5, 50.5))
+        found = await bot.find_placement(AbilityId.TERRANBUILD_BARRACKS, near)
+        return found, near, bot
+
+    found, near, bot = asyncio.run(run())
+    assert found == near
+    assert bot.grid.requests == 1
+
+
+def test_taken_near_asks_all_rings_in_one_request():
+    async def run():
+        bot = BatchedBot(Grid())
+        near = Point2((50.5, 50.5))
+        bot.grid.blocked = {(50, 50)}
+        found = await bot.find_placement(AbilityId.TERRANBUILD_BARRACKS, near, random_alternative=False)
+        return found, near, bot
+
+    found, near, bot = asyncio.run(run())
+    assert found is not None and found.distance_to_point2(near) == 2
+    assert bot.grid.requests == 1
+
+
+def test_answers_are_kept_for_the_game_loop():
+    async def run():
+        bot = BatchedBot(Grid())
+        near = Point2((50.5, 50.5))
+        bot.placements.refresh(1)
+        first = await bot.find_placement(AbilityId.TERRANBUILD_BARRACKS, near, random_alternative=False)
+        again = await bot.find_placement(AbilityId.TERRANBUILD_BARRACKS, near, random_alternative=False)
+        requests = bot.grid.requests
+        bot.placements.refresh(2)
+        await bot.find_placement(AbilityId.TERRANBUILD_BARRACKS, near, random_alternative=False)
+        return first, again, requests, bot
+
+    first, again, requests, bot = asyncio.run(run())
+    assert first == again
+    assert requests == 1 and bot.placements.reused > 0
+    assert bot.grid.requests == 2
+
+
+def test_terran_step_sends_at_most_one_request():
+    async def run():
+        random.seed(0)
+        bot = synthetic_bot(TerranBot)
+        game = SyntheticGame(bot, Race.Terran, own_units=200, enemies=100, seed=0)
+        await game.start()
+        most = 0
+        for _ in range(50):
+            before = game.placement_requests
+            await game.step()
+            most = max(most, game.placement_requests - before)
+        return most, game
+
+    most, game = asyncio.run(run())
+    assert game.placement_requests > 0
+    assert most == 1
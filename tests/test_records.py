@@ -0,0 +1,22 @@
+from events.trigger_event import TriggerEvent
+from helpers.enum import States
+from helpers.scheduler import QueueEntry
+from helpers.task import Task
+from helpers.unit_registry import UnitRecord
+
+
+def noop(*args):
+    return False
+
+
+def test_unit_record_keeps_the_dict_access():
+    record = UnitRecord(48)
+    assert record["state"] == States.IDLE and record["type_id"] == 48
+    record["state"] = States.ARMY_DEFENDING
+    assert record.state == States.ARMY_DEFENDING
+
+
+def test_records_have_no_instance_dict():
+    entry = QueueEntry(0, Task(step=noop), TriggerEvent(noop, constant=True), "", 0.0)
+    for record in (Task(), TriggerEvent(noop), entry, UnitRecord(48)):
+        assert not hasattr(record, "__dict__")
@@ -0,0 +1,55 @@
+from sc2.data import Race
+from sc2.ids.unit_typeid import UnitTypeId
+
+import asyncio
+
+from tests.fakes import SyntheticGame, synthetic_bot
+from bots.terran_bot import TerranBot
+from helpers.reservations import StepReservations
+
+
+def test_held_costs_are_left_out_until_released():
+    reservations = StepReservations()
+    assert not reservations.held
+    with reservations.hold(150, 0):
+        assert reservations.held
+        assert not reservations.fits(100, 0, 0, 200, 0, 10)
+        assert reservations.fits(50, 0, 0, 200, 0, 10)
+        with reservations.hold(0, 0, 2):
+            assert not reservations.fits(0, 0, 9, 1000, 1000, 10)
+            assert reservations.fits(0, 0, 8, 1000, 1000, 10)
+    assert not reservations.held and reservations.fits(200, 0, 10, 200, 0, 10)
+    assert reservations.holds == 2 and reservations.refused == 2
+
+
+def concurrent_builds(minerals: int):
+    async def play():
+        bot = synthetic_bot(TerranBot)
+        game = SyntheticGame(bot, Race.Terran, own_units=60, seed=0)
+        await game.start()
+        bot.minerals, bot.vespene = minerals, 0
+        requests = game.placement_requests
+        results = []
+        near = bot.start_location.towards(bot.game_info.map_center, 8)
+
+        async def build_barracks():
+            results.append(await bot.build(UnitTypeId.BARRACKS, near=near))
+
+        await bot.run_phases([[build_barracks, build_barracks]])
+        builds = [action for action in bot.actions if action.ability.name.endswith("BARRACKS")]
+        return results, builds, game.placement_requests - requests
+
+    return asyncio.run(play())
+
+
+def test_concurrent_routines_do_not_spend_the_same_minerals():
+    results, builds, requests = concurrent_builds(150)
+    assert sorted(results) == [False, True]
+    assert len(builds) == 1 and requests == 1
+
+
+def test_concurrent_routines_share_the_placement_request_and_not_the_worker():
+    results, builds, requests = concurrent_builds(300)
+    assert results == [True, True]
+    assert len({action.unit.tag for action in builds}) == 2
+    assert requests == 1
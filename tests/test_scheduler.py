@@ -0,0 +1,74 @@
+from helpers.enum import TaskStatus
+from helpers.scheduler import QueueEntry, TaskScheduler
+
+
+class StepTask(object):
+    """ Logs its name on every step and is done after `steps` steps. """
+
+    def __init__(self, name: str, log: list, steps: int = 1):
+        self.name = name
+        self.log = log
+        self.steps = steps
+        self.status = None
+
+    def on_step(self, bot):
+        self.log.append(self.name)
+        self.steps -= 1
+
+    def get_status(self, bot):
+        return TaskStatus.RUNNING if self.steps > 0 else TaskStatus.DONE
+
+    def on_end(self, bot, status):
+        self.status = status
+
+
+class Always(object):
+    def __init__(self, constant: bool = False):
+        self.constant = constant
+
+    def should_trigger(self, bot):
+        return True
+
+
+def test_global_tasks_run_by_priority_then_insertion():
+    log = []
+    scheduler = TaskScheduler()
+    scheduler.add_global_task(QueueEntry(1, StepTask("a", log, 2), Always(constant=True)))
+    scheduler.add_global_task(QueueEntry(5, StepTask("b", log), Always()))
+    scheduler.add_global_task(QueueEntry(1, StepTask("c", log), Always()))
+    assert [entry.task.name for entry in scheduler.global_tasks()] == ["b", "a", "c"]
+
+    scheduler.exec_global_tasks(None)
+    assert log == ["b", "a", "c"]
+    assert [entry.task.name for entry in scheduler.global_tasks()] == ["a"]
+
+    scheduler.exec_global_tasks(None)
+    assert log[-1] == "a"
+    assert scheduler.global_tasks() == []
+
+
+def test_cancelled_unit_task_is_skipped():
+    log = []
+    scheduler = TaskScheduler()
+    scheduler.add_unit_task(1, QueueEntry(0, StepTask("x", log), Always()))
+    cancelled = scheduler.add_unit_task(1, QueueEntry(2, StepTask("y", log), Always()))
+    assert [entry.task.name for entry in scheduler.unit_tasks(1)] == ["y", "x"]
+
+    scheduler.cancel(cancelled)
+    assert [entry.task.name for entry in scheduler.unit_tasks(1)] == ["x"]
+    assert [entry.task.name for entry in scheduler.drop_unit(1)] == ["x"]
+    assert scheduler.queued_unit_count() == 0
+
+
+def test_failed_unit_tasks_end_as_failed():
+    log = []
+    scheduler = TaskScheduler()
+    task = StepTask("x", log)
+    scheduler.add_unit_task(1, QueueEntry(0, task, Always()))
+    scheduler.add_unit_task(2, QueueEntry(0, StepTask("y", log), Always()))
+
+    assert scheduler.fail_unit_tasks(None, 1) == 1
+    assert task.status == TaskStatus.FAILED
+    assert scheduler.queued_unit_count() == 1
+    scheduler.exec_unit_tasks(None)
+    assert log == ["y"]
@@ -0,0 +1,41 @@
+from collections import namedtuple
+from typing import List
+
+import math
+import random
+
+from helpers.spatial_index import GridIndex
+
+Positioned = namedtuple("Positioned", ["tag", "position"])
+
+
+def distance(a, b) -> float:
+    return math.hypot(a.position[0] - b.position[0], a.position[1] - b.position[1])
+
+
+def random_units(count: int, center, spread: float, rng: random.Random) -> List[Positioned]:
+    return [
+        Positioned(index, (center[0] + rng.uniform(-spread, spread), center[1] + rng.uniform(-spread, spread)))
+        for index in range(count)
+    ]
+
+
+def test_queries_match_brute_force():
+    rng = random.Random(0)
+    units = random_units(500, (88, 86), 80, rng)
+    grid = GridIndex(units)
+    for _ in range(100):
+        probe = Positioned(-1, (rng.uniform(0, 176), rng.uniform(0, 172)))
+        radius = rng.uniform(1, 40)
+        expected = {unit.tag for unit in units if distance(unit, probe) < radius}
+        assert {unit.tag for unit in grid.query_radius(probe.position, radius)} == expected
+        assert grid.any_within(probe.position, radius) == bool(expected)
+        k = rng.randint(1, 10)
+        nearest = [unit.tag for unit in sorted(units, key=lambda unit: distance(unit, probe))[:k]]
+        assert [unit.tag for unit in grid.nearest(probe.position, k)] == nearest
+
+
+def test_empty_index():
+    grid = GridIndex([])
+    assert not grid.any_within((10, 10), 15)
+    assert list(grid.query_radius((10, 10), 15)) == []
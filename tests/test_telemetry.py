@@ -0,0 +1,44 @@
+from sc2.data import Race
+
+import asyncio
+import os
+
+import numpy as np
+
+from tests.fakes import SyntheticGame, synthetic_bot
+from bots.terran_bot import TerranBot
+from helpers.telemetry import TelemetryRecorder, load_games, load_telemetry
+
+
+def record_game(path: str, steps: int):
+    async def play():
+        bot = synthetic_bot(TerranBot)
+        game = SyntheticGame(bot, Race.Terran, own_units=60, enemies=20, seed=0)
+        await game.start()
+        bot.telemetry = TelemetryRecorder(path, chunk_rows=8)
+        actions = [len(await game.step()) for _ in range(steps)]
+        await bot.on_end(None)
+        return actions
+
+    return asyncio.run(play())
+
+
+def test_every_step_is_recorded_at_the_end_of_on_step(tmp_path):
+    path = str(tmp_path / "game.tlm")
+    actions = record_game(path, 20)
+
+    game = load_telemetry(path)
+    assert len(game["game_loop"]) == 20
+    assert np.all(np.diff(game["game_loop"].astype(np.int64)) == 8)
+    assert game["actions"].tolist() == actions
+    assert game["step_ms"].min() > 0
+    assert game["unit_counts"].sum(axis=1).min() > 0
+    assert load_games([path])[path]["game_loop"].tolist() == game["game_loop"].tolist()
+
+
+def test_a_game_cut_short_keeps_its_complete_chunks(tmp_path):
+    path = str(tmp_path / "game.tlm")
+    record_game(path, 20)
+    with open(path, "rb") as stored, open(path + ".cut", "wb") as cut:
+        cut.write(stored.read()[:os.path.getsize(path) - 100])
+    assert len(load_telemetry(path + ".cut")["game_loop"]) == 16
@@ -0,0 +1,148 @@
+from sc2.data import Race
+from sc2.ids.unit_typeid import UnitTypeId
+
+import asyncio
+import random
+
+from bots.terran_bot import TerranBot
+from events.passive_event import PassiveEvent
+from events.trigger_event import TriggerEvent
+from helpers.enum import EventTypes, States, TaskStatus
+from helpers.scheduler import QueueEntry, TaskScheduler
+from helpers.task import Task
+from helpers.unit_registry import UnitRecord, UnitRegistry
+from tests.fakes import RegistryUnit, SyntheticGame, rebuild_step, registry_game, synthetic_bot
+
+
+def test_registry_matches_a_rebuild_from_scratch():
+    random.seed(0)
+    live = {tag: RegistryUnit(tag, 0) for tag in range(50)}
+    next_tag = len(live)
+    registry = UnitRegistry()
+    for unit in live.values():
+        registry.mark_new(unit)
+    registry.apply_changes()
+    world = {}
+    rebuild_step(world, list(live.values()))
+
+    for _ in range(200):
+        created = [RegistryUnit(tag, 0) for tag in range(next_tag, next_tag + random.randint(0, 3))]
+        next_tag += len(created)
+        destroyed = random.sample(list(live), random.randint(0, 3))
+        for tag in destroyed:
+            live.pop(tag)
+        for unit in created:
+            live[unit.tag] = unit
+
+        rebuild_step(world, list(live.values()))
+        for unit in created:
+            registry.mark_new(unit)
+        for tag in destroyed:
+            registry.mark_removed(tag)
+        registry.apply_changes()
+        assert set(registry) == set(world) == set(live)
+
+
+def test_changes_within_a_step():
+    registry = UnitRegistry()
+    registry.mark_new(RegistryUnit(1, 0))
+    registry.mark_new(RegistryUnit(2, 0))
+    registry.mark_removed(2)
+    registry.mark_changed(RegistryUnit(1, 5))
+    new_units, removed, changed = registry.apply_changes()
+    assert [unit.tag for unit in new_units] == [1] and not removed and not changed
+    assert isinstance(registry[1], UnitRecord) and registry[1]["type_id"] == 5
+
+    registry.mark_changed(RegistryUnit(1, 6))
+    registry.mark_removed(3)
+    assert registry.apply_changes() == ([], [], [RegistryUnit(1, 6)])
+    assert registry.get(1).type_id == 6 and registry.get(3) is None
+
+
+def test_removed_units_are_evicted_with_their_tasks():
+    random.seed(0)
+    registry = UnitRegistry()
+    scheduler = TaskScheduler()
+    ended = []
+    live = {}
+    next_tag = 1
+    removed_count = 0
+    evicted = 0
+    for step in range(1000):
+        for _ in range(random.randint(0, 3)):
+            if len(live) < 100:
+                unit = RegistryUnit(next_tag, 0)
+                live[unit.tag] = unit
+                registry.mark_new(unit)
+                next_tag += 1
+        if len(live) > 20:
+            for tag in random.sample(list(live), random.randint(0, 2)):
+                live.pop(tag)
+                registry.mark_removed(tag)
+
+        new_units, removed, _ = registry.apply_changes()
+        for unit in new_units:
+            scheduler.add_unit_task(unit.tag, QueueEntry(
+                0, Task(end=lambda bot, status: ended.append(status)), TriggerEvent(lambda bot: False, constant=True)
+            ))
+        removed_count += len(removed)
+        for tag, entry in removed:
+            evicted += scheduler.fail_unit_tasks(None, tag)
+        scheduler.exec_unit_tasks(None)
+
+        assert len(registry) == len(live)
+        assert scheduler.queued_unit_count() == len(live)
+
+    # Units removed on the step they appeared never got a task.
+    assert evicted == removed_count > 0
+    assert ended == [TaskStatus.FAILED] * evicted
+
+
+def test_memory_stays_flat_once_the_army_is_capped():
+    # The army reaches its 100 units around step 900, sample 10 is the first one taken once it is capped.
+    created, evicted, ended, live, samples = registry_game(3000, 100, 100)
+    assert created > 1000 and live <= 100
+    assert ended == {TaskStatus.FAILED: evicted}
+    first_capped, last = samples[10][1], samples[max(samples)][1]
+    assert last < first_capped * 1.5, (first_capped, last)
+
+
+def test_destroyed_units_leave_the_bot_registry():
+    async def play():
+        bot = synthetic_bot(TerranBot)
+        game = SyntheticGame(bot, Race.Terran, own_units=60, seed=0)
+        await game.start()
+        await game.step()
+        registry = bot.world["units"]
+        removed_events = []
+        bot.register_global_event(PassiveEvent(lambda bot, tag, entry: removed_events.append((tag, entry)),
+                                               EventTypes.REMOVED_UNIT, constant=True))
+
+        marines = bot.units.of_type(UnitTypeId.MARINE)[:3]
+        assert len(marines) == 3
+        ended = []
+        for marine in marines:
+            # The code written against the former dict entries still reads and writes them.
+            registry[marine.tag]["state"] = States.ARMY_DEFENDING
+            bot.add_unit_task(marine, Task(end=lambda bot, status: ended.append(status)),
+                              TriggerEvent(lambda bot: False, constant=True))
+        size = len(registry)
+
+        for marine in marines:
+            await bot.on_unit_destroyed(marine.tag)
+        bot.detect_changes()
+
+        assert len(registry) == size - len(marines)
+        assert all(marine.tag not in registry and registry.get(marine.tag) is None for marine in marines)
+        assert [tag for tag, entry in removed_events] == [marine.tag for marine in marines]
+        for tag, entry in removed_events:
+            assert isinstance(entry, UnitRecord)
+            assert entry["state"] == entry.state == States.ARMY_DEFENDING
+            assert entry["type_id"] == UnitTypeId.MARINE
+        assert ended == [TaskStatus.FAILED] * len(marines)
+
+        # Nothing else changed, the next step removes nothing more.
+        bot.detect_changes()
+        assert len(registry) == size - len(marines) and len(removed_events) == len(marines)
+
+    asyncio.run(play())
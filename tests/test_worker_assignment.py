@@ -0,0 +1,53 @@
+from helpers.worker_assignment import AWAY_LOOPS, WorkerAssignment
+
+MINERALS = {100 + index: (float(index), 0.0) for index in range(8)}
+GAS = {200: (0.0, 10.0)}
+
+
+def assigned(workers: int) -> WorkerAssignment:
+    assignment = WorkerAssignment()
+    positions = {worker: (float(worker % 8), 5.0) for worker in range(workers)}
+    assignment.update(positions, MINERALS, GAS, 0)
+    return assignment
+
+
+def test_gas_worker_inside_the_gas_building_keeps_its_resource():
+    assignment = assigned(16)
+    positions = {worker: (float(worker % 8), 5.0) for worker in range(16)}
+    gas_worker = next(worker for worker in positions if assignment.resource_of(worker) == 200)
+    inside = {worker: position for worker, position in positions.items() if worker != gas_worker}
+    rebalances = assignment.rebalances
+    for game_loop in range(11, 44, 11):
+        assert assignment.update(inside, MINERALS, GAS, game_loop) == {}
+        assert assignment.resource_of(gas_worker) == 200
+    assert assignment.update(positions, MINERALS, GAS, 55) == {}
+    assert assignment.resource_of(gas_worker) == 200
+    assert assignment.harvesters(200) == 3
+    assert assignment.rebalances == rebalances
+
+
+def test_missing_worker_is_released_after_a_while_or_when_forgotten():
+    assignment = assigned(16)
+    positions = {worker: (float(worker % 8), 5.0) for worker in range(16)}
+    gas_worker = next(worker for worker in positions if assignment.resource_of(worker) == 200)
+    inside = {worker: position for worker, position in positions.items() if worker != gas_worker}
+    assignment.update(inside, MINERALS, GAS, 1)
+    assignment.update(inside, MINERALS, GAS, 2 + AWAY_LOOPS)
+    assert assignment.resource_of(gas_worker) is None
+
+    assignment = assigned(16)
+    assignment.update(inside, MINERALS, GAS, 1)
+    assignment.forget(gas_worker)
+    assert assignment.resource_of(gas_worker) is None
+    moved = assignment.update(inside, MINERALS, GAS, 2)
+    assert list(moved.values()) == [200] and assignment.harvesters(200) == 3
+
+
+def test_busy_worker_loses_its_resource():
+    assignment = assigned(16)
+    positions = {worker: (float(worker % 8), 5.0) for worker in range(16)}
+    gas_worker = next(worker for worker in positions if assignment.resource_of(worker) == 200)
+    building = {worker: position for worker, position in positions.items() if worker != gas_worker}
+    moved = assignment.update(building, MINERALS, GAS, 1, busy=[gas_worker])
+    assert assignment.resource_of(gas_worker) is None
+    assert list(moved.values()) == [200]